@@ -35,6 +35,7 @@ class ExportJobAdmin(admin.ModelAdmin):
         "requesting_user",
         "job_type",
         "status",
+        "progress_percentage",
         "file_format",
         "created_at",
         "completed_at",
@@ -54,6 +55,7 @@ class ExportJobAdmin(admin.ModelAdmin):
         "requesting_user",
         "job_type",
         "status",
+        "progress_percentage",
         "file_format",
         "task_id",
         "filters",
@@ -66,7 +68,16 @@ class ExportJobAdmin(admin.ModelAdmin):
     fieldsets = (
         (
             _("Job Overview"),
-            {"fields": ("id", "job_type", "status", "requesting_user", "task_id")},
+            {
+                "fields": (
+                    "id",
+                    "job_type",
+                    "status",
+                    "progress_percentage",
+                    "requesting_user",
+                    "task_id",
+                )
+            },
         ),
         (_("File Details"), {"fields": ("file_format", "download_file_link")}),
         (_("Timestamps"), {"fields": ("created_at", "completed_at")}),
@@ -109,7 +120,15 @@ class ExportJobAdmin(admin.ModelAdmin):
                 job.status = ExportJob.Status.PENDING
                 job.error_message = None
                 job.completed_at = None
-                job.save(update_fields=["status", "error_message", "completed_at"])
+                job.progress_percentage = 0
+                job.save(
+                    update_fields=[
+                        "status",
+                        "error_message",
+                        "completed_at",
+                        "progress_percentage",
+                    ]
+                )
 
                 # Dispatch the task again
                 process_export_job.delay(job_id=job.id)
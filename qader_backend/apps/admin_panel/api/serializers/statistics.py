@@ -110,6 +110,7 @@ class ExportJobSerializer(serializers.ModelSerializer):
             "requesting_user",
             "job_type",
             "status",
+            "progress_percentage",
             "file_format",
             "file_url",  # Use our new method field
             "filters",
@@ -5,8 +5,8 @@ import openpyxl
 from io import StringIO, BytesIO
 from django.utils import timezone
 from django.http import HttpResponse
-from django.db.models import Count, Avg, Q, F, FloatField, Case, When, IntegerField
-from django.db.models.functions import TruncDate, Cast
+from django.db.models import Q, F, FloatField
+from django.db.models.functions import Cast
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, serializers as drf_serializers
@@ -25,7 +25,6 @@ from rest_framework.filters import OrderingFilter
 
 
 from apps.users.models import UserProfile
-from apps.study.models import UserQuestionAttempt, UserTestAttempt
 from apps.learning.models import Question, LearningSection
 from apps.users.constants import RoleChoices
 
@@ -133,18 +132,6 @@ class AdminStatisticsOverviewAPIView(APIView):
         except drf_serializers.ValidationError as e:
             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
 
-        # Define a reusable expression to calculate accuracy
-        accuracy_expression = (
-            Avg(
-                Case(
-                    When(is_correct=True, then=1),
-                    default=0,
-                    output_field=IntegerField(),
-                )
-            )
-            * 100
-        )
-
         # --- Perform Aggregations ---
         active_students_q = UserProfile.objects.filter(
             role=RoleChoices.STUDENT,
@@ -155,143 +142,84 @@ class AdminStatisticsOverviewAPIView(APIView):
             role=RoleChoices.STUDENT,
             user__date_joined__range=(datetime_from, datetime_to),
         ).count()
-        attempts_in_period = UserQuestionAttempt.objects.filter(
-            attempted_at__range=(datetime_from, datetime_to)
-        )
-        tests_in_period = UserTestAttempt.objects.filter(
-            start_time__range=(datetime_from, datetime_to)
+
+        # Closed days come from the daily rollups, only today is scanned raw
+        activity = admin_services.get_activity_totals(date_from, date_to)
+
+        def accuracy(attempts, correct):
+            return correct / attempts * 100 if attempts else None
+
+        question_totals = activity["questions"]
+        test_totals = activity["tests"]
+        total_questions_answered_period = sum(activity["daily_questions"].values())
+        total_tests_completed_period = test_totals["completed"]
+        overall_average_test_score = (
+            test_totals["score_sum"] / test_totals["scored"]
+            if test_totals["scored"]
+            else None
         )
-        completed_tests_in_period = tests_in_period.filter(
-            status=UserTestAttempt.Status.COMPLETED
+        overall_average_accuracy = accuracy(
+            total_questions_answered_period,
+            sum(correct for _attempts, correct in question_totals.values()),
         )
-        total_questions_answered_period = attempts_in_period.count()
-        total_tests_completed_period = completed_tests_in_period.count()
-        overall_average_test_score = completed_tests_in_period.aggregate(
-            avg_score=Avg("score_percentage")
-        )["avg_score"]
-        overall_average_accuracy = attempts_in_period.aggregate(
-            avg_acc=accuracy_expression
-        )["avg_acc"]
         section_performance = []
         for section in LearningSection.objects.all().order_by("order"):
-            section_attempts = attempts_in_period.filter(
-                question__subsection__section=section
-            )
-            section_agg = section_attempts.aggregate(
-                avg_acc=accuracy_expression,
-                total_attempts=Count("id"),
+            section_attempts, section_correct = activity["sections"].get(
+                section.id, (0, 0)
             )
             section_performance.append(
                 {
                     "section_name": section.name,
                     "section_slug": section.slug,
-                    "average_accuracy": section_agg["avg_acc"],
-                    "total_attempts": section_agg["total_attempts"],
+                    "average_accuracy": accuracy(section_attempts, section_correct),
+                    "total_attempts": section_attempts,
                 }
             )
         min_attempts_threshold = 10
 
-        most_attempted_q = (
-            attempts_in_period.values("question_id")
-            .annotate(
-                attempt_count=Count("id"),
-                accuracy_rate=accuracy_expression,
-            )
-            .order_by("-attempt_count")[:5]
+        most_attempted_ids = sorted(
+            question_totals, key=lambda q_id: -question_totals[q_id][0]
+        )[:5]
+        lowest_accuracy_ids = sorted(
+            (
+                q_id
+                for q_id, (attempts, _correct) in question_totals.items()
+                if attempts >= min_attempts_threshold
+            ),
+            key=lambda q_id: accuracy(*question_totals[q_id]),
+        )[:5]
+        question_texts = dict(
+            Question.objects.filter(
+                id__in=most_attempted_ids + lowest_accuracy_ids
+            ).values_list("id", "question_text")
         )
-        most_attempted_ids = [item["question_id"] for item in most_attempted_q]
-        most_attempted_questions_details = Question.objects.filter(
-            id__in=most_attempted_ids
-        ).values("id", "question_text")
-
-        most_attempted_map = {
-            item["question_id"]: {
-                "attempt_count": item["attempt_count"],
-                "accuracy_rate": item["accuracy_rate"],
-            }
-            for item in most_attempted_q
-        }
 
-        most_attempted_results = [
-            {
-                "id": q["id"],
-                "question_text": q["question_text"],
-                "attempt_count": most_attempted_map.get(q["id"], {}).get(
-                    "attempt_count"
-                ),
-                "accuracy_rate": most_attempted_map.get(q["id"], {}).get(
-                    "accuracy_rate"
-                ),
-            }
-            for q in most_attempted_questions_details
-        ]
+        def question_results(question_ids):
+            return [
+                {
+                    "id": q_id,
+                    "question_text": question_texts[q_id],
+                    "attempt_count": question_totals[q_id][0],
+                    "accuracy_rate": accuracy(*question_totals[q_id]),
+                }
+                for q_id in question_ids
+                if q_id in question_texts
+            ]
 
-        lowest_accuracy_q = (
-            attempts_in_period.values("question_id")
-            .annotate(
-                attempt_count=Count("id"),
-                accuracy_rate=accuracy_expression,
-            )
-            .filter(attempt_count__gte=min_attempts_threshold)
-            .order_by("accuracy_rate")[:5]
-        )
-        lowest_accuracy_ids = [item["question_id"] for item in lowest_accuracy_q]
-        lowest_accuracy_questions_details = Question.objects.filter(
-            id__in=lowest_accuracy_ids
-        ).values("id", "question_text")
-
-        lowest_accuracy_map = {
-            item["question_id"]: {
-                "accuracy_rate": item["accuracy_rate"],
-                "attempt_count": item["attempt_count"],
-            }
-            for item in lowest_accuracy_q
-        }
+        most_attempted_results = question_results(most_attempted_ids)
+        lowest_accuracy_results = question_results(lowest_accuracy_ids)
 
-        lowest_accuracy_results = [
+        final_daily_activity = [
             {
-                "id": q["id"],
-                "question_text": q["question_text"],
-                "accuracy_rate": lowest_accuracy_map.get(q["id"], {}).get(
-                    "accuracy_rate"
-                ),
-                "attempt_count": lowest_accuracy_map.get(q["id"], {}).get(
-                    "attempt_count"
-                ),
+                "date": day,
+                "questions_answered": activity["daily_questions"].get(day, 0),
+                "tests_completed": activity["daily_tests"].get(day, 0),
             }
-            for q in lowest_accuracy_questions_details
+            for day in sorted(
+                set(activity["daily_questions"]) | set(activity["daily_tests"])
+            )
         ]
 
-        daily_activity_data = (
-            attempts_in_period.annotate(date=TruncDate("attempted_at"))
-            .values("date")
-            .annotate(questions_answered=Count("id"))
-            .order_by("date")
-        )
-        daily_tests_data = (
-            completed_tests_in_period.annotate(date=TruncDate("start_time"))
-            .values("date")
-            .annotate(tests_completed=Count("id"))
-            .order_by("date")
-        )
-        merged_daily = {}
-        for item in daily_activity_data:
-            merged_daily[item["date"]] = {
-                "date": item["date"],
-                "questions_answered": item["questions_answered"],
-                "tests_completed": 0,
-            }
-        for item in daily_tests_data:
-            if item["date"] in merged_daily:
-                merged_daily[item["date"]]["tests_completed"] = item["tests_completed"]
-            else:
-                merged_daily[item["date"]] = {
-                    "date": item["date"],
-                    "questions_answered": 0,
-                    "tests_completed": item["tests_completed"],
-                }
-        final_daily_activity = sorted(merged_daily.values(), key=lambda x: x["date"])
-
         # --- Prepare Response Data ---
         data = {
             "total_active_students": total_active_students,
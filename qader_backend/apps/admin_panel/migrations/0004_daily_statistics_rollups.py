@@ -0,0 +1,64 @@
+# Generated by Django 5.2 on 2026-10-16 19:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0003_exportjob_job_type'),
+        ('learning', '0005_question_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatisticsRollupDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Date')),
+                ('built_at', models.DateTimeField(auto_now=True, verbose_name='Built At')),
+            ],
+            options={
+                'verbose_name': 'Statistics Rollup Day',
+                'verbose_name_plural': 'Statistics Rollup Days',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyTestActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True, verbose_name='Date')),
+                ('attempt_type', models.CharField(max_length=20, verbose_name='Attempt Type')),
+                ('tests_completed', models.PositiveIntegerField(default=0, verbose_name='Tests Completed')),
+                ('scored_tests', models.PositiveIntegerField(default=0, help_text='Completed tests with a score (the denominator of the average).', verbose_name='Scored Tests')),
+                ('score_sum', models.FloatField(default=0.0, verbose_name='Score Sum')),
+            ],
+            options={
+                'verbose_name': 'Daily Test Activity Rollup',
+                'verbose_name_plural': 'Daily Test Activity Rollups',
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'attempt_type'), name='unique_daily_test_activity_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyQuestionActivityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True, verbose_name='Date')),
+                ('mode', models.CharField(max_length=20, verbose_name='Attempt Mode')),
+                ('attempts_count', models.PositiveIntegerField(default=0, verbose_name='Attempts')),
+                ('correct_count', models.PositiveIntegerField(default=0, verbose_name='Correct Attempts')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='learning.question', verbose_name='Question')),
+                ('section', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='learning.learningsection', verbose_name='Section')),
+            ],
+            options={
+                'verbose_name': 'Daily Question Activity Rollup',
+                'verbose_name_plural': 'Daily Question Activity Rollups',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'section'], name='admin_panel_date_92a551_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'question', 'mode'), name='unique_daily_question_activity_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-16 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin_panel', '0004_daily_statistics_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='progress_percentage',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Share of rows written so far, updated while the job runs.', verbose_name='Progress (%)'),
+        ),
+    ]
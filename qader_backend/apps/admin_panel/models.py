@@ -116,6 +116,11 @@ class ExportJob(models.Model):
         null=True,
         help_text=_("Details of the error if the job failed."),
     )
+    progress_percentage = models.PositiveSmallIntegerField(
+        _("Progress (%)"),
+        default=0,
+        help_text=_("Share of rows written so far, updated while the job runs."),
+    )
     created_at = models.DateTimeField(_("Created At"), auto_now_add=True)
     completed_at = models.DateTimeField(_("Completed At"), blank=True, null=True)
 
@@ -126,3 +131,87 @@ class ExportJob(models.Model):
 
     def __str__(self):
         return f"Export Job {self.id} for {self.requesting_user.username} ({self.get_status_display()})"
+
+
+# --- Statistics Rollups ---
+class DailyQuestionActivityRollup(models.Model):
+    """
+    Question attempts per day, question and attempt mode (with the question's
+    section denormalized), so the admin overview can sum closed days instead of
+    scanning UserQuestionAttempt.
+    """
+
+    date = models.DateField(_("Date"), db_index=True)
+    question = models.ForeignKey(
+        "learning.Question",
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Question"),
+    )
+    section = models.ForeignKey(
+        "learning.LearningSection",
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name=_("Section"),
+    )
+    mode = models.CharField(_("Attempt Mode"), max_length=20)
+    attempts_count = models.PositiveIntegerField(_("Attempts"), default=0)
+    correct_count = models.PositiveIntegerField(_("Correct Attempts"), default=0)
+
+    class Meta:
+        verbose_name = _("Daily Question Activity Rollup")
+        verbose_name_plural = _("Daily Question Activity Rollups")
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "question", "mode"],
+                name="unique_daily_question_activity_rollup",
+            )
+        ]
+        indexes = [models.Index(fields=["date", "section"])]
+
+    def __str__(self):
+        return f"{self.date} Q{self.question_id} ({self.mode}): {self.correct_count}/{self.attempts_count}"
+
+
+class DailyTestActivityRollup(models.Model):
+    """Completed test attempts per start day and attempt type."""
+
+    date = models.DateField(_("Date"), db_index=True)
+    attempt_type = models.CharField(_("Attempt Type"), max_length=20)
+    tests_completed = models.PositiveIntegerField(_("Tests Completed"), default=0)
+    scored_tests = models.PositiveIntegerField(
+        _("Scored Tests"),
+        default=0,
+        help_text=_("Completed tests with a score (the denominator of the average)."),
+    )
+    score_sum = models.FloatField(_("Score Sum"), default=0.0)
+
+    class Meta:
+        verbose_name = _("Daily Test Activity Rollup")
+        verbose_name_plural = _("Daily Test Activity Rollups")
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "attempt_type"],
+                name="unique_daily_test_activity_rollup",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.attempt_type}: {self.tests_completed} completed"
+
+
+class StatisticsRollupDay(models.Model):
+    """Marks a day whose rollups have been built (days without activity have no rows)."""
+
+    date = models.DateField(_("Date"), unique=True)
+    built_at = models.DateTimeField(_("Built At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("Statistics Rollup Day")
+        verbose_name_plural = _("Statistics Rollup Days")
+        ordering = ["-date"]
+
+    def __str__(self):
+        return f"Rollups for {self.date}"
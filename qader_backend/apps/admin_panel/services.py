@@ -1,10 +1,21 @@
 import csv
 import openpyxl
-from io import StringIO, BytesIO
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from io import BytesIO, TextIOWrapper
+from typing import Any, Callable, Iterable, List, Optional, Tuple
 
-from django.db.models import Count
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
 from django.utils import timezone
-from apps.study.models import UserTestAttempt
+from apps.admin_panel.models import (
+    DailyQuestionActivityRollup,
+    DailyTestActivityRollup,
+    StatisticsRollupDay,
+)
+from apps.study.models import UserQuestionAttempt, UserTestAttempt
 from apps.users.models import UserProfile  # NEW IMPORT
 
 
@@ -43,146 +54,161 @@ def get_filtered_test_attempts(filters: dict):
     return queryset.order_by("-start_time")
 
 
-def generate_export_file_content(queryset, export_format: str):
+# --- Streaming Export Writer ---
+# Rows fetched per database round trip, and between progress reports.
+EXPORT_CHUNK_SIZE = getattr(settings, "ADMIN_EXPORT_CHUNK_SIZE", 2000)
+
+EXPORT_CONTENT_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _export_cell(value, export_format: str):
+    # CSV gets formatted timestamps; Excel gets naive datetimes, since it
+    # doesn't handle timezone-aware ones.
+    if isinstance(value, datetime):
+        if export_format == "csv":
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        return value.replace(tzinfo=None)
+    return value
+
+
+def write_export_file(
+    fileobj,
+    queryset,
+    export_format: str,
+    headers: List[str],
+    row_builder: Callable[[Any], list],
+    sheet_title: str = "Export",
+    progress_callback: Optional[Callable[[int], None]] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+) -> int:
     """
-    Generates file content (CSV or XLSX) from a queryset.
-    This is the single source of truth for file generation logic.
-    Provides a rich, meaningful set of columns for analysis.
+    Writes `queryset` to the binary file object `fileobj`, one chunk of rows at
+    a time, so memory use does not grow with the size of the export.
+
+    CSV rows are written to the file as they are produced. XLSX uses openpyxl's
+    write-only mode, which streams rows to a temporary file instead of keeping
+    a cell object per value.
+
+    Args:
+        row_builder: Turns one object of the queryset into a list of cell values.
+        progress_callback: Called with the number of rows written after each chunk.
+
+    Returns:
+        The number of rows written (excluding the header).
     """
-    # --- NEW, MORE INFORMATIVE HEADERS ---
-    headers = [
-        "Attempt ID",
-        "User ID",
-        "Username",
-        "User Full Name",
-        "User Email",
-        "Attempt Type",
-        "Test Name",
-        "Test Definition Type",
-        "Status",
-        "Start Time (UTC)",
-        "End Time (UTC)",
-        "Duration (Minutes)",
-        "Total Questions in Test",
-        "Questions Answered",
-        "Overall Score (%)",
-        "Verbal Score (%)",
-        "Quantitative Score (%)",
-    ]
-    filename = f"qader_test_attempts_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
-    content_type = None
-    file_content = None
+    if export_format not in EXPORT_CONTENT_TYPES:
+        raise ValueError(f"Unsupported export format: {export_format}")
 
-    # Use iterator() to handle large querysets efficiently by processing
-    # records in chunks, reducing memory usage.
+    rows_written = 0
     if export_format == "csv":
-        output = StringIO()
-        writer = csv.writer(output)
+        text_output = TextIOWrapper(fileobj, encoding="utf-8", newline="")
+        writer = csv.writer(text_output)
         writer.writerow(headers)
-        for attempt in queryset.iterator():
-            # Handle cases where related objects might be null
-            test_def_name = (
-                attempt.test_definition.name
-                if attempt.test_definition
-                else "N/A (Traditional Practice)"
-            )
-            test_def_type = (
-                attempt.test_definition.get_test_type_display()
-                if attempt.test_definition
-                else "N/A"
-            )
-            duration_minutes = (
-                round(attempt.duration_seconds / 60, 2)
-                if attempt.duration_seconds is not None
-                else None
-            )
-
-            writer.writerow(
-                [
-                    attempt.id,
-                    attempt.user.id,
-                    attempt.user.username,
-                    attempt.user.get_full_name(),
-                    attempt.user.email,
-                    attempt.get_attempt_type_display(),
-                    test_def_name,
-                    test_def_type,
-                    attempt.get_status_display(),
-                    attempt.start_time.strftime("%Y-%m-%d %H:%M:%S"),
-                    (
-                        attempt.end_time.strftime("%Y-%m-%d %H:%M:%S")
-                        if attempt.end_time
-                        else None
-                    ),
-                    duration_minutes,
-                    attempt.num_questions,
-                    attempt.answered_question_count_agg,  # Use the efficient annotated value
-                    attempt.score_percentage,
-                    attempt.score_verbal,
-                    attempt.score_quantitative,
-                ]
-            )
-        file_content = output.getvalue().encode("utf-8")
-        content_type = "text/csv"
-
-    elif export_format == "xlsx":
-        output = BytesIO()
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = "Test Attempts"
+        append_row = writer.writerow
+    else:
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=sheet_title)
         sheet.append(headers)
-        for attempt in queryset.iterator():
-            # Handle cases where related objects might be null
-            test_def_name = (
-                attempt.test_definition.name
-                if attempt.test_definition
-                else "N/A (Traditional Practice)"
-            )
-            test_def_type = (
-                attempt.test_definition.get_test_type_display()
-                if attempt.test_definition
-                else "N/A"
-            )
-            duration_minutes = (
-                round(attempt.duration_seconds / 60, 2)
-                if attempt.duration_seconds is not None
-                else None
-            )
+        append_row = sheet.append
 
-            # Excel doesn't handle timezone-aware datetimes well, so we remove tzinfo
-            start_time_naive = attempt.start_time.replace(tzinfo=None)
-            end_time_naive = (
-                attempt.end_time.replace(tzinfo=None) if attempt.end_time else None
-            )
+    for obj in queryset.iterator(chunk_size=chunk_size):
+        append_row([_export_cell(value, export_format) for value in row_builder(obj)])
+        rows_written += 1
+        if rows_written % chunk_size == 0:
+            if export_format == "csv":
+                text_output.flush()
+            if progress_callback:
+                progress_callback(rows_written)
+
+    if export_format == "csv":
+        # Detach so closing the wrapper later doesn't close the caller's file
+        text_output.flush()
+        text_output.detach()
+    else:
+        workbook.save(fileobj)
+    return rows_written
 
-            sheet.append(
-                [
-                    attempt.id,
-                    attempt.user.id,
-                    attempt.user.username,
-                    attempt.user.get_full_name(),
-                    attempt.user.email,
-                    attempt.get_attempt_type_display(),
-                    test_def_name,
-                    test_def_type,
-                    attempt.get_status_display(),
-                    start_time_naive,
-                    end_time_naive,
-                    duration_minutes,
-                    attempt.num_questions,
-                    attempt.answered_question_count_agg,  # Use the efficient annotated value
-                    attempt.score_percentage,
-                    attempt.score_verbal,
-                    attempt.score_quantitative,
-                ]
-            )
-        workbook.save(output)
-        file_content = output.getvalue()
-        content_type = (
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
 
-    return file_content, content_type, filename
+# --- Test Attempt Export ---
+TEST_ATTEMPT_EXPORT_HEADERS = [
+    "Attempt ID",
+    "User ID",
+    "Username",
+    "User Full Name",
+    "User Email",
+    "Attempt Type",
+    "Test Name",
+    "Test Definition Type",
+    "Status",
+    "Start Time (UTC)",
+    "End Time (UTC)",
+    "Duration (Minutes)",
+    "Total Questions in Test",
+    "Questions Answered",
+    "Overall Score (%)",
+    "Verbal Score (%)",
+    "Quantitative Score (%)",
+]
+
+
+def test_attempt_export_row(attempt) -> list:
+    """One export row for a test attempt from `get_filtered_test_attempts`."""
+    # Handle cases where related objects might be null
+    test_def_name = (
+        attempt.test_definition.name
+        if attempt.test_definition
+        else "N/A (Traditional Practice)"
+    )
+    test_def_type = (
+        attempt.test_definition.get_test_type_display()
+        if attempt.test_definition
+        else "N/A"
+    )
+    duration_minutes = (
+        round(attempt.duration_seconds / 60, 2)
+        if attempt.duration_seconds is not None
+        else None
+    )
+    return [
+        attempt.id,
+        attempt.user.id,
+        attempt.user.username,
+        attempt.user.get_full_name(),
+        attempt.user.email,
+        attempt.get_attempt_type_display(),
+        test_def_name,
+        test_def_type,
+        attempt.get_status_display(),
+        attempt.start_time,
+        attempt.end_time,
+        duration_minutes,
+        attempt.num_questions,
+        attempt.answered_question_count_agg,  # Use the efficient annotated value
+        attempt.score_percentage,
+        attempt.score_verbal,
+        attempt.score_quantitative,
+    ]
+
+
+def generate_export_file_content(queryset, export_format: str):
+    """
+    Generates file content (CSV or XLSX) from a queryset, in memory.
+    Background jobs should use `write_export_file` to stream to a file instead.
+    """
+    output = BytesIO()
+    write_export_file(
+        output,
+        queryset,
+        export_format,
+        TEST_ATTEMPT_EXPORT_HEADERS,
+        test_attempt_export_row,
+        sheet_title="Test Attempts",
+    )
+    filename = f"qader_test_attempts_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    return output.getvalue(), EXPORT_CONTENT_TYPES.get(export_format), filename
 
 
 # --- NEW SERVICE FUNCTIONS FOR USER EXPORT ---
@@ -212,136 +238,297 @@ def get_filtered_users(filters: dict):
     return queryset.order_by("-user__date_joined")
 
 
+USER_EXPORT_HEADERS = [
+    "User ID",
+    "Username",
+    "Full Name",
+    "Preferred Name",
+    "Email",
+    "Role",
+    "Account Type",
+    "Is Active",
+    "Is Subscribed",
+    "Subscription Expires At (UTC)",
+    "Date Joined (UTC)",
+    "Last Login (UTC)",
+    "Gender",
+    "Grade",
+    "Taken Qiyas Before",
+    "Points",
+    "Current Streak (Days)",
+    "Longest Streak (Days)",
+    "Verbal Level (%)",
+    "Quantitative Level (%)",
+    "Referral Code",
+    "Referred By (Username)",
+    "Assigned Mentor",
+]
+
+
+def user_export_row(profile) -> list:
+    """One export row for a profile from `get_filtered_users`."""
+    return [
+        profile.user_id,
+        profile.user.username,
+        profile.full_name,
+        profile.preferred_name,
+        profile.user.email,
+        profile.get_role_display(),
+        profile.get_account_type_display(),
+        profile.user.is_active,
+        profile.is_subscribed,
+        profile.subscription_expires_at,
+        profile.user.date_joined,
+        profile.user.last_login,
+        profile.get_gender_display(),
+        profile.get_grade_display(),
+        profile.has_taken_qiyas_before,
+        profile.points,
+        profile.current_streak_days,
+        profile.longest_streak_days,
+        profile.current_level_verbal,
+        profile.current_level_quantitative,
+        profile.referral_code,
+        profile.referred_by.username if profile.referred_by else None,
+        (profile.assigned_mentor.user.username if profile.assigned_mentor else None),
+    ]
+
+
 def generate_user_export_file_content(queryset, export_format: str):
     """
-    Generates file content (CSV or XLSX) for User data from a queryset.
+    Generates file content (CSV or XLSX) for User data from a queryset, in memory.
+    Background jobs should use `write_export_file` to stream to a file instead.
     """
-    headers = [
-        "User ID",
-        "Username",
-        "Full Name",
-        "Preferred Name",
-        "Email",
-        "Role",
-        "Account Type",
-        "Is Active",
-        "Is Subscribed",
-        "Subscription Expires At (UTC)",
-        "Date Joined (UTC)",
-        "Last Login (UTC)",
-        "Gender",
-        "Grade",
-        "Taken Qiyas Before",
-        "Points",
-        "Current Streak (Days)",
-        "Longest Streak (Days)",
-        "Verbal Level (%)",
-        "Quantitative Level (%)",
-        "Referral Code",
-        "Referred By (Username)",
-        "Assigned Mentor",
-    ]
+    output = BytesIO()
+    write_export_file(
+        output,
+        queryset,
+        export_format,
+        USER_EXPORT_HEADERS,
+        user_export_row,
+        sheet_title="Users",
+    )
     filename = f"qader_users_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
-    content_type = None
-    file_content = None
+    return output.getvalue(), EXPORT_CONTENT_TYPES.get(export_format), filename
 
-    if export_format == "csv":
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow(headers)
-        for profile in queryset.iterator():
-            writer.writerow(
-                [
-                    profile.user_id,
-                    profile.user.username,
-                    profile.full_name,
-                    profile.preferred_name,
-                    profile.user.email,
-                    profile.get_role_display(),
-                    profile.get_account_type_display(),
-                    profile.user.is_active,
-                    profile.is_subscribed,
-                    (
-                        profile.subscription_expires_at.strftime("%Y-%m-%d %H:%M:%S")
-                        if profile.subscription_expires_at
-                        else None
-                    ),
-                    profile.user.date_joined.strftime("%Y-%m-%d %H:%M:%S"),
-                    (
-                        profile.user.last_login.strftime("%Y-%m-%d %H:%M:%S")
-                        if profile.user.last_login
-                        else None
-                    ),
-                    profile.get_gender_display(),
-                    profile.get_grade_display(),
-                    profile.has_taken_qiyas_before,
-                    profile.points,
-                    profile.current_streak_days,
-                    profile.longest_streak_days,
-                    profile.current_level_verbal,
-                    profile.current_level_quantitative,
-                    profile.referral_code,
-                    profile.referred_by.username if profile.referred_by else None,
-                    (
-                        profile.assigned_mentor.user.username
-                        if profile.assigned_mentor
-                        else None
-                    ),
-                ]
+
+# --- Statistics Rollups ---
+# Closed days always rebuilt by the nightly task, to pick up late writes (e.g. answers
+# committed just after midnight).
+ADMIN_STATS_ROLLUP_REBUILD_DAYS = getattr(settings, "ADMIN_STATS_ROLLUP_REBUILD_DAYS", 2)
+# How far back the nightly task looks for days that were never rolled up.
+ADMIN_STATS_ROLLUP_BACKFILL_DAYS = getattr(
+    settings, "ADMIN_STATS_ROLLUP_BACKFILL_DAYS", 365
+)
+
+
+def _day_range_bounds(day_from: date, day_to: date):
+    """Aware datetimes covering whole local days day_from..day_to."""
+    return (
+        timezone.make_aware(datetime.combine(day_from, time.min)),
+        timezone.make_aware(datetime.combine(day_to, time.max)),
+    )
+
+
+def _contiguous_day_runs(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Groups days into (first, last) runs of consecutive days, in order."""
+    runs = []
+    for day in sorted(days):
+        if runs and runs[-1][1] == day - timedelta(days=1):
+            runs[-1] = (runs[-1][0], day)
+        else:
+            runs.append((day, day))
+    return runs
+
+
+def _raw_question_activity(datetime_from, datetime_to):
+    return (
+        UserQuestionAttempt.objects.filter(attempted_at__range=(datetime_from, datetime_to))
+        .annotate(date=TruncDate("attempted_at"))
+        .values("date", "question_id", "question__subsection__section_id", "mode")
+        .annotate(
+            attempts=Count("id"), correct=Count("id", filter=Q(is_correct=True))
+        )
+        .order_by()
+    )
+
+
+def _raw_test_activity(datetime_from, datetime_to):
+    # Keyed on the completion day: a day's completed tests are final once it closes,
+    # however long ago the tests were started
+    return (
+        UserTestAttempt.objects.filter(
+            end_time__range=(datetime_from, datetime_to),
+            status=UserTestAttempt.Status.COMPLETED,
+        )
+        .annotate(date=TruncDate("end_time"))
+        .values("date", "attempt_type")
+        .annotate(
+            completed=Count("id"),
+            scored=Count("score_percentage"),
+            score_sum=Sum("score_percentage"),
+        )
+        .order_by()
+    )
+
+
+@transaction.atomic
+def build_daily_statistics_rollups(day: date):
+    """(Re)builds the question and test activity rollups of a single local day."""
+    datetime_from, datetime_to = _day_range_bounds(day, day)
+
+    DailyQuestionActivityRollup.objects.filter(date=day).delete()
+    DailyQuestionActivityRollup.objects.bulk_create(
+        [
+            DailyQuestionActivityRollup(
+                date=day,
+                question_id=row["question_id"],
+                section_id=row["question__subsection__section_id"],
+                mode=row["mode"],
+                attempts_count=row["attempts"],
+                correct_count=row["correct"],
             )
-        file_content = output.getvalue().encode("utf-8")
-        content_type = "text/csv"
-
-    elif export_format == "xlsx":
-        output = BytesIO()
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = "Users"
-        sheet.append(headers)
-        for profile in queryset.iterator():
-            sheet.append(
-                [
-                    profile.user_id,
-                    profile.user.username,
-                    profile.full_name,
-                    profile.preferred_name,
-                    profile.user.email,
-                    profile.get_role_display(),
-                    profile.get_account_type_display(),
-                    profile.user.is_active,
-                    profile.is_subscribed,
-                    (
-                        profile.subscription_expires_at.replace(tzinfo=None)
-                        if profile.subscription_expires_at
-                        else None
-                    ),
-                    profile.user.date_joined.replace(tzinfo=None),
-                    (
-                        profile.user.last_login.replace(tzinfo=None)
-                        if profile.user.last_login
-                        else None
-                    ),
-                    profile.get_gender_display(),
-                    profile.get_grade_display(),
-                    profile.has_taken_qiyas_before,
-                    profile.points,
-                    profile.current_streak_days,
-                    profile.longest_streak_days,
-                    profile.current_level_verbal,
-                    profile.current_level_quantitative,
-                    profile.referral_code,
-                    profile.referred_by.username if profile.referred_by else None,
-                    (
-                        profile.assigned_mentor.user.username
-                        if profile.assigned_mentor
-                        else None
-                    ),
-                ]
+            for row in _raw_question_activity(datetime_from, datetime_to)
+        ],
+        batch_size=1000,
+    )
+
+    DailyTestActivityRollup.objects.filter(date=day).delete()
+    DailyTestActivityRollup.objects.bulk_create(
+        [
+            DailyTestActivityRollup(
+                date=day,
+                attempt_type=row["attempt_type"],
+                tests_completed=row["completed"],
+                scored_tests=row["scored"],
+                score_sum=row["score_sum"] or 0.0,
             )
-        workbook.save(output)
-        file_content = output.getvalue()
-        content_type = (
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            for row in _raw_test_activity(datetime_from, datetime_to)
+        ]
+    )
+
+    StatisticsRollupDay.objects.update_or_create(date=day)
+
+
+def build_pending_statistics_rollups(today: Optional[date] = None) -> List[date]:
+    """
+    Builds rollups for closed days in the backfill window that have none yet, and
+    rebuilds the most recent ADMIN_STATS_ROLLUP_REBUILD_DAYS closed days.
+    Returns the days that were built.
+    """
+    today = today or timezone.localdate()
+    yesterday = today - timedelta(days=1)
+    window_start = today - timedelta(days=ADMIN_STATS_ROLLUP_BACKFILL_DAYS)
+    rebuild_from = today - timedelta(days=ADMIN_STATS_ROLLUP_REBUILD_DAYS)
+
+    built_days = set(
+        StatisticsRollupDay.objects.filter(
+            date__range=(window_start, yesterday)
+        ).values_list("date", flat=True)
+    )
+    days = [
+        window_start + timedelta(days=offset)
+        for offset in range((yesterday - window_start).days + 1)
+    ]
+    days = [day for day in days if day not in built_days or day >= rebuild_from]
+    for day in days:
+        build_daily_statistics_rollups(day)
+    return days
+
+
+def get_activity_totals(date_from: date, date_to: date) -> dict:
+    """
+    Question and test activity for local days date_from..date_to, for the admin
+    statistics overview. Closed days that have been rolled up are summed from the
+    rollup tables; today (and any closed day not rolled up yet) is scanned raw.
+
+    Returns a dict with:
+        questions: {question_id: [attempts, correct]}
+        sections: {section_id: [attempts, correct]}
+        daily_questions / daily_tests: {date: count}, tests by completion day
+        tests: {"completed": n, "scored": n, "score_sum": float}
+    """
+    totals = {
+        "questions": defaultdict(lambda: [0, 0]),
+        "sections": defaultdict(lambda: [0, 0]),
+        "daily_questions": defaultdict(int),
+        "daily_tests": defaultdict(int),
+        "tests": {"completed": 0, "scored": 0, "score_sum": 0.0},
+    }
+
+    def add_question_rows(rows, section_key):
+        for row in rows:
+            question = totals["questions"][row["question_id"]]
+            question[0] += row["attempts"]
+            question[1] += row["correct"]
+            section = totals["sections"][row[section_key]]
+            section[0] += row["attempts"]
+            section[1] += row["correct"]
+
+    def add_test_rows(rows):
+        for row in rows:
+            totals["daily_tests"][row["date"]] += row["completed"]
+            totals["tests"]["completed"] += row["completed"]
+            totals["tests"]["scored"] += row["scored"]
+            totals["tests"]["score_sum"] += row["score_sum"] or 0.0
+
+    today = timezone.localdate()
+    closed_to = min(date_to, today - timedelta(days=1))
+    raw_days = set()
+
+    if date_from <= closed_to:
+        rolled_days = set(
+            StatisticsRollupDay.objects.filter(
+                date__range=(date_from, closed_to)
+            ).values_list("date", flat=True)
+        )
+        raw_days.update(
+            day
+            for day in (
+                date_from + timedelta(days=offset)
+                for offset in range((closed_to - date_from).days + 1)
+            )
+            if day not in rolled_days
+        )
+
+        question_rollups = DailyQuestionActivityRollup.objects.filter(
+            date__in=rolled_days
         )
+        add_question_rows(
+            question_rollups.values("question_id", "section_id").annotate(
+                attempts=Sum("attempts_count"), correct=Sum("correct_count")
+            ),
+            "section_id",
+        )
+        for row in question_rollups.values("date").annotate(
+            attempts=Sum("attempts_count")
+        ):
+            totals["daily_questions"][row["date"]] += row["attempts"]
+        add_test_rows(
+            DailyTestActivityRollup.objects.filter(date__in=rolled_days)
+            .values("date")
+            .annotate(
+                completed=Sum("tests_completed"),
+                scored=Sum("scored_tests"),
+                score_sum=Sum("score_sum"),
+            )
+        )
+
+    # Only the days missing from the rollups are scanned, one range per run
+    raw_runs = _contiguous_day_runs(raw_days)
+    if date_to >= today:
+        open_from = max(date_from, today)
+        if raw_runs and raw_runs[-1][1] == open_from - timedelta(days=1):
+            raw_runs[-1] = (raw_runs[-1][0], date_to)
+        else:
+            raw_runs.append((open_from, date_to))
+
+    for run_from, run_to in raw_runs:
+        raw_from, raw_to = _day_range_bounds(run_from, run_to)
+        question_rows = list(_raw_question_activity(raw_from, raw_to))
+        add_question_rows(question_rows, "question__subsection__section_id")
+        for row in question_rows:
+            totals["daily_questions"][row["date"]] += row["attempts"]
+        add_test_rows(_raw_test_activity(raw_from, raw_to))
 
-    return file_content, content_type, filename
+    return totals
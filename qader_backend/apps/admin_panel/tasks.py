@@ -1,7 +1,9 @@
 from celery import shared_task
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files.base import File
 from django.utils import timezone
 import logging
+import tempfile
 
 from apps.admin_panel.models import ExportJob
 from apps.admin_panel import services as admin_services
@@ -9,11 +11,22 @@ from apps.admin_panel import services as admin_services
 logger = logging.getLogger(__name__)
 
 
-@shared_task(bind=True)
+# Exports stream rows to disk, so large ones are bounded by time rather than memory
+EXPORT_JOB_TIME_LIMIT = getattr(settings, "EXPORT_JOB_TIME_LIMIT", 1800)  # Seconds
+EXPORT_JOB_SOFT_TIME_LIMIT = getattr(settings, "EXPORT_JOB_SOFT_TIME_LIMIT", 1740)
+
+
+@shared_task(
+    bind=True,
+    time_limit=EXPORT_JOB_TIME_LIMIT,
+    soft_time_limit=EXPORT_JOB_SOFT_TIME_LIMIT,
+)
 def process_export_job(self, job_id):
     """
     Generic Celery task to process an export job.
     It inspects the job's `job_type` and delegates to the appropriate logic.
+    Rows are streamed in chunks to a temporary file, which is then copied to
+    storage; `progress_percentage` is updated after every chunk.
     """
     try:
         job = ExportJob.objects.get(id=job_id)
@@ -23,38 +36,61 @@ def process_export_job(self, job_id):
 
     job.status = ExportJob.Status.IN_PROGRESS
     job.task_id = self.request.id  # Save celery task ID
-    job.save(update_fields=["status", "task_id"])
+    job.progress_percentage = 0
+    job.save(update_fields=["status", "task_id", "progress_percentage"])
 
     try:
         # --- DELEGATION LOGIC ---
         if job.job_type == ExportJob.JobType.TEST_ATTEMPTS:
             queryset = admin_services.get_filtered_test_attempts(job.filters)
-            file_content, _, filename = admin_services.generate_export_file_content(
-                queryset, job.file_format
-            )
+            headers = admin_services.TEST_ATTEMPT_EXPORT_HEADERS
+            row_builder = admin_services.test_attempt_export_row
+            sheet_title = "Test Attempts"
+            filename_prefix = "qader_test_attempts"
         elif job.job_type == ExportJob.JobType.USERS:
             queryset = admin_services.get_filtered_users(job.filters)
-            file_content, _, filename = (
-                admin_services.generate_user_export_file_content(
-                    queryset, job.file_format
-                )
-            )
+            headers = admin_services.USER_EXPORT_HEADERS
+            row_builder = admin_services.user_export_row
+            sheet_title = "Users"
+            filename_prefix = "qader_users"
         else:
             raise ValueError(f"Unknown job type: {job.job_type}")
 
-        # --- Common success logic ---
-        if not file_content:
-            raise ValueError(f"Generated file content is empty for job {job_id}.")
+        total_rows = queryset.count()
+
+        def report_progress(rows_written):
+            # Keep 100% for after the file has been stored
+            percentage = min(99, rows_written * 100 // total_rows) if total_rows else 0
+            ExportJob.objects.filter(id=job.id).update(progress_percentage=percentage)
+
+        filename = f"{filename_prefix}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{job.file_format}"
+        with tempfile.TemporaryFile() as tmp_file:
+            admin_services.write_export_file(
+                tmp_file,
+                queryset,
+                job.file_format,
+                headers,
+                row_builder,
+                sheet_title=sheet_title,
+                progress_callback=report_progress,
+            )
+            tmp_file.seek(0)
+            # Storage backends copy File objects chunk by chunk
+            job.file.save(filename, File(tmp_file), save=False)
 
-        job.file.save(filename, ContentFile(file_content))
+        # --- Common success logic ---
         job.status = ExportJob.Status.SUCCESS
+        job.progress_percentage = 100
         job.completed_at = timezone.now()
-        job.save(update_fields=["status", "file", "completed_at"])
+        job.save(
+            update_fields=["status", "file", "progress_percentage", "completed_at"]
+        )
 
         logger.info(
-            f"Successfully completed ExportJob {job_id} of type {job.job_type}. File: {job.file.name}"
+            f"Successfully completed ExportJob {job_id} of type {job.job_type} "
+            f"({total_rows} rows). File: {job.file.name}"
         )
-        return {"status": "SUCCESS", "file_path": job.file.path}
+        return {"status": "SUCCESS", "file_path": job.file.name}
 
     except Exception as e:
         logger.exception(f"Failed to process ExportJob {job_id}. Error: {e}")
@@ -63,3 +99,14 @@ def process_export_job(self, job_id):
         job.completed_at = timezone.now()
         job.save(update_fields=["status", "error_message", "completed_at"])
         return {"status": "FAILURE", "message": str(e)}
+
+
+@shared_task(name="build_daily_statistics_rollups_task")
+def build_daily_statistics_rollups_task():
+    """
+    Nightly task building the admin statistics rollups for closed days that are
+    missing, and rebuilding the most recent ones.
+    """
+    days = admin_services.build_pending_statistics_rollups()
+    logger.info(f"Built admin statistics rollups for {len(days)} day(s).")
+    return f"Built statistics rollups for {len(days)} day(s)."
@@ -0,0 +1,77 @@
+import csv
+import openpyxl
+import pytest
+from io import BytesIO, StringIO
+
+from apps.admin_panel import services as admin_services
+from apps.admin_panel.models import ExportJob
+from apps.admin_panel.tasks import process_export_job
+from apps.study.models import UserTestAttempt
+from apps.study.tests.factories import UserTestAttemptFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def completed_attempts(admin_user):
+    return UserTestAttemptFactory.create_batch(
+        5,
+        user=admin_user,
+        status=UserTestAttempt.Status.COMPLETED,
+        score_percentage=75.0,
+    )
+
+
+@pytest.fixture(autouse=True)
+def export_media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+
+
+def test_write_export_file_streams_csv_in_chunks(completed_attempts):
+    output = BytesIO()
+    progress = []
+
+    rows_written = admin_services.write_export_file(
+        output,
+        admin_services.get_filtered_test_attempts({}),
+        "csv",
+        admin_services.TEST_ATTEMPT_EXPORT_HEADERS,
+        admin_services.test_attempt_export_row,
+        progress_callback=progress.append,
+        chunk_size=2,
+    )
+
+    assert rows_written == 5
+    assert progress == [2, 4]
+    rows = list(csv.reader(StringIO(output.getvalue().decode("utf-8"))))
+    assert rows[0] == admin_services.TEST_ATTEMPT_EXPORT_HEADERS
+    assert sorted(int(row[0]) for row in rows[1:]) == sorted(
+        a.id for a in completed_attempts
+    )
+
+
+@pytest.mark.parametrize("file_format", ["csv", "xlsx"])
+def test_process_export_job_stores_file_and_reports_progress(
+    admin_user, completed_attempts, file_format
+):
+    job = ExportJob.objects.create(
+        requesting_user=admin_user,
+        job_type=ExportJob.JobType.TEST_ATTEMPTS,
+        file_format=file_format,
+    )
+
+    result = process_export_job.apply(kwargs={"job_id": job.id}).get()
+
+    job.refresh_from_db()
+    assert result["status"] == "SUCCESS"
+    assert job.status == ExportJob.Status.SUCCESS
+    assert job.progress_percentage == 100
+    assert job.file.name.endswith(f".{file_format}")
+    with job.file.open("rb") as stored_file:
+        content = stored_file.read()
+    if file_format == "xlsx":
+        sheet = openpyxl.load_workbook(BytesIO(content)).active
+        assert sheet.title == "Test Attempts"
+        assert sheet.max_row == 6
+    else:
+        assert len(content.decode("utf-8").splitlines()) == 6
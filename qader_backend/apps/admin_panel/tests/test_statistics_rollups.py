@@ -0,0 +1,169 @@
+import pytest
+from unittest.mock import patch
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from apps.admin_panel import services as admin_services
+from apps.admin_panel.models import (
+    DailyQuestionActivityRollup,
+    DailyTestActivityRollup,
+    StatisticsRollupDay,
+)
+from apps.learning.tests.factories import (
+    LearningSectionFactory,
+    LearningSubSectionFactory,
+    QuestionFactory,
+)
+from apps.study.models import UserTestAttempt
+from apps.study.tests.factories import (
+    UserQuestionAttemptFactory,
+    UserTestAttemptFactory,
+)
+
+pytestmark = pytest.mark.django_db
+
+OVERVIEW_URL = reverse("api:v1:admin_panel:admin-statistics-overview")
+
+
+@pytest.fixture
+def activity(admin_user):
+    """Question and test activity spread over today and the two previous days."""
+    section = LearningSectionFactory(slug="verbal")
+    subsection = LearningSubSectionFactory(section=section)
+    questions = QuestionFactory.create_batch(2, subsection=subsection)
+    now = timezone.now()
+
+    for days_ago, question, is_correct in [
+        (2, questions[0], True),
+        (2, questions[0], False),
+        (1, questions[1], True),
+        (0, questions[0], True),
+        (0, questions[1], False),
+    ]:
+        UserQuestionAttemptFactory(
+            user=admin_user,
+            question=question,
+            is_correct=is_correct,
+            attempted_at=now - timedelta(days=days_ago),
+        )
+    for days_ago, score in [(2, 40.0), (1, 80.0), (0, 90.0)]:
+        test_attempt = UserTestAttemptFactory(
+            user=admin_user,
+            status=UserTestAttempt.Status.COMPLETED,
+            score_percentage=score,
+        )
+        UserTestAttempt.objects.filter(pk=test_attempt.pk).update(
+            start_time=now - timedelta(days=days_ago),
+            end_time=now - timedelta(days=days_ago),
+        )
+    return {"section": section, "questions": questions}
+
+
+def test_build_pending_rollups_builds_closed_days(activity):
+    today = timezone.localdate()
+    days = admin_services.build_pending_statistics_rollups(today)
+
+    assert today not in days
+    assert today - timedelta(days=1) in days
+    assert StatisticsRollupDay.objects.filter(date=today - timedelta(days=2)).exists()
+    rollup = DailyQuestionActivityRollup.objects.get(
+        date=today - timedelta(days=2), question=activity["questions"][0]
+    )
+    assert (rollup.attempts_count, rollup.correct_count) == (2, 1)
+    assert rollup.section == activity["section"]
+    assert DailyTestActivityRollup.objects.filter(date__lt=today).count() == 2
+
+    # Re-running only rebuilds the most recent closed days
+    rebuilt = admin_services.build_pending_statistics_rollups(today)
+    assert len(rebuilt) == admin_services.ADMIN_STATS_ROLLUP_REBUILD_DAYS
+
+
+def test_late_completed_test_counts_on_its_completion_day(admin_user):
+    today = timezone.localdate()
+    now = timezone.now()
+    started_days_ago = admin_services.ADMIN_STATS_ROLLUP_REBUILD_DAYS + 2
+    test_attempt = UserTestAttemptFactory(user=admin_user)
+    UserTestAttempt.objects.filter(pk=test_attempt.pk).update(
+        start_time=now - timedelta(days=started_days_ago)
+    )
+    # Rolled up while the test was still in progress
+    admin_services.build_pending_statistics_rollups(today - timedelta(days=1))
+    assert not DailyTestActivityRollup.objects.exists()
+
+    UserTestAttempt.objects.filter(pk=test_attempt.pk).update(
+        status=UserTestAttempt.Status.COMPLETED,
+        score_percentage=75.0,
+        end_time=now - timedelta(days=1),
+    )
+    admin_services.build_pending_statistics_rollups(today)
+
+    rollup = DailyTestActivityRollup.objects.get()
+    assert rollup.date == today - timedelta(days=1)
+    assert (rollup.tests_completed, rollup.score_sum) == (1, 75.0)
+    totals = admin_services.get_activity_totals(
+        today - timedelta(days=started_days_ago), today
+    )
+    assert totals["tests"]["completed"] == 1
+    assert dict(totals["daily_tests"]) == {today - timedelta(days=1): 1}
+
+
+def test_overview_matches_raw_counts_with_and_without_rollups(
+    admin_client, activity
+):
+    raw_response = admin_client.get(OVERVIEW_URL)
+    assert raw_response.status_code == status.HTTP_200_OK
+
+    admin_services.build_pending_statistics_rollups()
+    rolled_response = admin_client.get(OVERVIEW_URL)
+    assert rolled_response.status_code == status.HTTP_200_OK
+
+    for data in (raw_response.data, rolled_response.data):
+        assert data["total_questions_answered_period"] == 5
+        assert data["total_tests_completed_period"] == 3
+        assert data["overall_average_test_score"] == pytest.approx(70.0)
+        assert data["overall_average_accuracy"] == pytest.approx(60.0)
+        section = next(
+            s for s in data["performance_by_section"] if s["section_slug"] == "verbal"
+        )
+        assert section["total_attempts"] == 5
+        assert [q["attempt_count"] for q in data["most_attempted_questions"]] == [3, 2]
+        assert [
+            (d["questions_answered"], d["tests_completed"])
+            for d in data["daily_activity"]
+        ] == [(2, 1), (1, 1), (2, 1)]
+
+
+def test_activity_totals_scan_only_days_missing_from_rollups(activity):
+    today = timezone.localdate()
+    admin_services.build_pending_statistics_rollups(today)
+    StatisticsRollupDay.objects.filter(date=today - timedelta(days=2)).delete()
+
+    with patch.object(
+        admin_services,
+        "_raw_test_activity",
+        wraps=admin_services._raw_test_activity,
+    ) as raw_scan:
+        totals = admin_services.get_activity_totals(today - timedelta(days=2), today)
+
+    # The un-rolled day and today are scanned; the rolled-up day between is not
+    scanned_days = [
+        (timezone.localtime(start).date(), timezone.localtime(end).date())
+        for start, end in (call.args for call in raw_scan.call_args_list)
+    ]
+    assert scanned_days == [
+        (today - timedelta(days=2), today - timedelta(days=2)),
+        (today, today),
+    ]
+    assert sum(totals["daily_questions"].values()) == 5
+    assert totals["tests"]["completed"] == 3
+
+
+def test_contiguous_day_runs():
+    today = timezone.localdate()
+    days = [today, today - timedelta(days=1), today - timedelta(days=5)]
+    assert admin_services._contiguous_day_runs(days) == [
+        (today - timedelta(days=5), today - timedelta(days=5)),
+        (today - timedelta(days=1), today),
+    ]
@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import LimitOffsetPagination, PageNumberPagination
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -17,3 +17,16 @@ class StandardResultsSetPagination(PageNumberPagination):
     # The maximum number of items the client is allowed to request per page.
     # This is a crucial safeguard against performance issues or DoS attacks.
     max_page_size = 1000
+
+
+class OptionalLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination that only kicks in when the client sends `limit`,
+    e.g. to fetch the next chunk of a list while working through the current
+    one. Without it the full, unpaginated list is returned.
+    """
+
+    default_limit = None
+
+    # The maximum number of items the client is allowed to request per chunk.
+    max_limit = 100
@@ -0,0 +1,63 @@
+# qader_backend/apps/api/tracking.py
+"""
+Loaded-value tracking for post_save handlers that act on what a save changed.
+
+Each tracked model gets one post_init receiver that remembers the union of the
+fields registered by every app, read from __dict__ so deferred fields are never
+fetched. pre_save hands that snapshot to the handlers of the save in progress and
+takes a new one of the fields the save writes, so handlers never refresh it
+themselves and all of them see the same transition.
+"""
+from django.db.models.signals import post_init, pre_save
+
+UNSET = object()
+
+_tracked_fields = {}  # model class -> set of field attnames
+
+
+def track_loaded_values(model, fields):
+    """Registers the fields (attnames) of model whose changes post_save handlers need."""
+    if model not in _tracked_fields:
+        _tracked_fields[model] = set()
+        label = model._meta.label_lower
+        post_init.connect(
+            _remember_on_init, sender=model, dispatch_uid=f"track_loaded_{label}"
+        )
+        pre_save.connect(
+            _remember_on_save, sender=model, dispatch_uid=f"track_saved_{label}"
+        )
+    _tracked_fields[model].update(fields)
+
+
+def saved_change(instance, field, created=False):
+    """
+    (value before, value after) the save in progress, for post_save handlers.
+    `before` is None for created rows; either is UNSET when it is not known.
+    A field the save did not write keeps its loaded value on both sides.
+    """
+    before = None
+    if not created:
+        before = getattr(instance, "_values_before_save", {}).get(field, UNSET)
+    return before, getattr(instance, "_loaded_values", {}).get(field, UNSET)
+
+
+def _snapshot(instance, fields):
+    return {field: instance.__dict__.get(field, UNSET) for field in fields}
+
+
+def _remember_on_init(sender, instance, **kwargs):
+    instance._loaded_values = _snapshot(instance, _tracked_fields[sender])
+
+
+def _remember_on_save(sender, instance, update_fields=None, **kwargs):
+    written = _tracked_fields[sender]
+    if update_fields is not None:
+        written = [
+            field
+            for field in written
+            if field in update_fields
+            or sender._meta.get_field(field).name in update_fields
+        ]
+    loaded = getattr(instance, "_loaded_values", {})
+    instance._values_before_save = loaded
+    instance._loaded_values = {**loaded, **_snapshot(instance, written)}
@@ -184,12 +184,12 @@ class ChallengeViewSet(
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        question_attempt, challenge_ended = process_challenge_answer(
+        answer_result, challenge_ended = process_challenge_answer(
             challenge=challenge, user=request.user, **serializer.validated_data
         )
         response_data = {
             "status": "answer_received",
-            "is_correct": question_attempt.is_correct,
+            "is_correct": answer_result.is_correct,
             "challenge_ended": challenge_ended,
         }
         if challenge_ended:
@@ -4,8 +4,10 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import PermissionDenied
+from rest_framework.exceptions import APIException
 from rest_framework.serializers import ValidationError
 
+from apps.users.presence import presence, challenge_context
 from .models import Challenge, ChallengeStatus, ChallengeAttempt
 from .api.serializers import (
     ChallengeDetailSerializer,  # For sending full state
@@ -13,6 +15,7 @@ from .api.serializers import (
     ChallengeListSerializer,  # Could be useful for notifications
 )
 from .services import (
+    process_challenge_answer,
     set_participant_ready,
 )  # Maybe call services directly? Or trigger via signals/tasks
 
@@ -78,6 +81,9 @@ class ChallengeConsumer(AsyncWebsocketConsumer):
             )
 
             await self.accept()
+            await presence.aheartbeat(
+                self.user.id, [challenge_context(self.challenge_pk)]
+            )
             logger.info(
                 f"User {self.user.id} connected to WebSocket for Challenge {self.challenge_pk}"
             )
@@ -113,6 +119,7 @@ class ChallengeConsumer(AsyncWebsocketConsumer):
             await self.channel_layer.group_discard(
                 self.challenge_group_name, self.channel_name
             )
+            await presence.aleave(self.user.id, challenge_context(self.challenge_pk))
         else:
             logger.info(
                 f"User (potentially unauthenticated/unvalidated) disconnected. Code: {close_code}"
@@ -127,6 +134,9 @@ class ChallengeConsumer(AsyncWebsocketConsumer):
         # - Ping/Pong keepalives
         # - Client explicitly marking itself "ready" via WS (though REST action is safer)
 
+        # Any frame, including {"type": "heartbeat"}, keeps the user present
+        await presence.aheartbeat(self.user.id, [challenge_context(self.challenge_pk)])
+
         # Example: Handling a 'ready' message from client
         try:
             data = json.loads(text_data)
@@ -173,6 +183,32 @@ class ChallengeConsumer(AsyncWebsocketConsumer):
                         "Internal server error processing ready status."
                     )
 
+            elif message_type == "answer":
+                # Answers are checked against the challenge's live state, so
+                # answering here skips the HTTP round trip without a DB query
+                try:
+                    question_id = int(data.get("question_id"))
+                    selected_answer = str(data["selected_answer"])
+                except (KeyError, TypeError, ValueError):
+                    await self.send_error("question_id and selected_answer are required.")
+                    return
+                try:
+                    result, challenge_ended = await self.answer_service_call(
+                        question_id, selected_answer, data.get("time_taken_seconds")
+                    )
+                    await self.send_json_data(
+                        {
+                            "type": "answer_confirmation",
+                            "status": "success",
+                            "question_id": question_id,
+                            "is_correct": result.is_correct,
+                            "challenge_ended": challenge_ended,
+                        }
+                    )
+                except APIException as e:
+                    detail = e.detail[0] if isinstance(e.detail, list) else e.detail
+                    await self.send_error(str(detail))
+
             # Handle other message types if needed
 
         except json.JSONDecodeError:
@@ -294,6 +330,15 @@ class ChallengeConsumer(AsyncWebsocketConsumer):
         # Also, make sure `set_participant_ready` uses group_send internally.
         return set_participant_ready(challenge, user)
 
+    @database_sync_to_async
+    def answer_service_call(self, question_id, selected_answer, time_taken_seconds):
+        # The challenge was loaded on connect; reload it until it has started
+        if self.challenge.status != ChallengeStatus.ONGOING:
+            self.challenge = Challenge.objects.get(pk=self.challenge_pk)
+        return process_challenge_answer(
+            self.challenge, self.user, question_id, selected_answer, time_taken_seconds
+        )
+
 
 # --- Consumer for General User Notifications (Optional) ---
 
@@ -315,6 +360,8 @@ class ChallengeNotificationConsumer(AsyncWebsocketConsumer):
         # Join user-specific group
         await self.channel_layer.group_add(self.user_group_name, self.channel_name)
         await self.accept()
+        # Online users are the candidates for random matchmaking
+        await presence.aheartbeat(self.user.id)
         logger.info(
             f"User {self.user.id} connected to Challenge Notifications WebSocket"
         )
@@ -328,6 +375,10 @@ class ChallengeNotificationConsumer(AsyncWebsocketConsumer):
                 self.user_group_name, self.channel_name
             )
 
+    async def receive(self, text_data=None, bytes_data=None):
+        """Clients send {"type": "heartbeat"} periodically to stay online."""
+        await presence.aheartbeat(self.user.id)
+
     # --- Group message handlers ---
     async def new_challenge_invite(self, event):
         """Handles 'new.challenge.invite' message broadcast to the user."""
@@ -0,0 +1,433 @@
+import json
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Optional, Set
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Defaults to the presence Redis; unset means in-process state and answers written
+# straight to the database (tests, development)
+CHALLENGE_LIVE_STATE_REDIS_URL = getattr(
+    settings,
+    "CHALLENGE_LIVE_STATE_REDIS_URL",
+    getattr(settings, "PRESENCE_REDIS_URL", None),
+)
+# Live state of an abandoned challenge is dropped after this long without answers
+CHALLENGE_LIVE_STATE_TTL_SECONDS = getattr(
+    settings, "CHALLENGE_LIVE_STATE_TTL_SECONDS", 2 * 60 * 60
+)
+
+KEY_PREFIX = "challenge_live"
+DIRTY_KEY = f"{KEY_PREFIX}:dirty"
+
+# KEYS: answers, scores, answered, pending, dirty, meta
+# ARGV: question_id, selected_answer, user_id, is_correct (0/1), entry, challenge_id, ttl
+RECORD_ANSWER_SCRIPT = """
+if redis.call('HSETNX', KEYS[1], ARGV[1], ARGV[2]) == 0 then
+    return false
+end
+local score = redis.call('HINCRBY', KEYS[2], ARGV[3], ARGV[4])
+local answered = redis.call('HINCRBY', KEYS[3], ARGV[3], 1)
+redis.call('RPUSH', KEYS[4], ARGV[5])
+redis.call('SADD', KEYS[5], ARGV[6])
+for _, key in ipairs({KEYS[1], KEYS[2], KEYS[3], KEYS[4], KEYS[6]}) do
+    redis.call('EXPIRE', key, ARGV[7])
+end
+return {score, answered}
+"""
+
+# KEYS: pending, dirty
+# ARGV: challenge_id, entries...
+ACK_PENDING_SCRIPT = """
+for i = 2, #ARGV do
+    redis.call('LREM', KEYS[1], 1, ARGV[i])
+end
+if redis.call('LLEN', KEYS[1]) == 0 then
+    redis.call('SREM', KEYS[2], ARGV[1])
+end
+return redis.call('LLEN', KEYS[1])
+"""
+
+
+class AnswerResult(NamedTuple):
+    """Outcome of one recorded answer, as seen by the live state."""
+
+    user_id: int
+    question_id: int
+    selected_answer: str
+    is_correct: bool
+    score: int  # The user's score including this answer
+    answered: int  # Questions the user has answered so far, including this one
+
+
+class InMemoryLiveStore:
+    """
+    The Redis hash/list/set commands the live state needs, kept in process
+    memory. Used when no Redis URL is configured.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def hsetnx(self, name, key, value):
+        with self._lock:
+            values = self._data.setdefault(name, {})
+            if key in values:
+                return 0
+            values[key] = str(value)
+            return 1
+
+    def hset(self, name, key=None, value=None, mapping=None):
+        mapping = {**(mapping or {}), **({key: value} if key is not None else {})}
+        with self._lock:
+            self._data.setdefault(name, {}).update(
+                {key: str(value) for key, value in mapping.items()}
+            )
+
+    def hgetall(self, name):
+        with self._lock:
+            return dict(self._data.get(name, {}))
+
+    def hincrby(self, name, key, amount=1):
+        with self._lock:
+            values = self._data.setdefault(name, {})
+            values[key] = str(int(values.get(key, 0)) + amount)
+            return int(values[key])
+
+    def rpush(self, name, *values):
+        with self._lock:
+            items = self._data.setdefault(name, [])
+            items.extend(values)
+            return len(items)
+
+    def lrange(self, name, start, end):
+        with self._lock:
+            items = self._data.get(name, [])
+            return list(items[start : None if end == -1 else end + 1])
+
+    def lrem(self, name, count, value):
+        # Only the count=1 form (first match) is used
+        with self._lock:
+            items = self._data.get(name, [])
+            if value in items:
+                items.remove(value)
+                return 1
+            return 0
+
+    def llen(self, name):
+        with self._lock:
+            return len(self._data.get(name, []))
+
+    def sadd(self, name, *values):
+        with self._lock:
+            members = self._data.setdefault(name, set())
+            added = len(set(map(str, values)) - members)
+            members.update(map(str, values))
+            return added
+
+    def srem(self, name, *values):
+        with self._lock:
+            members = self._data.get(name, set())
+            removed = len(members & set(map(str, values)))
+            members.difference_update(map(str, values))
+            return removed
+
+    def smembers(self, name):
+        with self._lock:
+            return set(self._data.get(name, set()))
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def expire(self, name, seconds):
+        pass  # Finalized challenges are discarded explicitly
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    # --- Scripts ---
+    # In-process counterparts of the Lua scripts; callers run them under one lock
+    def record_answer(self, keys, args):
+        answers, scores, answered, pending, dirty, _meta = keys
+        question_id, selected_answer, user_id, is_correct, entry, challenge_id, _ttl = args
+        if not self.hsetnx(answers, question_id, selected_answer):
+            return None
+        score = self.hincrby(scores, user_id, int(is_correct))
+        answered_count = self.hincrby(answered, user_id, 1)
+        self.rpush(pending, entry)
+        self.sadd(dirty, challenge_id)
+        return [score, answered_count]
+
+    def ack_pending(self, keys, args):
+        pending, dirty = keys
+        challenge_id, *entries = args
+        for entry in entries:
+            self.lrem(pending, 1, entry)
+        if not self.llen(pending):
+            self.srem(dirty, challenge_id)
+        return self.llen(pending)
+
+
+class ChallengeLiveState:
+    """
+    The state of ongoing challenges that answering needs: each question's
+    correct answer, every participant's answered questions, score and
+    answered count. Each answer is recorded here in one Redis round trip (a
+    Lua script, so it is deduplicated, scored and queued atomically) and
+    queued for `flush_challenge_answers`, which writes the durable rows in
+    batches.
+
+    Per challenge, "meta" holds the answer key and each participant's
+    attempt payload; "answers:<user>" maps answered question
+    IDs to the selected answer (HSETNX makes a repeated answer a no-op);
+    "scores" and "answered" hold per-user counters; "pending" lists answers
+    not written to the database yet. Challenges with pending answers are in
+    one "dirty" set, swept periodically. Queued answers are only removed once
+    their rows are committed (`ack_pending`), so a failed write leaves them
+    queued for the next flush.
+
+    `load` writes everything with set-if-absent semantics, so concurrent
+    loads from the database never clobber answers recorded meanwhile.
+
+    Without a Redis URL the state lives in this process only, which other
+    web workers and the flush task cannot see; `write_behind` is then off and
+    callers write answers straight to the database instead.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = CHALLENGE_LIVE_STATE_REDIS_URL,
+        ttl_seconds: int = CHALLENGE_LIVE_STATE_TTL_SECONDS,
+    ):
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self._client = None
+        self._memory = None if redis_url else InMemoryLiveStore()
+        # Runs each in-process batch as a unit, as MULTI does in Redis
+        self._memory_lock = threading.Lock()
+        self._scripts = {}
+        # Only a state shared by every process may hold answers not yet written
+        self.write_behind = bool(redis_url)
+
+    # --- Clients ---
+    def _get_client(self):
+        if self._memory is not None:
+            return self._memory
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    def _execute(self, commands: List[tuple], transaction: bool = False) -> list:
+        client = self._get_client()
+        if self._memory is not None:
+            with self._memory_lock:
+                return [getattr(client, name)(*args) for name, *args in commands]
+        pipe = client.pipeline(transaction=transaction)
+        for name, *args in commands:
+            getattr(pipe, name)(*args)
+        return pipe.execute()
+
+    def _run_script(self, name: str, source: str, keys: List[str], args: list):
+        if self._memory is not None:
+            with self._memory_lock:
+                return getattr(self._memory, name)(keys, [str(arg) for arg in args])
+        if name not in self._scripts:
+            self._scripts[name] = self._get_client().register_script(source)
+        return self._scripts[name](keys=keys, args=args)
+
+    # --- Keys ---
+    @staticmethod
+    def _key(challenge_id: int, part: str) -> str:
+        return f"{KEY_PREFIX}:{challenge_id}:{part}"
+
+    def _answers_key(self, challenge_id: int, user_id: int) -> str:
+        return self._key(challenge_id, f"answers:{user_id}")
+
+    def _expire_commands(self, challenge_id: int, user_ids) -> List[tuple]:
+        keys = [
+            self._key(challenge_id, part)
+            for part in ("meta", "scores", "answered", "pending")
+        ]
+        keys += [self._answers_key(challenge_id, user_id) for user_id in user_ids]
+        return [("expire", key, self.ttl_seconds) for key in keys]
+
+    # --- State ---
+    def load(
+        self,
+        challenge_id: int,
+        answer_key: Dict[int, str],
+        participants: Dict[int, dict],
+        answers: Dict[int, Dict[int, str]],
+        scores: Dict[int, int],
+    ):
+        """
+        Seeds the live state of a challenge from the database. `participants`
+        maps user IDs to their serialized attempt; `answers` maps user IDs to
+        the {question_id: selected_answer} they already have on record.
+        """
+        commands = []
+        for user_id in participants:
+            user_answers = answers.get(user_id, {})
+            for question_id, selected_answer in user_answers.items():
+                commands.append(
+                    (
+                        "hsetnx",
+                        self._answers_key(challenge_id, user_id),
+                        str(question_id),
+                        selected_answer,
+                    )
+                )
+            commands += [
+                ("hsetnx", self._key(challenge_id, "scores"), str(user_id), scores.get(user_id, 0)),
+                ("hsetnx", self._key(challenge_id, "answered"), str(user_id), len(user_answers)),
+            ]
+        # Written last: its presence means the rest is in place
+        commands.append(
+            (
+                "hset",
+                self._key(challenge_id, "meta"),
+                None,
+                None,
+                {
+                    "answer_key": json.dumps(
+                        {str(question_id): answer for question_id, answer in answer_key.items()}
+                    ),
+                    "participants": json.dumps(
+                        {str(user_id): payload for user_id, payload in participants.items()}
+                    ),
+                },
+            )
+        )
+        self._execute(commands + self._expire_commands(challenge_id, participants))
+
+    def get_meta(self, challenge_id: int) -> Optional[dict]:
+        """The answer key and participant payloads, or None if not loaded."""
+        meta = self._get_client().hgetall(self._key(challenge_id, "meta"))
+        if not meta:
+            return None
+        return {
+            "answer_key": json.loads(meta["answer_key"]),
+            "participants": json.loads(meta["participants"]),
+        }
+
+    def record_answer(
+        self,
+        challenge_id: int,
+        user_id: int,
+        question_id: int,
+        selected_answer: str,
+        is_correct: bool,
+        time_taken_seconds: Optional[int],
+        answered_at: str,
+    ) -> Optional[AnswerResult]:
+        """
+        Records the answer and queues it for writing. Returns None if the user
+        already answered this question.
+        """
+        entry = self._encode_entry(
+            {
+                "user_id": user_id,
+                "question_id": question_id,
+                "selected_answer": selected_answer,
+                "is_correct": is_correct,
+                "time_taken_seconds": time_taken_seconds,
+                "answered_at": answered_at,
+            }
+        )
+        counts = self._run_script(
+            "record_answer",
+            RECORD_ANSWER_SCRIPT,
+            keys=[
+                self._answers_key(challenge_id, user_id),
+                self._key(challenge_id, "scores"),
+                self._key(challenge_id, "answered"),
+                self._key(challenge_id, "pending"),
+                DIRTY_KEY,
+                self._key(challenge_id, "meta"),
+            ],
+            args=[
+                question_id,
+                selected_answer,
+                user_id,
+                int(is_correct),
+                entry,
+                challenge_id,
+                self.ttl_seconds,
+            ],
+        )
+        if counts is None:
+            return None
+        score, answered = counts
+        return AnswerResult(
+            user_id=user_id,
+            question_id=question_id,
+            selected_answer=selected_answer,
+            is_correct=is_correct,
+            score=int(score),
+            answered=int(answered),
+        )
+
+    # --- Write-Behind Queue ---
+    @staticmethod
+    def _encode_entry(entry: dict) -> str:
+        # Entries are matched by their encoding when acknowledged; decoding
+        # keeps key order, so re-encoding a read entry gives the same string
+        return json.dumps(entry)
+
+    def read_pending(self, challenge_id: int) -> List[dict]:
+        """
+        Returns every answer queued for writing, oldest first, leaving them
+        queued until `ack_pending` is called with them.
+        """
+        entries = self._get_client().lrange(self._key(challenge_id, "pending"), 0, -1)
+        return [json.loads(entry) for entry in entries]
+
+    def ack_pending(self, challenge_id: int, entries: List[dict]):
+        """
+        Removes answers whose rows are committed from the queue. Answers queued
+        meanwhile stay, and the challenge stays dirty until none are left.
+        """
+        if not entries:
+            return
+        self._run_script(
+            "ack_pending",
+            ACK_PENDING_SCRIPT,
+            keys=[self._key(challenge_id, "pending"), DIRTY_KEY],
+            args=[challenge_id, *[self._encode_entry(entry) for entry in entries]],
+        )
+
+    def dirty_challenge_ids(self) -> Set[int]:
+        """Challenges with answers waiting to be written."""
+        return {int(member) for member in self._get_client().smembers(DIRTY_KEY)}
+
+    def discard(self, challenge_id: int, user_ids):
+        """Drops a challenge's live state once it has been finalized."""
+        self._execute(
+            [
+                (
+                    "delete",
+                    *[
+                        self._key(challenge_id, part)
+                        for part in ("meta", "scores", "answered", "pending")
+                    ],
+                    *[self._answers_key(challenge_id, user_id) for user_id in user_ids],
+                ),
+                ("srem", DIRTY_KEY, str(challenge_id)),
+            ]
+        )
+
+    def clear(self):
+        """Drops all in-process live state (tests / development only)."""
+        if self._memory is not None:
+            self._memory.clear()
+
+
+# Module-level singleton shared by the challenge services and consumers in this process
+challenge_live_state = ChallengeLiveState()
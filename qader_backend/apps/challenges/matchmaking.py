@@ -0,0 +1,180 @@
+import logging
+import time
+from typing import Iterator, Optional, Tuple
+
+import redis
+from django.conf import settings
+
+from apps.users.presence import InMemorySortedSets
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Defaults to the presence Redis; unset means an in-process queue (tests, development)
+MATCHMAKING_REDIS_URL = getattr(
+    settings, "MATCHMAKING_REDIS_URL", getattr(settings, "PRESENCE_REDIS_URL", None)
+)
+# Width of a level bucket, in level points (levels are 0-100)
+MATCHMAKING_LEVEL_BUCKET_SIZE = getattr(settings, "MATCHMAKING_LEVEL_BUCKET_SIZE", 10)
+# Buckets a brand new request may reach, and the most any request reaches
+MATCHMAKING_INITIAL_WINDOW = getattr(settings, "MATCHMAKING_INITIAL_WINDOW", 0)
+MATCHMAKING_MAX_WINDOW = getattr(settings, "MATCHMAKING_MAX_WINDOW", 3)
+# A waiting request reaches one bucket further per this many seconds
+MATCHMAKING_WINDOW_WIDEN_SECONDS = getattr(
+    settings, "MATCHMAKING_WINDOW_WIDEN_SECONDS", 15
+)
+# Requests waiting longer than this are dropped and their challenge expires
+MATCHMAKING_TIMEOUT_SECONDS = getattr(settings, "MATCHMAKING_TIMEOUT_SECONDS", 120)
+# Oldest entries looked at per bucket when searching
+MATCHMAKING_PEEK_SIZE = getattr(settings, "MATCHMAKING_PEEK_SIZE", 10)
+
+DEFAULT_LEVEL = 50.0
+QUEUE_KEY_PREFIX = "matchmaking"
+
+
+def average_level(profile) -> float:
+    """
+    Average of the user's verbal/quantitative levels (0-100). Users without an
+    assessed level count as average.
+    """
+    levels = [
+        level
+        for level in (
+            getattr(profile, "current_level_verbal", None),
+            getattr(profile, "current_level_quantitative", None),
+        )
+        if level is not None
+    ]
+    level = sum(levels) / len(levels) if levels else DEFAULT_LEVEL
+    return min(max(level, 0.0), 100.0)
+
+
+def level_bucket(profile) -> int:
+    return int(average_level(profile) // MATCHMAKING_LEVEL_BUCKET_SIZE)
+
+
+def max_bucket() -> int:
+    return int(100 // MATCHMAKING_LEVEL_BUCKET_SIZE)
+
+
+def search_window(waited_seconds: float) -> int:
+    """How many buckets away a request that has waited this long may match."""
+    widened = int(waited_seconds // MATCHMAKING_WINDOW_WIDEN_SECONDS)
+    return min(MATCHMAKING_MAX_WINDOW, MATCHMAKING_INITIAL_WINDOW + widened)
+
+
+class MatchmakingQueue:
+    """
+    Random-challenge requests waiting for an opponent, in one Redis sorted set
+    per (challenge type, level bucket), scored by enqueue time.
+
+    A search walks the buckets outwards from the searcher's own and looks at
+    the oldest entries of each: a pair matches when the bucket distance is
+    within either side's window, and windows widen the longer a request
+    waits. Each step is an O(log n) sorted-set operation over a fixed number
+    of buckets.
+
+    Searching does not remove anything: the joiner locks the challenge row,
+    which decides between concurrent searches, and removes the entry once
+    the join is committed. A rolled-back join leaves the request waiting.
+    """
+
+    def __init__(self, redis_url: Optional[str] = MATCHMAKING_REDIS_URL):
+        self.redis_url = redis_url
+        self._client = None
+        self._memory = None if redis_url else InMemorySortedSets()
+
+    def _get_client(self):
+        if self._memory is not None:
+            return self._memory
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    @staticmethod
+    def _key(challenge_type: str, bucket: int) -> str:
+        return f"{QUEUE_KEY_PREFIX}:{challenge_type}:{bucket}"
+
+    @staticmethod
+    def _member(user_id: int, challenge_id: int) -> str:
+        return f"{user_id}:{challenge_id}"
+
+    def enqueue(
+        self, user_id: int, challenge_id: int, challenge_type: str, bucket: int
+    ):
+        try:
+            self._get_client().zadd(
+                self._key(challenge_type, bucket),
+                {self._member(user_id, challenge_id): time.time()},
+            )
+        except redis.RedisError as e:
+            logger.error(f"Could not queue challenge {challenge_id} for matchmaking: {e}")
+
+    def remove(
+        self, user_id: int, challenge_id: int, challenge_type: str, bucket: int
+    ):
+        try:
+            self._get_client().zrem(
+                self._key(challenge_type, bucket), self._member(user_id, challenge_id)
+            )
+        except redis.RedisError as e:
+            logger.warning(
+                f"Could not remove challenge {challenge_id} from matchmaking: {e}"
+            )
+
+    def candidates(
+        self, user_id: int, challenge_type: str, bucket: int
+    ) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yields (user_id, challenge_id, bucket) of the waiting requests this user
+        may join, best first: nearest bucket first, oldest first within a
+        bucket. Entries stay queued; see `remove`.
+        """
+        client = self._get_client()
+        now = time.time()
+        try:
+            for distance in range(MATCHMAKING_MAX_WINDOW + 1):
+                for candidate_bucket in sorted({bucket - distance, bucket + distance}):
+                    if not 0 <= candidate_bucket <= max_bucket():
+                        continue
+                    entries = client.zrange(
+                        self._key(challenge_type, candidate_bucket),
+                        0,
+                        MATCHMAKING_PEEK_SIZE - 1,
+                        withscores=True,
+                    )
+                    for member, enqueued_at in entries:
+                        waited = now - enqueued_at
+                        if waited > MATCHMAKING_TIMEOUT_SECONDS:
+                            continue  # Left for `prune`
+                        if distance > search_window(waited):
+                            break  # Newer entries have narrower windows
+                        owner_id, challenge_id = map(int, member.split(":"))
+                        if owner_id != user_id:
+                            yield owner_id, challenge_id, candidate_bucket
+        except redis.RedisError as e:
+            logger.error(f"Matchmaking search failed for user {user_id}: {e}")
+
+    def prune(self, challenge_types) -> int:
+        """Drops requests older than MATCHMAKING_TIMEOUT_SECONDS from every queue."""
+        client = self._get_client()
+        cutoff = time.time() - MATCHMAKING_TIMEOUT_SECONDS
+        removed = 0
+        try:
+            for challenge_type in challenge_types:
+                for bucket in range(max_bucket() + 1):
+                    removed += client.zremrangebyscore(
+                        self._key(challenge_type, bucket), float("-inf"), cutoff
+                    )
+        except redis.RedisError as e:
+            logger.error(f"Could not prune matchmaking queues: {e}")
+        return removed
+
+    def clear(self):
+        """Drops all in-process queues (tests / development only)."""
+        if self._memory is not None:
+            self._memory.clear()
+
+
+# Module-level singleton shared by the challenge services in this process
+matchmaking_queue = MatchmakingQueue()
@@ -152,7 +152,8 @@ class Challenge(BaseModel):
 
     def is_participant(self, user: settings.AUTH_USER_MODEL) -> bool:
         """Checks if a given user is a participant in this challenge."""
-        return user in self.participants
+        # Compares IDs so neither participant has to be fetched
+        return user.pk is not None and user.pk in (self.challenger_id, self.opponent_id)
 
     @property
     def num_questions(self) -> int:
@@ -1,13 +1,16 @@
 import random
 import logging
 import json  # Add json import
-from typing import Tuple, Optional
+from datetime import timedelta
+from typing import Dict, List, Tuple, Optional
 
+import redis
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Q, F
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from rest_framework.exceptions import ValidationError, PermissionDenied
 from django.utils.translation import gettext_lazy as _
@@ -23,9 +26,25 @@ from .models import Challenge, ChallengeAttempt, ChallengeType, ChallengeStatus
 from apps.learning.models import (
     Question,
 )  # Removed unused LearningSection, LearningSubSection
+from apps.learning.services import question_pool_index
 from apps.study.models import UserQuestionAttempt
-from apps.gamification.services import award_points, check_and_award_badge, PointReason
+from apps.study.services import statistics as statistics_services
+from apps.gamification.services import (
+    award_points,
+    award_points_bulk,
+    evaluate_badges,
+    increment_badge_counters,
+    PointReason,
+)
 from apps.users.models import UserProfile  # For level matching
+from .matchmaking import (
+    DEFAULT_LEVEL,
+    MATCHMAKING_TIMEOUT_SECONDS,
+    average_level,
+    level_bucket,
+    matchmaking_queue,
+)
+from .live_state import AnswerResult, challenge_live_state
 from apps.notifications.services import create_notification
 
 # Import serializers to format broadcast data
@@ -186,26 +205,40 @@ def broadcast_challenge_start(challenge: Challenge):
         )
 
 
-def broadcast_answer_result(attempt: UserQuestionAttempt, challenge_id: int):
-    """Broadcasts the result of a single answer submission."""
+def broadcast_live_participant_update(challenge_id: int, payload: dict):
+    """Sends a participant update built from the live state, without a database read."""
     channel_layer = get_channel_layer()
     if not channel_layer:
         return
     group_name = f"challenge_{challenge_id}"
     try:
-        # Fetch current score *after* potential update in process_challenge_answer
-        current_score = (
-            ChallengeAttempt.objects.values_list("score", flat=True)
-            .filter(challenge_id=challenge_id, user_id=attempt.user_id)
-            .first()
+        async_to_sync(channel_layer.group_send)(
+            group_name,
+            {
+                "type": "participant.update",
+                "payload": payload,
+            },
+        )
+    except Exception as e:
+        logger.error(
+            f"Error broadcasting live participant update for challenge {challenge_id}: {e}",
+            exc_info=True,
         )
 
+
+def broadcast_answer_result(attempt: AnswerResult, challenge_id: int):
+    """Broadcasts the result of a single answer submission."""
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    group_name = f"challenge_{challenge_id}"
+    try:
         payload = {
             "user_id": attempt.user_id,
             "question_id": attempt.question_id,
             "is_correct": attempt.is_correct,
             "selected_answer": attempt.selected_answer,
-            "current_score": current_score if current_score is not None else 0,
+            "current_score": attempt.score,
         }
         async_to_sync(channel_layer.group_send)(
             group_name,
@@ -272,32 +305,75 @@ def notify_user(user_id: int, event_type: str, payload: dict):
 # --- Question/Opponent Selection Helper Functions ---
 
 
-def _get_challenge_questions(config: dict) -> list[int]:
-    """Selects random questions based on the challenge configuration."""
-    num_questions = config.get("num_questions", 10)
-    section_slugs = config.get("sections", [])
-    subsection_slugs = config.get("subsections", [])
-    skill_slugs = config.get("skills", [])
-
-    # Build filter query
-    filters = Q(is_active=True)
-    # Apply filters progressively specific -> general
-    if skill_slugs:
-        filters &= Q(skill__slug__in=skill_slugs)
-    elif subsection_slugs:
-        filters &= Q(subsection__slug__in=subsection_slugs)
-    elif section_slugs:
-        # Assuming Question has direct FK to Subsection, and Subsection has FK to Section
-        filters &= Q(subsection__section__slug__in=section_slugs)
-    else:
-        # No filters applied, might select from all active questions
-        pass
+def _difficulty_target(participants) -> float:
+    """
+    Difficulty (1-5) matching the participants' average level (0-100), so
+    the question set sits between both players rather than favouring one.
+    Participants without an assessed level count as average.
+    """
+    levels = [
+        average_level(getattr(user, "profile", None)) for user in participants
+    ]
+    level = sum(levels) / len(levels) if levels else DEFAULT_LEVEL
+    return 1 + 4 * level / 100
+
 
-    question_ids = list(
-        Question.objects.filter(filters)
-        .order_by("?")  # Random order
-        .values_list("id", flat=True)[:num_questions]
+def _allocate_by_difficulty(
+    num_questions: int, available: Dict[int, int], target: float
+) -> Dict[int, int]:
+    """
+    Splits num_questions across difficulties, weighted towards `target` but
+    spread over the neighbouring levels, capped by what each level has.
+    """
+    counts = {difficulty: 0 for difficulty in available}
+    remaining = min(num_questions, sum(available.values()))
+    while remaining > 0:
+        weights = {
+            difficulty: 1.0 / (1.0 + abs(difficulty - target))
+            for difficulty, size in available.items()
+            if counts[difficulty] < size
+        }
+        total_weight = sum(weights.values())
+        shares = {d: remaining * w / total_weight for d, w in weights.items()}
+        allotments = {d: int(share) for d, share in shares.items()}
+        # Largest remainders get the questions lost to rounding down
+        leftover = remaining - sum(allotments.values())
+        for difficulty in sorted(
+            shares, key=lambda d: shares[d] - allotments[d], reverse=True
+        )[:leftover]:
+            allotments[difficulty] += 1
+        # Levels that run short hand their excess to the others next round
+        for difficulty, allotment in allotments.items():
+            allotment = min(allotment, available[difficulty] - counts[difficulty])
+            counts[difficulty] += allotment
+            remaining -= allotment
+    return counts
+
+
+def _get_challenge_questions(config: dict, participants=()) -> list[int]:
+    """
+    Selects random questions based on the challenge configuration, with a
+    difficulty mix centred on the participants' average level. Draws from the
+    in-memory question pool index, so the cost depends on the number of
+    questions drawn, not on the size of the question bank.
+    """
+    num_questions = config.get("num_questions", 10)
+    pools = question_pool_index.pools_by_difficulty(
+        section_slugs=config.get("sections", []),
+        subsection_slugs=config.get("subsections", []),
+        skill_slugs=config.get("skills", []),
+    )
+    available = {
+        difficulty: sum(len(pool) for pool in difficulty_pools)
+        for difficulty, difficulty_pools in pools.items()
+        if difficulty_pools
+    }
+    counts = _allocate_by_difficulty(
+        num_questions, available, _difficulty_target(participants)
     )
+    question_ids = []
+    for difficulty, count in counts.items():
+        question_ids += question_pool_index.draw(pools[difficulty], count)
 
     # Ensure exact number requested, handle cases with fewer available questions
     if len(question_ids) < num_questions:
@@ -310,32 +386,55 @@ def _get_challenge_questions(config: dict) -> list[int]:
                 _("No suitable questions found for this challenge configuration.")
             )
         # Proceed with fewer questions
-    elif len(question_ids) > num_questions:  # Should not happen with slice
-        question_ids = question_ids[:num_questions]
 
-    random.shuffle(question_ids)  # Shuffle again for good measure
+    random.shuffle(question_ids)  # Mix the difficulty levels
     return question_ids
 
 
-def _find_random_opponent(challenger: User) -> Optional[User]:
-    """Finds a suitable random opponent (basic implementation)."""
-    # Placeholder: Implement real matchmaking logic
-    # - Consider UserProfile level for matching
-    # - Check for users actively seeking random challenges (new model field?)
-    # - Prioritize online users (requires presence tracking - complex)
-    # Basic: Find any other active user with a profile
-    possible_opponents = (
-        User.objects.filter(is_active=True, profile__isnull=False)
-        .exclude(pk=challenger.pk)
-        .order_by("?")  # Random opponent
-    )
-    # Future: Filter by level difference:
-    # challenger_level = challenger.profile.get_current_level() # Assumes method exists
-    # possible_opponents = possible_opponents.annotate(
-    #     level_diff=Abs(F('profile__level_field') - challenger_level)
-    # ).filter(level_diff__lte=2).order_by('level_diff', '?') # Prioritize closer levels
+def _join_random_challenge(
+    challenger: User, challenge_type: str
+) -> Optional[Challenge]:
+    """
+    Pairs the challenger with a random challenge of the same type waiting in
+    the matchmaking queue (see matchmaking.MatchmakingQueue), joining it as
+    the opponent. Returns None when nobody suitable is waiting.
 
-    return possible_opponents.first()
+    The challenge row lock decides between concurrent joiners; the queue entry
+    is only removed once the join is committed.
+    """
+    bucket = level_bucket(challenger.profile)
+    for waiting_user_id, challenge_id, entry_bucket in matchmaking_queue.candidates(
+        challenger.pk, challenge_type, bucket
+    ):
+        waiting = Challenge.objects.filter(
+            pk=challenge_id,
+            challenge_type=challenge_type,
+            status=ChallengeStatus.PENDING_MATCHMAKING,
+            opponent__isnull=True,
+        ).exclude(challenger=challenger)
+        # Rows another search is joining right now are skipped, not waited on
+        challenge = waiting.select_for_update(skip_locked=True).first()
+        if challenge:
+            break
+        if not waiting.exists():
+            # The queue may outlive the challenge (cancelled, expired, joined)
+            matchmaking_queue.remove(
+                waiting_user_id, challenge_id, challenge_type, entry_bucket
+            )
+    else:
+        return None
+
+    challenge.opponent = challenger
+    challenge.status = ChallengeStatus.ACCEPTED  # Auto-accept random matches
+    challenge.accepted_at = timezone.now()
+    challenge.save(update_fields=["opponent", "status", "accepted_at", "updated_at"])
+    ChallengeAttempt.objects.create(challenge=challenge, user=challenger)
+    transaction.on_commit(
+        lambda: matchmaking_queue.remove(
+            waiting_user_id, challenge_id, challenge_type, entry_bucket
+        )
+    )
+    return challenge
 
 
 # --- Core Service Functions ---
@@ -371,7 +470,31 @@ def start_challenge(
     except (KeyError, ValueError):
         raise ValidationError(_("Invalid challenge type specified."))
 
-    question_ids = _get_challenge_questions(config)
+    if not opponent:
+        # Random matchmaking: join a compatible waiting challenge if there is one
+        joined_challenge = _join_random_challenge(challenger, challenge_type)
+        if joined_challenge:
+            logger.info(
+                f"User {challenger.username} joined random challenge {joined_challenge.id} "
+                f"of {joined_challenge.challenger.username}."
+            )
+            accept_payload = {
+                "challenge_id": joined_challenge.id,
+                "accepted_by": challenger.username,
+            }
+            notify_user(
+                joined_challenge.challenger_id,
+                "challenge_accepted_notification",
+                accept_payload,
+            )
+            broadcast_challenge_update(joined_challenge)
+            message = _("Random challenge started with {username}!").format(
+                username=joined_challenge.challenger.username
+            )
+            return joined_challenge, message, ChallengeStatus.ACCEPTED
+
+    participants = [challenger, opponent] if opponent else [challenger]
+    question_ids = _get_challenge_questions(config, participants)
     if not question_ids:
         # _get_challenge_questions should raise if none found, but double check
         raise ValidationError(
@@ -400,20 +523,9 @@ def start_challenge(
     found_opponent = opponent  # Track if we have a definite opponent
 
     if not opponent:
-        # Random Matchmaking logic
-        random_opponent = _find_random_opponent(challenger)
-        if random_opponent:
-            opponent = random_opponent  # Assign found opponent
-            found_opponent = opponent
-            initial_status = ChallengeStatus.ACCEPTED  # Auto-accept random matches
-            message = _("Random challenge started with {username}!").format(
-                username=opponent.username
-            )
-            # TODO: Need robust notification system if opponent isn't immediately connected via WS
-        else:
-            initial_status = ChallengeStatus.PENDING_MATCHMAKING
-            message = _("Searching for a random opponent...")
-            # TODO: Add logic for async matchmaking (e.g., Celery task + polling/WS updates)
+        # Nobody compatible is waiting: wait in the matchmaking queue ourselves
+        initial_status = ChallengeStatus.PENDING_MATCHMAKING
+        message = _("Searching for a random opponent...")
     else:
         # Direct Invite logic
         message = _("Challenge issued to {username}!").format(
@@ -461,9 +573,14 @@ def start_challenge(
             email_subject=_("You have a new challenge!"),
             email_body_template_name="emails/new_challenge",
         )
-    elif initial_status == ChallengeStatus.ACCEPTED:  # Random match found and accepted
-        # Both participants are in, broadcast initial state to challenge group
-        broadcast_challenge_update(challenge)
+    elif initial_status == ChallengeStatus.PENDING_MATCHMAKING:
+        # Queue only once committed, so nobody can join a rolled-back challenge
+        bucket = level_bucket(challenger.profile)
+        transaction.on_commit(
+            lambda: matchmaking_queue.enqueue(
+                challenger.pk, challenge.pk, challenge_type, bucket
+            )
+        )
 
     return challenge, message, initial_status
 
@@ -530,9 +647,14 @@ def cancel_challenge(challenge: Challenge, user: User) -> Challenge:
     ]:
         raise ValidationError(_("Challenge cannot be cancelled in its current state."))
 
+    was_matchmaking = challenge.status == ChallengeStatus.PENDING_MATCHMAKING
     challenge.status = ChallengeStatus.CANCELLED
     challenge.save(update_fields=["status"])
     logger.info(f"Challenge {challenge.id} cancelled by {user.username}")
+    if was_matchmaking:
+        matchmaking_queue.remove(
+            user.pk, challenge.pk, challenge.challenge_type, level_bucket(user.profile)
+        )
 
     # --- Broadcast ---
     # Notify opponent if they were invited (optional)
@@ -592,6 +714,13 @@ def set_participant_ready(challenge: Challenge, user: User) -> Tuple[Challenge,
             challenge.started_at = timezone.now()  # Mark overall challenge start
             challenge.save(update_fields=["status", "started_at"])
             logger.info(f"Challenge {challenge.id} transitioned to ONGOING.")
+            try:
+                if challenge_live_state.write_behind:
+                    _load_live_state(challenge)  # So the first answer needs no queries
+            except redis.RedisError as e:
+                logger.warning(
+                    f"Could not preload live state for Challenge {challenge.id}: {e}"
+                )
 
             # --- Broadcast Challenge Start ---
             broadcast_challenge_start(challenge)
@@ -610,8 +739,17 @@ def process_challenge_answer(
     question_id: int,
     selected_answer: str,
     time_taken_seconds: Optional[int],
-) -> Tuple[UserQuestionAttempt, bool]:
-    """Processes a user's answer during a challenge."""
+) -> Tuple[AnswerResult, bool]:
+    """
+    Processes a user's answer during a challenge.
+
+    The answer is checked and recorded against the challenge's live state,
+    so no database query is needed; the durable rows are written behind by
+    `flush_challenge_answers`. Once the user has answered every question,
+    their answers are written right away and the challenge is finalized if
+    everyone is done. Without a shared (Redis) live state the answer is
+    written to the database directly.
+    """
     if not challenge.is_participant(user):
         raise PermissionDenied(_("You are not a participant in this challenge."))
     if challenge.status != ChallengeStatus.ONGOING:
@@ -619,14 +757,107 @@ def process_challenge_answer(
     if question_id not in challenge.question_ids:
         raise ValidationError(_("Invalid question for this challenge."))
 
+    if challenge_live_state.write_behind:
+        result, participant_payload = _record_live_answer(
+            challenge, user, question_id, selected_answer, time_taken_seconds
+        )
+    else:
+        result, participant_payload = _record_answer_in_db(
+            challenge, user, question_id, selected_answer, time_taken_seconds
+        )
+
+    logger.info(
+        f"User {user.username} answered Q:{question_id} in Challenge {challenge.id}. Correct: {result.is_correct}. Score: {result.score}"
+    )
+
+    # --- Broadcast Answer Result ---
+    broadcast_answer_result(result, challenge.id)
+
+    challenge_ended = False
+    if result.answered < challenge.num_questions:
+        broadcast_live_participant_update(
+            challenge.id, {**participant_payload, "score": result.score}
+        )
+        return result, challenge_ended
+
+    # The user is done: write their answers now so finalization sees them
+    attempts = flush_challenge_answers(challenge.id, finished_user_id=user.id)
+    logger.info(f"User {user.username} finished their part of Challenge {challenge.id}")
+    if user.id in attempts:
+        broadcast_participant_update(attempts[user.id])
+    # Now check if *both* players have finished to finalize
+    if _check_and_finalize_challenge(challenge):
+        challenge_ended = True  # finalize_challenge handles end broadcast
+
+    # TODO: Add check for time limit expiration (better handled by scheduled task or consumer logic)
+
+    return result, challenge_ended
+
+
+def _record_live_answer(
+    challenge: Challenge,
+    user: User,
+    question_id: int,
+    selected_answer: str,
+    time_taken_seconds: Optional[int],
+) -> Tuple[AnswerResult, dict]:
+    """
+    Checks and records the answer in the challenge's live state. Returns the
+    result and the user's participant payload.
+    """
+    live_meta = challenge_live_state.get_meta(challenge.id) or _load_live_state(
+        challenge
+    )
+    participant_payload = live_meta["participants"].get(str(user.id))
+    if participant_payload is None:
+        # Should not happen if attempts are created on start/accept
+        logger.error(
+            f"Missing ChallengeAttempt for user {user.id} in challenge {challenge.id}"
+        )
+        raise ValidationError(_("Challenge participation record not found."))
+    correct_answer = live_meta["answer_key"].get(str(question_id))
+    if correct_answer is None:
+        raise ValidationError(_("Question not found."))
+
+    result = challenge_live_state.record_answer(
+        challenge.id,
+        user.id,
+        question_id,
+        selected_answer,
+        is_correct=correct_answer == selected_answer,
+        time_taken_seconds=time_taken_seconds,
+        answered_at=timezone.now().isoformat(),
+    )
+    if result is None:
+        raise ValidationError(
+            _("You have already answered this question in this challenge.")
+        )
+    return result, participant_payload
+
+
+def _record_answer_in_db(
+    challenge: Challenge,
+    user: User,
+    question_id: int,
+    selected_answer: str,
+    time_taken_seconds: Optional[int],
+) -> Tuple[AnswerResult, dict]:
+    """
+    Checks the answer and writes its question attempt right away, for when the
+    live state is private to this process. Returns the result and the user's
+    participant payload.
+    """
     try:
         question = Question.objects.get(pk=question_id)
     except Question.DoesNotExist:
         raise ValidationError(_("Question not found."))
 
-    challenge_attempt = ChallengeAttempt.objects.filter(
-        challenge=challenge, user=user
-    ).first()
+    # The lock serializes answers of one user, so the duplicate check holds
+    challenge_attempt = (
+        ChallengeAttempt.objects.select_for_update()
+        .filter(challenge=challenge, user=user)
+        .first()
+    )
     if not challenge_attempt:
         # Should not happen if attempts are created on start/accept
         logger.error(
@@ -634,15 +865,12 @@ def process_challenge_answer(
         )
         raise ValidationError(_("Challenge participation record not found."))
 
-    # Check if already answered this question in this challenge
     if challenge_attempt.question_attempts.filter(question=question).exists():
         raise ValidationError(
             _("You have already answered this question in this challenge.")
         )
 
     is_correct = question.correct_answer == selected_answer
-
-    # Create the specific question attempt record
     user_question_attempt = UserQuestionAttempt.objects.create(
         user=user,
         question=question,
@@ -651,49 +879,22 @@ def process_challenge_answer(
         time_taken_seconds=time_taken_seconds,
         mode=UserQuestionAttempt.Mode.CHALLENGE,
     )
-    # Link it to the ChallengeAttempt via M2M
     challenge_attempt.question_attempts.add(user_question_attempt)
-
-    # Update score immediately
     if is_correct:
-        # Use F expression for atomic increment
         ChallengeAttempt.objects.filter(pk=challenge_attempt.pk).update(
             score=F("score") + 1
         )
-        # Refresh the instance variable if needed later in this function
-        challenge_attempt.refresh_from_db(fields=["score"])
-
-    logger.info(
-        f"User {user.username} answered Q:{question_id} in Challenge {challenge.id}. Correct: {is_correct}. Score: {challenge_attempt.score}"
-    )
-
-    # --- Broadcast Answer Result ---
-    broadcast_answer_result(user_question_attempt, challenge.id)
-
-    # --- Broadcast Participant Score Update --- (Send full attempt state for simplicity)
-    # Refresh attempt again *after* score update and before broadcasting
     challenge_attempt.refresh_from_db()
-    broadcast_participant_update(challenge_attempt)
-
-    challenge_ended = False
-    # Check if challenge ended for THIS user
-    num_answered = challenge_attempt.question_attempts.count()
-    num_total_questions = challenge.num_questions  # Use property
-
-    if num_answered >= num_total_questions:
-        if not challenge_attempt.end_time:  # Set end time only once
-            challenge_attempt.end_time = timezone.now()
-            challenge_attempt.save(update_fields=["end_time"])
-            logger.info(
-                f"User {user.username} finished their part of Challenge {challenge.id}"
-            )
-        # Now check if *both* players have finished to finalize
-        if _check_and_finalize_challenge(challenge):
-            challenge_ended = True  # finalize_challenge handles end broadcast
 
-    # TODO: Add check for time limit expiration (better handled by scheduled task or consumer logic)
-
-    return user_question_attempt, challenge_ended
+    result = AnswerResult(
+        user_id=user.id,
+        question_id=question_id,
+        selected_answer=selected_answer,
+        is_correct=is_correct,
+        score=challenge_attempt.score,
+        answered=challenge_attempt.question_attempts.count(),
+    )
+    return result, ChallengeAttemptSerializer(challenge_attempt).data
 
 
 def _check_and_finalize_challenge(challenge: Challenge) -> bool:
@@ -758,6 +959,14 @@ def finalize_challenge(challenge: Challenge):
         )
         return
 
+    # Answers still queued in the live state count towards the final scores
+    flush_challenge_answers(challenge.id)
+    transaction.on_commit(
+        lambda: challenge_live_state.discard(
+            challenge.id, [challenge.challenger_id, challenge.opponent_id]
+        )
+    )
+
     challenger_attempt = challenge.attempts.filter(user=challenge.challenger).first()
     opponent_attempt = (
         challenge.attempts.filter(user=challenge.opponent).first()
@@ -867,19 +1076,224 @@ def finalize_challenge(challenge: Challenge):
         )
 
     if winner:
-        challenge_badge_slugs = list(
-            Badge.objects.filter(
-                is_active=True, criteria_type=Badge.BadgeCriteriaType.CHALLENGES_WON
-            ).values_list("slug", flat=True)
-        )
-        for slug in challenge_badge_slugs:
-            check_and_award_badge(winner, slug)
+        evaluate_badges(winner, criteria_types=[Badge.BadgeCriteriaType.CHALLENGES_WON])
 
     # --- Broadcast Challenge End ---
     broadcast_challenge_end(challenge)
     logger.info(f"Challenge {challenge.id} finalized completely.")
 
 
+# --- Live Challenge State ---
+
+
+def _load_live_state(challenge: Challenge) -> dict:
+    """
+    Seeds the challenge's live state from the database (answer key, attempts,
+    answers on record) and returns its meta. Raises if it is no longer ongoing.
+    """
+    if not Challenge.objects.filter(
+        pk=challenge.id, status=ChallengeStatus.ONGOING
+    ).exists():
+        raise ValidationError(_("Challenge is not ongoing."))
+    answer_key = dict(
+        Question.objects.filter(pk__in=challenge.question_ids).values_list(
+            "id", "correct_answer"
+        )
+    )
+    attempts = ChallengeAttempt.objects.filter(challenge=challenge).select_related(
+        "user"
+    )
+    answers: Dict[int, Dict[int, str]] = {}
+    for user_id, question_id, selected_answer in UserQuestionAttempt.objects.filter(
+        challenge_context__challenge=challenge
+    ).values_list("challenge_context__user_id", "question_id", "selected_answer"):
+        answers.setdefault(user_id, {})[question_id] = selected_answer or ""
+    challenge_live_state.load(
+        challenge.id,
+        answer_key=answer_key,
+        participants={
+            attempt.user_id: ChallengeAttemptSerializer(attempt).data
+            for attempt in attempts
+        },
+        answers=answers,
+        scores={attempt.user_id: attempt.score for attempt in attempts},
+    )
+    logger.debug(f"Loaded live state for Challenge {challenge.id}.")
+    return challenge_live_state.get_meta(challenge.id)
+
+
+def _write_challenge_answers(
+    attempts: Dict[int, ChallengeAttempt], entries: List[dict]
+) -> int:
+    """
+    Bulk-creates the question attempts for answers read from the live state,
+    links them to their challenge attempts and adds the correct ones to the
+    scores. Answers whose question already has a row on the challenge attempt
+    are skipped, so writing the same entries twice is harmless. Returns the
+    number of rows written. Callers hold a lock on the challenge attempts.
+    """
+    entries_by_user: Dict[int, List[dict]] = {}
+    for entry in entries:
+        entries_by_user.setdefault(entry["user_id"], []).append(entry)
+
+    written = 0
+    mode_display = dict(UserQuestionAttempt.Mode.choices)[
+        UserQuestionAttempt.Mode.CHALLENGE
+    ]
+    for user_id, user_entries in entries_by_user.items():
+        attempt = attempts.get(user_id)
+        if attempt is None:
+            logger.error(
+                f"Dropping {len(user_entries)} live answers of user {user_id}: no ChallengeAttempt."
+            )
+            continue
+        already_written = set(
+            attempt.question_attempts.filter(
+                question_id__in=[entry["question_id"] for entry in user_entries]
+            ).values_list("question_id", flat=True)
+        )
+        new_entries = {}
+        for entry in user_entries:
+            if entry["question_id"] not in already_written:
+                new_entries.setdefault(entry["question_id"], entry)
+        if not new_entries:
+            continue
+        question_attempts = UserQuestionAttempt.objects.bulk_create(
+            [
+                UserQuestionAttempt(
+                    user_id=user_id,
+                    question_id=entry["question_id"],
+                    selected_answer=entry["selected_answer"],
+                    is_correct=entry["is_correct"],
+                    time_taken_seconds=entry["time_taken_seconds"],
+                    mode=UserQuestionAttempt.Mode.CHALLENGE,
+                    attempted_at=parse_datetime(entry["answered_at"]),
+                )
+                for entry in new_entries.values()
+            ]
+        )
+        attempt.question_attempts.add(*question_attempts)
+        solved = [qa for qa in question_attempts if qa.is_correct]
+        if solved:
+            ChallengeAttempt.objects.filter(pk=attempt.pk).update(
+                score=F("score") + len(solved)
+            )
+            attempt.score += len(solved)
+        written += len(question_attempts)
+
+        # bulk_create skips post_save, so apply the per-answer side effects here
+        increment_badge_counters(user_id, questions_solved_correctly=len(solved))
+        statistics_services.record_question_attempt_statistics(
+            user_id,
+            [
+                (qa.question_id, None, (qa.is_correct, qa.time_taken_seconds))
+                for qa in question_attempts
+            ],
+        )
+        if solved and settings.POINTS_QUESTION_SOLVED_CORRECT > 0:
+            solved_questions = Question.objects.in_bulk(
+                [qa.question_id for qa in solved]
+            )
+            award_points_bulk(
+                user=attempt.user,
+                points_per_object=settings.POINTS_QUESTION_SOLVED_CORRECT,
+                reason_code=PointReason.QUESTION_SOLVED,
+                related_objects=[solved_questions[qa.question_id] for qa in solved],
+                description_fn=lambda question: gettext(
+                    "Solved Question #{qid} ({mode})"
+                ).format(qid=question.id, mode=mode_display),
+            )
+    return written
+
+
+def flush_challenge_answers(
+    challenge_id: int, finished_user_id: Optional[int] = None
+) -> Dict[int, ChallengeAttempt]:
+    """
+    Writes the answers queued in the challenge's live state in one
+    transaction. With `finished_user_id`, also sets that user's end time.
+    Returns the challenge's attempts by user ID, as written.
+    """
+    with transaction.atomic():
+        # Locking the attempts first makes concurrent flushes of one challenge
+        # run one after another, so a finishing user sees every earlier answer
+        attempts = {
+            attempt.user_id: attempt
+            for attempt in ChallengeAttempt.objects.select_for_update().filter(
+                challenge_id=challenge_id
+            )
+        }
+        entries = challenge_live_state.read_pending(challenge_id)
+        written = _write_challenge_answers(attempts, entries)
+        if entries:
+            # Dequeued only once the rows are durable; until then a retry
+            # rewrites nothing, as rows already written are skipped
+            transaction.on_commit(
+                lambda: challenge_live_state.ack_pending(challenge_id, entries)
+            )
+
+        finished_attempt = attempts.get(finished_user_id)
+        if finished_attempt and not finished_attempt.end_time:  # Set end time only once
+            finished_attempt.end_time = timezone.now()
+            finished_attempt.save(update_fields=["end_time", "updated_at"])
+    if written:
+        logger.info(f"Wrote {written} live answers of Challenge {challenge_id}.")
+    return attempts
+
+
+def flush_pending_challenge_answers() -> int:
+    """
+    Writes the queued answers of every challenge that has some. Returns the
+    number of challenges flushed.
+    """
+    flushed = 0
+    for challenge_id in challenge_live_state.dirty_challenge_ids():
+        try:
+            flush_challenge_answers(challenge_id)
+            flushed += 1
+        except Exception as e:
+            logger.exception(
+                f"Error writing live answers of Challenge {challenge_id}: {e}"
+            )
+    return flushed
+
+
+# --- Matchmaking Expiry ---
+
+
+def expire_stale_matchmaking_challenges() -> int:
+    """
+    Expires random challenges that found no opponent within
+    MATCHMAKING_TIMEOUT_SECONDS and drops their matchmaking queue entries.
+    Returns the number of challenges expired.
+    """
+    matchmaking_queue.prune(CHALLENGE_CONFIGS.keys())
+    cutoff = timezone.now() - timedelta(seconds=MATCHMAKING_TIMEOUT_SECONDS)
+    expired = 0
+    stale_ids = list(
+        Challenge.objects.filter(
+            status=ChallengeStatus.PENDING_MATCHMAKING, created_at__lt=cutoff
+        ).values_list("pk", flat=True)
+    )
+    for challenge_id in stale_ids:
+        with transaction.atomic():
+            # Re-check under lock: someone may have joined meanwhile
+            challenge = (
+                Challenge.objects.select_for_update()
+                .filter(pk=challenge_id, status=ChallengeStatus.PENDING_MATCHMAKING)
+                .first()
+            )
+            if not challenge:
+                continue
+            challenge.status = ChallengeStatus.EXPIRED
+            challenge.save(update_fields=["status", "updated_at"])
+        broadcast_challenge_update(challenge)
+        expired += 1
+    if expired:
+        logger.info(f"Expired {expired} random challenges that found no opponent.")
+    return expired
+
+
 # --- Rematch Service ---
 @transaction.atomic  # Rematch involves creating a new challenge
 def create_rematch(original_challenge: Challenge, user_initiating: User) -> Challenge:
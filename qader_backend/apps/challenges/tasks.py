@@ -0,0 +1,31 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="expire_stale_matchmaking_challenges_task")
+def expire_stale_matchmaking_challenges_task():
+    """
+    Periodic sweeper for random challenges that waited too long for an opponent.
+    """
+    from apps.challenges.services import (
+        expire_stale_matchmaking_challenges,
+    )  # Import here to avoid circular dependency
+
+    expired = expire_stale_matchmaking_challenges()
+    return f"Expired {expired} stale matchmaking challenges."
+
+
+@shared_task(name="flush_pending_challenge_answers_task")
+def flush_pending_challenge_answers_task():
+    """
+    Periodic write-behind of answers recorded in the live state of ongoing
+    challenges.
+    """
+    from apps.challenges.services import (
+        flush_pending_challenge_answers,
+    )  # Import here to avoid circular dependency
+
+    flushed = flush_pending_challenge_answers()
+    return f"Flushed live answers of {flushed} challenges."
@@ -13,6 +13,7 @@ from .factories import (
     ChallengeAttemptFactory,
 )
 from ..models import Challenge, ChallengeStatus, ChallengeType
+from ..services import start_challenge
 from unittest.mock import patch, MagicMock
 
 pytestmark = pytest.mark.django_db
@@ -355,18 +356,24 @@ def test_create_challenge_direct_invite(mock_get_q, subscribed_client):
 
 
 @patch("apps.challenges.services._get_challenge_questions", return_value=[1, 2])
-@patch("apps.challenges.services._find_random_opponent")  # Mock matchmaking
-def test_create_challenge_random(mock_find_opp, mock_get_q, subscribed_client):
-    opponent = UserFactory()
-    mock_find_opp.return_value = opponent  # Simulate finding someone
+def test_create_challenge_random(
+    mock_get_q, subscribed_client, django_capture_on_commit_callbacks
+):
+    waiting_user = UserFactory()
+    with django_capture_on_commit_callbacks(execute=True):  # Queues the challenge
+        start_challenge(waiting_user, None, ChallengeType.MEDIUM_VERBAL_15)
+
     url = reverse("api:v1:challenges:challenge-list")
     data = {"opponent_username": None, "challenge_type": ChallengeType.MEDIUM_VERBAL_15}
     post_data = {k: v for k, v in data.items() if v is not None}
     response = subscribed_client.post(url, post_data)
     assert response.status_code == 201
-    challenge = Challenge.objects.first()
-    assert challenge.opponent == opponent
+    assert Challenge.objects.count() == 1  # Joined the waiting challenge
+    challenge = Challenge.objects.get()
+    assert challenge.challenger == waiting_user
+    assert challenge.opponent == subscribed_client.user
     assert challenge.status == ChallengeStatus.ACCEPTED  # Auto-accept
+    assert challenge.attempts.count() == 2
 
 
 def test_create_challenge_not_subscribed(authenticated_client):  # Unsubscribed user
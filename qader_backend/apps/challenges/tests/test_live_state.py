@@ -0,0 +1,155 @@
+import pytest
+from unittest.mock import patch
+
+from rest_framework.exceptions import ValidationError
+
+from apps.study.models import UserQuestionAttempt
+
+from .factories import ChallengeAttemptFactory, ChallengeFactory, QuestionFactory
+from ..live_state import challenge_live_state
+from ..models import ChallengeAttempt, ChallengeStatus
+from ..services import (
+    flush_challenge_answers,
+    flush_pending_challenge_answers,
+    process_challenge_answer,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def write_behind(monkeypatch):
+    """The in-process store stands in for a shared Redis."""
+    monkeypatch.setattr(challenge_live_state, "write_behind", True)
+
+
+@pytest.fixture
+def duel():
+    questions = [QuestionFactory(correct_answer="A") for _ in range(2)]
+    challenge = ChallengeFactory(
+        ongoing=True, question_ids=[question.id for question in questions]
+    )
+    for user in (challenge.challenger, challenge.opponent):
+        ChallengeAttemptFactory(
+            challenge=challenge, user=user, ready_to_start=True, score=0
+        )
+    return challenge, questions
+
+
+def test_answers_are_recorded_live_and_written_behind(
+    duel, django_capture_on_commit_callbacks
+):
+    challenge, (q1, _q2) = duel
+    challenger = challenge.challenger
+
+    result, ended = process_challenge_answer(challenge, challenger, q1.id, "A", 12)
+
+    assert (result.is_correct, result.score, result.answered, ended) == (
+        True,
+        1,
+        1,
+        False,
+    )
+    assert not UserQuestionAttempt.objects.filter(user=challenger).exists()
+    with pytest.raises(ValidationError, match="already answered"):
+        process_challenge_answer(challenge, challenger, q1.id, "B", None)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        assert flush_pending_challenge_answers() == 1
+    attempt = ChallengeAttempt.objects.get(challenge=challenge, user=challenger)
+    assert attempt.score == 1
+    question_attempt = attempt.question_attempts.get()
+    assert (question_attempt.question_id, question_attempt.time_taken_seconds) == (
+        q1.id,
+        12,
+    )
+    assert question_attempt.mode == UserQuestionAttempt.Mode.CHALLENGE
+    assert flush_pending_challenge_answers() == 0
+
+
+def test_answers_stay_queued_until_their_rows_commit(
+    duel, django_capture_on_commit_callbacks
+):
+    challenge, (q1, _q2) = duel
+    challenger = challenge.challenger
+    process_challenge_answer(challenge, challenger, q1.id, "A", None)
+
+    with patch(
+        "apps.challenges.services.increment_badge_counters",
+        side_effect=RuntimeError("worker died"),
+    ):
+        with pytest.raises(RuntimeError):
+            flush_challenge_answers(challenge.id)
+    assert not UserQuestionAttempt.objects.filter(user=challenger).exists()
+    assert challenge_live_state.dirty_challenge_ids() == {challenge.id}
+
+    # Written but not acknowledged (commit callbacks not run): still queued
+    flush_challenge_answers(challenge.id)
+    assert challenge_live_state.dirty_challenge_ids() == {challenge.id}
+
+    # The retry skips the row already written
+    with django_capture_on_commit_callbacks(execute=True):
+        flush_challenge_answers(challenge.id)
+    assert challenge_live_state.dirty_challenge_ids() == set()
+    attempt = ChallengeAttempt.objects.get(challenge=challenge, user=challenger)
+    assert attempt.score == 1
+    assert attempt.question_attempts.count() == 1
+
+
+def test_answers_are_written_directly_without_shared_state(duel, monkeypatch):
+    monkeypatch.setattr(challenge_live_state, "write_behind", False)
+    challenge, (q1, _q2) = duel
+    challenger = challenge.challenger
+
+    result, _ended = process_challenge_answer(challenge, challenger, q1.id, "A", None)
+
+    assert (result.is_correct, result.score, result.answered) == (True, 1, 1)
+    attempt = ChallengeAttempt.objects.get(challenge=challenge, user=challenger)
+    assert attempt.question_attempts.get().question_id == q1.id
+    assert challenge_live_state.dirty_challenge_ids() == set()
+    with pytest.raises(ValidationError, match="already answered"):
+        process_challenge_answer(challenge, challenger, q1.id, "B", None)
+
+
+def test_live_state_is_rebuilt_from_written_answers(duel):
+    challenge, (q1, q2) = duel
+    challenger = challenge.challenger
+    process_challenge_answer(challenge, challenger, q1.id, "A", None)
+    flush_pending_challenge_answers()
+
+    challenge_live_state.clear()  # e.g. Redis restarted
+
+    with pytest.raises(ValidationError, match="already answered"):
+        process_challenge_answer(challenge, challenger, q1.id, "A", None)
+    result, _ended = process_challenge_answer(challenge, challenger, q2.id, "C", None)
+    assert (result.is_correct, result.score, result.answered) == (False, 1, 2)
+
+
+def test_challenge_finalizes_when_everyone_has_answered(
+    duel, django_capture_on_commit_callbacks
+):
+    challenge, questions = duel
+    with patch("apps.challenges.services.broadcast_challenge_end"):
+        for question in questions:
+            process_challenge_answer(
+                challenge, challenge.opponent, question.id, "A", None
+            )
+        _result, ended = process_challenge_answer(
+            challenge, challenge.challenger, questions[0].id, "A", None
+        )
+        assert ended is False
+        with django_capture_on_commit_callbacks(execute=True):
+            _result, ended = process_challenge_answer(
+                challenge, challenge.challenger, questions[1].id, "B", None
+            )
+
+    assert ended is True
+    challenge.refresh_from_db()
+    assert challenge.status == ChallengeStatus.COMPLETED
+    assert challenge.winner == challenge.opponent
+    scores = dict(challenge.attempts.values_list("user_id", "score"))
+    assert scores == {challenge.opponent_id: 2, challenge.challenger_id: 1}
+    assert UserQuestionAttempt.objects.filter(
+        challenge_context__challenge=challenge
+    ).count() == 4
+    assert challenge_live_state.get_meta(challenge.id) is None
@@ -0,0 +1,108 @@
+import pytest
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from django.db import transaction
+
+from .factories import UserFactory
+from ..matchmaking import MatchmakingQueue, level_bucket, matchmaking_queue
+from ..models import Challenge, ChallengeStatus, ChallengeType
+from ..services import (
+    _join_random_challenge,
+    expire_stale_matchmaking_challenges,
+    start_challenge,
+)
+
+pytestmark = pytest.mark.django_db
+
+QUICK = ChallengeType.QUICK_QUANT_10
+
+
+@pytest.fixture
+def queue():
+    return MatchmakingQueue(redis_url=None)
+
+
+def test_level_bucket_averages_known_levels():
+    def profile(verbal, quantitative):
+        return SimpleNamespace(
+            current_level_verbal=verbal, current_level_quantitative=quantitative
+        )
+
+    assert level_bucket(profile(None, None)) == 5  # Not assessed yet
+    assert level_bucket(profile(20.0, 40.0)) == 3
+    assert level_bucket(profile(20.0, None)) == 2
+    assert level_bucket(profile(100.0, 100.0)) == 10
+
+
+def test_candidates_prefer_nearest_bucket_and_stay_queued(queue):
+    with patch("apps.challenges.matchmaking.time.time", return_value=1000.0):
+        queue.enqueue(1, 10, QUICK, 5)
+        queue.enqueue(2, 20, QUICK, 6)
+        queue.enqueue(4, 40, QUICK, 6)
+        queue.enqueue(3, 30, ChallengeType.COMPREHENSIVE_20, 6)
+
+        # Bucket 5 is out of reach, for now
+        assert list(queue.candidates(9, QUICK, 6)) == [(2, 20, 6), (4, 40, 6)]
+        assert list(queue.candidates(9, QUICK, 6)) == [(2, 20, 6), (4, 40, 6)]
+        assert list(queue.candidates(1, QUICK, 5)) == []  # Never pairs with oneself
+
+        queue.remove(2, 20, QUICK, 6)
+        assert list(queue.candidates(9, QUICK, 6)) == [(4, 40, 6)]
+
+
+def test_search_window_widens_with_waiting_time(queue):
+    with patch("apps.challenges.matchmaking.time.time", return_value=1000.0):
+        queue.enqueue(1, 10, QUICK, 2)
+    with patch("apps.challenges.matchmaking.time.time", return_value=1020.0):
+        assert list(queue.candidates(9, QUICK, 4)) == []  # Waited one step: 1 bucket
+    with patch("apps.challenges.matchmaking.time.time", return_value=1031.0):
+        assert list(queue.candidates(9, QUICK, 4)) == [(1, 10, 2)]
+
+
+@patch("apps.challenges.services._get_challenge_questions", return_value=[1, 2])
+def test_rolled_back_join_leaves_the_request_queued(
+    mock_get_questions, django_capture_on_commit_callbacks
+):
+    first, second = UserFactory(), UserFactory()
+    with django_capture_on_commit_callbacks(execute=True):
+        waiting, _, _ = start_challenge(first, None, QUICK)
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                assert _join_random_challenge(second, QUICK) == waiting
+                raise RuntimeError("Rolled back after joining")
+    assert callbacks == []  # The queue entry is only removed on commit
+    bucket = level_bucket(first.profile)
+    assert list(
+        matchmaking_queue.candidates(second.pk, QUICK, bucket)
+    ) == [(first.pk, waiting.pk, bucket)]
+
+    joined, _, status = start_challenge(second, None, QUICK)
+    assert joined == waiting and status == ChallengeStatus.ACCEPTED
+
+
+@patch("apps.challenges.services._get_challenge_questions", return_value=[1, 2])
+def test_random_challenges_pair_up_and_stale_ones_expire(
+    mock_get_questions, django_capture_on_commit_callbacks
+):
+    first, second, third = UserFactory(), UserFactory(), UserFactory()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        waiting, _, status = start_challenge(first, None, QUICK)
+    assert status == ChallengeStatus.PENDING_MATCHMAKING
+
+    joined, _, status = start_challenge(second, None, QUICK)
+    assert joined == waiting and status == ChallengeStatus.ACCEPTED
+    assert joined.opponent == second
+
+    lonely, _, _ = start_challenge(third, None, QUICK)
+    Challenge.objects.filter(pk=lonely.pk).update(
+        created_at=lonely.created_at - timedelta(minutes=10)
+    )
+    assert expire_stale_matchmaking_challenges() == 1
+    lonely.refresh_from_db()
+    assert lonely.status == ChallengeStatus.EXPIRED
+
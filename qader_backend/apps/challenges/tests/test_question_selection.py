@@ -0,0 +1,57 @@
+import pytest
+from collections import Counter
+
+from apps.learning.models import Question
+from apps.learning.tests.factories import (
+    LearningSectionFactory,
+    LearningSubSectionFactory,
+    QuestionFactory,
+)
+
+from .factories import UserFactory
+from ..services import _allocate_by_difficulty, _get_challenge_questions
+
+pytestmark = pytest.mark.django_db
+
+
+def test_allocation_centres_on_target_and_respects_availability():
+    available = {difficulty: 20 for difficulty in range(1, 6)}
+    assert _allocate_by_difficulty(10, available, 3.0) == {
+        1: 1,
+        2: 2,
+        3: 4,
+        4: 2,
+        5: 1,
+    }
+    assert sum(_allocate_by_difficulty(10, available, 5.0).values()) == 10
+
+    # Short levels hand their share to the others
+    counts = _allocate_by_difficulty(10, {1: 1, 3: 2, 5: 20}, 3.0)
+    assert counts == {1: 1, 3: 2, 5: 7}
+    assert _allocate_by_difficulty(10, {3: 4}, 3.0) == {3: 4}
+
+
+def test_challenge_questions_balance_difficulty_between_players():
+    section = LearningSectionFactory(slug="quantitative")
+    subsection = LearningSubSectionFactory(section=section)
+    for difficulty in range(1, 6):
+        QuestionFactory.create_batch(6, subsection=subsection, difficulty=difficulty)
+
+    strong, weak = UserFactory(), UserFactory()
+    strong.profile.current_level_verbal = strong.profile.current_level_quantitative = 100
+    weak.profile.current_level_verbal = weak.profile.current_level_quantitative = 0
+
+    config = {"num_questions": 10, "sections": ["quantitative"]}
+    difficulties = Counter(
+        Question.objects.get(pk=qid).difficulty
+        for qid in _get_challenge_questions(config, [strong, weak])
+    )
+    assert sum(difficulties.values()) == 10
+    assert difficulties[3] == max(difficulties.values())  # Midpoint of both levels
+    assert difficulties[1] == difficulties[5]
+
+    hard_only = Counter(
+        Question.objects.get(pk=qid).difficulty
+        for qid in _get_challenge_questions(config, [strong])
+    )
+    assert hard_only[5] == max(hard_only.values())
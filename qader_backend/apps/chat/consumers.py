@@ -5,8 +5,6 @@ from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 from django.core.exceptions import PermissionDenied as DjangoPermissionDenied
 from django.utils import timezone
-from django.core.cache import cache
-from django.conf import settings
 
 from qader_project.settings.base import FRONTEND_BASE_URL
 
@@ -15,16 +13,13 @@ from apps.users.models import (
     UserProfile,
     RoleChoices,
 )  # Assuming UserProfile is in users.models
+from apps.users.presence import presence, chat_context
 from .api.serializers import ChatMessageSerializer  # Re-use the API serializer
 
 User = get_user_model()
 
 
 class ChatConsumer(AsyncWebsocketConsumer):
-    def _get_active_user_cache_key(self, user_id, conversation_id):
-        """Helper to generate a consistent cache key."""
-        return f"active_chat_user_{user_id}_conversation_{conversation_id}"
-
     async def connect(self):
         self.user = self.scope.get("user")
         if not self.user or not self.user.is_authenticated:
@@ -59,17 +54,16 @@ class ChatConsumer(AsyncWebsocketConsumer):
 
         self.conversation_id_str = str(self.conversation_obj.id)
         self.room_group_name = f"chat_{self.conversation_id_str}"
+        self.presence_context = chat_context(self.conversation_id_str)
+        self.peer_user_id = await self.get_peer_user_id(
+            self.conversation_obj, self.user
+        )
 
         await self.channel_layer.group_add(self.room_group_name, self.channel_name)
         await self.accept()
 
-        # Mark user as active in this conversation
-        active_user_cache_key = self._get_active_user_cache_key(
-            self.user.id, self.conversation_id_str
-        )
-        await database_sync_to_async(cache.set)(
-            active_user_cache_key, True, timeout=settings.CHAT_ACTIVE_USER_TIMEOUT
-        )
+        # Mark user as present in this conversation
+        await presence.aheartbeat(self.user.id, [self.presence_context])
 
         await self.mark_messages_as_read_on_connect(self.conversation_obj, self.user)
 
@@ -88,14 +82,10 @@ class ChatConsumer(AsyncWebsocketConsumer):
             hasattr(self, "user")
             and self.user
             and self.user.is_authenticated
-            and hasattr(self, "conversation_id_str")
-            and self.conversation_id_str
+            and hasattr(self, "presence_context")
         ):
-            # Mark user as inactive by deleting the cache key
-            active_user_cache_key = self._get_active_user_cache_key(
-                self.user.id, self.conversation_id_str
-            )
-            await database_sync_to_async(cache.delete)(active_user_cache_key)
+            # Leave the conversation right away instead of waiting for expiry
+            await presence.aleave(self.user.id, self.presence_context)
 
         if hasattr(self, "room_group_name") and self.room_group_name:
             await self.channel_layer.group_discard(
@@ -109,16 +99,14 @@ class ChatConsumer(AsyncWebsocketConsumer):
             )
             return
 
-        # Refresh user's active status in this conversation upon receiving a message
-        # This indicates they are still actively participating.
-        active_user_cache_key = self._get_active_user_cache_key(
-            self.user.id, self.conversation_id_str
-        )
-        await database_sync_to_async(cache.set)(
-            active_user_cache_key, True, timeout=settings.CHAT_ACTIVE_USER_TIMEOUT
-        )
+        # Any frame (message or heartbeat) shows the user is still in the conversation
+        await presence.aheartbeat(self.user.id, [self.presence_context])
 
         text_data_json = json.loads(text_data)
+        if text_data_json.get("type") == "heartbeat":
+            # Sent periodically by idle clients to stay present
+            return
+
         message_content = text_data_json.get("message")
 
         if not message_content or not message_content.strip():
@@ -127,8 +115,12 @@ class ChatConsumer(AsyncWebsocketConsumer):
             )
             return
 
+        # Read receipt: a peer who is in the conversation sees the message live
+        peer_present = await presence.ais_online(
+            self.peer_user_id, self.presence_context
+        )
         new_message = await self.create_message(
-            self.conversation_obj, self.user, message_content
+            self.conversation_obj, self.user, message_content, is_read=peer_present
         )
 
         if not new_message:
@@ -203,10 +195,20 @@ class ChatConsumer(AsyncWebsocketConsumer):
             return None
 
     @database_sync_to_async
-    def create_message(self, conversation, sender, content):
+    def get_peer_user_id(self, conversation, user):
+        """The other participant of the conversation."""
+        if conversation.student.user_id == user.id:
+            return conversation.teacher.user_id
+        return conversation.student.user_id
+
+    @database_sync_to_async
+    def create_message(self, conversation, sender, content, is_read=False):
         try:
             message = Message.objects.create(
-                conversation=conversation, sender=sender, content=content
+                conversation=conversation,
+                sender=sender,
+                content=content,
+                is_read=is_read,
             )
             # The message save method should update conversation.updated_at
             return message
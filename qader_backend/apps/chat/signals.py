@@ -2,23 +2,17 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
-from django.core.cache import cache  # Import Django's cache
-from django.conf import settings  # Import Django settings
 import logging  # It's good practice to log this behavior
 
 from apps.notifications.services import create_notification
 from apps.notifications.models import NotificationTypeChoices
+from apps.users.presence import presence, chat_context
 from .models import Message, Conversation
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 
-def _get_active_user_cache_key_for_signal(user_id, conversation_id):
-    """Helper to generate a consistent cache key, usable in sync context."""
-    return f"active_chat_user_{user_id}_conversation_{conversation_id}"
-
-
 @receiver(post_save, sender=Message)
 def send_chat_message_notification(sender, instance: Message, created: bool, **kwargs):
     """
@@ -37,10 +31,9 @@ def send_chat_message_notification(sender, instance: Message, created: bool, **k
 
         if recipient_user and recipient_user != message_sender:
             # Check if the recipient is active in this specific conversation
-            active_user_cache_key = _get_active_user_cache_key_for_signal(
-                recipient_user.id, conversation.id
+            is_recipient_active = presence.is_online(
+                recipient_user.id, context=chat_context(conversation.id)
             )
-            is_recipient_active = cache.get(active_user_cache_key)
 
             if is_recipient_active:
                 logger.info(
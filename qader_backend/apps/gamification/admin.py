@@ -1,7 +1,14 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
 
-from .models import PointLog, Badge, UserBadge, RewardStoreItem, UserRewardPurchase
+from .models import (
+    PointLog,
+    Badge,
+    UserBadge,
+    RewardStoreItem,
+    UserRewardPurchase,
+    GamificationEvent,
+)
 
 
 @admin.register(Badge)
@@ -99,3 +106,22 @@ class UserRewardPurchaseAdmin(admin.ModelAdmin):
     search_fields = ("user__username", "item__name")
     raw_id_fields = ("user", "item")
     list_select_related = ("user", "item")
+
+
+@admin.register(GamificationEvent)
+class GamificationEventAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "user",
+        "event_type",
+        "test_attempt",
+        "status",
+        "attempts",
+        "created_at",
+        "processed_at",
+    )
+    list_filter = ("status", "event_type", "created_at")
+    search_fields = ("user__username", "test_attempt__id")
+    raw_id_fields = ("user", "test_attempt")
+    list_select_related = ("user",)
+    readonly_fields = ("result", "last_error", "created_at", "processed_at")
@@ -0,0 +1,30 @@
+# Generated by Django 5.2 on 2026-10-16 19:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('gamification', '0008_rewardstoreitem_code_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserBadgeCounters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='badge_counters', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+                ('questions_solved_correctly', models.PositiveIntegerField(default=0, verbose_name='Questions Solved Correctly')),
+                ('tests_completed', models.PositiveIntegerField(default=0, verbose_name='Tests Completed')),
+                ('challenges_won', models.PositiveIntegerField(default=0, verbose_name='Challenges Won')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'User Badge Counters',
+                'verbose_name_plural': 'User Badge Counters',
+            },
+        ),
+    ]
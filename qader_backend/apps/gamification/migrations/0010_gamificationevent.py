@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-16 19:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gamification', '0009_userbadgecounters'),
+        ('study', '0016_usertestattempt_smart_analysis'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GamificationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('test_completed', 'Test Completed')], max_length=30, verbose_name='Event Type')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processed', 'Processed'), ('failed', 'Failed')], db_index=True, default='pending', max_length=15, verbose_name='Status')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Processing Attempts')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last Error')),
+                ('result', models.JSONField(blank=True, help_text='Points, badges and streak info produced by processing.', null=True, verbose_name='Result')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processed At')),
+                ('test_attempt', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gamification_events', to='study.usertestattempt', verbose_name='Test Attempt')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='gamification_events', to=settings.AUTH_USER_MODEL, verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Gamification Event',
+                'verbose_name_plural': 'Gamification Events',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='gamificatio_status_de2c96_idx')],
+                'constraints': [models.UniqueConstraint(fields=('event_type', 'test_attempt'), name='unique_gamification_event_per_attempt')],
+            },
+        ),
+    ]
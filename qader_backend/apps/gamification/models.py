@@ -211,6 +211,106 @@ class UserBadge(models.Model):
         return f"{getattr(self.user, 'username', 'N/A')} earned {self.badge.name}"
 
 
+class UserBadgeCounters(models.Model):
+    """
+    Running per-user totals behind count-based badges. Kept up to date incrementally
+    by signals so badge checks never have to count the user's full history.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="badge_counters",
+        verbose_name=_("User"),
+    )
+    questions_solved_correctly = models.PositiveIntegerField(
+        default=0, verbose_name=_("Questions Solved Correctly")
+    )
+    tests_completed = models.PositiveIntegerField(
+        default=0, verbose_name=_("Tests Completed")
+    )
+    challenges_won = models.PositiveIntegerField(
+        default=0, verbose_name=_("Challenges Won")
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Updated At"))
+
+    class Meta:
+        verbose_name = _("User Badge Counters")
+        verbose_name_plural = _("User Badge Counters")
+
+    def __str__(self):
+        return f"Badge counters for {getattr(self.user, 'username', 'N/A')}"
+
+
+class GamificationEvent(models.Model):
+    """
+    Outbox row for gamification work triggered by another app (e.g. a completed test).
+    At most one event exists per (event_type, test_attempt), so enqueueing twice is a
+    no-op, and a worker processes each event exactly once.
+    """
+
+    class EventType(models.TextChoices):
+        TEST_COMPLETED = "test_completed", _("Test Completed")
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        PROCESSED = "processed", _("Processed")
+        FAILED = "failed", _("Failed")
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="gamification_events",
+        verbose_name=_("User"),
+    )
+    event_type = models.CharField(
+        max_length=30, choices=EventType.choices, verbose_name=_("Event Type")
+    )
+    test_attempt = models.ForeignKey(
+        "study.UserTestAttempt",
+        on_delete=models.CASCADE,
+        related_name="gamification_events",
+        verbose_name=_("Test Attempt"),
+    )
+    status = models.CharField(
+        max_length=15,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+        verbose_name=_("Status"),
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name=_("Processing Attempts")
+    )
+    last_error = models.TextField(blank=True, verbose_name=_("Last Error"))
+    result = models.JSONField(
+        null=True,
+        blank=True,
+        verbose_name=_("Result"),
+        help_text=_("Points, badges and streak info produced by processing."),
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created At"))
+    processed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name=_("Processed At")
+    )
+
+    class Meta:
+        verbose_name = _("Gamification Event")
+        verbose_name_plural = _("Gamification Events")
+        ordering = ["created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event_type", "test_attempt"],
+                name="unique_gamification_event_per_attempt",
+            )
+        ]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"{self.get_event_type_display()} for attempt {self.test_attempt_id} ({self.status})"
+
+
 class RewardStoreItem(models.Model):
     """Defines items available for purchase in the rewards store."""
 
@@ -1,13 +1,13 @@
 import datetime
 import logging
 from datetime import timedelta
-from typing import Optional, Any, Callable, Dict, List  # Added List
+from typing import Optional, Any, Callable, Dict, Iterable, List  # Added List
 from django.db import transaction, models
-from django.db.models import F
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
 from django.contrib.contenttypes.models import ContentType
-from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
@@ -17,8 +17,10 @@ from apps.challenges.models import Challenge, ChallengeStatus
 from .models import (
     PointLog,
     Badge,
+    GamificationEvent,
     StudyDayLog,
     UserBadge,
+    UserBadgeCounters,
     RewardStoreItem,
     UserRewardPurchase,
     PointReason,
@@ -27,6 +29,16 @@ from apps.study.models import UserQuestionAttempt, UserTestAttempt
 
 DjangoUser = settings.AUTH_USER_MODEL
 logger = logging.getLogger(__name__)
+
+# --- Constants ---
+GAMIFICATION_EVENT_MAX_ATTEMPTS = getattr(
+    settings, "GAMIFICATION_EVENT_MAX_ATTEMPTS", 5
+)
+# Pending events older than this are picked up again by the periodic sweeper
+# (covers a lost broker message or a worker crash mid-event).
+GAMIFICATION_EVENT_RETRY_AFTER_SECONDS = getattr(
+    settings, "GAMIFICATION_EVENT_RETRY_AFTER_SECONDS", 60
+)
 BadgeChecker = Callable[[DjangoUser, UserProfile], bool]
 
 
@@ -88,6 +100,227 @@ def award_points(
         return 0
 
 
+def award_points_bulk(
+    user: DjangoUser,
+    points_per_object: int,
+    reason_code: PointReason,
+    related_objects: List[models.Model],
+    description_fn: Callable[[models.Model], str],
+) -> int:
+    """
+    Awards the same number of points for each of several related objects with one
+    profile lock, one bulk PointLog insert and one F() update. Keeps one PointLog
+    row per object, exactly as repeated `award_points` calls would.
+    Returns the total number of points changed (0 if nothing awarded or error).
+    """
+    if not user or not hasattr(user, "pk"):
+        logger.error(f"Attempted to award bulk points to invalid user object: {user}")
+        return 0
+
+    if points_per_object == 0 or not related_objects:
+        return 0
+
+    username = getattr(user, "username", f"UserID_{user.pk}")
+    total_change = points_per_object * len(related_objects)
+
+    try:
+        with transaction.atomic():
+            profile = UserProfile.objects.select_for_update().get(user=user)
+            content_type = ContentType.objects.get_for_model(related_objects[0])
+            PointLog.objects.bulk_create(
+                [
+                    PointLog(
+                        user=user,
+                        points_change=points_per_object,
+                        reason_code=reason_code,
+                        description=description_fn(obj),
+                        content_type=content_type,
+                        object_id=obj.pk,
+                    )
+                    for obj in related_objects
+                ]
+            )
+            profile.points = F("points") + total_change
+            profile.save(update_fields=["points", "updated_at"])
+            profile.refresh_from_db(fields=["points"])
+            logger.info(
+                f"Awarded {total_change} points ({len(related_objects)} x {points_per_object}) "
+                f"to {username} for {reason_code.label}. New balance: {profile.points}"
+            )
+            return total_change
+    except UserProfile.DoesNotExist:
+        logger.error(
+            f"UserProfile not found for user {username} during bulk point award for {reason_code.label}."
+        )
+        return 0
+    except Exception as e:
+        logger.exception(
+            f"Error awarding bulk points to {username} for {reason_code.label}: {e}"
+        )
+        return 0
+
+
+# --- Badge Engine ---
+# Count-based criteria types and the UserBadgeCounters field holding their running total
+BADGE_COUNTER_FIELDS = {
+    Badge.BadgeCriteriaType.QUESTIONS_SOLVED_CORRECTLY: "questions_solved_correctly",
+    Badge.BadgeCriteriaType.TESTS_COMPLETED: "tests_completed",
+    Badge.BadgeCriteriaType.CHALLENGES_WON: "challenges_won",
+}
+
+
+def _count_badge_counters_from_history(user_id: int) -> Dict[str, int]:
+    """Full history counts. Only used once per user, to seed their counters row."""
+    return {
+        "questions_solved_correctly": UserQuestionAttempt.objects.filter(
+            user_id=user_id, is_correct=True
+        ).count(),
+        "tests_completed": UserTestAttempt.objects.filter(
+            user_id=user_id, status=UserTestAttempt.Status.COMPLETED
+        ).count(),
+        "challenges_won": Challenge.objects.filter(
+            winner_id=user_id, status=ChallengeStatus.COMPLETED
+        ).count(),
+    }
+
+
+def get_badge_counters(user: DjangoUser) -> UserBadgeCounters:
+    """Returns the user's badge counters, seeding them from history on first use."""
+    try:
+        return UserBadgeCounters.objects.get(user_id=user.pk)
+    except UserBadgeCounters.DoesNotExist:
+        counters, created = UserBadgeCounters.objects.get_or_create(
+            user_id=user.pk, defaults=_count_badge_counters_from_history(user.pk)
+        )
+        return counters
+
+
+def increment_badge_counters(user_id: int, **deltas: int):
+    """
+    Atomically applies deltas (e.g. tests_completed=1) to a user's badge counters.
+    Must be called after the triggering row is saved: if the user has no counters
+    row yet it is seeded from history, which already includes that row.
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas or not user_id:
+        return
+    updated = UserBadgeCounters.objects.filter(user_id=user_id).update(
+        updated_at=timezone.now(),
+        **{
+            field: Greatest(F(field) + delta, Value(0))
+            for field, delta in deltas.items()
+        },
+    )
+    if not updated:
+        UserBadgeCounters.objects.get_or_create(
+            user_id=user_id, defaults=_count_badge_counters_from_history(user_id)
+        )
+
+
+def _current_badge_values(
+    user: DjangoUser, criteria_types: Iterable[str]
+) -> Dict[str, int]:
+    """Current progress per criteria type, read from the profile and badge counters."""
+    criteria_types = set(criteria_types)
+    values: Dict[str, int] = {}
+    if Badge.BadgeCriteriaType.STUDY_STREAK in criteria_types:
+        profile = UserProfile.objects.only("current_streak_days").get(user=user)
+        values[Badge.BadgeCriteriaType.STUDY_STREAK] = profile.current_streak_days
+    if criteria_types & set(BADGE_COUNTER_FIELDS):
+        counters = get_badge_counters(user)
+        for criteria_type, field in BADGE_COUNTER_FIELDS.items():
+            values[criteria_type] = getattr(counters, field)
+    return values
+
+
+def _award_badge(user: DjangoUser, badge: Badge) -> Optional[Dict[str, Any]]:
+    """Creates the UserBadge and awards badge points. Returns details if newly earned."""
+    username = getattr(user, "username", f"UserID_{user.pk}")
+    with transaction.atomic():
+        user_badge, created = UserBadge.objects.get_or_create(user=user, badge=badge)
+        if not created:
+            logger.warning(
+                f"Badge '{badge.slug}' was already present for user {username} (race condition?)."
+            )
+            return None  # Not newly awarded
+
+        logger.info(
+            f"Awarded badge '{badge.name}' (slug: {badge.slug}) to user {username}"
+        )
+        points_for_this_badge = 0
+        points_badge_earned_setting = getattr(settings, "POINTS_BADGE_EARNED", 0)
+        if points_badge_earned_setting > 0:
+            points_for_this_badge = award_points(
+                user=user,
+                points_change=points_badge_earned_setting,
+                reason_code=PointReason.BADGE_EARNED,
+                description=f"Earned badge: {badge.name}",
+                related_object=user_badge,
+            )
+        return {
+            "slug": badge.slug,
+            "name": badge.name,
+            "description": badge.description,  # Or criteria_description
+            "points_awarded": points_for_this_badge,
+        }
+
+
+def evaluate_badges(
+    user: DjangoUser, criteria_types: Optional[Iterable[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Awards every active badge the user has not earned yet and now qualifies for.
+    Unearned badges are loaded in one query and thresholds are compared in memory
+    against the running counters, so the cost is O(badges) with no history scans.
+
+    Args:
+        user: The user to evaluate.
+        criteria_types: Restrict evaluation to these Badge.BadgeCriteriaType values.
+
+    Returns:
+        A list of details dicts (as returned by check_and_award_badge) for newly earned badges.
+    """
+    if not user or not hasattr(user, "pk"):
+        logger.warning(f"Badge evaluation skipped for invalid user object: {user}")
+        return []
+
+    username = getattr(user, "username", f"UserID_{user.pk}")
+    unearned_badges = (
+        Badge.objects.filter(is_active=True, target_value__isnull=False)
+        .exclude(criteria_type=Badge.BadgeCriteriaType.OTHER)
+        .exclude(earned_by__user=user)
+        .only("id", "slug", "name", "description", "criteria_type", "target_value")
+        .order_by("criteria_type", "target_value")
+    )
+    if criteria_types is not None:
+        unearned_badges = unearned_badges.filter(criteria_type__in=list(criteria_types))
+    unearned_badges = list(unearned_badges)
+    if not unearned_badges:
+        return []
+
+    awarded: List[Dict[str, Any]] = []
+    try:
+        current_values = _current_badge_values(
+            user, {badge.criteria_type for badge in unearned_badges}
+        )
+        for badge in unearned_badges:
+            current_value = current_values.get(badge.criteria_type)
+            if current_value is None:
+                logger.warning(
+                    f"Unhandled criteria type '{badge.criteria_type}' for badge '{badge.slug}'."
+                )
+                continue
+            if current_value >= badge.target_value:
+                badge_award_detail = _award_badge(user, badge)
+                if badge_award_detail:
+                    awarded.append(badge_award_detail)
+    except UserProfile.DoesNotExist:
+        logger.error(f"UserProfile not found for user {username} during badge evaluation.")
+    except Exception as e:
+        logger.exception(f"Error evaluating badges for {username}: {e}")
+    return awarded
+
+
 # --- Badge Management ---
 def check_and_award_badge(
     user: DjangoUser, badge_slug: str
@@ -96,6 +329,7 @@ def check_and_award_badge(
     Checks if a user qualifies for a specific badge and awards it.
     Returns a dict with badge details and points awarded if newly earned, else None.
     Badge details: {'slug': str, 'name': str, 'description': str, 'points_awarded': int}
+    Prefer `evaluate_badges` when checking several badges at once.
     """
     if not user or not hasattr(user, "pk"):
         logger.warning(f"Badge check skipped for invalid user object: {user}")
@@ -105,7 +339,6 @@ def check_and_award_badge(
 
     try:
         badge = Badge.objects.get(slug=badge_slug, is_active=True)
-        profile = UserProfile.objects.get(user=user)
 
         if UserBadge.objects.filter(user=user, badge=badge).exists():
             return None
@@ -113,78 +346,23 @@ def check_and_award_badge(
         if badge.criteria_type == Badge.BadgeCriteriaType.OTHER:
             return None
 
-        if (
-            badge.target_value is None
-            and badge.criteria_type != Badge.BadgeCriteriaType.OTHER
-        ):  # Ensure target_value exists where needed
+        if badge.target_value is None:  # Ensure target_value exists where needed
             logger.error(
                 f"Badge '{badge_slug}' (type: {badge.criteria_type}) is missing target_value."
             )
             return None
 
-        current_value = None
-        if badge.criteria_type == Badge.BadgeCriteriaType.STUDY_STREAK:
-            current_value = profile.current_streak_days
-        elif badge.criteria_type == Badge.BadgeCriteriaType.QUESTIONS_SOLVED_CORRECTLY:
-            current_value = UserQuestionAttempt.objects.filter(
-                user=user, is_correct=True
-            ).count()
-        elif badge.criteria_type == Badge.BadgeCriteriaType.TESTS_COMPLETED:
-            current_value = UserTestAttempt.objects.filter(
-                user=user, status=UserTestAttempt.Status.COMPLETED
-            ).count()
-        elif badge.criteria_type == Badge.BadgeCriteriaType.CHALLENGES_WON:
-            current_value = Challenge.objects.filter(
-                winner=user, status=ChallengeStatus.COMPLETED
-            ).count()
-        else:
+        current_value = _current_badge_values(user, {badge.criteria_type}).get(
+            badge.criteria_type
+        )
+        if current_value is None:
             logger.warning(
                 f"Unhandled criteria type '{badge.criteria_type}' for badge '{badge_slug}'."
             )
             return None
 
-        criteria_met = False
-        if current_value is not None and (
-            badge.target_value is None or current_value >= badge.target_value
-        ):
-            # Handle cases where target_value might be None for certain auto-awarded badges not requiring a specific count
-            if badge.target_value is not None and current_value < badge.target_value:
-                criteria_met = False
-            else:
-                criteria_met = True
-
-        if criteria_met:
-            with transaction.atomic():
-                user_badge, created = UserBadge.objects.get_or_create(
-                    user=user, badge=badge
-                )
-                if created:
-                    logger.info(
-                        f"Awarded badge '{badge.name}' (slug: {badge_slug}) to user {username}"
-                    )
-                    points_for_this_badge = 0
-                    points_badge_earned_setting = getattr(
-                        settings, "POINTS_BADGE_EARNED", 0
-                    )
-                    if points_badge_earned_setting > 0:
-                        points_for_this_badge = award_points(
-                            user=user,
-                            points_change=points_badge_earned_setting,
-                            reason_code=PointReason.BADGE_EARNED,
-                            description=f"Earned badge: {badge.name}",
-                            related_object=user_badge,
-                        )
-                    return {
-                        "slug": badge.slug,
-                        "name": badge.name,
-                        "description": badge.description,  # Or criteria_description
-                        "points_awarded": points_for_this_badge,
-                    }
-                else:
-                    logger.warning(
-                        f"Badge '{badge_slug}' was already present for user {username} (race condition?)."
-                    )
-                    return None  # Not newly awarded
+        if current_value >= badge.target_value:
+            return _award_badge(user, badge)
         return None  # Criteria not met
     except Badge.DoesNotExist:
         logger.warning(
@@ -454,39 +632,23 @@ def process_test_completion_gamification(
             all_newly_awarded_badges_details.append(badge_detail)
             total_points_earned_this_event += badge_detail.get("points_awarded", 0)
 
-    # 3. Check for other relevant badges (e.g., "N Tests Completed", "N Questions Solved")
-    # These checks use the user's current overall stats.
-    # Badges for "TESTS_COMPLETED"
-    test_count_badges_qs = Badge.objects.filter(
-        is_active=True, criteria_type=Badge.BadgeCriteriaType.TESTS_COMPLETED
-    ).only("slug", "name", "description")
-    for badge_def in test_count_badges_qs:
-        badge_award_detail = check_and_award_badge(user, badge_def.slug)
-        if badge_award_detail:
-            if not any(
-                b["slug"] == badge_award_detail["slug"]
-                for b in all_newly_awarded_badges_details
-            ):
-                all_newly_awarded_badges_details.append(badge_award_detail)
-                total_points_earned_this_event += badge_award_detail.get(
-                    "points_awarded", 0
-                )
-
-    # Badges for "QUESTIONS_SOLVED_CORRECTLY"
-    question_count_badges_qs = Badge.objects.filter(
-        is_active=True, criteria_type=Badge.BadgeCriteriaType.QUESTIONS_SOLVED_CORRECTLY
-    ).only("slug", "name", "description")
-    for badge_def in question_count_badges_qs:
-        badge_award_detail = check_and_award_badge(user, badge_def.slug)
-        if badge_award_detail:
-            if not any(
-                b["slug"] == badge_award_detail["slug"]
-                for b in all_newly_awarded_badges_details
-            ):
-                all_newly_awarded_badges_details.append(badge_award_detail)
-                total_points_earned_this_event += badge_award_detail.get(
-                    "points_awarded", 0
-                )
+    # 3. Check count-based badges (e.g., "N Tests Completed", "N Questions Solved")
+    # against the user's running counters, all unearned badges at once.
+    for badge_award_detail in evaluate_badges(
+        user,
+        criteria_types=[
+            Badge.BadgeCriteriaType.TESTS_COMPLETED,
+            Badge.BadgeCriteriaType.QUESTIONS_SOLVED_CORRECTLY,
+        ],
+    ):
+        if not any(
+            b["slug"] == badge_award_detail["slug"]
+            for b in all_newly_awarded_badges_details
+        ):
+            all_newly_awarded_badges_details.append(badge_award_detail)
+            total_points_earned_this_event += badge_award_detail.get(
+                "points_awarded", 0
+            )
 
     # 4. Mark test attempt as gamification processed and save
     test_attempt.completion_points_awarded = (
@@ -510,6 +672,151 @@ def process_test_completion_gamification(
     }
 
 
+# --- Gamification Event Outbox ---
+def enqueue_test_completion_event(test_attempt: UserTestAttempt) -> GamificationEvent:
+    """
+    Records that a test attempt's completion gamification (points, streak, badges)
+    still has to run, and hands it to a worker once the surrounding transaction
+    commits. Idempotent: at most one event exists per attempt.
+    """
+    event, created = GamificationEvent.objects.get_or_create(
+        event_type=GamificationEvent.EventType.TEST_COMPLETED,
+        test_attempt=test_attempt,
+        defaults={"user_id": test_attempt.user_id},
+    )
+    if created:
+        logger.info(
+            f"Queued gamification event {event.id} for completed test attempt {test_attempt.id} (user {test_attempt.user_id})."
+        )
+        transaction.on_commit(lambda: _dispatch_gamification_event(event.id))
+    return event
+
+
+def _dispatch_gamification_event(event_id: int):
+    """Sends the event to Celery. On failure the event stays pending for the sweeper."""
+    from apps.gamification.tasks import (
+        process_gamification_event_task,
+    )  # Import here to avoid circular dependency
+
+    try:
+        process_gamification_event_task.delay(event_id)
+    except Exception as e:
+        logger.exception(
+            f"Failed to dispatch gamification event {event_id}; it will be retried by the sweeper: {e}"
+        )
+
+
+def _json_safe_gamification_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "total_points_earned": result.get("total_points_earned", 0),
+        "badges_won_details": [
+            {
+                "slug": b["slug"],
+                "name": str(b["name"]),
+                "description": str(b["description"]),
+                "points_awarded": b.get("points_awarded", 0),
+            }
+            for b in result.get("badges_won_details", [])
+        ],
+        "streak_info": {
+            "was_updated": result.get("streak_info", {}).get("was_updated", False),
+            "current_days": result.get("streak_info", {}).get("current_days", 0),
+        },
+    }
+
+
+def process_gamification_event(event_id: int) -> Optional[GamificationEvent]:
+    """
+    Runs the gamification work for one outbox event. Safe to call repeatedly and
+    concurrently: the event row is locked, processed events are skipped, and the
+    attempt's `completion_points_awarded` flag guards against double awards.
+    Failures are recorded on the event; it is marked FAILED after
+    GAMIFICATION_EVENT_MAX_ATTEMPTS tries.
+    """
+    with transaction.atomic():
+        try:
+            event = (
+                GamificationEvent.objects.select_for_update()
+                .select_related("test_attempt", "user")
+                .get(pk=event_id)
+            )
+        except GamificationEvent.DoesNotExist:
+            logger.warning(f"Gamification event {event_id} not found. Skipping.")
+            return None
+
+        if event.status != GamificationEvent.Status.PENDING:
+            logger.info(
+                f"Gamification event {event_id} already {event.status}. Skipping."
+            )
+            return event
+
+        event.attempts += 1
+        try:
+            # Savepoint: a failure rolls back partial awards but keeps the event update.
+            with transaction.atomic():
+                test_attempt = UserTestAttempt.objects.select_for_update().get(
+                    pk=event.test_attempt_id
+                )
+                if test_attempt.status != UserTestAttempt.Status.COMPLETED:
+                    # e.g. scoring failed after the event was queued; nothing to award.
+                    event.attempts = GAMIFICATION_EVENT_MAX_ATTEMPTS
+                    raise ValueError(
+                        f"Test attempt {test_attempt.id} is {test_attempt.status}, not completed."
+                    )
+                result = process_test_completion_gamification(
+                    event.user, test_attempt
+                )
+        except Exception as e:
+            logger.exception(
+                f"Error processing gamification event {event_id} (attempt {event.test_attempt_id}, try {event.attempts}): {e}"
+            )
+            event.last_error = str(e)
+            if event.attempts >= GAMIFICATION_EVENT_MAX_ATTEMPTS:
+                event.status = GamificationEvent.Status.FAILED
+            event.save(update_fields=["attempts", "last_error", "status"])
+            return event
+
+        event.result = _json_safe_gamification_result(result)
+        event.status = GamificationEvent.Status.PROCESSED
+        event.processed_at = timezone.now()
+        event.last_error = ""
+        event.save(
+            update_fields=[
+                "attempts",
+                "result",
+                "status",
+                "processed_at",
+                "last_error",
+            ]
+        )
+    return event
+
+
+def process_pending_gamification_events(
+    limit: int = 100,
+    older_than_seconds: int = GAMIFICATION_EVENT_RETRY_AFTER_SECONDS,
+) -> int:
+    """Re-processes pending events that were not handled promptly. Returns the count processed."""
+    cutoff = timezone.now() - timedelta(seconds=older_than_seconds)
+    event_ids = list(
+        GamificationEvent.objects.filter(
+            status=GamificationEvent.Status.PENDING, created_at__lte=cutoff
+        )
+        .order_by("created_at")
+        .values_list("id", flat=True)[:limit]
+    )
+    processed = 0
+    for event_id in event_ids:
+        event = process_gamification_event(event_id)
+        if event and event.status == GamificationEvent.Status.PROCESSED:
+            processed += 1
+    if event_ids:
+        logger.info(
+            f"Gamification sweeper processed {processed}/{len(event_ids)} pending events."
+        )
+    return processed
+
+
 # --- Rewards Store Management (largely unchanged from original structure) ---
 class PurchaseError(Exception):
     pass
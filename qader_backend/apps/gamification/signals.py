@@ -1,5 +1,5 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext as _
 from django.db import (
@@ -7,12 +7,15 @@ from django.db import (
 )  # Not strictly needed here anymore but good to keep if other signals use it
 import logging
 
+from apps.api.tracking import UNSET, saved_change, track_loaded_values
+from apps.challenges.models import Challenge, ChallengeStatus
 from apps.study.models import UserQuestionAttempt, UserTestAttempt
 from .models import Badge, PointReason
 from .services import (
     award_points,
-    process_test_completion_gamification,
-)  # updated import
+    enqueue_test_completion_event,
+    increment_badge_counters,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -51,16 +54,63 @@ def gamify_on_test_completed(sender, instance: UserTestAttempt, created, **kwarg
             )
             return  # Avoid processing if it looks premature
 
-        logger.info(
-            f"Signal gamify_on_test_completed triggered for attempt {instance.id}. "
-            f"Calling gamification service."
-        )
+        # Only queue the work here; the outbox worker awards points, streak and badges.
         try:
-            process_test_completion_gamification(
-                user=instance.user, test_attempt=instance
-            )
+            enqueue_test_completion_event(instance)
         except Exception as e:
             logger.exception(
-                f"Error in signal calling process_test_completion_gamification for attempt {instance.id}: {e}"
+                f"Error queueing gamification event for attempt {instance.id}: {e}"
             )
-            # Depending on requirements, you might want to retry or log for manual intervention.
+
+
+# --- Badge Counters ---
+# post_save tells whether a save crossed a badge-relevant transition from the values
+# loaded before it, kept by the shared tracker (see `apps.api.tracking`); an unknown
+# previous value counts as no change.
+track_loaded_values(UserQuestionAttempt, ["is_correct"])
+track_loaded_values(UserTestAttempt, ["status"])
+track_loaded_values(Challenge, ["status", "winner_id"])
+
+
+@receiver(post_save, sender=UserQuestionAttempt, dispatch_uid="badge_count_question_attempt")
+def count_correct_question_attempt(sender, instance, created, **kwargs):
+    was_correct, is_correct = saved_change(instance, "is_correct", created)
+    if UNSET not in (was_correct, is_correct):
+        increment_badge_counters(
+            instance.user_id,
+            questions_solved_correctly=int(bool(is_correct)) - int(bool(was_correct)),
+        )
+
+
+@receiver(post_delete, sender=UserQuestionAttempt, dispatch_uid="badge_uncount_question_attempt")
+def uncount_deleted_question_attempt(sender, instance, **kwargs):
+    if instance.is_correct:
+        increment_badge_counters(instance.user_id, questions_solved_correctly=-1)
+
+
+@receiver(post_save, sender=UserTestAttempt, dispatch_uid="badge_count_test_attempt")
+def count_completed_test_attempt(sender, instance, created, **kwargs):
+    previous_status, status = saved_change(instance, "status", created)
+    if UNSET not in (previous_status, status):
+        is_completed = status == UserTestAttempt.Status.COMPLETED
+        was_completed = previous_status == UserTestAttempt.Status.COMPLETED
+        increment_badge_counters(
+            instance.user_id, tests_completed=int(is_completed) - int(was_completed)
+        )
+
+
+@receiver(post_delete, sender=UserTestAttempt, dispatch_uid="badge_uncount_test_attempt")
+def uncount_deleted_test_attempt(sender, instance, **kwargs):
+    if instance.status == UserTestAttempt.Status.COMPLETED:
+        increment_badge_counters(instance.user_id, tests_completed=-1)
+
+
+@receiver(post_save, sender=Challenge, dispatch_uid="badge_count_challenge_win")
+def count_challenge_win(sender, instance, created, **kwargs):
+    previous_status, status = saved_change(instance, "status", created)
+    previous_winner_id, winner_id = saved_change(instance, "winner_id", created)
+    if UNSET not in (previous_status, status, previous_winner_id, winner_id):
+        was_won = previous_status == ChallengeStatus.COMPLETED and previous_winner_id
+        is_won = status == ChallengeStatus.COMPLETED and winner_id
+        if is_won and not was_won:
+            increment_badge_counters(winner_id, challenges_won=1)
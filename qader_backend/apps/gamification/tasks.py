@@ -0,0 +1,29 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="process_gamification_event_task")
+def process_gamification_event_task(event_id: int):
+    """
+    Awards the points, streak and badges recorded by a gamification outbox event.
+    """
+    from apps.gamification.services import (
+        process_gamification_event,
+    )  # Import here to avoid circular dependency
+
+    event = process_gamification_event(event_id)
+    status = event.status if event else "missing"
+    return f"Gamification event {event_id}: {status}."
+
+
+@shared_task(name="process_pending_gamification_events_task")
+def process_pending_gamification_events_task():
+    """
+    Periodic sweeper for gamification events whose dispatch was lost or failed.
+    """
+    from apps.gamification.services import process_pending_gamification_events
+
+    processed = process_pending_gamification_events()
+    return f"Processed {processed} pending gamification events."
@@ -8,7 +8,10 @@ from apps.study.tests.factories import (
     UserTestAttemptFactory,
 )
 from apps.study.models import UserQuestionAttempt, UserTestAttempt
-from apps.gamification.models import Badge
+from apps.challenges.models import ChallengeStatus
+from apps.challenges.tests.factories import ChallengeFactory
+from apps.gamification.models import Badge, UserBadgeCounters
+from apps.users.tests.factories import UserFactory
 from ..services import PointReason
 from apps.gamification.tests.factories import BadgeFactory
 
@@ -18,8 +21,8 @@ POINTS_QUESTION_SOLVED_CORRECT = getattr(
     settings, "POINTS_QUESTION_SOLVED_CORRECT", 1
 )  # Use the correct setting key
 
-# Note: The signal gamify_on_test_completed now calls process_test_completion_gamification.
-# So, tests for the signal should mock process_test_completion_gamification.
+# Note: The signal gamify_on_test_completed queues a gamification outbox event.
+# So, tests for the signal should mock enqueue_test_completion_event.
 
 
 @patch("apps.gamification.signals.award_points")
@@ -54,8 +57,8 @@ def test_gamify_on_incorrect_question_solved(mock_award_points):
     mock_award_points.assert_not_called()
 
 
-# Test the gamify_on_test_completed signal which calls process_test_completion_gamification
-@patch("apps.gamification.signals.process_test_completion_gamification")
+# Test the gamify_on_test_completed signal which queues the gamification event
+@patch("apps.gamification.signals.enqueue_test_completion_event")
 def test_signal_gamify_on_test_completed_calls_service(mock_process_gamification):
     # Create a UserTestAttempt that is initially not completed
     attempt = UserTestAttemptFactory(
@@ -72,14 +75,12 @@ def test_signal_gamify_on_test_completed_calls_service(mock_process_gamification
     )  # Set end_time as the service/signal expects for valid completion
     attempt.save()  # This save should trigger the signal
 
-    mock_process_gamification.assert_called_once_with(
-        user=attempt.user, test_attempt=attempt
-    )
-    # The service process_test_completion_gamification itself will set completion_points_awarded.
+    mock_process_gamification.assert_called_once_with(attempt)
+    # The outbox worker sets completion_points_awarded when it processes the event.
     # We don't need to check it here as we're testing the signal's call to the service.
 
 
-@patch("apps.gamification.signals.process_test_completion_gamification")
+@patch("apps.gamification.signals.enqueue_test_completion_event")
 def test_signal_gamify_on_test_completed_already_awarded(mock_process_gamification):
     attempt = UserTestAttemptFactory(
         status=UserTestAttempt.Status.COMPLETED,
@@ -92,7 +93,7 @@ def test_signal_gamify_on_test_completed_already_awarded(mock_process_gamificati
     mock_process_gamification.assert_not_called()
 
 
-@patch("apps.gamification.signals.process_test_completion_gamification")
+@patch("apps.gamification.signals.enqueue_test_completion_event")
 def test_signal_gamify_on_test_status_not_completed(mock_process_gamification):
     # Test with ABANDONED status
     attempt_abandoned = UserTestAttemptFactory(
@@ -108,7 +109,7 @@ def test_signal_gamify_on_test_status_not_completed(mock_process_gamification):
     mock_process_gamification.assert_not_called()
 
 
-@patch("apps.gamification.signals.process_test_completion_gamification")
+@patch("apps.gamification.signals.enqueue_test_completion_event")
 def test_signal_gamify_on_test_completed_no_end_time_skipped(mock_process_gamification):
     """
     Test that the signal skips gamification if status is COMPLETED but end_time is None.
@@ -123,5 +124,73 @@ def test_signal_gamify_on_test_completed_no_end_time_skipped(mock_process_gamifi
     attempt.status = UserTestAttempt.Status.COMPLETED
     attempt.save()
 
-    # The signal handler should log a warning and return, not calling process_test_completion_gamification
+    # The signal handler should log a warning and return, not queueing the gamification event
     mock_process_gamification.assert_not_called()
+
+
+# --- Badge counter signals ---
+def test_badge_counters_track_correct_answers_incrementally():
+    user = UserFactory()
+    first = UserQuestionAttemptFactory(user=user, is_correct=True)
+    UserQuestionAttemptFactory(user=user, is_correct=False)
+    UserQuestionAttemptFactory(user=user, is_correct=True)
+    assert UserBadgeCounters.objects.get(user=user).questions_solved_correctly == 2
+
+    # Changing an answer moves the counter both ways
+    first.is_correct = False
+    first.save()
+    assert UserBadgeCounters.objects.get(user=user).questions_solved_correctly == 1
+    reloaded = UserQuestionAttempt.objects.get(pk=first.pk)
+    reloaded.is_correct = True
+    reloaded.save()
+    assert UserBadgeCounters.objects.get(user=user).questions_solved_correctly == 2
+
+    reloaded.delete()
+    assert UserBadgeCounters.objects.get(user=user).questions_solved_correctly == 1
+
+
+@patch("apps.gamification.signals.enqueue_test_completion_event")
+def test_badge_counters_track_completed_tests(mock_process_gamification):
+    user = UserFactory()
+    attempt = UserTestAttemptFactory(user=user, status=UserTestAttempt.Status.STARTED)
+    assert not UserBadgeCounters.objects.filter(user=user).exists()
+
+    attempt = UserTestAttempt.objects.get(pk=attempt.pk)
+    attempt.status = UserTestAttempt.Status.COMPLETED
+    attempt.end_time = timezone.now()
+    attempt.save()
+    attempt.save()  # Saving again without a transition does not count twice
+    assert UserBadgeCounters.objects.get(user=user).tests_completed == 1
+
+
+@patch("apps.gamification.signals.enqueue_test_completion_event")
+def test_badge_counters_count_completion_when_status_is_written(
+    mock_process_gamification,
+):
+    user = UserFactory()
+    attempt = UserTestAttempt.objects.get(pk=UserTestAttemptFactory(user=user).pk)
+    # One snapshot holds the fields tracked by both the badge and statistics handlers
+    assert set(attempt._loaded_values) == {"status"}
+    assert set(UserQuestionAttemptFactory(user=user)._loaded_values) == {
+        "is_correct",
+        "time_taken_seconds",
+    }
+
+    attempt.status = UserTestAttempt.Status.COMPLETED
+    attempt.end_time = timezone.now()
+    attempt.save(update_fields=["end_time"])  # The status is not written yet
+    assert not UserBadgeCounters.objects.filter(user=user, tests_completed__gt=0).exists()
+
+    attempt.save(update_fields=["status", "end_time"])
+    assert UserBadgeCounters.objects.get(user=user).tests_completed == 1
+
+
+def test_badge_counters_track_challenge_wins():
+    challenge = ChallengeFactory(ongoing=True)
+    winner = challenge.challenger
+    challenge.winner = winner
+    challenge.status = ChallengeStatus.COMPLETED
+    challenge.save()
+    challenge.save()
+    assert UserBadgeCounters.objects.get(user=winner).challenges_won == 1
+
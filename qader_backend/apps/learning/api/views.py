@@ -26,7 +26,10 @@ from ..models import (
     Question,
     UserStarredQuestion,
 )
-from apps.study.models import UserSkillProficiency
+from apps.study.services.sampling import (
+    DEFAULT_PROFICIENCY_THRESHOLD,
+    ProficiencyVector,
+)
 from .serializers import (
     LearningSectionSerializer,
     LearningSubSectionDetailSerializer,
@@ -367,19 +370,14 @@ class QuestionViewSet(viewsets.ReadOnlyModelViewSet):
         # Handle 'not_mastered=true' filter
         not_mastered_param = self.request.query_params.get("not_mastered", "").lower()
         if not_mastered_param == "true" and user.is_authenticated:
-            # --- Add logic here to filter based on UserSkillProficiency ---
-            mastery_threshold = (
-                0.7  # Define threshold in settings settings.MASTERY_THRESHOLD
+            weak_skill_ids = ProficiencyVector.for_user(user).weak_skill_ids(
+                DEFAULT_PROFICIENCY_THRESHOLD
             )
-            weak_skill_ids = UserSkillProficiency.objects.filter(
-                user=user, proficiency_score__lt=mastery_threshold
-            ).values_list("skill_id", flat=True)
-            if weak_skill_ids.exists():
-                queryset = queryset.filter(skill_id__in=list(weak_skill_ids))
+            if weak_skill_ids:
+                queryset = queryset.filter(skill_id__in=weak_skill_ids)
             else:
                 # If user has no weak skills, return empty or handle as needed
                 queryset = queryset.none()
-            pass  # Remove pass when implemented
 
         # Handle 'exclude_ids' filter more robustly
         exclude_ids_str = self.request.query_params.get("exclude_ids")
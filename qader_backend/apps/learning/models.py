@@ -232,6 +232,22 @@ class QuestionQuerySet(models.QuerySet):
         )
         return self.annotate(user_has_starred=Exists(starred_subquery))
 
+    def update(self, **kwargs):
+        """Bulk updates bypass signals, so invalidate the question pool index here."""
+        from .services import invalidate_question_pool_index
+
+        rows = super().update(**kwargs)
+        if rows:
+            invalidate_question_pool_index()
+        return rows
+
+    def bulk_create(self, *args, **kwargs):
+        from .services import invalidate_question_pool_index
+
+        objs = super().bulk_create(*args, **kwargs)
+        invalidate_question_pool_index()
+        return objs
+
 
 class Question(TimeStampedModel):
     """
@@ -0,0 +1,308 @@
+import bisect
+import logging
+import random
+import threading
+import time
+from typing import (
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Question, LearningSection, LearningSubSection, Skill
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+QUESTION_POOL_INDEX_TTL_SECONDS = getattr(
+    settings, "QUESTION_POOL_INDEX_TTL_SECONDS", 300
+)
+QUESTION_POOL_VERSION_CACHE_KEY = "learning:question_pool:version"
+
+
+class PoolIndexState(NamedTuple):
+    """One immutable build of the question pool index."""
+
+    version: int
+    built_at: float
+    all_ids: FrozenSet[int]
+    by_subsection: Dict[int, FrozenSet[int]]
+    by_skill: Dict[int, FrozenSet[int]]
+    by_difficulty: Dict[int, FrozenSet[int]]
+    subsection_ids_by_slug: Dict[str, int]
+    skill_ids_by_slug: Dict[str, int]
+    section_ids_by_slug: Dict[str, int]
+    subsection_id_by_question: Dict[int, int]
+    skill_id_by_question: Dict[int, Optional[int]]
+    # {(dimension, key, difficulty): question IDs}, dimension being
+    # "section", "subsection", "skill" or "all" (key 0)
+    sequences: Dict[Tuple[str, int, int], Tuple[int, ...]]
+
+
+class QuestionPoolIndex:
+    """
+    Per-process, in-memory index of active question IDs keyed by subsection,
+    skill and difficulty.
+
+    Sampling questions becomes a set intersection in memory instead of a
+    `values_list("id")` scan over the Question table on every request.
+    For uniform draws the index also keeps ID tuples per (section,
+    subsection or skill, difficulty), so `draw` picks k questions in O(k)
+    without building the candidate set at all. The
+    index is rebuilt lazily when it expires or when the shared version stamp
+    (stored in the Django cache, i.e. Redis in production) is bumped by
+    another process after a Question/Skill/SubSection write.
+
+    Each build is a `PoolIndexState` published with a single reference swap,
+    so concurrent readers see either the previous build or the new one, never
+    a mix or a half-cleared index.
+    """
+
+    def __init__(self, ttl_seconds: int = QUESTION_POOL_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._state: Optional[PoolIndexState] = None
+
+    # --- Versioning / Invalidation ---
+    @staticmethod
+    def _shared_version() -> int:
+        version = cache.get(QUESTION_POOL_VERSION_CACHE_KEY)
+        if version is None:
+            # Seeded from the clock rather than 0, so a stamp lost to eviction
+            # never comes back as a value an earlier cache key already used
+            cache.add(QUESTION_POOL_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+            version = cache.get(QUESTION_POOL_VERSION_CACHE_KEY) or time.time_ns()
+        return version
+
+    def invalidate(self):
+        """Drops the local index and bumps the shared version for other processes."""
+        self._state = None
+        try:
+            cache.incr(QUESTION_POOL_VERSION_CACHE_KEY)
+        except ValueError:  # Key missing (expired/evicted cache)
+            cache.set(QUESTION_POOL_VERSION_CACHE_KEY, time.time_ns(), timeout=None)
+        except Exception as e:
+            logger.warning(f"Could not bump shared question pool version: {e}")
+
+    def _is_stale(self, state: Optional[PoolIndexState], version: int) -> bool:
+        if state is None or state.version != version:
+            return True
+        return (time.monotonic() - state.built_at) > self.ttl_seconds
+
+    # --- Building ---
+    def _build(self, version: int) -> PoolIndexState:
+        by_subsection: Dict[int, Set[int]] = {}
+        by_skill: Dict[int, Set[int]] = {}
+        by_difficulty: Dict[int, Set[int]] = {}
+        subsection_by_question: Dict[int, int] = {}
+        skill_by_question: Dict[int, Optional[int]] = {}
+        sequences: Dict[Tuple[str, int, int], List[int]] = {}
+        section_by_subsection = dict(
+            LearningSubSection.objects.values_list("id", "section_id")
+        )
+
+        rows = Question.objects.filter(is_active=True).values_list(
+            "id", "subsection_id", "skill_id", "difficulty"
+        )
+        for qid, subsection_id, skill_id, difficulty in rows.iterator(
+            chunk_size=5000
+        ):
+            by_subsection.setdefault(subsection_id, set()).add(qid)
+            if skill_id is not None:
+                by_skill.setdefault(skill_id, set()).add(qid)
+                sequences.setdefault(("skill", skill_id, difficulty), []).append(qid)
+            by_difficulty.setdefault(difficulty, set()).add(qid)
+            subsection_by_question[qid] = subsection_id
+            skill_by_question[qid] = skill_id
+            section_id = section_by_subsection.get(subsection_id)
+            for key in (
+                ("all", 0, difficulty),
+                ("subsection", subsection_id, difficulty),
+                ("section", section_id, difficulty),
+            ):
+                sequences.setdefault(key, []).append(qid)
+
+        state = PoolIndexState(
+            version=version,
+            built_at=time.monotonic(),
+            all_ids=frozenset(subsection_by_question),
+            by_subsection={k: frozenset(v) for k, v in by_subsection.items()},
+            by_skill={k: frozenset(v) for k, v in by_skill.items()},
+            by_difficulty={k: frozenset(v) for k, v in by_difficulty.items()},
+            subsection_ids_by_slug=dict(
+                LearningSubSection.objects.values_list("slug", "id")
+            ),
+            skill_ids_by_slug=dict(Skill.objects.values_list("slug", "id")),
+            section_ids_by_slug=dict(
+                LearningSection.objects.values_list("slug", "id")
+            ),
+            subsection_id_by_question=subsection_by_question,
+            skill_id_by_question=skill_by_question,
+            sequences={key: tuple(ids) for key, ids in sequences.items()},
+        )
+        logger.info(
+            f"Question pool index built (version {version}): {len(state.all_ids)} active questions, "
+            f"{len(state.by_subsection)} subsections, {len(state.by_skill)} skills."
+        )
+        return state
+
+    def ensure_fresh(self) -> PoolIndexState:
+        """
+        Returns the current build, rebuilding it first if it is missing,
+        expired or behind the shared version. Callers should read everything
+        they need from the returned state rather than from repeated calls.
+        """
+        version = self._shared_version()
+        state = self._state
+        if self._is_stale(state, version):
+            with self._lock:
+                state = self._state
+                if self._is_stale(state, version):
+                    state = self._build(version)
+                    self._state = state
+        return state
+
+    # --- Lookups ---
+    @staticmethod
+    def _union(pools: Dict[int, FrozenSet[int]], keys: Iterable[int]) -> Set[int]:
+        result: Set[int] = set()
+        for key in keys:
+            result.update(pools.get(key, ()))
+        return result
+
+    def candidate_ids(
+        self,
+        subsection_slugs: Optional[Iterable[str]] = None,
+        skill_slugs: Optional[Iterable[str]] = None,
+        difficulties: Optional[Iterable[int]] = None,
+        skill_ids: Optional[Iterable[int]] = None,
+    ) -> Set[int]:
+        """
+        Returns the set of active question IDs matching all the given filters.
+        A filter left as None is not applied; an empty iterable matches nothing.
+        """
+        state = self.ensure_fresh()
+        result: Set[int] = set(state.all_ids)
+
+        if subsection_slugs is not None:
+            ids = [
+                state.subsection_ids_by_slug[slug]
+                for slug in subsection_slugs
+                if slug in state.subsection_ids_by_slug
+            ]
+            result &= self._union(state.by_subsection, ids)
+        if skill_slugs is not None:
+            ids = [
+                state.skill_ids_by_slug[slug]
+                for slug in skill_slugs
+                if slug in state.skill_ids_by_slug
+            ]
+            result &= self._union(state.by_skill, ids)
+        if skill_ids is not None:
+            result &= self._union(state.by_skill, skill_ids)
+        if difficulties is not None:
+            result &= self._union(state.by_difficulty, difficulties)
+        return result
+
+    def skill_ids(self) -> Set[int]:
+        """Returns IDs of all skills that have at least one active question."""
+        return set(self.ensure_fresh().by_skill)
+
+    def pools_by_difficulty(
+        self,
+        section_slugs: Optional[Iterable[str]] = None,
+        subsection_slugs: Optional[Iterable[str]] = None,
+        skill_slugs: Optional[Iterable[str]] = None,
+    ) -> Dict[int, List[Tuple[int, ...]]]:
+        """
+        Question ID pools per difficulty for `draw`, filtered by the most
+        specific of skills, subsections or sections given (all active
+        questions if none is). The pools of one difficulty are disjoint.
+        Costs O(keys x difficulties), independent of the number of questions.
+        """
+        state = self.ensure_fresh()
+        if skill_slugs:
+            dimension, ids_by_slug, slugs = "skill", state.skill_ids_by_slug, skill_slugs
+        elif subsection_slugs:
+            dimension, ids_by_slug, slugs = (
+                "subsection",
+                state.subsection_ids_by_slug,
+                subsection_slugs,
+            )
+        elif section_slugs:
+            dimension, ids_by_slug, slugs = (
+                "section",
+                state.section_ids_by_slug,
+                section_slugs,
+            )
+        else:
+            dimension, ids_by_slug, slugs = "all", {"": 0}, [""]
+
+        keys = {ids_by_slug[slug] for slug in slugs if slug in ids_by_slug}
+        pools: Dict[int, List[Tuple[int, ...]]] = {}
+        for difficulty in state.by_difficulty:
+            pools[difficulty] = [
+                state.sequences[(dimension, key, difficulty)]
+                for key in keys
+                if (dimension, key, difficulty) in state.sequences
+            ]
+        return pools
+
+    @staticmethod
+    def draw(pools: Sequence[Sequence[int]], k: int) -> List[int]:
+        """
+        Draws up to k distinct IDs uniformly from the union of disjoint pools.
+        Picks random positions instead of shuffling, so the cost is O(k)
+        expected unless k is close to the pool size.
+        """
+        offsets, total = [], 0
+        for pool in pools:
+            offsets.append(total)
+            total += len(pool)
+        k = min(k, total)
+        if k <= 0:
+            return []
+        if k * 2 > total:  # Dense draw: rejection would retry too often
+            return random.sample([qid for pool in pools for qid in pool], k)
+
+        positions: Set[int] = set()
+        while len(positions) < k:
+            positions.add(random.randrange(total))
+        drawn = []
+        for position in positions:
+            index = bisect.bisect_right(offsets, position) - 1
+            drawn.append(pools[index][position - offsets[index]])
+        random.shuffle(drawn)
+        return drawn
+
+
+question_pool_index = QuestionPoolIndex()
+
+
+def question_content_version() -> int:
+    """
+    Shared stamp bumped on every Question, Skill, subsection or section write.
+    Caches of rendered question content put it in their keys, so an edit
+    retires every entry at once.
+    """
+    return QuestionPoolIndex._shared_version()
+
+
+def invalidate_question_pool_index():
+    """
+    Invalidates the question pool index now and again once the surrounding
+    transaction commits, so a rebuild inside the transaction cannot leave
+    rolled-back rows behind.
+    """
+    question_pool_index.invalidate()
+    transaction.on_commit(question_pool_index.invalidate)
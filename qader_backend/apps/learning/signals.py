@@ -0,0 +1,45 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+import logging
+
+from .models import Question, LearningSection, LearningSubSection, Skill
+from .services import invalidate_question_pool_index
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=Question, dispatch_uid="question_pool_on_question_save")
+@receiver(
+    post_delete, sender=Question, dispatch_uid="question_pool_on_question_delete"
+)
+@receiver(post_save, sender=Skill, dispatch_uid="question_pool_on_skill_save")
+@receiver(post_delete, sender=Skill, dispatch_uid="question_pool_on_skill_delete")
+@receiver(
+    post_save,
+    sender=LearningSubSection,
+    dispatch_uid="question_pool_on_subsection_save",
+)
+@receiver(
+    post_delete,
+    sender=LearningSubSection,
+    dispatch_uid="question_pool_on_subsection_delete",
+)
+@receiver(
+    post_save,
+    sender=LearningSection,
+    dispatch_uid="question_pool_on_section_save",
+)
+@receiver(
+    post_delete,
+    sender=LearningSection,
+    dispatch_uid="question_pool_on_section_delete",
+)
+def invalidate_question_pool_on_change(sender, instance, **kwargs):
+    """
+    Keeps the in-memory question pool index, and caches keyed on
+    `question_content_version`, in sync with learning content edits.
+    """
+    logger.debug(
+        f"{sender.__name__} {instance.pk} changed. Invalidating question pool index."
+    )
+    invalidate_question_pool_index()
@@ -0,0 +1,107 @@
+import pytest
+from django.core.cache import cache
+
+from apps.learning.models import Question
+from apps.learning.services import (
+    QUESTION_POOL_VERSION_CACHE_KEY,
+    question_content_version,
+    question_pool_index,
+)
+from .factories import (
+    QuestionFactory,
+    SkillFactory,
+    LearningSectionFactory,
+    LearningSubSectionFactory,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def test_candidate_ids_filters_by_subsection_skill_and_difficulty():
+    sub_a = LearningSubSectionFactory()
+    sub_b = LearningSubSectionFactory()
+    skill_a = SkillFactory(subsection=sub_a)
+    q1 = QuestionFactory(subsection=sub_a, skill=skill_a, difficulty=1)
+    q2 = QuestionFactory(subsection=sub_a, skill=skill_a, difficulty=3)
+    q3 = QuestionFactory(subsection=sub_b, skill=None, difficulty=3)
+
+    assert question_pool_index.candidate_ids() == {q1.id, q2.id, q3.id}
+    assert question_pool_index.candidate_ids(subsection_slugs=[sub_a.slug]) == {
+        q1.id,
+        q2.id,
+    }
+    assert question_pool_index.candidate_ids(skill_slugs=[skill_a.slug]) == {
+        q1.id,
+        q2.id,
+    }
+    assert question_pool_index.candidate_ids(difficulties=[3]) == {q2.id, q3.id}
+    assert question_pool_index.candidate_ids(subsection_slugs=["unknown"]) == set()
+
+
+def test_index_invalidated_on_save_delete_and_bulk_update():
+    q1 = QuestionFactory()
+    q2 = QuestionFactory()
+    assert question_pool_index.candidate_ids() == {q1.id, q2.id}
+
+    q1.is_active = False
+    q1.save()
+    assert question_pool_index.candidate_ids() == {q2.id}
+
+    q3 = QuestionFactory()
+    assert question_pool_index.candidate_ids() == {q2.id, q3.id}
+
+    q3.delete()
+    assert question_pool_index.candidate_ids() == {q2.id}
+
+    Question.objects.update(is_active=False)
+    assert question_pool_index.candidate_ids() == set()
+
+
+def test_invalidate_leaves_builds_held_by_readers_intact():
+    q1 = QuestionFactory()
+    state = question_pool_index.ensure_fresh()
+
+    q2 = QuestionFactory()  # Invalidates the index
+    assert state.all_ids == {q1.id}
+    assert state.subsection_id_by_question == {q1.id: q1.subsection_id}
+    assert question_pool_index.ensure_fresh().all_ids == {q1.id, q2.id}
+
+
+def test_content_version_does_not_regress_after_eviction():
+    question_pool_index.invalidate()
+    before = question_content_version()
+
+    cache.delete(QUESTION_POOL_VERSION_CACHE_KEY)
+    assert question_content_version() > before
+
+    cache.delete(QUESTION_POOL_VERSION_CACHE_KEY)
+    question_pool_index.invalidate()
+    assert question_content_version() > before
+
+
+def test_pools_by_difficulty_and_draw():
+    section = LearningSectionFactory()
+    sub_a = LearningSubSectionFactory(section=section)
+    sub_b = LearningSubSectionFactory(section=section)
+    easy = [QuestionFactory(subsection=sub, difficulty=1) for sub in (sub_a, sub_b)]
+    hard = QuestionFactory(subsection=sub_a, difficulty=5)
+    QuestionFactory(difficulty=1)  # Other section
+
+    pools = question_pool_index.pools_by_difficulty(section_slugs=[section.slug])
+    assert {qid for pool in pools[1] for qid in pool} == {q.id for q in easy}
+    assert pools[5] == [(hard.id,)]
+    assert 3 not in pools  # No active question of that difficulty
+
+    drawn = question_pool_index.draw(pools[1], 1)
+    assert len(drawn) == 1 and drawn[0] in {q.id for q in easy}
+    assert sorted(question_pool_index.draw(pools[1], 10)) == sorted(
+        q.id for q in easy
+    )
+
+
+def test_draw_is_uniform_over_pools():
+    pools = [tuple(range(0, 10)), tuple(range(10, 100))]
+    drawn = [qid for _ in range(200) for qid in question_pool_index.draw(pools, 5)]
+    assert len(set(drawn)) > 50
+    # 10% of the IDs live in the first pool
+    assert 0.03 < sum(qid < 10 for qid in drawn) / len(drawn) < 0.2
@@ -17,7 +17,12 @@ from drf_spectacular.utils import (
 from drf_spectacular.types import OpenApiTypes  # For parameter types
 
 from apps.notifications.models import Notification
-from apps.notifications.services import bulk_mark_as_read, mark_all_as_read_for_user
+from apps.notifications.services import (
+    bulk_mark_as_read,
+    delete_notification,
+    get_unread_count,
+    mark_all_as_read_for_user,
+)
 from .serializers import NotificationSerializer, NotificationMarkReadInputSerializer
 
 import logging
@@ -269,7 +274,7 @@ class NotificationDeleteView(generics.DestroyAPIView):
         logger.info(
             f"User {self.request.user.id} deleting notification ID {instance.id}."
         )
-        super().perform_destroy(instance)
+        delete_notification(instance)
 
 
 @extend_schema(
@@ -294,7 +299,5 @@ class UnreadNotificationCountView(views.APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, *args, **kwargs):
-        count = Notification.objects.filter(
-            recipient=request.user, is_read=False
-        ).count()
+        count = get_unread_count(request.user.id)
         return Response({"unread_count": count}, status=status.HTTP_200_OK)
@@ -0,0 +1,80 @@
+import json
+import logging
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from apps.users.presence import presence
+from .realtime import notification_group_name
+from .services import get_unread_count
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationConsumer(AsyncWebsocketConsumer):
+    """
+    Pushes a user's new notifications and unread-count changes, so clients
+    don't have to poll the list and unread-count endpoints.
+
+    On connect the client receives its current unread count; afterwards
+    every change arrives as a delta together with the resulting count.
+    """
+
+    async def connect(self):
+        self.user = self.scope.get("user")
+        if not self.user or not self.user.is_authenticated:
+            await self.close(code=4001)
+            return
+
+        self.user_group_name = notification_group_name(self.user.id)
+
+        # Join user-specific group
+        await self.channel_layer.group_add(self.user_group_name, self.channel_name)
+        await self.accept()
+        await presence.aheartbeat(self.user.id)
+        await self.send_unread_count()
+        logger.info(f"User {self.user.id} connected to Notifications WebSocket")
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "user_group_name"):
+            logger.info(
+                f"User {self.user.id} disconnected from Notifications WebSocket. Code: {close_code}"
+            )
+            await self.channel_layer.group_discard(
+                self.user_group_name, self.channel_name
+            )
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """
+        Clients send {"type": "heartbeat"} periodically to stay online; the
+        reply re-seeds the unread counter should it have expired meanwhile.
+        """
+        await presence.aheartbeat(self.user.id)
+        await self.send_unread_count()
+
+    async def send_unread_count(self):
+        count = await database_sync_to_async(get_unread_count)(self.user.id)
+        await self.send(
+            text_data=json.dumps(
+                {"type": "unread_count", "payload": {"delta": 0, "unread_count": count}}
+            )
+        )
+
+    # --- Group message handlers ---
+    async def notification_created(self, event):
+        """Handles 'notification.created': a new notification for this user."""
+        await self.send(
+            text_data=json.dumps(
+                {
+                    "type": "notification",
+                    "payload": event["payload"],  # NotificationSerializer data
+                    "unread_count": event["unread_count"],
+                }
+            )
+        )
+
+    async def unread_count_update(self, event):
+        """Handles 'unread.count.update': notifications were read or deleted."""
+        await self.send(
+            text_data=json.dumps({"type": "unread_count", "payload": event["payload"]})
+        )
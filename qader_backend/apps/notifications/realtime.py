@@ -0,0 +1,167 @@
+import logging
+import threading
+from typing import Iterable, List, Optional
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Defaults to the presence Redis; unset means in-process counters (tests, development)
+NOTIFICATION_COUNTER_REDIS_URL = getattr(
+    settings,
+    "NOTIFICATION_COUNTER_REDIS_URL",
+    getattr(settings, "PRESENCE_REDIS_URL", None),
+)
+# A counter is recounted from the database at least this often, bounding any drift
+NOTIFICATION_UNREAD_COUNT_TTL_SECONDS = getattr(
+    settings, "NOTIFICATION_UNREAD_COUNT_TTL_SECONDS", 24 * 60 * 60
+)
+
+UNREAD_KEY_PREFIX = "notifications:unread"
+
+# Adjusts a counter only if it is seeded, never below zero
+ADJUST_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return nil
+end
+local count = redis.call("INCRBY", KEYS[1], ARGV[1])
+if count < 0 then
+    redis.call("SET", KEYS[1], 0, "KEEPTTL")
+    count = 0
+end
+return count
+"""
+
+
+def notification_group_name(user_id) -> str:
+    """Channel layer group of a user's notification sockets."""
+    return f"user_{user_id}_notifications"
+
+
+class InMemoryCounters:
+    """
+    The Redis string commands the unread counter needs, kept in process
+    memory. Used when no Redis URL is configured.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def get(self, name):
+        with self._lock:
+            value = self._values.get(name)
+        return None if value is None else str(value)
+
+    def set(self, name, value, ex=None, nx=False):
+        with self._lock:
+            if nx and name in self._values:
+                return None
+            self._values[name] = int(value)
+            return True
+
+    def adjust(self, name, amount):
+        """Same semantics as ADJUST_SCRIPT."""
+        with self._lock:
+            if name not in self._values:
+                return None
+            self._values[name] = max(self._values[name] + amount, 0)
+            return self._values[name]
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class UnreadNotificationCounter:
+    """
+    Per-user unread notification counts in Redis, so the count endpoint and
+    notification sockets never run COUNT(*) over the notifications table.
+
+    A counter is seeded from the database the first time it is read and
+    then moved by deltas as notifications are created, read and deleted.
+    Deltas for a user without a counter are dropped: the next read seeds it
+    with the exact count. Counters expire so any drift is short-lived.
+    Counting is best effort: Redis errors are logged and reported as
+    "unknown", and callers fall back to the database.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = NOTIFICATION_COUNTER_REDIS_URL,
+        ttl_seconds: int = NOTIFICATION_UNREAD_COUNT_TTL_SECONDS,
+    ):
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self._client = None
+        self._adjust_script = None
+        self._memory = None if redis_url else InMemoryCounters()
+
+    def _get_client(self):
+        if self._memory is not None:
+            return self._memory
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url, decode_responses=True)
+            self._adjust_script = self._client.register_script(ADJUST_SCRIPT)
+        return self._client
+
+    @staticmethod
+    def _key(user_id) -> str:
+        return f"{UNREAD_KEY_PREFIX}:{user_id}"
+
+    def get(self, user_id) -> Optional[int]:
+        """The user's unread count, or None if it is not seeded."""
+        try:
+            value = self._get_client().get(self._key(user_id))
+        except redis.RedisError as e:
+            logger.warning(f"Unread count lookup failed for user {user_id}: {e}")
+            return None
+        return None if value is None else int(value)
+
+    def seed(self, user_id, count: int) -> int:
+        """
+        Stores a count read from the database, unless a counter appeared in
+        the meantime. Returns the stored count.
+        """
+        client = self._get_client()
+        key = self._key(user_id)
+        try:
+            if client.set(key, count, ex=self.ttl_seconds, nx=True):
+                return count
+            value = client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Could not seed unread count for user {user_id}: {e}")
+            return count
+        return count if value is None else int(value)
+
+    def adjust(self, user_id, delta: int) -> Optional[int]:
+        """Moves a seeded counter by `delta`. Returns the new count, or None if not seeded."""
+        return self.adjust_many([user_id], delta)[0]
+
+    def adjust_many(self, user_ids: Iterable, delta: int) -> List[Optional[int]]:
+        """`adjust` for many users in one round trip; counts follow `user_ids` order."""
+        user_ids = list(user_ids)
+        client = self._get_client()
+        try:
+            if self._memory is not None:
+                results = [client.adjust(self._key(user_id), delta) for user_id in user_ids]
+            else:
+                pipe = client.pipeline(transaction=False)
+                for user_id in user_ids:
+                    self._adjust_script(keys=[self._key(user_id)], args=[delta], client=pipe)
+                results = pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Could not adjust unread counts for {len(user_ids)} users: {e}")
+            return [None] * len(user_ids)
+        return [None if result is None else int(result) for result in results]
+
+    def clear(self):
+        """Drops all in-process counters (tests / development only)."""
+        if self._memory is not None:
+            self._memory.clear()
+
+
+# Module-level singleton shared by the notification services and consumers in this process
+unread_counter = UnreadNotificationCounter()
@@ -0,0 +1,12 @@
+from django.urls import re_path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    # New notifications and unread-count changes for the connected user
+    re_path(
+        r"ws/notifications/$",
+        consumers.NotificationConsumer.as_asgi(),
+        name="ws_notifications",
+    ),
+]
@@ -1,19 +1,34 @@
+import asyncio
+from itertools import islice
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.db import transaction
+from django.db.models import QuerySet
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Iterable, List, Union
 import logging
 
-from apps.notifications.tasks import dispatch_notification_email_task
+from apps.notifications.tasks import (
+    dispatch_notification_email_task,
+    dispatch_notification_emails_task,
+)
 from qader_project.settings.base import FRONTEND_BASE_URL
 
 from .models import Notification, NotificationTypeChoices
+from .realtime import notification_group_name, unread_counter
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# --- Constants ---
+# Recipients handled per INSERT, email task and channel layer call in create_notifications_bulk
+NOTIFICATION_BULK_BATCH_SIZE = getattr(settings, "NOTIFICATION_BULK_BATCH_SIZE", 500)
+
 
 @transaction.atomic
 def create_notification(
@@ -29,7 +44,7 @@ def create_notification(
     send_email: bool = False,
     email_subject: Optional[str] = None,
     email_body_template_name: Optional[str] = None,
-    # send_realtime: bool = True, # For future WebSocket integration
+    send_realtime: bool = True,
 ) -> Optional[Notification]:
     """
     Creates and saves a notification, optionally triggering an email.
@@ -47,7 +62,7 @@ def create_notification(
         send_email: If True, an email notification will be dispatched.
         email_subject: Custom subject for the email. If None, a default will be used.
         email_body_template_name: Custom template name for email body. If None, a default will be used.
-        # send_realtime: If True, attempt to send a real-time update (future).
+        send_realtime: If True, the notification is pushed to the recipient's open sockets.
 
     Returns:
         The created Notification object or None if an error occurred.
@@ -97,10 +112,11 @@ def create_notification(
             f"Actor ID {actor.id if actor else 'System'}, Verb '{verb}', Type '{notification_type}'"
         )
 
-        # TODO: Future - Real-time push via WebSockets (e.g., Django Channels)
-        # if send_realtime:
-        #     from .tasks import send_realtime_notification_task # Example Celery task
-        #     send_realtime_notification_task.delay(notification.id)
+        transaction.on_commit(
+            lambda: notify_unread_count_change(
+                recipient.id, 1, notification=notification if send_realtime else None
+            )
+        )
 
         if send_email and recipient.email:
             try:
@@ -160,6 +176,148 @@ def create_notification(
         return None
 
 
+def create_notifications_bulk(
+    recipients: Union[QuerySet, Iterable[int]],
+    verb: str,
+    actor: Optional[User] = None,
+    description: Optional[str] = None,
+    target: Optional[Any] = None,
+    action_object: Optional[Any] = None,
+    notification_type: str = NotificationTypeChoices.INFO,
+    url: Optional[str] = FRONTEND_BASE_URL,
+    extra_data: Optional[Dict[str, Any]] = None,
+    extra_data_by_recipient: Optional[Dict[int, Dict[str, Any]]] = None,
+    send_email: bool = False,
+    email_subject: Optional[str] = None,
+    email_body_template_name: Optional[str] = None,
+    send_realtime: bool = True,
+    batch_size: int = NOTIFICATION_BULK_BATCH_SIZE,
+) -> int:
+    """
+    Creates the same notification for many users: `create_notification` for
+    broadcasts. Recipients are handled in batches of `batch_size`, each one
+    INSERT, one email task and one channel layer call.
+
+    Args:
+        recipients: A User queryset or an iterable of user IDs.
+        extra_data_by_recipient: Per user ID, data merged over `extra_data`
+            for that recipient only.
+        batch_size: Recipients per batch.
+        The other arguments are as for `create_notification`.
+
+    Returns:
+        The number of notifications created.
+    """
+    if isinstance(recipients, QuerySet):
+        recipients = recipients.values_list("pk", flat=True)
+    recipient_ids = iter(dict.fromkeys(recipients))
+
+    # Shared by every row: resolved once instead of per recipient
+    fields = {
+        "actor": actor,
+        "verb": verb,
+        "description": description,
+        "notification_type": notification_type,
+        "url": url,
+    }
+    for name, obj in (("target", target), ("action_object", action_object)):
+        if obj is not None:
+            fields[f"{name}_content_type"] = ContentType.objects.get_for_model(
+                obj._meta.model
+            )
+            fields[f"{name}_object_id"] = str(obj.pk)
+
+    email = None
+    if send_email:
+        email = {
+            "subject": str(email_subject or _("New Notification: {}").format(verb)),
+            "body_template_name": email_body_template_name
+            or "emails/generic_notification_email",
+            "context": {
+                "verb": str(verb),
+                "actor_name": str(
+                    actor.get_full_name() or actor.username if actor else _("System")
+                ),
+                "description": str(description) if description else None,
+                "target_name": str(target) if target else None,
+                "action_object_name": str(action_object) if action_object else None,
+                "url": url,
+                **(extra_data or {}),
+            },
+        }
+
+    created = 0
+    while batch_ids := list(islice(recipient_ids, batch_size)):
+        created += _create_notification_batch(
+            batch_ids,
+            fields,
+            target,
+            action_object,
+            extra_data,
+            extra_data_by_recipient or {},
+            email,
+            send_realtime,
+        )
+    logger.info(
+        f"Created {created} '{notification_type}' notifications: Actor ID "
+        f"{actor.id if actor else 'System'}, Verb '{verb}'"
+    )
+    return created
+
+
+@transaction.atomic
+def _create_notification_batch(
+    recipient_ids: List[int],
+    fields: Dict[str, Any],
+    target: Optional[Any],
+    action_object: Optional[Any],
+    extra_data: Optional[Dict[str, Any]],
+    extra_data_by_recipient: Dict[int, Dict[str, Any]],
+    email: Optional[Dict[str, Any]],
+    send_realtime: bool,
+) -> int:
+    recipients = User.objects.filter(pk__in=recipient_ids).select_related("profile")
+    notifications = []
+    for recipient in recipients:
+        data = extra_data
+        if recipient.pk in extra_data_by_recipient:
+            data = {**(extra_data or {}), **extra_data_by_recipient[recipient.pk]}
+        notifications.append(Notification(recipient=recipient, data=data, **fields))
+    Notification.objects.bulk_create(notifications)
+
+    # Spares the real-time payloads a lookup per row
+    for name, obj in (("target", target), ("action_object", action_object)):
+        if obj is not None:
+            field = Notification._meta.get_field(name)
+            for notification in notifications:
+                field.set_cached_value(notification, obj)
+
+    transaction.on_commit(
+        lambda: notify_notifications_created(notifications, push=send_realtime)
+    )
+    if email:
+        messages = [
+            {
+                "notification_id": notification.id,
+                "recipient_email": notification.recipient.email,
+                "context": {
+                    "recipient_name": notification.recipient.get_full_name()
+                    or notification.recipient.username,
+                    **extra_data_by_recipient.get(notification.recipient_id, {}),
+                },
+            }
+            for notification in notifications
+            if notification.recipient.email
+        ]
+        if messages:
+            transaction.on_commit(
+                lambda: dispatch_notification_emails_task.delay(
+                    messages=messages, **email
+                )
+            )
+    return len(notifications)
+
+
 def bulk_mark_as_read(user: User, notification_ids: list[int]) -> int:
     """Marks a list of notification IDs as read for a specific user."""
     if not notification_ids:
@@ -169,6 +327,10 @@ def bulk_mark_as_read(user: User, notification_ids: list[int]) -> int:
         updated_count = Notification.objects.filter(
             recipient=user, id__in=notification_ids, is_read=False
         ).update(is_read=True, read_at=timezone.now())
+        if updated_count:
+            transaction.on_commit(
+                lambda: notify_unread_count_change(user.id, -updated_count)
+            )
     logger.info(
         f"User {user.id} bulk marked {updated_count} notifications as read from list: {notification_ids}."
     )
@@ -181,7 +343,118 @@ def mark_all_as_read_for_user(user: User) -> int:
         updated_count = Notification.objects.filter(
             recipient=user, is_read=False
         ).update(is_read=True, read_at=timezone.now())
+        if updated_count:
+            transaction.on_commit(
+                lambda: notify_unread_count_change(user.id, -updated_count)
+            )
     logger.info(
         f"User {user.id} marked all ({updated_count}) their unread notifications as read."
     )
     return updated_count
+
+
+@transaction.atomic
+def delete_notification(notification: Notification):
+    """Deletes a notification, keeping the recipient's unread count in step."""
+    recipient_id, was_unread = notification.recipient_id, not notification.is_read
+    notification.delete()
+    if was_unread:
+        transaction.on_commit(lambda: notify_unread_count_change(recipient_id, -1))
+
+
+# --- Real-time Delivery ---
+
+
+def get_unread_count(user_id: int) -> int:
+    """
+    The user's unread notification count, from the Redis counter. Only the
+    first read (or the first after the counter expires) counts rows.
+    """
+    count = unread_counter.get(user_id)
+    if count is None:
+        count = unread_counter.seed(
+            user_id,
+            Notification.objects.filter(recipient_id=user_id, is_read=False).count(),
+        )
+    return count
+
+
+def notify_unread_count_change(
+    user_id: int, delta: int, notification: Optional[Notification] = None
+):
+    """
+    Applies an unread-count delta to the user's counter and pushes it to the
+    user's notification sockets, with the new notification if there is one.
+    Call once the change is committed.
+    """
+    unread_count = unread_counter.adjust(user_id, delta)
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return  # Avoid errors if channels isn't configured
+    # A user without a counter has no socket open: connecting seeds it
+    if unread_count is None and notification is None:
+        return
+    try:
+        if notification is not None:
+            from .api.serializers import NotificationSerializer  # Avoid circular import
+
+            message = {
+                "type": "notification.created",  # Matches consumer method name
+                "payload": NotificationSerializer(notification).data,
+                "unread_count": unread_count,
+            }
+        else:
+            message = {
+                "type": "unread.count.update",
+                "payload": {"delta": delta, "unread_count": unread_count},
+            }
+        async_to_sync(channel_layer.group_send)(
+            notification_group_name(user_id), message
+        )
+    except Exception as e:
+        logger.error(
+            f"Error pushing notification update to user {user_id}: {e}", exc_info=True
+        )
+
+
+def notify_notifications_created(notifications: List[Notification], push: bool = True):
+    """
+    `notify_unread_count_change` for a batch of new notifications: one
+    counter round trip and, if `push`, one channel layer call for them all.
+    """
+    if not notifications:
+        return
+    unread_counts = unread_counter.adjust_many(
+        [notification.recipient_id for notification in notifications], 1
+    )
+    channel_layer = get_channel_layer()
+    if not push or not channel_layer:
+        return
+    try:
+        from .api.serializers import NotificationSerializer  # Avoid circular import
+
+        payloads = NotificationSerializer(notifications, many=True).data
+        messages = [
+            (
+                notification_group_name(notification.recipient_id),
+                {
+                    "type": "notification.created",
+                    "payload": payload,
+                    "unread_count": unread_count,
+                },
+            )
+            for notification, payload, unread_count in zip(
+                notifications, payloads, unread_counts
+            )
+        ]
+        async_to_sync(_group_send_all)(channel_layer, messages)
+    except Exception as e:
+        logger.error(
+            f"Error pushing {len(notifications)} new notifications: {e}", exc_info=True
+        )
+
+
+async def _group_send_all(channel_layer, messages):
+    await asyncio.gather(
+        *(channel_layer.group_send(group, message) for group, message in messages)
+    )
@@ -18,7 +18,7 @@ def send_subscription_expiry_reminders():
         UserProfile,
     )  # Import here to avoid circular dependency
     from apps.notifications.services import (
-        create_notification,
+        create_notifications_bulk,
     )
 
     now = timezone.now()
@@ -35,13 +35,13 @@ def send_subscription_expiry_reminders():
             subscription_expires_at__gte=target_expiry_date_start,
             subscription_expires_at__lt=target_expiry_date_end,
             account_type=AccountTypeChoices.SUBSCRIBED,  # Only for active subscribed users
-        ).select_related("user")
+        )
 
-        for profile in expiring_profiles:
-            # Avoid sending duplicate reminders for the same threshold
-            # Check if a similar notification was sent recently for this specific threshold
-            reminder_already_sent = Notification.objects.filter(
-                recipient=profile.user,
+        # Avoid sending duplicate reminders for the same threshold
+        # Users already reminded within the period, looked up for all profiles at once
+        already_reminded = set(
+            Notification.objects.filter(
+                recipient_id__in=expiring_profiles.values("user_id"),
                 notification_type=NotificationTypeChoices.SUBSCRIPTION,
                 verb__icontains="expiring",  # More robust check might use extra_data
                 # Check if 'data' field contains days_before_expiry
@@ -49,31 +49,38 @@ def send_subscription_expiry_reminders():
                 data__days_before_expiry=days_before_expiry,
                 created_at__gte=now
                 - timedelta(days=days_before_expiry + 1),  # Check within the period
-            ).exists()
-
-            if not reminder_already_sent:
-                create_notification(
-                    recipient=profile.user,
-                    verb=_("your subscription is expiring soon"),
-                    description=_(
-                        "Heads up! Your Qader subscription will expire in {days} day(s) on {expiry_date}. "
-                        "Renew now to maintain access."
-                    ).format(
-                        days=days_before_expiry,
-                        expiry_date=profile.subscription_expires_at.strftime(
-                            "%Y-%m-%d"
-                        ),
-                    ),
-                    notification_type=NotificationTypeChoices.SUBSCRIPTION,
-                    url="/profile/subscription/renew",  # Example URL
-                    extra_data={
-                        "days_before_expiry": days_before_expiry,
-                        "expiry_timestamp": profile.subscription_expires_at.isoformat(),
-                    },
-                )
-                logger.info(
-                    f"Sent {days_before_expiry}-day subscription expiry reminder to {profile.user.username}"
-                )
+            ).values_list("recipient_id", flat=True)
+        )
+
+        # Recipients sharing an expiry date get the same text, so one bulk call each
+        recipients_by_expiry_date = {}
+        for user_id, expires_at in expiring_profiles.values_list(
+            "user_id", "subscription_expires_at"
+        ):
+            if user_id in already_reminded:
+                continue
+            recipients_by_expiry_date.setdefault(expires_at.strftime("%Y-%m-%d"), {})[
+                user_id
+            ] = {
+                "days_before_expiry": days_before_expiry,
+                "expiry_timestamp": expires_at.isoformat(),
+            }
+
+        for expiry_date, recipient_data in recipients_by_expiry_date.items():
+            created = create_notifications_bulk(
+                recipients=list(recipient_data),
+                verb=_("your subscription is expiring soon"),
+                description=_(
+                    "Heads up! Your Qader subscription will expire in {days} day(s) on {expiry_date}. "
+                    "Renew now to maintain access."
+                ).format(days=days_before_expiry, expiry_date=expiry_date),
+                notification_type=NotificationTypeChoices.SUBSCRIPTION,
+                url="/profile/subscription/renew",  # Example URL
+                extra_data_by_recipient=recipient_data,
+            )
+            logger.info(
+                f"Sent {days_before_expiry}-day subscription expiry reminder to {created} users expiring on {expiry_date}"
+            )
     return f"Subscription expiry reminders check complete. Processed for {len(reminder_periods_days)} periods."
 
 
@@ -120,3 +127,50 @@ def dispatch_notification_email_task(
             f"Error sending notification email for Notification ID {notification_id} to {recipient_email}: {e}",
             exc_info=True,  # This will print the full traceback
         )
+
+
+@shared_task(name="dispatch_notification_emails_task")
+def dispatch_notification_emails_task(
+    subject: str,
+    body_template_name: str,
+    context: dict,
+    messages: list,
+):
+    """
+    Sends a batch of notification emails over one mail connection. Each
+    entry of `messages` holds the `notification_id`, `recipient_email` and
+    the `context` entries specific to that recipient.
+    """
+    from django.core.mail import EmailMultiAlternatives, get_connection
+    from django.template.loader import render_to_string
+
+    context = {**context, "site_base_url": getattr(settings, "SITE_BASE_URL", "")}
+    emails = []
+    for message in messages:
+        try:
+            message_context = {**context, **message["context"]}
+            email = EmailMultiAlternatives(
+                subject=subject,
+                body=render_to_string(f"{body_template_name}.txt", message_context),
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[message["recipient_email"]],
+            )
+            email.attach_alternative(
+                render_to_string(f"{body_template_name}.html", message_context),
+                "text/html",
+            )
+            emails.append(email)
+        except Exception as e:
+            logger.error(
+                f"Error rendering notification email for Notification ID {message['notification_id']}: {e}",
+                exc_info=True,
+            )
+
+    try:
+        sent = get_connection().send_messages(emails) or 0
+        logger.info(f"Sent {sent} of {len(messages)} batched notification emails.")
+    except Exception as e:
+        logger.error(
+            f"Error sending a batch of {len(emails)} notification emails: {e}",
+            exc_info=True,
+        )
@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+
+from apps.users.tests.factories import UserFactory
+
+from ..consumers import NotificationConsumer
+from ..models import Notification
+from ..realtime import notification_group_name, unread_counter
+from ..services import (
+    bulk_mark_as_read,
+    create_notification,
+    create_notifications_bulk,
+    delete_notification,
+    get_unread_count,
+    mark_all_as_read_for_user,
+    notify_unread_count_change,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def test_unread_count_is_seeded_once_then_moved_by_deltas(
+    django_capture_on_commit_callbacks, django_assert_num_queries
+):
+    user = UserFactory()
+    with django_capture_on_commit_callbacks(execute=True):
+        first = create_notification(recipient=user, verb="first")
+        second = create_notification(recipient=user, verb="second")
+
+    assert get_unread_count(user.id) == 2  # Seeded from the database
+    with django_capture_on_commit_callbacks(execute=True):
+        third = create_notification(recipient=user, verb="third")
+        bulk_mark_as_read(user, [first.id])
+        delete_notification(second)
+    with django_assert_num_queries(0):
+        assert get_unread_count(user.id) == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        mark_all_as_read_for_user(user)
+    assert get_unread_count(user.id) == 0
+    assert not Notification.objects.filter(pk=third.pk, is_read=False).exists()
+
+
+def test_socket_receives_unread_count_and_changes():
+    user = UserFactory()
+    unread_counter.seed(user.id, 3)
+
+    async def scenario():
+        communicator = WebsocketCommunicator(
+            NotificationConsumer.as_asgi(), "/ws/notifications/"
+        )
+        communicator.scope["user"] = user
+        connected, _subprotocol = await communicator.connect()
+        on_connect = await communicator.receive_json_from()
+        await database_sync_to_async(notify_unread_count_change)(user.id, -2)
+        on_change = await communicator.receive_json_from()
+        await communicator.disconnect()
+        return connected, on_connect, on_change
+
+    connected, on_connect, on_change = asyncio.run(scenario())
+    assert connected
+    assert on_connect == {
+        "type": "unread_count",
+        "payload": {"delta": 0, "unread_count": 3},
+    }
+    assert on_change == {
+        "type": "unread_count",
+        "payload": {"delta": -2, "unread_count": 1},
+    }
+
+
+def test_bulk_notifications_are_pushed_to_each_recipient(
+    django_capture_on_commit_callbacks,
+):
+    users = UserFactory.create_batch(2)
+    channel_layer = get_channel_layer()
+    channels = {}
+    for user in users:
+        unread_counter.seed(user.id, 0)
+        channels[user.id] = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(
+            notification_group_name(user.id), channels[user.id]
+        )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        create_notifications_bulk(recipients=[user.id for user in users], verb="hello")
+
+    for user in users:
+        message = async_to_sync(channel_layer.receive)(channels[user.id])
+        assert message["type"] == "notification.created"
+        assert message["payload"]["recipient"]["id"] == user.id
+        assert message["unread_count"] == 1
@@ -0,0 +1,87 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from apps.users.constants import AccountTypeChoices
+from apps.users.tests.factories import UserFactory
+
+from ..models import Notification, NotificationTypeChoices
+from ..services import create_notifications_bulk, get_unread_count
+from ..tasks import send_subscription_expiry_reminders
+
+pytestmark = pytest.mark.django_db
+
+
+def test_bulk_notifications_are_created_and_emailed_in_batches(
+    django_capture_on_commit_callbacks,
+):
+    users = UserFactory.create_batch(5)
+    first = users[0]
+    assert get_unread_count(first.id) == 0
+
+    with patch(
+        "apps.notifications.services.dispatch_notification_emails_task.delay"
+    ) as send_emails, django_capture_on_commit_callbacks(execute=True):
+        created = create_notifications_bulk(
+            recipients=[user.id for user in users] + [first.id],
+            verb="announcement",
+            target=users[1],
+            extra_data={"kind": "announcement"},
+            extra_data_by_recipient={first.id: {"rank": 1}},
+            send_email=True,
+            batch_size=2,
+        )
+
+    assert created == 5
+    assert Notification.objects.filter(verb="announcement").count() == 5
+    assert Notification.objects.get(recipient=first).data == {
+        "kind": "announcement",
+        "rank": 1,
+    }
+    assert Notification.objects.get(recipient=users[2]).target == users[1]
+    assert get_unread_count(first.id) == 1
+    assert [len(call.kwargs["messages"]) for call in send_emails.call_args_list] == [
+        2,
+        2,
+        1,
+    ]
+    first_message = send_emails.call_args_list[0].kwargs["messages"][0]
+    assert first_message["recipient_email"] == first.email
+    assert first_message["context"]["rank"] == 1
+
+
+def test_bulk_batches_issue_constant_queries(django_assert_max_num_queries):
+    users = UserFactory.create_batch(6)
+    with django_assert_max_num_queries(6):
+        create_notifications_bulk(
+            recipients=[user.id for user in users], verb="announcement", batch_size=10
+        )
+
+
+def test_subscription_reminders_are_sent_once_per_threshold():
+    expires_at = timezone.now() + timedelta(days=7, hours=1)
+    users = [
+        UserFactory(
+            profile_data={
+                "account_type": AccountTypeChoices.SUBSCRIBED,
+                "subscription_expires_at": expires_at,
+            }
+        )
+        for _ in range(2)
+    ]
+
+    send_subscription_expiry_reminders()
+    send_subscription_expiry_reminders()
+
+    reminders = Notification.objects.filter(
+        notification_type=NotificationTypeChoices.SUBSCRIPTION
+    )
+    assert sorted(reminders.values_list("recipient_id", flat=True)) == sorted(
+        user.id for user in users
+    )
+    assert reminders.first().data == {
+        "days_before_expiry": 7,
+        "expiry_timestamp": expires_at.isoformat(),
+    }
@@ -29,6 +29,7 @@ from .statistics import (
     SkillProficiencySummarySerializer,
     TestHistorySummarySerializer,
     UserStatisticsSerializer,
+    UserStatisticsSnapshotSerializer,
 )
 from .emergency import (
     EmergencyModeStartSerializer,
@@ -67,6 +68,7 @@ __all__ = [
     "SkillProficiencySummarySerializer",
     "TestHistorySummarySerializer",
     "UserStatisticsSerializer",
+    "UserStatisticsSnapshotSerializer",
     # Emergency Mode
     "EmergencyModeStartSerializer",
     "EmergencyModeStartResponseSerializer",
@@ -1,5 +1,6 @@
 from typing import Dict, Optional, List
 from rest_framework import serializers
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 import logging
 
@@ -10,6 +11,8 @@ from apps.learning.api.serializers import UnifiedQuestionSerializer
 
 logger = logging.getLogger(__name__)
 
+MAX_BULK_ANSWERS_PER_REQUEST = getattr(settings, "MAX_BULK_ANSWERS_PER_REQUEST", 200)
+
 # --- Unified Attempt Listing/Detail Serializers ---
 
 
@@ -91,7 +94,7 @@ class UserTestAttemptDetailSerializer(serializers.ModelSerializer):
 
     # Shows all questions included in the attempt (relies on view prefetching)
     included_questions = UnifiedQuestionSerializer(
-        source="get_questions_queryset", many=True, read_only=True
+        source="get_ordered_questions", many=True, read_only=True
     )
 
     # Shows questions already answered by the user (relies on view prefetching)
@@ -224,6 +227,96 @@ class UserQuestionAttemptResponseSerializer(serializers.Serializer):
     feedback_message = serializers.CharField(read_only=True, required=False)
 
 
+class BulkAnswerItemSerializer(serializers.Serializer):
+    """A single answer inside a bulk submission. Question membership is checked by the service."""
+
+    question_id = serializers.IntegerField(
+        min_value=1, help_text=_("Primary key of the question being answered.")
+    )
+    selected_answer = serializers.ChoiceField(
+        choices=UserQuestionAttempt.AnswerChoice.choices,
+        required=True,
+        allow_blank=False,
+        help_text=_("The answer choice selected by the user (A, B, C, or D)."),
+    )
+    time_taken_seconds = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        allow_null=True,
+        help_text=_("Optional: Time spent on this specific question in seconds."),
+    )
+
+
+class UserQuestionAttemptBulkSerializer(serializers.Serializer):
+    """Serializer for submitting several answers at once during ANY ongoing test attempt."""
+
+    answers = BulkAnswerItemSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=MAX_BULK_ANSWERS_PER_REQUEST,
+        help_text=_("The answers to record. Each question may appear only once."),
+    )
+
+
+class AnswerFeedbackSerializer(serializers.Serializer):
+    question_id = serializers.IntegerField(read_only=True)
+    is_correct = serializers.BooleanField(read_only=True)
+    correct_answer = serializers.CharField(read_only=True, allow_null=True)
+    explanation = serializers.CharField(read_only=True, allow_null=True)
+    feedback_message = serializers.CharField(read_only=True)
+
+
+class UserQuestionAttemptBulkResponseSerializer(serializers.Serializer):
+    """
+    Response after a bulk answer submission. Correct answers and explanations are
+    only populated for Traditional mode, as with single answers.
+    """
+
+    results = AnswerFeedbackSerializer(many=True, read_only=True)
+    answered_question_count = serializers.IntegerField(read_only=True)
+
+
+class UserTestAttemptAnalysisSerializer(serializers.ModelSerializer):
+    """
+    Current smart analysis and gamification outcome of a completed attempt, polled
+    while the AI analysis or the gamification event is still pending.
+    """
+
+    attempt_id = serializers.IntegerField(source="id", read_only=True)
+    gamification_status = serializers.SerializerMethodField(
+        help_text=_("'pending', 'processed' or 'failed'; null if nothing was queued.")
+    )
+    gamification_result = serializers.SerializerMethodField(
+        help_text=_(
+            "Points, badges and streak info awarded for completing the test, once processed."
+        )
+    )
+
+    class Meta:
+        model = UserTestAttempt
+        fields = [
+            "attempt_id",
+            "smart_analysis_status",
+            "smart_analysis",
+            "gamification_status",
+            "gamification_result",
+        ]
+        read_only_fields = fields
+
+    def _get_gamification_event(self, obj: UserTestAttempt):
+        # Uses the view's prefetch; an attempt has at most one completion event.
+        events = list(obj.gamification_events.all())
+        return events[0] if events else None
+
+    def get_gamification_status(self, obj: UserTestAttempt) -> Optional[str]:
+        event = self._get_gamification_event(obj)
+        return event.status if event else None
+
+    def get_gamification_result(self, obj: UserTestAttempt) -> Optional[Dict]:
+        event = self._get_gamification_event(obj)
+        return event.result if event else None
+
+
 class ScoreSerializer(serializers.Serializer):
     """Serializer for nested score object."""
 
@@ -239,7 +332,11 @@ class BadgeWonSerializer(serializers.Serializer):
 
 
 class StreakInfoSerializer(serializers.Serializer):
-    updated = serializers.BooleanField(read_only=True)
+    updated = serializers.BooleanField(
+        read_only=True,
+        allow_null=True,
+        help_text=_("Null while `gamification_status` is 'pending'."),
+    )
     current_days = serializers.IntegerField(read_only=True)
 
 
@@ -263,11 +360,20 @@ class UserTestAttemptCompletionResponseSerializer(serializers.Serializer):
     smart_analysis = serializers.CharField(
         allow_blank=True, allow_null=True, required=False, read_only=True
     )
+    smart_analysis_status = serializers.ChoiceField(
+        choices=UserTestAttempt.AnalysisStatus.choices,
+        read_only=True,
+        required=False,
+        help_text=_(
+            "'pending' means `smart_analysis` holds a quick rule-based summary; poll the analysis endpoint for the AI version."
+        ),
+    )
     points_from_test_completion_event = serializers.IntegerField(
         read_only=True,
+        allow_null=True,
         default=0,
         help_text=_(
-            "Points earned from completing the test, streak bonuses, and badges awarded at completion."
+            "Points earned from completing the test, streak bonuses, and badges awarded at completion. Null while `gamification_status` is 'pending'; see `gamification_result` on the analysis endpoint."
         ),
     )
     points_from_correct_answers_this_test = serializers.IntegerField(
@@ -277,8 +383,24 @@ class UserTestAttemptCompletionResponseSerializer(serializers.Serializer):
             "Points earned from correctly answering questions during this specific test attempt."
         ),
     )
-    badges_won = BadgeWonSerializer(many=True, read_only=True, default=list)
+    badges_won = BadgeWonSerializer(
+        many=True,
+        read_only=True,
+        allow_null=True,
+        default=list,
+        help_text=_(
+            "Badges awarded at completion. Null while `gamification_status` is 'pending'; see `gamification_result` on the analysis endpoint."
+        ),
+    )
     streak_info = StreakInfoSerializer(read_only=True, required=False)
+    gamification_status = serializers.CharField(
+        read_only=True,
+        allow_null=True,
+        required=False,
+        help_text=_(
+            "'pending' while completion points, streak and badges are being awarded in the background; the fields reporting them are null until then. Poll the analysis endpoint for the outcome (`gamification_result`)."
+        ),
+    )
 
     def create(self, validated_data):
         raise NotImplementedError("This serializer cannot create data.")
@@ -15,9 +15,11 @@ from django.db.models import (
 )
 from django.db.models.functions import TruncDay, TruncWeek, TruncMonth, TruncYear, Cast
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import timedelta  # For adjusting end_date
 import logging
 
+from apps.learning.models import LearningSubSection
 from apps.study.models import UserSkillProficiency, UserTestAttempt, UserQuestionAttempt
 from apps.api.utils import get_user_from_context
 
@@ -717,3 +719,159 @@ class UserStatisticsSerializer(serializers.Serializer):
             "average_time_per_question_by_correctness": serialized_avg_time_by_correctness,
             "average_test_duration_by_type": serialized_avg_duration_by_type,
         }
+
+
+def _rounded_average(total, count):
+    """round(total / count, 1); None when there is nothing (or only zeros) to average."""
+    if not count or not total:
+        return None
+    return round(total / count, 1)
+
+
+class UserStatisticsSnapshotSerializer(UserStatisticsSerializer):
+    """
+    Renders the same payload as `UserStatisticsSerializer` (without date filters or
+    aggregation) from the user's precomputed `UserStatisticsSnapshot`, passed in
+    the context as "snapshot". Only the profile, skill proficiencies and the
+    per-test score trends (unbounded, so kept out of the snapshot) are read live.
+    """
+
+    def _counters(self):
+        return self.context["snapshot"].data
+
+    def get_overall(self, obj):
+        profile = self._get_user_profile_safe()
+        counters = self._counters()
+        serializer = OverallStatsSerializer(
+            {
+                "mastery_level": {
+                    "verbal": profile.current_level_verbal,
+                    "quantitative": profile.current_level_quantitative,
+                },
+                "study_streaks": {
+                    "current_days": profile.current_streak_days,
+                    "longest_days": profile.longest_streak_days,
+                },
+                "activity_summary": {
+                    "total_questions_answered": counters["questions_answered"],
+                    "total_tests_completed": counters["tests_completed"],
+                },
+            }
+        )
+        return serializer.data
+
+    def get_performance_by_section(self, obj):
+        subsection_counts = {
+            int(subsection_id): counts
+            for subsection_id, counts in self._counters()["subsections"].items()
+            if counts["attempts"] > 0
+        }
+        subsections = sorted(
+            LearningSubSection.objects.filter(
+                id__in=subsection_counts.keys()
+            ).select_related("section"),
+            key=lambda sub: (sub.section.slug, sub.slug),
+        )
+        performance_data = {}
+        for subsection in subsections:
+            counts = subsection_counts[subsection.id]
+            section_data = performance_data.setdefault(
+                subsection.section.slug,
+                {
+                    "name": subsection.section.name,
+                    "attempts": 0,
+                    "correct": 0,
+                    "subsections": {},
+                },
+            )
+            section_data["subsections"][subsection.slug] = {
+                "name": subsection.name,
+                "accuracy": round((counts["correct"] / counts["attempts"] * 100), 1),
+                "attempts": counts["attempts"],
+            }
+            section_data["attempts"] += counts["attempts"]
+            section_data["correct"] += counts["correct"]
+        return {
+            slug: SectionPerformanceSerializer(
+                {
+                    "name": data["name"],
+                    "overall_accuracy": round((data["correct"] / data["attempts"] * 100), 1),
+                    "subsections": data["subsections"],
+                }
+            ).data
+            for slug, data in performance_data.items()
+        }
+
+    def get_test_history_summary(self, obj):
+        date_field = TestHistorySummarySerializer().fields["date"]
+        return [
+            {
+                "attempt_id": entry["id"],
+                "date": date_field.to_representation(parse_datetime(entry["end_time"])),
+                "type": str(UserTestAttempt.AttemptType(entry["attempt_type"]).label),
+                "type_value": entry["attempt_type"],
+                "overall_score": entry["score_percentage"],
+                "verbal_score": entry["score_verbal"],
+                "quantitative_score": entry["score_quantitative"],
+                "num_questions": entry["num_questions"],
+            }
+            for entry in self._counters()["recent_tests"]
+        ]
+
+    def get_average_scores_by_test_type(self, obj):
+        tests_by_type = self._counters()["tests_by_type"]
+        results = {}
+        for type_value, type_display in UserTestAttempt.AttemptType.choices:
+            counts = tests_by_type.get(type_value, {})
+            scored = counts.get("scored_count", 0)
+            results[type_value] = {
+                "attempt_type_value": type_value,
+                "attempt_type_display": type_display,
+                "average_score": (
+                    round(counts["score_sum"] / scored, 1) if scored else None
+                ),
+                "average_verbal_score": (
+                    round(counts["verbal_sum"] / counts["verbal_count"], 1)
+                    if counts.get("verbal_count")
+                    else None
+                ),
+                "average_quantitative_score": (
+                    round(counts["quantitative_sum"] / counts["quantitative_count"], 1)
+                    if counts.get("quantitative_count")
+                    else None
+                ),
+                "test_count": scored,
+            }
+        return results
+
+    def get_time_analytics(self, obj):
+        counters = self._counters()
+        question_time = counters["question_time"]
+        tests_by_type = counters["tests_by_type"]
+        avg_duration_by_type = {}
+        for type_value, type_display in UserTestAttempt.AttemptType.choices:
+            counts = tests_by_type.get(type_value, {})
+            avg_duration_by_type[type_value] = {
+                "attempt_type_value": type_value,
+                "attempt_type_display": type_display,
+                "average_duration_seconds": _rounded_average(
+                    counts.get("duration_seconds_sum"), counts.get("duration_count")
+                ),
+                "test_count": counts.get("duration_count", 0),
+            }
+        return {
+            "overall_average_time_per_question_seconds": _rounded_average(
+                question_time["all"]["total_seconds"], question_time["all"]["count"]
+            ),
+            "average_time_per_question_by_correctness": {
+                key: {
+                    "average_time_seconds": _rounded_average(
+                        question_time[key]["total_seconds"],
+                        question_time[key]["count"],
+                    ),
+                    "question_count": question_time[key]["count"],
+                }
+                for key in ("correct", "incorrect")
+            },
+            "average_test_duration_by_type": avg_duration_by_type,
+        }
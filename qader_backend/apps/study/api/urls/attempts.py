@@ -18,6 +18,11 @@ urlpatterns = [
         attempt_views.UserTestAttemptAnswerView.as_view(),
         name="attempt-answer",
     ),
+    path(
+        "<int:attempt_id>/answers/bulk/",
+        attempt_views.UserTestAttemptBulkAnswerView.as_view(),
+        name="attempt-answer-bulk",
+    ),
     path(
         "<int:attempt_id>/complete/",
         attempt_views.UserTestAttemptCompleteView.as_view(),
@@ -33,6 +38,11 @@ urlpatterns = [
         attempt_views.UserTestAttemptReviewView.as_view(),
         name="attempt-review",
     ),
+    path(
+        "<int:attempt_id>/analysis/",
+        attempt_views.UserTestAttemptAnalysisView.as_view(),
+        name="attempt-analysis",
+    ),
     path(
         "<int:attempt_id>/retake/",
         attempt_views.UserTestAttemptRetakeView.as_view(),
@@ -16,6 +16,9 @@ from drf_spectacular.utils import (
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 from django.shortcuts import get_object_or_404
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import get_language
 from django.utils import timezone
 from django.db.models import Case, When, IntegerField, Count
 from django.utils.translation import gettext_lazy as _
@@ -24,6 +27,8 @@ import logging
 import random
 
 from apps.api.permissions import IsSubscribed
+from apps.learning.models import UserStarredQuestion
+from apps.learning.services import question_content_version
 from apps.study.models import UserQuestionAttempt, UserTestAttempt, Question
 from apps.study.services import study as study_services
 from apps.study.api.serializers import (
@@ -34,6 +39,11 @@ from apps.api.exceptions import UsageLimitExceeded
 
 logger = logging.getLogger(__name__)
 
+# --- Constants ---
+REVIEW_CACHE_KEY_PREFIX = "study:attempt_review"
+# Entries are also retired by any question content edit (see question_content_version)
+REVIEW_CACHE_SECONDS = getattr(settings, "STUDY_ATTEMPT_REVIEW_CACHE_SECONDS", 24 * 60 * 60)
+
 # --- Unified Test Attempt Views ---
 
 
@@ -131,9 +141,9 @@ class UserTestAttemptDetailView(generics.RetrieveAPIView):
                 "question_attempts",
                 "question_attempts__question",
                 # Prefetch questions with their details for 'included_questions' field
-                # Note: get_questions_queryset() applies its own select_related, but prefetching here
+                # Note: get_ordered_questions() applies its own select_related, but prefetching here
                 # might sometimes help Django optimize if the queryset is evaluated multiple times.
-                # Test performance impact if needed. Let's rely on get_questions_queryset() for now.
+                # Test performance impact if needed. Let's rely on get_ordered_questions() for now.
                 # 'questions', 'questions__subsection', 'questions__subsection__section', 'questions__skill',
             )
             .annotate(answered_question_count_agg=Count("question_attempts"))
@@ -222,14 +232,14 @@ class UserTestAttemptResumeView(generics.GenericAPIView):
         }
 
         # Get the full, ordered list of questions for the test
-        questions_queryset = test_attempt.get_questions_queryset()
+        questions = test_attempt.get_ordered_questions()
 
         # Prepare the data for our new serializer
         response_data = {
             "attempt_id": test_attempt.id,
             "answered_question_count": len(user_attempts_map),
             "total_questions": test_attempt.num_questions,
-            "questions": questions_queryset,
+            "questions": questions,
         }
 
         # The context provides the `user_attempts_map` to the `UnifiedQuestionSerializer`
@@ -363,13 +373,70 @@ class UserTestAttemptAnswerView(generics.GenericAPIView):
             )
 
 
+@extend_schema(
+    tags=["Study - Test Attempts (Core Actions)"],
+    summary="Submit Multiple Answers",
+    description=(
+        "Submits several answers at once for an *ongoing* (`status=started`) test attempt (`{attempt_id}`). "
+        "Intended for offline-capable clients and simulation mode, which submit everything at the end. "
+        "Behaves like calling the single-answer endpoint once per answer (existing answers are overwritten, "
+        "proficiency is updated), but all answers are validated first and written in one transaction: "
+        "if any answer is invalid, nothing is recorded."
+    ),
+    request=attempt_serializers.UserQuestionAttemptBulkSerializer,
+    responses={
+        200: attempt_serializers.UserQuestionAttemptBulkResponseSerializer,
+        400: OpenApiResponse(
+            description="Validation Error (e.g., invalid input, duplicate question, question not part of attempt)."
+        ),
+        401: OpenApiResponse(description="Authentication required."),
+        403: OpenApiResponse(
+            description="Permission Denied (Not owner or not subscribed)."
+        ),
+        404: OpenApiResponse(
+            description="Not Found (Attempt ID invalid or attempt not 'started')."
+        ),
+    },
+)
+class UserTestAttemptBulkAnswerView(UserTestAttemptAnswerView):
+    """Handles submission of many answers in one request for any active test attempt."""
+
+    serializer_class = attempt_serializers.UserQuestionAttemptBulkSerializer
+
+    def post(self, request, attempt_id, *args, **kwargs):
+        test_attempt = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            result_data = study_services.record_answers_bulk(
+                test_attempt=test_attempt,
+                answers=serializer.validated_data["answers"],
+            )
+        except DRFValidationError as e:
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            logger.exception(
+                f"Unexpected error recording bulk answers for attempt {attempt_id}, User {request.user.id}: {e}"
+            )
+            return Response(
+                {"detail": _("An internal error occurred while recording the answers.")},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        response_serializer = (
+            attempt_serializers.UserQuestionAttemptBulkResponseSerializer(result_data)
+        )
+        return Response(response_serializer.data, status=status.HTTP_200_OK)
+
+
 @extend_schema(
     tags=["Study - Test Attempts (Core Actions)"],
     summary="Complete Test Attempt",
     description=(
         "Finalizes an *ongoing* (`status=started`) test attempt (`{attempt_id}`). "
         "Applicable to all types (Level Assessment, Practice, Simulation, Traditional). "
-        "For non-Traditional types: calculates scores, updates status, updates profile levels (for Level Assessment), triggers rewards. "
+        "For non-Traditional types: calculates scores, updates status, updates profile levels (for Level Assessment), queues rewards (awarded in the background). "
         "For Traditional types: simply marks the session as completed."
     ),
     request=None,
@@ -541,6 +608,9 @@ class UserTestAttemptCancelView(generics.GenericAPIView):
             test_attempt.status = UserTestAttempt.Status.ABANDONED
             test_attempt.end_time = timezone.now()
             test_attempt.save(update_fields=["status", "end_time", "updated_at"])
+            if study_services.SKILL_PROFICIENCY_BUFFERED_UPDATES:
+                # Answers given before cancelling still count towards proficiency
+                study_services.flush_test_attempt_proficiency(test_attempt)
             logger.info(
                 f"Test attempt {test_attempt.id} cancelled by user {request.user.id}."
             )
@@ -597,9 +667,7 @@ class UserTestAttemptReviewView(generics.GenericAPIView):
     def get_object(self) -> UserTestAttempt:
         attempt_id = self.kwargs.get("attempt_id")
         user = self.request.user
-        queryset = UserTestAttempt.objects.select_related("user").prefetch_related(
-            "question_attempts"
-        )
+        queryset = UserTestAttempt.objects.select_related("user")
 
         try:
             attempt = get_object_or_404(
@@ -632,42 +700,30 @@ class UserTestAttemptReviewView(generics.GenericAPIView):
                 _("An error occurred while retrieving test attempt details.")
             )
 
-    def get(self, request, attempt_id, *args, **kwargs):
-        test_attempt = self.get_object()
-
-        all_questions_queryset = test_attempt.get_questions_queryset().select_related(
-            "subsection__section", "skill"
-        )
-        all_question_ids_ordered = list(
-            all_questions_queryset.values_list("id", flat=True)
+    def _review_cache_key(self, test_attempt: UserTestAttempt) -> str:
+        # Rendered URLs depend on the host and labels on the language; any
+        # question content edit bumps the version and retires every entry
+        return (
+            f"{REVIEW_CACHE_KEY_PREFIX}:{test_attempt.id}:v{question_content_version()}"
+            f":{get_language()}:{self.request.get_host()}"
         )
 
+    def _render_review(self, test_attempt: UserTestAttempt) -> dict:
+        """
+        Serializes the full review once, with the IDs of the questions the
+        `incorrect_only` view keeps, so both views come from one entry.
+        """
+        all_questions = test_attempt.get_ordered_questions()
         user_attempts_map = {
             ua.question_id: ua for ua in test_attempt.question_attempts.all()
         }
-
-        incorrect_only_param = (
-            request.query_params.get("incorrect_only", "").strip().lower()
-        )
-        incorrect_only = incorrect_only_param in ["true", "1", "yes"]
-
-        review_questions_queryset = all_questions_queryset
-
-        if incorrect_only:
-            incorrect_or_skipped_question_ids = set()
-            for qid in all_question_ids_ordered:
-                user_attempt = user_attempts_map.get(qid)
-                if (user_attempt and user_attempt.is_correct is False) or (
-                    user_attempt is None
-                ):
-                    incorrect_or_skipped_question_ids.add(qid)
-
-            if not incorrect_or_skipped_question_ids:
-                review_questions_queryset = all_questions_queryset.none()
-            else:
-                review_questions_queryset = all_questions_queryset.filter(
-                    pk__in=incorrect_or_skipped_question_ids
-                )
+        incorrect_or_skipped_ids = []
+        for question in all_questions:
+            user_attempt = user_attempts_map.get(question.id)
+            if (user_attempt and user_attempt.is_correct is False) or (
+                user_attempt is None
+            ):
+                incorrect_or_skipped_ids.append(question.id)
 
         # --- KEY CHANGE ---
         # The context now contains the `user_attempts_map` which the
@@ -677,14 +733,84 @@ class UserTestAttemptReviewView(generics.GenericAPIView):
 
         response_data = {
             "attempt_id": test_attempt.id,
-            "questions": review_questions_queryset,
+            "questions": all_questions,
             "attempt": test_attempt,
         }
 
         # The new UserTestAttemptReviewSerializer now internally uses UnifiedQuestionSerializer,
         # which will receive the context we've prepared.
         serializer = self.get_serializer(response_data, context=context)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return {
+            "review": serializer.data,
+            "incorrect_or_skipped_ids": incorrect_or_skipped_ids,
+        }
+
+    def get(self, request, attempt_id, *args, **kwargs):
+        test_attempt = self.get_object()
+
+        # A completed attempt never changes, so its review is rendered once
+        cache_key = self._review_cache_key(test_attempt)
+        cached = cache.get(cache_key)
+        if cached is None:
+            cached = self._render_review(test_attempt)
+            cache.set(cache_key, cached, timeout=REVIEW_CACHE_SECONDS)
+
+        incorrect_only_param = (
+            request.query_params.get("incorrect_only", "").strip().lower()
+        )
+        incorrect_only = incorrect_only_param in ["true", "1", "yes"]
+
+        questions = cached["review"]["questions"]
+        if incorrect_only:
+            keep_ids = set(cached["incorrect_or_skipped_ids"])
+            questions = [question for question in questions if question["id"] in keep_ids]
+
+        # Stars are the one part the user can still change
+        starred_ids = set(
+            UserStarredQuestion.objects.filter(
+                user=request.user,
+                question_id__in=[question["id"] for question in questions],
+            ).values_list("question_id", flat=True)
+        )
+        review = dict(cached["review"])
+        review["questions"] = [
+            {**question, "is_starred": question["id"] in starred_ids}
+            for question in questions
+        ]
+        return Response(review, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    tags=["Study - Test Attempts (Core Actions)"],
+    summary="Get Test Attempt Smart Analysis",
+    description=(
+        "Returns the smart analysis of a test attempt (`{attempt_id}`). Completion responds immediately with a "
+        "rule-based analysis and `smart_analysis_status='pending'` while the AI analysis is generated in the background. "
+        "Poll this endpoint until the status is `completed` (AI text) or `failed` (rule-based text is kept). "
+        "Also reports the completion rewards (`gamification_status`, `gamification_result`) once they have been awarded."
+    ),
+    responses={
+        200: attempt_serializers.UserTestAttemptAnalysisSerializer,
+        401: OpenApiResponse(description="Authentication required."),
+        403: OpenApiResponse(
+            description="Permission Denied (Not owner or not subscribed)."
+        ),
+        404: OpenApiResponse(description="Not Found (Test attempt ID invalid)."),
+    },
+)
+class UserTestAttemptAnalysisView(generics.RetrieveAPIView):
+    """Polling endpoint for the asynchronously generated smart analysis and gamification."""
+
+    serializer_class = attempt_serializers.UserTestAttemptAnalysisSerializer
+    permission_classes = [IsAuthenticated, IsSubscribed]
+    lookup_url_kwarg = "attempt_id"
+
+    def get_queryset(self):
+        return (
+            UserTestAttempt.objects.filter(user=self.request.user)
+            .only("id", "user_id", "smart_analysis", "smart_analysis_status")
+            .prefetch_related("gamification_events")
+        )
 
 
 @extend_schema(
@@ -1,3 +1,6 @@
+import json
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, status, mixins
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -8,6 +11,9 @@ from django.utils.translation import gettext_lazy as _
 from django.db import transaction
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiTypes
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.encoding import force_str
 
 from apps.study.models import (
     ConversationSession,
@@ -27,7 +33,8 @@ from apps.study.api.serializers.conversation import (
     ConversationTestSubmitSerializer,
     ConversationTestResultSerializer,
 )
-from apps.study.services import conversation
+from apps.learning.api.serializers import UnifiedQuestionSerializer
+from apps.study.services import conversation, conversation_context
 from apps.api.permissions import IsSubscribed  # Import the permission class
 from apps.learning.models import Question  # Ensure Question model is available
 from apps.api.exceptions import UsageLimitExceeded
@@ -37,6 +44,56 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+STREAM_QUERY_PARAMETER = OpenApiParameter(
+    name="stream",
+    location=OpenApiParameter.QUERY,
+    description=(
+        "Stream the AI reply as server-sent events: `delta` events carry text as it is "
+        "generated, a final `message` event carries the saved response (its text is "
+        "authoritative), and `error` events carry `detail` and `status`."
+    ),
+    required=False,
+    type=OpenApiTypes.BOOL,
+)
+
+
+# --- Server-Sent Events Helpers ---
+
+
+def _wants_stream(request) -> bool:
+    return request.query_params.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def _sse_event(event: str, data) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=force_str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def _sse_error(detail, status_code: int) -> str:
+    return _sse_event("error", {"detail": detail, "status": status_code})
+
+
+def _event_stream_response(request, events, async_events) -> StreamingHttpResponse:
+    """
+    Streams `events()` under WSGI and `async_events()` under ASGI, where the
+    AI is awaited on the event loop instead of holding a worker thread.
+    (Django's ASGI handler would also consume a sync iterator in full before
+    sending anything.)
+    """
+    if isinstance(request._request, ASGIRequest):
+        stream = async_events()
+    else:
+        stream = events()
+    response = StreamingHttpResponse(stream, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # Don't let nginx buffer the stream
+    return response
+
+
+def _is_ai_unavailable_reply(feedback_text) -> bool:
+    feedback_text = force_str(feedback_text).lower()
+    return "unavailable" in feedback_text or "couldn't connect" in feedback_text
+
 
 @extend_schema(tags=["Study - Conversational Learning"])
 class ConversationViewSet(
@@ -118,6 +175,7 @@ class ConversationViewSet(
         summary="Send Message to AI",
         request=ConversationUserMessageInputSerializer,
         responses={
+            200: {"description": "Server-sent events, when `stream=true`."},
             201: ConversationMessageSerializer,  # Returns the AI's response message
             400: {"description": "Session completed or invalid input."},
             403: {"description": "Usage limit exceeded or permission denied."},
@@ -132,6 +190,7 @@ class ConversationViewSet(
                 required=True,
                 type=OpenApiTypes.INT,
             ),
+            STREAM_QUERY_PARAMETER,
         ],
     )
     @action(detail=True, methods=["post"], url_path="messages")
@@ -166,39 +225,23 @@ class ConversationViewSet(
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+        if _wants_stream(request):
+            return self._stream_message_reply(
+                request, session, user_message_text, related_question_instance
+            )
+
         # --- Core Logic ---
         try:
-            current_question = session.current_topic_question  # Get context Q
             ai_response_data = {}  # To store structured response from service
 
             # Use a single transaction block for user message, AI call (read-only part),
             # potential attempt saving, and AI message saving.
             with transaction.atomic():
                 # 1. Save user message
-                user_msg = ConversationMessage.objects.create(
-                    session=session,
-                    sender_type=ConversationMessage.SenderType.USER,
-                    message_text=user_message_text,
-                    related_question=related_question_instance,
-                )
-                logger.info(
-                    f"User message saved (ID: {user_msg.id}) for session {session.id}"
+                current_question = self._record_user_message(
+                    session, user_message_text, related_question_instance
                 )
 
-                # Update session context if user explicitly linked a different question
-                if (
-                    related_question_instance
-                    and current_question != related_question_instance
-                ):
-                    session.current_topic_question = related_question_instance
-                    session.save(update_fields=["current_topic_question", "updated_at"])
-                    current_question = (
-                        related_question_instance  # Update local variable
-                    )
-                    logger.info(
-                        f"Session {session.id} context updated by user message to question {current_question.id}"
-                    )
-
                 # 2. Call AI Service to process message and get structured response
                 ai_response_data = conversation.process_user_message_with_ai(
                     session=session,
@@ -207,12 +250,8 @@ class ConversationViewSet(
                 )
 
                 # Check for critical AI errors indicated by the response structure/text
-                if (
-                    "unavailable" in ai_response_data["feedback_text"].lower()
-                    or "couldn't connect" in ai_response_data["feedback_text"].lower()
-                ):
+                if _is_ai_unavailable_reply(ai_response_data["feedback_text"]):
                     # Don't save AI message, return error directly
-                    # Use raise Exception to rollback transaction if needed, or handle differently
                     # For now, return response, transaction will commit user message.
                     logger.warning(
                         f"AI Service unavailable/error during processing for session {session.id}. AI Response: {ai_response_data}"
@@ -222,57 +261,12 @@ class ConversationViewSet(
                         status=status.HTTP_503_SERVICE_UNAVAILABLE,
                     )
 
-                # 3. Conditionally Save UserQuestionAttempt based on AI interpretation
-                if (
-                    ai_response_data.get("processed_as_answer")
-                    and ai_response_data.get("user_choice")
-                    and current_question
-                ):
-                    submitted_choice = ai_response_data["user_choice"]
-                    logger.info(
-                        f"AI processed message as answer '{submitted_choice}' for Q {current_question.id}. Saving attempt."
-                    )
-                    try:
-                        # Use update_or_create for idempotency within the session context
-                        attempt, created = UserQuestionAttempt.objects.update_or_create(
-                            user=user,
-                            question=current_question,
-                            conversation_session=session,
-                            defaults={
-                                "selected_answer": submitted_choice,
-                                "mode": UserQuestionAttempt.Mode.CONVERSATION,
-                                "attempted_at": timezone.now(),
-                                "is_correct": None,  # Let model calculate
-                            },
-                        )
-                        # We don't strictly *need* the result here unless logging correctness
-                        # attempt.refresh_from_db(fields=['is_correct'])
-                        logger.info(
-                            f"{'Created' if created else 'Updated'} UserQuestionAttempt {attempt.id} based on AI interpretation."
-                        )
-                    except Exception as attempt_err:
-                        # Log error but continue to save AI message and return feedback
-                        logger.error(
-                            f"Failed to save UserQuestionAttempt for session {session.id}, Q {current_question.id} despite AI indicating answer. Error: {attempt_err}",
-                            exc_info=True,
-                        )
-                        # Modify feedback slightly?
-                        ai_response_data["feedback_text"] += _(
-                            " (Note: There was an issue recording this attempt.)"
-                        )
-
-                # 4. Save AI response message (always happens if AI call didn't critically fail)
-                ai_msg = ConversationMessage.objects.create(
-                    session=session,
-                    sender_type=ConversationMessage.SenderType.AI,
-                    message_text=ai_response_data["feedback_text"],
-                    # related_question is null here, message is feedback/response
-                )
-                logger.info(
-                    f"AI response message saved (ID: {ai_msg.id}) for session {session.id}"
+                # 3. Save the attempt (if the AI read an answer) and the AI response
+                ai_msg = self._record_ai_reply(
+                    session, user, current_question, ai_response_data
                 )
 
-            # 5. Return the saved AI message
+            # 4. Return the saved AI message
             output_serializer = ConversationMessageSerializer(
                 ai_msg, context=self.get_serializer_context()
             )
@@ -285,11 +279,225 @@ class ConversationViewSet(
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+    def _record_user_message(
+        self, session, user_message_text, related_question_instance
+    ):
+        """Saves the user's message; returns the question the conversation is about."""
+        current_question = session.current_topic_question  # Get context Q
+        user_msg = ConversationMessage.objects.create(
+            session=session,
+            sender_type=ConversationMessage.SenderType.USER,
+            message_text=user_message_text,
+            related_question=related_question_instance,
+        )
+        logger.info(f"User message saved (ID: {user_msg.id}) for session {session.id}")
+
+        # Update session context if user explicitly linked a different question
+        if related_question_instance and current_question != related_question_instance:
+            session.current_topic_question = related_question_instance
+            session.save(update_fields=["current_topic_question", "updated_at"])
+            current_question = related_question_instance  # Update local variable
+            logger.info(
+                f"Session {session.id} context updated by user message to question {current_question.id}"
+            )
+
+        return current_question
+
+    def _record_ai_reply(self, session, user, current_question, ai_response_data):
+        """
+        Saves a UserQuestionAttempt if the AI read the message as an answer, then
+        the AI response message, which is returned.
+        """
+        if (
+            ai_response_data.get("processed_as_answer")
+            and ai_response_data.get("user_choice")
+            and current_question
+        ):
+            submitted_choice = ai_response_data["user_choice"]
+            logger.info(
+                f"AI processed message as answer '{submitted_choice}' for Q {current_question.id}. Saving attempt."
+            )
+            try:
+                # Use update_or_create for idempotency within the session context
+                attempt, created = UserQuestionAttempt.objects.update_or_create(
+                    user=user,
+                    question=current_question,
+                    conversation_session=session,
+                    defaults={
+                        "selected_answer": submitted_choice,
+                        "mode": UserQuestionAttempt.Mode.CONVERSATION,
+                        "attempted_at": timezone.now(),
+                        "is_correct": None,  # Let model calculate
+                    },
+                )
+                # We don't strictly *need* the result here unless logging correctness
+                # attempt.refresh_from_db(fields=['is_correct'])
+                logger.info(
+                    f"{'Created' if created else 'Updated'} UserQuestionAttempt {attempt.id} based on AI interpretation."
+                )
+            except Exception as attempt_err:
+                # Log error but continue to save AI message and return feedback
+                logger.error(
+                    f"Failed to save UserQuestionAttempt for session {session.id}, Q {current_question.id} despite AI indicating answer. Error: {attempt_err}",
+                    exc_info=True,
+                )
+                # Modify feedback slightly?
+                ai_response_data["feedback_text"] += _(
+                    " (Note: There was an issue recording this attempt.)"
+                )
+
+        # Save AI response message (always happens if AI call didn't critically fail)
+        ai_msg = ConversationMessage.objects.create(
+            session=session,
+            sender_type=ConversationMessage.SenderType.AI,
+            message_text=ai_response_data["feedback_text"],
+            # related_question is null here, message is feedback/response
+        )
+        logger.info(
+            f"AI response message saved (ID: {ai_msg.id}) for session {session.id}"
+        )
+
+        # Fold turns that left the context window into the running summary
+        conversation_context.schedule_summary_refresh(session)
+        return ai_msg
+
+    def _stream_message_reply(
+        self, request, session, user_message_text, related_question_instance
+    ):
+        """
+        send_message with `stream=true`. The user message is saved up front; the
+        attempt and AI message are saved once the stream closes, each in a short
+        transaction rather than one held open for the whole generation.
+        """
+        with transaction.atomic():
+            current_question = self._record_user_message(
+                session, user_message_text, related_question_instance
+            )
+
+        stream_kwargs = {
+            "session": session,
+            "user_message_text": user_message_text,
+            "current_topic_question": current_question,
+        }
+
+        def message_event(event, payload):
+            return self._message_reply_event(
+                request, session, current_question, event, payload
+            )
+
+        def events():
+            try:
+                for event, payload in conversation.stream_user_message_with_ai(
+                    **stream_kwargs
+                ):
+                    yield message_event(event, payload)
+            except Exception as e:
+                logger.exception(
+                    f"Error streaming message reply for session {session.id}: {e}"
+                )
+                yield _sse_error(
+                    _("An error occurred while processing your message."),
+                    status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+        async def async_events():
+            try:
+                async for event, payload in conversation.astream_user_message_with_ai(
+                    **stream_kwargs
+                ):
+                    if event == "delta":
+                        yield message_event(event, payload)
+                    else:  # Saves the reply
+                        yield await sync_to_async(message_event)(event, payload)
+            except Exception as e:
+                logger.exception(
+                    f"Error streaming message reply for session {session.id}: {e}"
+                )
+                yield _sse_error(
+                    _("An error occurred while processing your message."),
+                    status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+        return _event_stream_response(request, events, async_events)
+
+    def _message_reply_event(self, request, session, current_question, event, payload):
+        """
+        Turns a stream_user_message_with_ai event into a server-sent event,
+        saving the attempt and AI message on the final "result".
+        """
+        if event == "delta":
+            return _sse_event("delta", {"text": payload})
+        if _is_ai_unavailable_reply(payload["feedback_text"]):
+            logger.warning(
+                f"AI Service unavailable/error during streaming for session {session.id}. AI Response: {payload}"
+            )
+            return _sse_error(
+                payload["feedback_text"], status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        with transaction.atomic():
+            ai_msg = self._record_ai_reply(
+                session, request.user, current_question, payload
+            )
+        return _sse_event(
+            "message",
+            ConversationMessageSerializer(
+                ai_msg, context=self.get_serializer_context()
+            ).data,
+        )
+
+    def _ask_question_event(self, event, payload) -> str:
+        """Turns a stream_ai_question_message event (or the question) into a server-sent event."""
+        context = self.get_serializer_context()
+        if event == "question":
+            return _sse_event(
+                "question", UnifiedQuestionSerializer(payload, context=context).data
+            )
+        if event == "delta":
+            return _sse_event("delta", {"text": payload})
+        return _sse_event(
+            "message", AIQuestionResponseSerializer(payload, context=context).data
+        )
+
+    def _ask_question_stream(self, request, session, selected_question):
+        def events():
+            try:
+                yield self._ask_question_event("question", selected_question)
+                for event, payload in conversation.stream_ai_question_message(
+                    session, request.user, selected_question
+                ):
+                    yield self._ask_question_event(event, payload)
+            except Exception as e:
+                logger.exception(f"Error streaming ask_question response: {e}")
+                yield _sse_error(
+                    _("An error occurred while asking for a question."),
+                    status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+        async def async_events():
+            ask_question_event = sync_to_async(self._ask_question_event)
+            try:
+                yield await ask_question_event("question", selected_question)
+                async for event, payload in conversation.astream_ai_question_message(
+                    session, request.user, selected_question
+                ):
+                    if event == "delta":
+                        yield self._ask_question_event(event, payload)
+                    else:
+                        yield await ask_question_event(event, payload)
+            except Exception as e:
+                logger.exception(f"Error streaming ask_question response: {e}")
+                yield _sse_error(
+                    _("An error occurred while asking for a question."),
+                    status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+        return _event_stream_response(request, events, async_events)
+
     @extend_schema(
         summary="Ask AI to Provide a Question",
         request=None,  # No request body needed
         responses={
-            200: AIQuestionResponseSerializer,
+            200: AIQuestionResponseSerializer,  # Server-sent events when `stream=true`
             400: {"description": "Session completed or cannot find question."},
             403: {"description": "Usage limit exceeded or permission denied."},
             404: {"description": "Could not find a suitable question."},
@@ -304,6 +512,7 @@ class ConversationViewSet(
                 required=True,
                 type=OpenApiTypes.INT,
             ),
+            STREAM_QUERY_PARAMETER,
         ],
     )
     @action(detail=True, methods=["post"], url_path="ask-question")
@@ -332,6 +541,12 @@ class ConversationViewSet(
             )
 
         try:
+            if _wants_stream(request):
+                # Availability and question selection errors are raised before
+                # streaming starts, so they still get a regular error response.
+                selected_question = conversation.select_ai_question(session, user)
+                return self._ask_question_stream(request, session, selected_question)
+
             # Call the service function to generate the question and message
             response_data = conversation.generate_ai_question_and_message(session, user)
 
@@ -5,8 +5,9 @@ from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 from django.db import transaction
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 
+from apps.api.pagination import OptionalLimitOffsetPagination
 from apps.api.permissions import IsSubscribed
 from apps.study.models import (
     EmergencyModeSession,
@@ -20,6 +21,7 @@ from apps.study.api.serializers.emergency import (
     EmergencyModeStartSerializer,
     EmergencyModeStartResponseSerializer,
     EmergencyModeUpdateSerializer,
+    EmergencyModeSessionSerializer,
     EmergencyModeAnswerSerializer,
     EmergencyModeAnswerResponseSerializer,
     EmergencyModeCompleteResponseSerializer,
@@ -41,8 +43,12 @@ class EmergencyModeStartView(APIView):
     **Workflow:**
     1.  Validates user input (`reason`, `available_time_hours`, `focus_areas`).
     2.  Calls the `generate_emergency_plan` service to analyze the user's weak skills.
-    3.  Creates an `EmergencyModeSession` instance, storing the generated plan.
-    4.  Returns the session ID and the detailed plan.
+    3.  Samples the session's question set from the plan.
+    4.  Creates an `EmergencyModeSession` instance, storing the plan and question set.
+    5.  Returns the session ID and the detailed plan.
+
+    The plan starts with default motivational tips; personalized AI tips are
+    generated in the background and can be read from the session endpoint.
 
     **Endpoint:** `POST /api/v1/study/emergency/start/`
     """
@@ -89,14 +95,26 @@ class EmergencyModeStartView(APIView):
                     available_time_hours=data.get("available_time_hours"),
                     days_until_test=data.get("days_until_test"),
                     focus_areas=data.get("focus_areas"),
+                    defer_ai_tips=True,
                 )
 
+                try:
+                    question_ids = study_services.sample_emergency_question_ids(
+                        request.user, plan
+                    )
+                except serializers.ValidationError:
+                    question_ids = []  # Sampled again on the first questions fetch
+
                 session = EmergencyModeSession.objects.create(
                     user=request.user,
                     reason=data.get("reason"),
                     suggested_plan=plan,
+                    question_ids=question_ids,
                     days_until_test=data.get("days_until_test"),
                 )
+                study_services.schedule_emergency_tips_generation(
+                    session, data.get("available_time_hours")
+                )
 
             response_data = {"session_id": session.id, "suggested_plan": plan}
             output_serializer = EmergencyModeStartResponseSerializer(response_data)
@@ -115,17 +133,34 @@ class EmergencyModeQuestionsView(APIView):
     Retrieves the list of recommended questions for an active emergency session.
 
     After starting a session, the frontend calls this endpoint to get the actual
-    questions the user needs to answer. The questions are selected based on the
-    `suggested_plan` that was generated and stored in the session object.
+    questions the user needs to answer. The questions are sampled once from the
+    session's `suggested_plan` and stored on the session, so every call returns
+    the same questions in the same order.
+
+    Pass `limit` (and `offset`) to fetch the set in chunks, e.g. to prefetch the
+    next chunk while the user answers the current one.
 
     **Endpoint:** `GET /api/v1/study/emergency/sessions/{session_id}/questions/`
     """
 
     permission_classes = [IsAuthenticated, IsSubscribed]
+    pagination_class = OptionalLimitOffsetPagination
 
     @extend_schema(
         summary="Get Questions for a Session",
-        description="Fetches questions based on the session's generated plan.",
+        description="Fetches the session's question set, sampled from its generated plan.",
+        parameters=[
+            OpenApiParameter(
+                name="limit",
+                type=int,
+                description="Number of questions per chunk. Omit to get the whole set as a plain list.",
+            ),
+            OpenApiParameter(
+                name="offset",
+                type=int,
+                description="Position of the first question of the chunk (used with `limit`).",
+            ),
+        ],
         responses={
             200: UnifiedQuestionSerializer(many=True),
             400: {
@@ -143,6 +178,11 @@ class EmergencyModeQuestionsView(APIView):
         **Path Parameters:**
         - `session_id` (int): The ID of the emergency session.
 
+        **Query Parameters:**
+        - `limit` (int, optional): Return this many questions, wrapped in
+          `{count, next, previous, results}`.
+        - `offset` (int, optional): Index of the first question to return.
+
         **Success Response (200 OK):**
         - A list of question objects, serialized using `UnifiedQuestionSerializer`.
           Sensitive fields like `correct_answer` and `explanation` are excluded.
@@ -163,44 +203,18 @@ class EmergencyModeQuestionsView(APIView):
             )
 
         try:
-            target_subsection_slugs = [
-                topic["slug"] for topic in plan.get("quick_review_topics", [])
-            ]
-
-            question_limit = plan.get("recommended_question_count", 10)
-
-            # If for some reason the plan has no review topics, we can fall back to skills
-            # to prevent returning no questions at all.
-            target_skill_slugs = [
-                skill["slug"] for skill in plan.get("target_skills", [])
-            ]
-
-            if not target_subsection_slugs and not target_skill_slugs:
-                return Response(
-                    {
-                        "detail": _(
-                            "The study plan does not contain any target areas to fetch questions from."
-                        )
-                    },
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
+            question_ids = study_services.get_emergency_session_question_ids(session)
 
-            # Call the service with the broader subsection filter.
-            # The 'not_mastered' flag is set to False to ensure we get questions from the
-            # target areas, even if the user's score is decent but still needs practice.
-            questions = study_services.get_filtered_questions(
-                user=request.user,
-                limit=question_limit,
-                subsections=target_subsection_slugs,
-                skills=(
-                    target_skill_slugs if not target_subsection_slugs else None
-                ),  # Use skills only as a fallback
-                not_mastered=False,  # Set to False to widen the pool as requested
-                min_required=1,
+            paginator = self.pagination_class()
+            page_ids = paginator.paginate_queryset(question_ids, request, view=self)
+            questions = session.get_questions_queryset(
+                page_ids if page_ids is not None else question_ids
             )
             serializer = UnifiedQuestionSerializer(
                 questions, many=True, context={"exclude_sensitive_fields": True}
             )
+            if page_ids is not None:
+                return paginator.get_paginated_response(serializer.data)
             return Response(serializer.data)
         except serializers.ValidationError as e:
             return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
@@ -211,15 +225,17 @@ class EmergencyModeQuestionsView(APIView):
 
 
 @extend_schema(tags=["Study - Emergency Mode"])
-class EmergencyModeSessionUpdateView(generics.UpdateAPIView):
+class EmergencyModeSessionUpdateView(generics.RetrieveUpdateAPIView):
     """
-    Updates flags for an ongoing emergency session.
+    Retrieves an emergency session or updates its flags.
+
+    `GET` returns the session with its current plan, e.g. to pick up the
+    personalized tips generated after the session started.
 
-    This endpoint is used to toggle specific boolean flags on the session, such as
+    `PATCH` toggles specific boolean flags on the session, such as
     activating "Calm Mode" or sharing the session status with administrators for support.
-    It uses the `PATCH` method to allow for partial updates.
 
-    **Endpoint:** `PATCH /api/v1/study/emergency/sessions/{session_id}/`
+    **Endpoint:** `GET, PATCH /api/v1/study/emergency/sessions/{session_id}/`
     """
 
     permission_classes = [IsAuthenticated, IsSubscribed]
@@ -228,6 +244,19 @@ class EmergencyModeSessionUpdateView(generics.UpdateAPIView):
     lookup_field = "pk"
     lookup_url_kwarg = "session_id"
 
+    def get_serializer_class(self):
+        if self.request.method == "GET":
+            return EmergencyModeSessionSerializer
+        return super().get_serializer_class()
+
+    @extend_schema(
+        summary="Get Session Details",
+        description="Returns the session, including its current study plan.",
+        responses={200: EmergencyModeSessionSerializer},
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     @extend_schema(
         summary="Update Session Flags",
         description="Toggles Calm Mode or admin sharing for a session.",
@@ -249,7 +278,7 @@ class EmergencyModeSessionUpdateView(generics.UpdateAPIView):
         return super().patch(request, *args, **kwargs)
 
     def get_queryset(self):
-        """Ensures users can only update their own sessions."""
+        """Ensures users can only access their own sessions."""
         return super().get_queryset().filter(user=self.request.user)
 
 
@@ -16,6 +16,7 @@ from apps.api.permissions import IsSubscribed
 from apps.study.api.serializers.statistics import (
     RECENT_TESTS_LIMIT,
     UserStatisticsSerializer,
+    UserStatisticsSnapshotSerializer,
     # Import nested serializers for explicit schema examples if needed,
     # though drf-spectacular usually infers them well from UserStatisticsSerializer
     OverallStatsSerializer,
@@ -29,6 +30,7 @@ from apps.study.api.serializers.statistics import (
     # AverageTestDurationSerializer, # Part of TimeAnalytics
 )
 from apps.study.models import UserTestAttempt  # For attempt type choices in docs
+from apps.study.services.statistics import get_user_statistics_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -164,7 +166,8 @@ EXAMPLE_STATISTICS_OUTPUT_BRIEF = {
         "- `aggregation_period` (string): Group time-series data in `performance_trends_by_test_type` "
         f"by a specific period. Allowed values: `{'`, `'.join(AGGREGATION_PERIOD_CHOICES)}`. "
         "If not provided, `performance_trends_by_test_type` shows individual test attempts. "
-        "If provided, it shows averages for each period (e.g., average score per week)."
+        "If provided, it shows averages for each period (e.g., average score per week).\n\n"
+        "Without any of these parameters the response is served from a precomputed per-user snapshot."
     ),
     parameters=[
         OpenApiParameter(
@@ -275,9 +278,18 @@ class UserStatisticsView(views.APIView):
         }
 
         try:
-            serializer = UserStatisticsSerializer(
-                instance=request.user, context=serializer_context
-            )
+            if start_date or end_date or aggregation_period:
+                serializer = UserStatisticsSerializer(
+                    instance=request.user, context=serializer_context
+                )
+            else:
+                # Default dashboard: render from the materialized snapshot
+                serializer_context["snapshot"] = get_user_statistics_snapshot(
+                    request.user.id
+                )
+                serializer = UserStatisticsSnapshotSerializer(
+                    instance=request.user, context=serializer_context
+                )
             data = serializer.data
             return Response(data, status=status.HTTP_200_OK)
         except serializers.ValidationError as e:
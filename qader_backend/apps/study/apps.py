@@ -6,3 +6,6 @@ class StudyConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.study"
     verbose_name = _("Study & Progress")
+
+    def ready(self):
+        import apps.study.signals  # noqa F401
@@ -0,0 +1,126 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from apps.learning.models import LearningSection, LearningSubSection, Question
+from apps.study.models import UserQuestionAttempt, UserTestAttempt
+
+User = get_user_model()
+
+
+class _Rollback(Exception):
+    """Raised to discard the benchmark's synthetic data."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Times UserTestAttempt.calculate_and_save_scores on synthetic attempts of "
+        "several sizes, with and without a question snapshot. All data is "
+        "created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="25,100,200",
+            help="Comma-separated numbers of questions per attempt.",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Timed runs per size."
+        )
+        parser.add_argument(
+            "--subsections",
+            type=int,
+            default=8,
+            help="Subsections the questions are spread over, split between sections.",
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["sizes"].split(",") if size.strip()]
+        try:
+            with transaction.atomic():
+                subsections = self._create_subsections(options["subsections"])
+                user = User.objects.create_user(
+                    username="scoring-benchmark", password=None
+                )
+                for size in sizes:
+                    attempt = self._create_attempt(user, subsections, size)
+                    self._report(attempt, size, options["repeat"], "snapshot")
+                    attempt.question_snapshot = {}
+                    self._report(attempt, size, options["repeat"], "no snapshot")
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _create_subsections(self, count):
+        sections = [
+            LearningSection.objects.get_or_create(
+                slug=slug, defaults={"name": slug.title()}
+            )[0]
+            for slug in ("verbal", "quantitative")
+        ]
+        return [
+            LearningSubSection.objects.create(
+                section=sections[i % 2],
+                name=f"Benchmark Subsection {i}",
+                slug=f"scoring-benchmark-{i}",
+            )
+            for i in range(max(count, 1))
+        ]
+
+    def _create_attempt(self, user, subsections, size):
+        questions = Question.objects.bulk_create(
+            [
+                Question(
+                    subsection=subsections[i % len(subsections)],
+                    question_text=f"Benchmark question {i}",
+                    option_a="A",
+                    option_b="B",
+                    option_c="C",
+                    option_d="D",
+                    correct_answer="A",
+                )
+                for i in range(size)
+            ]
+        )
+        attempt = UserTestAttempt.objects.create(
+            user=user,
+            attempt_type=UserTestAttempt.AttemptType.SIMULATION,
+            question_ids=[question.id for question in questions],
+            question_snapshot=UserTestAttempt.build_question_snapshot(
+                [question.id for question in questions]
+            ),
+        )
+        # Every question answered, two thirds correctly
+        UserQuestionAttempt.objects.bulk_create(
+            [
+                UserQuestionAttempt(
+                    user=user,
+                    question=question,
+                    test_attempt=attempt,
+                    selected_answer="A" if i % 3 else "B",
+                    is_correct=bool(i % 3),
+                    mode=UserQuestionAttempt.Mode.TEST,
+                )
+                for i, question in enumerate(questions)
+            ]
+        )
+        return attempt
+
+    def _report(self, attempt, size, repeat, label):
+        attempt.calculate_and_save_scores()  # Warm-up
+        timings = []
+        for _run in range(max(repeat, 1)):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                attempt.calculate_and_save_scores()
+                timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f"{size:>5} questions ({label}): median {statistics.median(timings):.2f} ms, "
+            f"max {max(timings):.2f} ms, {len(queries)} queries per run "
+            f"(score {attempt.score_percentage}%)"
+        )
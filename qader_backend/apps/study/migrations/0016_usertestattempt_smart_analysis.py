@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-16 18:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0015_emergencymodesession_days_until_test'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertestattempt',
+            name='smart_analysis',
+            field=models.TextField(blank=True, help_text='Performance analysis shown after completion. Holds the rule-based fallback until the AI analysis is ready.', null=True, verbose_name='smart analysis'),
+        ),
+        migrations.AddField(
+            model_name='usertestattempt',
+            name='smart_analysis_status',
+            field=models.CharField(choices=[('not_requested', 'Not Requested'), ('pending', 'Pending'), ('completed', 'Completed'), ('failed', 'Failed')], default='not_requested', help_text='State of the asynchronous AI performance analysis.', max_length=15, verbose_name='smart analysis status'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-16 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0017_userstatisticssnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationsession',
+            name='context_summary',
+            field=models.TextField(blank=True, default='', help_text='AI-written summary of older messages, sent instead of them.', verbose_name='context summary'),
+        ),
+        migrations.AddField(
+            model_name='conversationsession',
+            name='context_summary_message_id',
+            field=models.BigIntegerField(blank=True, help_text='ID of the most recent message folded into the context summary.', null=True, verbose_name='context summary last message ID'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-16 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0018_conversation_context_summary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emergencymodesession',
+            name='question_ids',
+            field=models.JSONField(blank=True, default=list, help_text='Ordered list of question primary keys sampled for this session.', verbose_name='question IDs'),
+        ),
+    ]
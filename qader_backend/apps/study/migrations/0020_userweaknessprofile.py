@@ -0,0 +1,31 @@
+# Generated by Django 5.2 on 2026-10-16 19:55
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('study', '0019_emergencymodesession_question_ids'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserWeaknessProfile',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='weakness_profile', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='User')),
+                ('data', models.JSONField(default=dict, help_text='Ranked skill counters and subsection rollups.', verbose_name='Profile')),
+                ('is_stale', models.BooleanField(default=False, help_text='Set when a background rebuild could not be queued; forces a rebuild on next read.', verbose_name='Is Stale')),
+                ('rebuilt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Rebuilt At')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated At')),
+            ],
+            options={
+                'verbose_name': 'User Weakness Profile',
+                'verbose_name_plural': 'User Weakness Profiles',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-16 20:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('study', '0020_userweaknessprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usertestattempt',
+            name='question_snapshot',
+            field=models.JSONField(blank=True, default=dict, help_text="Question placement at start: {'questions': [[question_id, subsection_id], ...], 'subsections': {subsection_id: [slug, name, section_slug]}}. Empty for older attempts.", verbose_name='question snapshot'),
+        ),
+    ]
@@ -5,7 +5,19 @@ from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.db import transaction
-from django.db.models import F, Case, When, IntegerField, QuerySet, Count
+from django.db.models import (
+    F,
+    Q,
+    Case,
+    When,
+    IntegerField,
+    FloatField,
+    QuerySet,
+    Count,
+    FilteredRelation,
+    Value,
+)
+from django.db.models.functions import Cast
 import logging
 from typing import List, Optional, Dict, Any
 
@@ -130,6 +142,12 @@ class UserTestAttempt(models.Model):
         # Add other types like 'EMERGENCY'? Maybe map emergency actions to TRADITIONAL?
         # Let's keep TRADITIONAL for now to represent unstructured practice.
 
+    class AnalysisStatus(models.TextChoices):
+        NOT_REQUESTED = "not_requested", _("Not Requested")
+        PENDING = "pending", _("Pending")
+        COMPLETED = "completed", _("Completed")
+        FAILED = "failed", _("Failed")
+
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -168,6 +186,17 @@ class UserTestAttempt(models.Model):
         default=list,
         help_text=_("Ordered list of question primary keys included in this attempt."),
     )
+    # Captured at start so scoring and ordering need no joins, and stay true
+    # to the test as taken if questions later move between subsections
+    question_snapshot = models.JSONField(
+        _("question snapshot"),
+        default=dict,
+        blank=True,
+        help_text=_(
+            "Question placement at start: {'questions': [[question_id, subsection_id], ...], "
+            "'subsections': {subsection_id: [slug, name, section_slug]}}. Empty for older attempts."
+        ),
+    )
     status = models.CharField(
         _("status"),
         max_length=15,
@@ -210,6 +239,21 @@ class UserTestAttempt(models.Model):
             "Tracks if gamification points for completing this attempt have been awarded."
         ),
     )
+    smart_analysis = models.TextField(
+        _("smart analysis"),
+        blank=True,
+        null=True,
+        help_text=_(
+            "Performance analysis shown after completion. Holds the rule-based fallback until the AI analysis is ready."
+        ),
+    )
+    smart_analysis_status = models.CharField(
+        _("smart analysis status"),
+        max_length=15,
+        choices=AnalysisStatus.choices,
+        default=AnalysisStatus.NOT_REQUESTED,
+        help_text=_("State of the asynchronous AI performance analysis."),
+    )
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
     updated_at = models.DateTimeField(_("updated at"), auto_now=True)
 
@@ -244,6 +288,43 @@ class UserTestAttempt(models.Model):
         """Returns the number of questions included in this attempt based on question_ids field."""
         return len(self.question_ids) if isinstance(self.question_ids, list) else 0
 
+    @staticmethod
+    def build_question_snapshot(question_ids: List[Any]) -> Dict[str, Any]:
+        """
+        Captures where each question sits (see `question_snapshot`) with one
+        query. Questions that do not exist are left out, as scoring skips them.
+        """
+        valid_ids = [int(qid) for qid in question_ids if str(qid).isdigit()]
+        subsection_by_question = {}
+        subsections = {}
+        for qid, sub_id, sub_slug, sub_name, section_slug in Question.objects.filter(
+            pk__in=valid_ids
+        ).values_list(
+            "id",
+            "subsection_id",
+            "subsection__slug",
+            "subsection__name",
+            "subsection__section__slug",
+        ):
+            subsection_by_question[qid] = sub_id
+            if sub_id is not None:
+                subsections[str(sub_id)] = [sub_slug, sub_name, section_slug]
+        return {
+            "questions": [
+                [qid, subsection_by_question[qid]]
+                for qid in valid_ids
+                if qid in subsection_by_question
+            ],
+            "subsections": subsections,
+        }
+
+    @property
+    def ordered_question_ids(self) -> List[int]:
+        """Question IDs in test order, from the snapshot when there is one."""
+        if self.question_snapshot:
+            return [qid for qid, _sub_id in self.question_snapshot["questions"]]
+        return [int(qid) for qid in self.question_ids or [] if str(qid).isdigit()]
+
     @property
     def answered_question_count(self) -> int:
         """
@@ -290,29 +371,88 @@ class UserTestAttempt(models.Model):
             .order_by(preserved_order)
         )
 
-    @transaction.atomic  # Ensure score calculation and saving are atomic
-    def calculate_and_save_scores(
-        self, question_attempts_qs: Optional[QuerySet["UserQuestionAttempt"]] = None
-    ):
+    def get_ordered_questions(self) -> List[Question]:
         """
-        Calculates scores based on provided or fetched question attempts and updates the instance.
-        Prefetches related data if queryset is not provided.
+        The attempt's questions, annotated as in `get_questions_queryset`, put
+        in test order in Python rather than with a CASE over every ID.
+        """
+        positions = {}
+        for position, qid in enumerate(self.ordered_question_ids):
+            positions.setdefault(qid, position)
+        if not positions:
+            return []
+        questions = (
+            Question.objects.with_user_annotations(self.user)
+            .filter(pk__in=positions)
+            .select_related("subsection", "subsection__section", "skill")
+        )
+        return sorted(questions, key=lambda question: positions[question.id])
 
-        Args:
-            question_attempts_qs: Optional pre-fetched queryset of UserQuestionAttempt
-                                  related to this test_attempt. If None, it will be fetched.
+    def _subsection_score_rows(self) -> List[Dict[str, Any]]:
+        """
+        Per subsection of the attempt's questions: slug, name, section slug,
+        number of questions and of correct answers.
+        """
+        if self.question_snapshot:
+            # Only the correct answers are read; placement comes from the snapshot
+            correct_by_question = {}
+            for qid in self.question_attempts.filter(is_correct=True).values_list(
+                "question_id", flat=True
+            ):
+                correct_by_question[qid] = correct_by_question.get(qid, 0) + 1
+            rows = {}
+            for qid, sub_id in dict(self.question_snapshot["questions"]).items():
+                sub_slug, sub_name, section_slug = self.question_snapshot[
+                    "subsections"
+                ].get(str(sub_id), (None, None, None))
+                row = rows.setdefault(
+                    sub_id,
+                    {
+                        "subsection__slug": sub_slug,
+                        "subsection__name": sub_name,
+                        "subsection__section__slug": section_slug,
+                        "total": 0,
+                        "correct": 0,
+                    },
+                )
+                row["total"] += 1
+                row["correct"] += correct_by_question.get(qid, 0)
+            return sorted(
+                rows.values(), key=lambda row: row["subsection__slug"] or ""
+            )
+
+        # Older attempts: group the questions in SQL, LEFT JOINed to the answers
+        return list(
+            Question.objects.filter(pk__in=self.ordered_question_ids)
+            .annotate(
+                answer=FilteredRelation(
+                    "user_attempts", condition=Q(user_attempts__test_attempt=self)
+                )
+            )
+            .values(
+                "subsection__slug",
+                "subsection__name",
+                "subsection__section__slug",
+            )
+            .annotate(
+                # A question answered more than once joins several rows
+                total=Count("pk", distinct=True),
+                correct=Count("answer", filter=Q(answer__is_correct=True)),
+            )
+            .order_by("subsection__slug")
+        )
+
+    @transaction.atomic  # Ensure score calculation and saving are atomic
+    def calculate_and_save_scores(self):
         """
-        if not question_attempts_qs:
-            # Fetch attempts if not provided, ensuring necessary related data is loaded
-            question_attempts_qs = self.question_attempts.select_related(
-                "question__subsection__section", "question__skill"
-            ).all()
+        Calculates the overall, verbal and quantitative scores and the
+        per-subsection results summary, and saves them.
 
+        All counts come from one query: the IDs of correct answers, placed
+        with the question snapshot, or for attempts without one a grouped
+        aggregate over the questions LEFT JOINed to their answers.
+        """
         total_questions_in_attempt = self.num_questions
-        answered_attempts = list(
-            question_attempts_qs
-        )  # Fetch into memory for processing
-        num_answered = len(answered_attempts)
 
         if total_questions_in_attempt == 0:
             logger.warning(
@@ -323,136 +463,47 @@ class UserTestAttempt(models.Model):
             self.score_quantitative = None
             self.results_summary = {}
         else:
-            correct_answers = sum(
-                1 for attempt in answered_attempts if attempt.is_correct
-            )
-            # Overall score based on total questions *in the attempt* definition
-            overall_score = round(
-                (correct_answers / total_questions_in_attempt * 100.0), 1
-            )
-
-            verbal_correct, verbal_total, quant_correct, quant_total = 0, 0, 0, 0
+            correct_answers = 0
+            section_counts = {
+                "verbal": {"correct": 0, "total": 0},
+                "quantitative": {"correct": 0, "total": 0},
+            }
             results_summary_calc = {}
-
-            all_q_ids = set(self.question_ids)
-            if not all_q_ids:
-                logger.warning(
-                    f"Attempt {self.id} has empty question_ids list during scoring calculation."
-                )
-                q_detail_map = {}
-            else:
-                # Ensure IDs are integers for the query
-                valid_q_ids = [int(qid) for qid in all_q_ids if str(qid).isdigit()]
-                if not valid_q_ids:
-                    logger.warning(
-                        f"Attempt {self.id} has no valid integer question IDs for scoring."
-                    )
-                    q_detail_map = {}
-                else:
-                    # Fetch details for ALL questions defined in the attempt
-                    q_details = (
-                        Question.objects.filter(id__in=valid_q_ids)
-                        .select_related(
-                            "subsection__section"
-                        )  # Ensure section is loaded
-                        .values(
-                            "id",
-                            "subsection_id",
-                            "subsection__slug",
-                            "subsection__name",
-                            "subsection__section__slug",  # Get section slug directly
-                        )
-                    )
-                    q_detail_map = {q["id"]: q for q in q_details}
-
-            # Initialize results summary based on involved subsections from ALL questions
-            involved_subsections = {}
-            for qid, q_detail in q_detail_map.items():
-                sub_id = q_detail.get("subsection_id")
-                if sub_id and sub_id not in involved_subsections:
-                    involved_subsections[sub_id] = {
-                        "slug": q_detail.get("subsection__slug"),
-                        "name": q_detail.get("subsection__name"),
-                    }
-                    if q_detail.get(
-                        "subsection__slug"
-                    ):  # Initialize summary only if slug exists
-                        results_summary_calc[q_detail["subsection__slug"]] = {
+            for row in self._subsection_score_rows():
+                correct_answers += row["correct"]
+                section = section_counts.get(row["subsection__section__slug"])
+                if section is not None:
+                    section["correct"] += row["correct"]
+                    section["total"] += row["total"]
+                sub_slug = row["subsection__slug"]
+                if sub_slug:
+                    summary = results_summary_calc.setdefault(
+                        sub_slug,
+                        {
                             "correct": 0,
                             "total": 0,
-                            "name": q_detail.get("subsection__name", "Unknown"),
+                            "name": row["subsection__name"],
                             "score": 0.0,
-                        }
-
-            # Count totals per section/subsection based on ALL questions in the attempt
-            for qid in all_q_ids:
-                # Ensure qid is integer before map lookup
-                qid_int = int(qid) if str(qid).isdigit() else None
-                if qid_int is None:
-                    continue
-
-                detail = q_detail_map.get(qid_int)
-                if not detail:
-                    logger.warning(
-                        f"Missing details for Question ID {qid_int} in Attempt {self.id} during scoring total count."
-                    )
-                    continue
-
-                sub_slug = detail.get("subsection__slug")
-                if sub_slug and sub_slug in results_summary_calc:
-                    results_summary_calc[sub_slug]["total"] += 1
-
-                section_slug = detail.get("subsection__section__slug")
-                if section_slug == "verbal":
-                    verbal_total += 1
-                elif section_slug == "quantitative":
-                    quant_total += 1
-
-            # Count correct answers from the *answered* attempts
-            for attempt in answered_attempts:
-                question_id = attempt.question_id  # Use FK directly
-                detail = q_detail_map.get(question_id)
-
-                if not detail:
-                    logger.warning(
-                        f"Missing detail for answered Q {question_id} in attempt {self.id} during scoring correct count."
+                        },
                     )
-                    continue
-
-                subsection_slug = detail.get("subsection__slug")
-                section_slug = detail.get("subsection__section__slug")
-
-                if attempt.is_correct:
-                    if subsection_slug and subsection_slug in results_summary_calc:
-                        results_summary_calc[subsection_slug]["correct"] += 1
-                    if section_slug == "verbal":
-                        verbal_correct += 1
-                    elif section_slug == "quantitative":
-                        quant_correct += 1
-
-            # Calculate final scores for summary and sections
-            for slug, data in results_summary_calc.items():
-                data["score"] = (
-                    round((data["correct"] / data["total"] * 100.0), 1)
-                    if data["total"] > 0
-                    else 0.0
-                )
+                    summary["correct"] += row["correct"]
+                    summary["total"] += row["total"]
 
-            verbal_score = (
-                round((verbal_correct / verbal_total * 100.0), 1)
-                if verbal_total > 0
-                else None
-            )
-            quantitative_score = (
-                round((quant_correct / quant_total * 100.0), 1)
-                if quant_total > 0
-                else None
-            )
+            def percentage(counts) -> Optional[float]:
+                if counts["total"] <= 0:
+                    return None
+                return round((counts["correct"] / counts["total"] * 100.0), 1)
+
+            for data in results_summary_calc.values():
+                data["score"] = percentage(data) or 0.0
 
-            # Assign calculated scores to the instance
-            self.score_percentage = overall_score
-            self.score_verbal = verbal_score
-            self.score_quantitative = quantitative_score
+            # Assign calculated scores to the instance. The overall score is
+            # based on total questions *in the attempt* definition
+            self.score_percentage = round(
+                (correct_answers / total_questions_in_attempt * 100.0), 1
+            )
+            self.score_verbal = percentage(section_counts["verbal"])
+            self.score_quantitative = percentage(section_counts["quantitative"])
             self.results_summary = results_summary_calc
 
         # Save the updated fields efficiently
@@ -781,10 +832,62 @@ class UserSkillProficiency(models.Model):
         user_name = getattr(self.user, "username", "N/A")
         return f"{user_name} - {skill_name}: {self.proficiency_score:.2f}"
 
-    @transaction.atomic  # Ensure atomic updates for counters and score
+    @classmethod
+    def add_attempt_deltas(cls, user_id: int, deltas: Dict[int, Dict[str, int]]) -> int:
+        """
+        Adds aggregated attempt/correct counts to the user's rows for several skills
+        and recomputes their scores. Missing rows are inserted first (conflicts
+        ignored); a single UPDATE then computes new counters and scores from the
+        current row values with F() expressions, so no row is read or locked in Python.
+
+        Args:
+            deltas: {skill_id: {"attempts": int, "correct": int}}.
+        Returns:
+            Number of proficiency rows updated.
+        """
+        if not deltas:
+            return 0
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                [cls(user_id=user_id, skill_id=skill_id) for skill_id in deltas],
+                ignore_conflicts=True,
+            )
+
+            def _delta_case(key: str) -> Case:
+                return Case(
+                    *[
+                        When(skill_id=skill_id, then=Value(delta.get(key, 0)))
+                        for skill_id, delta in deltas.items()
+                    ],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+
+            new_attempts = F("attempts_count") + _delta_case("attempts")
+            new_correct = F("correct_count") + _delta_case("correct")
+            updated = cls.objects.filter(
+                user_id=user_id, skill_id__in=deltas.keys()
+            ).update(
+                attempts_count=new_attempts,
+                correct_count=new_correct,
+                # All right-hand sides read the pre-update row, so the score uses the new totals
+                proficiency_score=Cast(new_correct, FloatField())
+                / Cast(new_attempts, FloatField()),
+                last_calculated_at=timezone.now(),
+            )
+
+            # Import here to avoid circular dependency
+            from apps.study.services.weakness import (
+                schedule_user_weakness_profile_rebuild,
+            )
+
+            schedule_user_weakness_profile_rebuild(user_id)
+            return updated
+
     def record_attempt(self, is_correct: bool):
         """
-        Atomically updates counters and recalculates proficiency score for this record.
+        Atomically updates counters and recalculates proficiency score for this record
+        with a single F()-expression UPDATE (no row lock held across round trips).
         Should be called after a UserQuestionAttempt related to this user/skill is saved.
         """
         if not isinstance(is_correct, bool):
@@ -793,61 +896,101 @@ class UserSkillProficiency(models.Model):
             )
             return
 
-        # Lock the row for update to prevent race conditions
-        # Note: select_for_update() needs to be called on the queryset *before* the update
         try:
-            # Re-fetch with select_for_update within the transaction
-            locked_self = UserSkillProficiency.objects.select_for_update().get(
-                pk=self.pk
+            UserSkillProficiency.add_attempt_deltas(
+                self.user_id,
+                {self.skill_id: {"attempts": 1, "correct": int(is_correct)}},
             )
-
-            # Increment counters using the locked instance's values
-            locked_self.attempts_count += 1
-            if is_correct:
-                locked_self.correct_count += 1
-            locked_self.last_calculated_at = (
-                timezone.now()
-            )  # Keep track of last update time
-
-            # Recalculate the new score
-            if locked_self.attempts_count > 0:
-                # Round to a reasonable number of decimal places (e.g., 4)
-                new_score = round(
-                    locked_self.correct_count / locked_self.attempts_count, 4
-                )
-            else:
-                new_score = 0.0  # Should not happen if attempts_count was incremented, but safe fallback
-
-            # Update score only if it has changed significantly (avoid unnecessary writes/signals)
-            # Use a small tolerance for float comparison
-            if abs(locked_self.proficiency_score - new_score) > 1e-5:
-                locked_self.proficiency_score = new_score
-
-            # Save all changes at once
-            locked_self.save(
-                update_fields=[
+            # Update the current in-memory object to reflect changes if needed by caller
+            self.refresh_from_db(
+                fields=[
                     "attempts_count",
                     "correct_count",
                     "proficiency_score",
                     "last_calculated_at",
                 ]
             )
-
-            # Update the current in-memory object to reflect changes if needed by caller
-            self.attempts_count = locked_self.attempts_count
-            self.correct_count = locked_self.correct_count
-            self.proficiency_score = locked_self.proficiency_score
-            self.last_calculated_at = locked_self.last_calculated_at
-
-        except UserSkillProficiency.DoesNotExist:
-            logger.error(
-                f"UserSkillProficiency pk={self.pk} not found during record_attempt update."
-            )
         except Exception as e:
             logger.exception(
                 f"Error during UserSkillProficiency.record_attempt for pk={self.pk}: {e}"
             )
-            # Transaction will be rolled back
+
+
+# --- User Statistics Snapshot Model ---
+class UserStatisticsSnapshot(models.Model):
+    """
+    Materialized counters behind the user statistics dashboard. Kept up to date
+    incrementally as answers are recorded and attempts complete (see
+    `apps.study.services.statistics`); rebuilt from raw attempts when missing,
+    marked stale, or older than USER_STATISTICS_SNAPSHOT_MAX_AGE.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="statistics_snapshot",
+        verbose_name=_("User"),
+    )
+    data = models.JSONField(
+        _("Counters"),
+        default=dict,
+        help_text=_("Aggregated activity counters used to render the statistics."),
+    )
+    is_stale = models.BooleanField(
+        _("Is Stale"),
+        default=False,
+        help_text=_("Set when a change could not be applied incrementally."),
+    )
+    rebuilt_at = models.DateTimeField(_("Rebuilt At"), default=timezone.now)
+    updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("User Statistics Snapshot")
+        verbose_name_plural = _("User Statistics Snapshots")
+
+    def __str__(self):
+        user_name = getattr(self.user, "username", self.user_id)
+        return f"Statistics snapshot for {user_name}"
+
+
+class UserWeaknessProfile(models.Model):
+    """
+    Per-skill attempt counters of a user, ranked weakest first, with
+    subsection rollups, so emergency plans are computed in memory instead of
+    from live proficiency queries (see `apps.study.services.weakness`).
+    Rebuilt from UserSkillProficiency by a debounced background task after
+    skill proficiencies change, and on read when missing, marked stale, or
+    older than USER_WEAKNESS_PROFILE_MAX_AGE.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="weakness_profile",
+        verbose_name=_("User"),
+    )
+    data = models.JSONField(
+        _("Profile"),
+        default=dict,
+        help_text=_("Ranked skill counters and subsection rollups."),
+    )
+    is_stale = models.BooleanField(
+        _("Is Stale"),
+        default=False,
+        help_text=_("Set when a background rebuild could not be queued; forces a rebuild on next read."),
+    )
+    rebuilt_at = models.DateTimeField(_("Rebuilt At"), default=timezone.now)
+    updated_at = models.DateTimeField(_("Updated At"), auto_now=True)
+
+    class Meta:
+        verbose_name = _("User Weakness Profile")
+        verbose_name_plural = _("User Weakness Profiles")
+
+    def __str__(self):
+        user_name = getattr(self.user, "username", self.user_id)
+        return f"Weakness profile for {user_name}"
 
 
 # --- Emergency Mode Session Model ---
@@ -869,6 +1012,13 @@ class EmergencyModeSession(models.Model):
             '"recommended_questions": N, "quick_review_topics": [...]}'
         ),
     )
+    # Sampled once from the plan, so refetches return the same questions
+    question_ids = models.JSONField(
+        _("question IDs"),
+        default=list,
+        blank=True,
+        help_text=_("Ordered list of question primary keys sampled for this session."),
+    )
     calm_mode_active = models.BooleanField(_("calm mode active"), default=False)
     days_until_test = models.IntegerField(
         null=True,
@@ -916,6 +1066,29 @@ class EmergencyModeSession(models.Model):
             self.end_time = timezone.now()
             self.save(update_fields=["end_time", "updated_at"])
 
+    def get_questions_queryset(
+        self, question_ids: Optional[List[int]] = None
+    ) -> QuerySet[Question]:
+        """
+        Returns an annotated queryset for `question_ids` (defaults to the whole
+        stored set) in the stored order, fetched by primary key.
+        """
+        if question_ids is None:
+            question_ids = self.question_ids
+        if not question_ids or not isinstance(question_ids, list):
+            return Question.objects.none()
+
+        preserved_order = Case(
+            *[When(pk=pk, then=pos) for pos, pk in enumerate(question_ids)],
+            output_field=IntegerField(),
+        )
+        return (
+            Question.objects.with_user_annotations(self.user)
+            .filter(pk__in=question_ids)
+            .select_related("subsection", "subsection__section", "skill")
+            .order_by(preserved_order)
+        )
+
 
 class EmergencySupportRequest(models.Model):
     """
@@ -1015,6 +1188,19 @@ class ConversationSession(models.Model):
         verbose_name=_("current topic question"),
         help_text=_("The question/concept currently being focused on."),
     )
+    # Running summary of the turns that fell out of the AI context window
+    context_summary = models.TextField(
+        _("context summary"),
+        blank=True,
+        default="",
+        help_text=_("AI-written summary of older messages, sent instead of them."),
+    )
+    context_summary_message_id = models.BigIntegerField(
+        _("context summary last message ID"),
+        null=True,
+        blank=True,
+        help_text=_("ID of the most recent message folded into the context summary."),
+    )
     start_time = models.DateTimeField(_("start time"), auto_now_add=True)
     end_time = models.DateTimeField(_("end time"), null=True, blank=True)
     created_at = models.DateTimeField(_("created at"), auto_now_add=True)
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable
+
+from django.conf import settings
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    InternalServerError,
+    RateLimitError,
+)
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Process-wide cap on in-flight AI requests
+AI_MAX_CONCURRENT_REQUESTS = getattr(settings, "AI_MAX_CONCURRENT_REQUESTS", 8)
+# How long background and async callers wait for a free slot before giving up
+# with a "busy" error; sync request paths never wait, they would hold a thread
+AI_CONCURRENCY_WAIT_SECONDS = getattr(settings, "AI_CONCURRENCY_WAIT_SECONDS", 10)
+# Per-user token bucket: sustained rate and burst size
+AI_USER_RATE_LIMIT_PER_MINUTE = getattr(settings, "AI_USER_RATE_LIMIT_PER_MINUTE", 20)
+AI_USER_RATE_LIMIT_BURST = getattr(settings, "AI_USER_RATE_LIMIT_BURST", 10)
+AI_RATE_LIMITER_MAX_TRACKED_USERS = getattr(
+    settings, "AI_RATE_LIMITER_MAX_TRACKED_USERS", 10000
+)
+# Retries of transient OpenAI errors (async client), with jittered exponential backoff
+AI_RETRY_ATTEMPTS = getattr(settings, "AI_RETRY_ATTEMPTS", 3)
+AI_RETRY_BASE_DELAY_SECONDS = getattr(settings, "AI_RETRY_BASE_DELAY_SECONDS", 0.5)
+AI_RETRY_MAX_DELAY_SECONDS = getattr(settings, "AI_RETRY_MAX_DELAY_SECONDS", 8.0)
+# Circuit breaker: consecutive transient failures before failing fast, and cool-down
+AI_CIRCUIT_FAILURE_THRESHOLD = getattr(settings, "AI_CIRCUIT_FAILURE_THRESHOLD", 5)
+AI_CIRCUIT_RESET_SECONDS = getattr(settings, "AI_CIRCUIT_RESET_SECONDS", 30)
+
+ASYNC_SLOT_POLL_SECONDS = 0.05
+
+TRANSIENT_AI_ERRORS = (
+    RateLimitError,
+    APITimeoutError,
+    APIConnectionError,
+    InternalServerError,
+)
+
+
+def is_transient_ai_error(error: Exception) -> bool:
+    """
+    Upstream trouble (not bad requests): worth retrying, and counts towards
+    opening the circuit.
+    """
+    return isinstance(error, TRANSIENT_AI_ERRORS)
+
+
+def backoff_delay(attempt: int) -> float:
+    """
+    Delay before retry number `attempt` (0-based): exponential, capped, with
+    "equal jitter" so simultaneous failures do not retry in lockstep.
+    """
+    ceiling = min(
+        AI_RETRY_MAX_DELAY_SECONDS, AI_RETRY_BASE_DELAY_SECONDS * 2**attempt
+    )
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures, so callers
+    fall back immediately instead of each waiting on a struggling upstream.
+
+    While open, one trial request is let through every `reset_timeout`
+    seconds; its success closes the circuit again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = AI_CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = AI_CIRCUIT_RESET_SECONDS,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._opened_at = time.monotonic()  # Re-arm: one trial per window
+                logger.info(
+                    "AI circuit breaker half-open: letting a trial request through."
+                )
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("AI circuit breaker closed after a successful request.")
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.error(
+                        f"AI circuit breaker opened after {self._failures} consecutive failures; "
+                        f"failing fast for {self.reset_timeout}s."
+                    )
+                self._opened_at = time.monotonic()
+
+    def reset(self):
+        self.record_success()
+
+
+class UserRateLimiter:
+    """
+    Per-user token buckets, so one user's burst cannot use up the shared AI
+    capacity. Buckets live in process memory (least recently seen users are
+    dropped beyond `max_users`), so the effective limit scales with the
+    number of worker processes.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float = AI_USER_RATE_LIMIT_PER_MINUTE,
+        burst: int = AI_USER_RATE_LIMIT_BURST,
+        max_users: int = AI_RATE_LIMITER_MAX_TRACKED_USERS,
+    ):
+        self.refill_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def try_acquire(self, user_key: Hashable) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(user_key, (self.burst, now))
+            tokens = min(
+                self.burst, tokens + (now - updated_at) * self.refill_per_second
+            )
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[user_key] = (tokens, now)
+            self._buckets.move_to_end(user_key)
+            while len(self._buckets) > self.max_users:
+                self._buckets.popitem(last=False)
+            return allowed
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class ConcurrencyLimiter:
+    """
+    Process-wide limit on in-flight AI requests, backed by a thread semaphore
+    so it spans worker threads and every event loop in the process. Sync
+    callers either take a free slot right away or (background work only) wait
+    up to `wait_seconds` for one; async callers poll for up to `wait_seconds`
+    without blocking their loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = AI_MAX_CONCURRENT_REQUESTS,
+        wait_seconds: float = AI_CONCURRENCY_WAIT_SECONDS,
+    ):
+        self.max_concurrent = max_concurrent
+        self.wait_seconds = wait_seconds
+        self._semaphore = threading.BoundedSemaphore(max_concurrent)
+
+    def acquire(self, wait: bool = False) -> bool:
+        if not wait:
+            return self._semaphore.acquire(blocking=False)
+        return self._semaphore.acquire(timeout=self.wait_seconds)
+
+    async def acquire_async(self) -> bool:
+        deadline = time.monotonic() + self.wait_seconds
+        while not self._semaphore.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(ASYNC_SLOT_POLL_SECONDS)
+        return True
+
+    def release(self):
+        self._semaphore.release()
+
+
+# Module-level singletons shared by every AIInteractionManager call in this process
+ai_circuit_breaker = CircuitBreaker()
+ai_user_rate_limiter = UserRateLimiter()
+ai_concurrency_limiter = ConcurrencyLimiter()
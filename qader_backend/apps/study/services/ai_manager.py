@@ -1,15 +1,29 @@
+import asyncio
 import json
 import logging
-from typing import List, Optional, Dict, Any, Tuple, Union
+import time
+import weakref
+from typing import AsyncIterator, Iterator, List, Optional, Dict, Any, Tuple, Union
 
 from django.conf import settings
 from django.utils.translation import gettext_lazy as _  # Keep for defining lazy strings
 from django.utils.functional import Promise  # For type checking __proxy__
 from django.utils.encoding import force_str  # For converting lazy objects to strings
-from openai import OpenAI, OpenAIError
+from asgiref.sync import sync_to_async
+from openai import AsyncOpenAI, OpenAI, OpenAIError
 
 from apps.study.models import ConversationMessage, ConversationSession
 
+from .ai_limits import (
+    AI_RETRY_ATTEMPTS,
+    ai_circuit_breaker,
+    ai_concurrency_limiter,
+    ai_user_rate_limiter,
+    backoff_delay,
+    is_transient_ai_error,
+)
+from .ai_response_cache import ai_response_cache
+
 logger = logging.getLogger(__name__)
 
 # --- Constants ---
@@ -30,6 +44,10 @@ AI_SPEECHLESS_MSG = _("I seem to be speechless! Could you try rephrasing?")
 AI_JSON_PARSE_ERROR_MSG = _(
     "I had a little trouble formatting my thoughts. Could you try again?"
 )
+AI_BUSY_MSG = _("The AI service is currently busy. Please try again in a moment.")
+AI_RATE_LIMITED_MSG = _(
+    "You're sending messages to the AI assistant too quickly. Please wait a moment and try again."
+)
 
 
 # --- System Prompt Configuration ---
@@ -114,6 +132,16 @@ Keep it brief (1-2 sentences).
 DO NOT include the question text itself in your message.
 Example ({cheerful_example_tone} tone): "Awesome, glad to hear it! Let's see that knowledge in action with this question. Good luck! ✨"
 Example ({serious_example_tone} tone): "Understood. To confirm your comprehension, please attempt the following related question."
+    """,
+    "summarize_conversation": """
+You are maintaining a running summary of this tutoring conversation. It replaces the older messages in your context on later turns.
+Current summary (empty at first):
+{existing_summary}
+
+The user message contains the next messages of the conversation, oldest first.
+Update the summary with them. Keep: topics and questions discussed (with question IDs when mentioned), how the student answered, the concepts they struggled with or understood, and any stated preferences. Drop greetings and small talk.
+Keep the summary under {max_words} words, in the language of the conversation.
+Output ONLY the updated summary text. Do not use markdown or JSON.
     """,
     "generate_emergency_tips": """
 You are an encouraging AI assistant helping a student in 'Emergency Mode' prepare for the Qudurat test.
@@ -199,6 +227,10 @@ Output ONLY the generated text analysis as a single string. Do not use markdown
 }
 
 
+class AIStreamError(Exception):
+    """Raised by a streamed completion that failed; str(error) is user-facing."""
+
+
 def get_tone_instruction_text(ai_tone_value: str) -> str:
     """Returns specific tone instructions for the system prompt based on ConversationSession.AiTone value."""
     tone_map = {
@@ -213,6 +245,8 @@ def get_tone_instruction_text(ai_tone_value: str) -> str:
 class AIInteractionManager:
     def __init__(self):
         self.client, self.init_error = self._initialize_openai_client()
+        # AsyncOpenAI connection pools are bound to an event loop: one client per loop
+        self._async_clients = weakref.WeakKeyDictionary()
         if self.init_error:
             logger.error(
                 f"AIInteractionManager initialization failed: {self.init_error}"
@@ -223,10 +257,7 @@ class AIInteractionManager:
         error_message = None
         try:
             if settings.OPENAI_API_KEY:
-                kwargs = {"api_key": settings.OPENAI_API_KEY}
-                if base_url := getattr(settings, "OPENAI_API_BASE_URL", None):
-                    kwargs["base_url"] = base_url
-                client_instance = OpenAI(**kwargs)
+                client_instance = OpenAI(**self._client_kwargs())
                 logger.info(
                     "OpenAI client initialized successfully for AIInteractionManager."
                 )
@@ -239,6 +270,22 @@ class AIInteractionManager:
             logger.exception(error_message)
         return client_instance, error_message
 
+    @staticmethod
+    def _client_kwargs() -> Dict[str, Any]:
+        kwargs = {"api_key": settings.OPENAI_API_KEY}
+        if base_url := getattr(settings, "OPENAI_API_BASE_URL", None):
+            kwargs["base_url"] = base_url
+        return kwargs
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            # Retries are ours (jittered, circuit-breaker aware), not the SDK's
+            client = AsyncOpenAI(**self._client_kwargs(), max_retries=0)
+            self._async_clients[loop] = client
+        return client
+
     def is_available(self) -> bool:
         return self.client is not None
 
@@ -300,22 +347,15 @@ class AIInteractionManager:
             formatted_messages.append({"role": role, "content": msg.message_text})
         return formatted_messages
 
-    def get_chat_completion(
+    def _build_api_kwargs(
         self,
         system_prompt_content: str,
         messages_for_api: List[Dict[str, str]],
-        model: str = DEFAULT_AI_MODEL,
-        temperature: float = DEFAULT_TEMPERATURE,
-        max_tokens: int = DEFAULT_MAX_TOKENS,
-        response_format: Optional[Dict[str, str]] = None,
-        user_id_for_tracking: Optional[str] = None,
-    ) -> Tuple[Optional[Union[str, Dict]], Optional[str]]:
-        if not self.is_available():
-            return (
-                None,
-                self.get_error_message_if_unavailable(),
-            )  # Returns forced string
-
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        user_id_for_tracking: Optional[str],
+    ) -> Dict[str, Any]:
         # Ensure all content in messages_for_api is string
         safe_messages_for_api = [
             {"role": msg["role"], "content": force_str(msg["content"])}
@@ -335,6 +375,185 @@ class AIInteractionManager:
         }
         if user_id_for_tracking:
             api_kwargs["user"] = user_id_for_tracking
+        return api_kwargs
+
+    @staticmethod
+    def _user_facing_api_error(e: OpenAIError) -> str:
+        user_facing_error = AI_RESPONSE_ERROR_MSG
+        if hasattr(e, "status_code"):
+            if e.status_code == 429:
+                user_facing_error = AI_BUSY_MSG
+            elif e.status_code == 401:
+                user_facing_error = _(
+                    "There's an issue with AI service authentication. Please contact support."
+                )
+        return force_str(user_facing_error)
+
+    @staticmethod
+    def _parse_json_content(
+        content: str, user_id_for_tracking: Optional[str] = None
+    ) -> Tuple[Optional[Dict], Optional[str]]:
+        try:
+            if content.strip().startswith("```json"):
+                content_cleaned = content.strip()[7:]
+                if content_cleaned.endswith("```"):
+                    content_cleaned = content_cleaned[:-3]
+                content = content_cleaned.strip()
+            elif content.strip().startswith("```"):
+                content_cleaned = content.strip()[3:]
+                if content_cleaned.endswith("```"):
+                    content_cleaned = content_cleaned[:-3]
+                content = content_cleaned.strip()
+
+            parsed_json = json.loads(content)
+            logger.info(
+                f"AI JSON response parsed successfully. User: {user_id_for_tracking or 'N/A'}"
+            )
+            return parsed_json, None
+        except json.JSONDecodeError as e:
+            logger.error(
+                f"Failed to parse AI JSON response. Error: {e}. Raw Response: '{content}'. User: {user_id_for_tracking or 'N/A'}",
+                exc_info=True,
+            )
+            return None, force_str(AI_JSON_PARSE_ERROR_MSG)
+
+    def get_chat_completion(
+        self,
+        system_prompt_content: str,
+        messages_for_api: List[Dict[str, str]],
+        model: str = DEFAULT_AI_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        response_format: Optional[Dict[str, str]] = None,
+        user_id_for_tracking: Optional[str] = None,
+        cache_ttl: Optional[int] = None,
+        background: bool = False,
+    ) -> Tuple[Optional[Union[str, Dict]], Optional[str]]:
+        """
+        Returns (content, None) on success or (None, user-facing error message).
+
+        Call sites whose output only depends on the prompt can pass `cache_ttl`
+        (seconds) to reuse a previous successful response for the same
+        normalized prompt, model and temperature bucket. Errors are never cached.
+
+        Celery tasks pass `background=True`: they are not held to the per-user
+        rate limit and may wait for a free request slot. Request paths get the
+        busy error right away instead of holding their worker thread.
+        """
+        if not self.is_available():
+            return (
+                None,
+                self.get_error_message_if_unavailable(),
+            )  # Returns forced string
+
+        cache_key = None
+        if cache_ttl:
+            cache_key = ai_response_cache.make_key(
+                system_prompt_content,
+                messages_for_api,
+                model,
+                temperature,
+                max_tokens,
+                response_format,
+            )
+            cached_content = ai_response_cache.get(cache_key, cache_ttl)
+            if cached_content is not None:
+                logger.info(
+                    f"AI response served from cache ({model}). User: {user_id_for_tracking or 'N/A'}"
+                )
+                return cached_content, None
+
+        admission_error = self._admission_error(user_id_for_tracking, background)
+        if admission_error:
+            return None, admission_error
+        if not ai_concurrency_limiter.acquire(wait=background):
+            logger.warning(
+                f"No free AI request slot; giving up. User: {user_id_for_tracking or 'N/A'}"
+            )
+            return None, force_str(AI_BUSY_MSG)
+        try:
+            content, error_msg = self._request_chat_completion(
+                system_prompt_content,
+                messages_for_api,
+                model,
+                temperature,
+                max_tokens,
+                response_format,
+                user_id_for_tracking,
+            )
+        finally:
+            ai_concurrency_limiter.release()
+        if cache_key and error_msg is None:
+            ai_response_cache.set(cache_key, content, cache_ttl)
+        return content, error_msg
+
+    # --- Load Protection ---
+    def _admission_error(
+        self, user_id_for_tracking: Optional[str], background: bool = False
+    ) -> Optional[str]:
+        """
+        Checks that run before any network call: the per-user rate limit (for
+        requests made on the user's behalf, not background work) and the
+        circuit breaker. Returns a user-facing error if the request must not be
+        sent, so callers go straight to their existing fallbacks.
+        """
+        if (
+            user_id_for_tracking
+            and not background
+            and not ai_user_rate_limiter.try_acquire(user_id_for_tracking)
+        ):
+            logger.warning(f"AI request rate limited. User: {user_id_for_tracking}")
+            return force_str(AI_RATE_LIMITED_MSG)
+        if not ai_circuit_breaker.allow_request():
+            logger.warning(
+                f"AI circuit breaker open; failing fast. User: {user_id_for_tracking or 'N/A'}"
+            )
+            return force_str(AI_UNAVAILABLE_ERROR_MSG)
+        return None
+
+    @staticmethod
+    def _record_api_failure(e: OpenAIError):
+        # Only upstream trouble opens the circuit, not e.g. a malformed request
+        if is_transient_ai_error(e):
+            ai_circuit_breaker.record_failure()
+
+    def _completion_result(
+        self,
+        content: Optional[str],
+        response_format: Optional[Dict[str, str]],
+        user_id_for_tracking: Optional[str],
+    ) -> Tuple[Optional[Union[str, Dict]], Optional[str]]:
+        if not content:
+            logger.warning(
+                f"Received empty AI response. User: {user_id_for_tracking or 'N/A'}"
+            )
+            return None, force_str(AI_SPEECHLESS_MSG)
+
+        if response_format and response_format.get("type") == "json_object":
+            return self._parse_json_content(content, user_id_for_tracking)
+
+        logger.info(f"AI text response received. User: {user_id_for_tracking or 'N/A'}")
+        return content.strip(), None
+
+    def _request_chat_completion(
+        self,
+        system_prompt_content: str,
+        messages_for_api: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]],
+        user_id_for_tracking: Optional[str],
+    ) -> Tuple[Optional[Union[str, Dict]], Optional[str]]:
+        api_kwargs = self._build_api_kwargs(
+            system_prompt_content,
+            messages_for_api,
+            model,
+            temperature,
+            max_tokens,
+            user_id_for_tracking,
+        )
+        api_payload_messages = api_kwargs["messages"]
 
         try:
             # The api_payload_messages should now be safe for json.dumps
@@ -351,65 +570,318 @@ class AIInteractionManager:
             )
 
             completion = self.client.chat.completions.create(**api_kwargs)
-            content = completion.choices[0].message.content
+            ai_circuit_breaker.record_success()
+            return self._completion_result(
+                completion.choices[0].message.content,
+                response_format,
+                user_id_for_tracking,
+            )
 
-            if not content:
+        except OpenAIError as e:
+            logger.error(
+                f"OpenAI API error: {e}. User: {user_id_for_tracking or 'N/A'}",
+                exc_info=True,
+            )
+            self._record_api_failure(e)
+            return None, self._user_facing_api_error(e)
+        except Exception as e:  # This will catch the TypeError if it still occurs
+            logger.exception(
+                f"Unexpected error calling AI: {e}. User: {user_id_for_tracking or 'N/A'}"
+            )
+            return None, force_str(AI_RESPONSE_ERROR_MSG)
+
+    async def aget_chat_completion(
+        self,
+        system_prompt_content: str,
+        messages_for_api: List[Dict[str, str]],
+        model: str = DEFAULT_AI_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        response_format: Optional[Dict[str, str]] = None,
+        user_id_for_tracking: Optional[str] = None,
+        cache_ttl: Optional[int] = None,
+    ) -> Tuple[Optional[Union[str, Dict]], Optional[str]]:
+        """
+        Async variant of get_chat_completion, for ASGI code paths: the request
+        is awaited on the async OpenAI client instead of blocking a worker
+        thread. Transient errors are retried with jittered exponential backoff,
+        and waiting for a free request slot does not hold a thread either.
+
+        Same return contract as get_chat_completion, so callers keep their
+        fallbacks for (None, error_message).
+        """
+        if not self.is_available():
+            return None, self.get_error_message_if_unavailable()
+
+        cache_key = None
+        if cache_ttl:
+            cache_key = ai_response_cache.make_key(
+                system_prompt_content,
+                messages_for_api,
+                model,
+                temperature,
+                max_tokens,
+                response_format,
+            )
+            cached_content = await sync_to_async(ai_response_cache.get)(
+                cache_key, cache_ttl
+            )
+            if cached_content is not None:
+                logger.info(
+                    f"AI response served from cache ({model}). User: {user_id_for_tracking or 'N/A'}"
+                )
+                return cached_content, None
+
+        admission_error = self._admission_error(user_id_for_tracking)
+        if admission_error:
+            return None, admission_error
+        if not await ai_concurrency_limiter.acquire_async():
+            logger.warning(
+                f"No free AI request slot; giving up. User: {user_id_for_tracking or 'N/A'}"
+            )
+            return None, force_str(AI_BUSY_MSG)
+        try:
+            content, error_msg = await self._arequest_chat_completion(
+                system_prompt_content,
+                messages_for_api,
+                model,
+                temperature,
+                max_tokens,
+                response_format,
+                user_id_for_tracking,
+            )
+        finally:
+            ai_concurrency_limiter.release()
+        if cache_key and error_msg is None:
+            await sync_to_async(ai_response_cache.set)(cache_key, content, cache_ttl)
+        return content, error_msg
+
+    async def _acreate_completion(self, api_kwargs: Dict[str, Any], user_label: str):
+        """
+        Awaits chat.completions.create on the async client, retrying transient
+        errors with jittered backoff. Raises the last OpenAIError otherwise.
+        """
+        client = self._get_async_client()
+        for attempt in range(AI_RETRY_ATTEMPTS):
+            try:
+                return await client.chat.completions.create(**api_kwargs)
+            except OpenAIError as e:
+                if not is_transient_ai_error(e) or attempt + 1 >= AI_RETRY_ATTEMPTS:
+                    raise
+                delay = backoff_delay(attempt)
                 logger.warning(
-                    f"Received empty AI response. User: {user_id_for_tracking or 'N/A'}"
+                    f"Transient OpenAI error: {e}. Retry {attempt + 1}/{AI_RETRY_ATTEMPTS - 1} "
+                    f"in {delay:.2f}s. User: {user_label}"
                 )
-                return None, force_str(AI_SPEECHLESS_MSG)
-
-            if response_format and response_format.get("type") == "json_object":
-                try:
-                    if content.strip().startswith("```json"):
-                        content_cleaned = content.strip()[7:]
-                        if content_cleaned.endswith("```"):
-                            content_cleaned = content_cleaned[:-3]
-                        content = content_cleaned.strip()
-                    elif content.strip().startswith("```"):
-                        content_cleaned = content.strip()[3:]
-                        if content_cleaned.endswith("```"):
-                            content_cleaned = content_cleaned[:-3]
-                        content = content_cleaned.strip()
-
-                    parsed_json = json.loads(content)
+                await asyncio.sleep(delay)
+
+    async def _arequest_chat_completion(
+        self,
+        system_prompt_content: str,
+        messages_for_api: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]],
+        user_id_for_tracking: Optional[str],
+    ) -> Tuple[Optional[Union[str, Dict]], Optional[str]]:
+        api_kwargs = self._build_api_kwargs(
+            system_prompt_content,
+            messages_for_api,
+            model,
+            temperature,
+            max_tokens,
+            user_id_for_tracking,
+        )
+        user_label = user_id_for_tracking or "N/A"
+        logger.info(
+            f"Calling OpenAI async ({model}) with {len(api_kwargs['messages'])} messages. "
+            f"User: {user_label}. Response Format: {response_format}."
+        )
+        try:
+            completion = await self._acreate_completion(api_kwargs, user_label)
+        except OpenAIError as e:
+            logger.error(f"OpenAI API error: {e}. User: {user_label}", exc_info=True)
+            self._record_api_failure(e)
+            return None, self._user_facing_api_error(e)
+        except Exception as e:
+            logger.exception(f"Unexpected error calling AI: {e}. User: {user_label}")
+            return None, force_str(AI_RESPONSE_ERROR_MSG)
+
+        ai_circuit_breaker.record_success()
+        return self._completion_result(
+            completion.choices[0].message.content,
+            response_format,
+            user_id_for_tracking,
+        )
+
+    def stream_chat_completion(
+        self,
+        system_prompt_content: str,
+        messages_for_api: List[Dict[str, str]],
+        model: str = DEFAULT_AI_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        response_format: Optional[Dict[str, str]] = None,
+        user_id_for_tracking: Optional[str] = None,
+    ) -> Iterator[str]:
+        """
+        Streaming variant of get_chat_completion: yields the raw response text in
+        chunks as the model produces them. As there, `response_format` only
+        describes the expected output: JSON is not parsed here, callers collect
+        the chunks and use _parse_json_content.
+
+        Time to first token is logged, since that is the latency the user sees.
+
+        Raises:
+            AIStreamError: If the AI is unavailable, rate limited or busy, the call
+                fails (possibly after some chunks were yielded) or the response is
+                empty.
+        """
+        if not self.is_available():
+            raise AIStreamError(self.get_error_message_if_unavailable())
+        admission_error = self._admission_error(user_id_for_tracking)
+        if admission_error:
+            raise AIStreamError(admission_error)
+
+        api_kwargs = self._build_api_kwargs(
+            system_prompt_content,
+            messages_for_api,
+            model,
+            temperature,
+            max_tokens,
+            user_id_for_tracking,
+        )
+        api_kwargs["stream"] = True
+
+        user_label = user_id_for_tracking or "N/A"
+        logger.info(
+            f"Streaming OpenAI ({model}) with {len(api_kwargs['messages'])} messages. "
+            f"User: {user_label}. Response Format: {response_format}."
+        )
+        if not ai_concurrency_limiter.acquire():
+            raise AIStreamError(force_str(AI_BUSY_MSG))
+        started_at = time.monotonic()
+        first_token_ms = None
+        try:
+            for chunk in self.client.chat.completions.create(**api_kwargs):
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if first_token_ms is None:
+                    ai_circuit_breaker.record_success()
+                    first_token_ms = (time.monotonic() - started_at) * 1000
                     logger.info(
-                        f"AI JSON response parsed successfully. User: {user_id_for_tracking or 'N/A'}"
+                        f"AI stream time to first token: {first_token_ms:.0f} ms. User: {user_label}"
                     )
-                    return parsed_json, None
-                except json.JSONDecodeError as e:
-                    logger.error(
-                        f"Failed to parse AI JSON response. Error: {e}. Raw Response: '{content}'. User: {user_id_for_tracking or 'N/A'}",
-                        exc_info=True,
-                    )
-                    return None, force_str(AI_JSON_PARSE_ERROR_MSG)
-
-            logger.info(
-                f"AI text response received. User: {user_id_for_tracking or 'N/A'}"
+                yield delta
+        except OpenAIError as e:
+            logger.error(
+                f"OpenAI API error while streaming: {e}. User: {user_label}",
+                exc_info=True,
             )
-            return content.strip(), None
+            self._record_api_failure(e)
+            raise AIStreamError(self._user_facing_api_error(e)) from e
+        except Exception as e:
+            logger.exception(
+                f"Unexpected error streaming AI response: {e}. User: {user_label}"
+            )
+            raise AIStreamError(force_str(AI_RESPONSE_ERROR_MSG)) from e
+        finally:
+            # Also runs when the consumer stops iterating early (generator closed)
+            ai_concurrency_limiter.release()
+
+        if first_token_ms is None:
+            logger.warning(f"Received empty AI stream. User: {user_label}")
+            raise AIStreamError(force_str(AI_SPEECHLESS_MSG))
+        logger.info(
+            f"AI stream completed in {(time.monotonic() - started_at) * 1000:.0f} ms "
+            f"(first token after {first_token_ms:.0f} ms). User: {user_label}"
+        )
+
+    async def astream_chat_completion(
+        self,
+        system_prompt_content: str,
+        messages_for_api: List[Dict[str, str]],
+        model: str = DEFAULT_AI_MODEL,
+        temperature: float = DEFAULT_TEMPERATURE,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        response_format: Optional[Dict[str, str]] = None,
+        user_id_for_tracking: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Async variant of stream_chat_completion, on the async OpenAI client.
+        Opening the stream is retried like aget_chat_completion; once chunks
+        have been yielded, errors are raised as they are.
 
+        Raises:
+            AIStreamError: As stream_chat_completion.
+        """
+        if not self.is_available():
+            raise AIStreamError(self.get_error_message_if_unavailable())
+        admission_error = self._admission_error(user_id_for_tracking)
+        if admission_error:
+            raise AIStreamError(admission_error)
+
+        api_kwargs = self._build_api_kwargs(
+            system_prompt_content,
+            messages_for_api,
+            model,
+            temperature,
+            max_tokens,
+            user_id_for_tracking,
+        )
+        api_kwargs["stream"] = True
+
+        user_label = user_id_for_tracking or "N/A"
+        logger.info(
+            f"Streaming OpenAI async ({model}) with {len(api_kwargs['messages'])} messages. "
+            f"User: {user_label}. Response Format: {response_format}."
+        )
+        if not await ai_concurrency_limiter.acquire_async():
+            raise AIStreamError(force_str(AI_BUSY_MSG))
+        started_at = time.monotonic()
+        first_token_ms = None
+        try:
+            stream = await self._acreate_completion(api_kwargs, user_label)
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if first_token_ms is None:
+                    ai_circuit_breaker.record_success()
+                    first_token_ms = (time.monotonic() - started_at) * 1000
+                    logger.info(
+                        f"AI stream time to first token: {first_token_ms:.0f} ms. User: {user_label}"
+                    )
+                yield delta
         except OpenAIError as e:
             logger.error(
-                f"OpenAI API error: {e}. User: {user_id_for_tracking or 'N/A'}",
+                f"OpenAI API error while streaming: {e}. User: {user_label}",
                 exc_info=True,
             )
-            user_facing_error = AI_RESPONSE_ERROR_MSG
-            if hasattr(e, "status_code"):
-                if e.status_code == 429:
-                    user_facing_error = _(
-                        "The AI service is currently busy. Please try again in a moment."
-                    )
-                elif e.status_code == 401:
-                    user_facing_error = _(
-                        "There's an issue with AI service authentication. Please contact support."
-                    )
-            return None, force_str(user_facing_error)
-        except Exception as e:  # This will catch the TypeError if it still occurs
+            self._record_api_failure(e)
+            raise AIStreamError(self._user_facing_api_error(e)) from e
+        except Exception as e:
             logger.exception(
-                f"Unexpected error calling AI: {e}. User: {user_id_for_tracking or 'N/A'}"
+                f"Unexpected error streaming AI response: {e}. User: {user_label}"
             )
-            return None, force_str(AI_RESPONSE_ERROR_MSG)
+            raise AIStreamError(force_str(AI_RESPONSE_ERROR_MSG)) from e
+        finally:
+            # Also runs when the consumer stops iterating early (generator closed)
+            ai_concurrency_limiter.release()
+
+        if first_token_ms is None:
+            logger.warning(f"Received empty AI stream. User: {user_label}")
+            raise AIStreamError(force_str(AI_SPEECHLESS_MSG))
+        logger.info(
+            f"AI stream completed in {(time.monotonic() - started_at) * 1000:.0f} ms "
+            f"(first token after {first_token_ms:.0f} ms). User: {user_label}"
+        )
 
 
 _ai_manager_instance = None
@@ -0,0 +1,146 @@
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.encoding import force_str
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Entries kept in the per-process LRU in front of the shared cache
+AI_RESPONSE_CACHE_MAX_ENTRIES = getattr(settings, "AI_RESPONSE_CACHE_MAX_ENTRIES", 512)
+# Temperatures within the same step share cache entries (0.6 and 0.65 -> one bucket)
+AI_RESPONSE_CACHE_TEMPERATURE_STEP = getattr(
+    settings, "AI_RESPONSE_CACHE_TEMPERATURE_STEP", 0.2
+)
+AI_RESPONSE_CACHE_KEY_PREFIX = "ai:response"
+
+
+def _normalize_text(text: Any) -> str:
+    """Collapses whitespace so formatting-only prompt differences share an entry."""
+    return " ".join(force_str(text).split())
+
+
+def temperature_bucket(temperature: float) -> int:
+    return int(round(temperature / AI_RESPONSE_CACHE_TEMPERATURE_STEP))
+
+
+class AIResponseCache:
+    """
+    Cache for AI chat completions that are (close to) deterministic for the
+    same inputs, e.g. emergency tips or performance analyses for identical
+    score profiles.
+
+    Entries are keyed on the normalized prompt, model, temperature bucket and
+    output settings (never on the user), stored in the shared Django cache
+    (Redis in production) with a per-call TTL, and mirrored in a bounded
+    per-process LRU so repeated hits skip the network round trip too.
+
+    Hit/miss counters are per process; see `stats()`.
+    """
+
+    def __init__(self, max_entries: int = AI_RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._counters = {"local_hits": 0, "shared_hits": 0, "misses": 0, "stores": 0}
+
+    @staticmethod
+    def make_key(
+        system_prompt_content: str,
+        messages_for_api: List[Dict[str, str]],
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, str]] = None,
+    ) -> str:
+        payload = {
+            "model": model,
+            "temperature": temperature_bucket(temperature),
+            "max_tokens": max_tokens,
+            "response_format": (response_format or {}).get("type"),
+            "system": _normalize_text(system_prompt_content),
+            "messages": [
+                [msg["role"], _normalize_text(msg["content"])]
+                for msg in messages_for_api
+            ],
+        }
+        digest = hashlib.sha256(
+            json.dumps(payload, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return f"{AI_RESPONSE_CACHE_KEY_PREFIX}:{digest}"
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _remember_locally(self, key: str, value: Any, ttl_seconds: int):
+        with self._lock:
+            self._local[key] = (time.monotonic() + ttl_seconds, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.max_entries:
+                self._local.popitem(last=False)  # Least recently used
+
+    def get(self, key: str, ttl_seconds: int) -> Optional[Any]:
+        """Returns a copy of the cached response, or None on a miss."""
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._local.move_to_end(key)
+                    self._counters["local_hits"] += 1
+                    return copy.deepcopy(value)
+                del self._local[key]
+
+        try:
+            value = cache.get(key)
+        except Exception as e:
+            logger.warning(f"AI response cache lookup failed: {e}")
+            value = None
+        if value is None:
+            self._count("misses")
+            return None
+
+        self._count("shared_hits")
+        # The shared entry may expire sooner; the local copy never outlives one TTL
+        self._remember_locally(key, value, ttl_seconds)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: int):
+        if value is None:
+            return
+        self._remember_locally(key, copy.deepcopy(value), ttl_seconds)
+        try:
+            cache.set(key, value, timeout=ttl_seconds)
+        except Exception as e:
+            logger.warning(f"AI response cache store failed: {e}")
+        self._count("stores")
+
+    def clear_local(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            local_entries = len(self._local)
+        hits = counters["local_hits"] + counters["shared_hits"]
+        lookups = hits + counters["misses"]
+        return {
+            **counters,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "local_entries": local_entries,
+        }
+
+
+# Module-level singleton, shared by all AIInteractionManager calls in this process
+ai_response_cache = AIResponseCache()
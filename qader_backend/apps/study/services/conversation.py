@@ -1,6 +1,9 @@
+import json
 import logging
-from typing import List, Optional, Dict, Any
+import re
+from typing import List, Optional, Dict, Any, AsyncIterator, Iterator, Tuple
 
+from asgiref.sync import sync_to_async
 from django.conf import settings  # Keep for MAX_HISTORY_MESSAGES
 from django.db import transaction
 from django.utils import timezone
@@ -18,9 +21,12 @@ from django.contrib.auth import get_user_model
 # Existing imports for non-AI logic
 from .study import get_filtered_questions, update_user_skill_proficiency
 
+from .conversation_context import build_conversation_context
+
 # New import for our AI manager
 from .ai_manager import (
     get_ai_manager,
+    AIStreamError,
     AI_SPEECHLESS_MSG,
     AI_JSON_PARSE_ERROR_MSG,
 )  # Import specific messages if needed
@@ -32,26 +38,21 @@ logger = logging.getLogger(__name__)
 # --- Core AI Interaction Functions (Refactored) ---
 
 
-def get_ai_response(
+def _build_conversation_request(
     session: ConversationSession,
     user_message_text: str,
     current_topic_question: Optional[Question] = None,
-) -> str:
-    ai_manager = get_ai_manager()
-    if not ai_manager.is_available():
-        return ai_manager.get_error_message_if_unavailable()
-
-    history_objects = list(session.messages.order_by("timestamp").all())
-    formatted_history = ai_manager._format_conversation_history(
-        history_objects
-    )  # Use manager's formatter
+) -> Tuple[str, List[Dict[str, str]]]:
+    """System prompt and messages for a plain conversational reply."""
+    # Running summary + recent messages, bounded however long the session is
+    formatted_history = build_conversation_context(session)
 
     context_message_addon = ""
     if current_topic_question:
         q_text_snippet = current_topic_question.question_text[:400]
         context_message_addon = f'\n\n[AI Context: We are currently discussing Question ID {current_topic_question.id}: "{q_text_snippet}..."]'
 
-    system_prompt = ai_manager._construct_system_prompt(
+    system_prompt = get_ai_manager()._construct_system_prompt(
         ai_tone_value=session.ai_tone, context_key="general_conversation"
     )
 
@@ -59,13 +60,12 @@ def get_ai_response(
         *formatted_history,
         {"role": "user", "content": user_message_text + context_message_addon},
     ]
+    return system_prompt, messages_for_api
 
-    response_content, error_msg = ai_manager.get_chat_completion(
-        system_prompt_content=system_prompt,
-        messages_for_api=messages_for_api,
-        user_id_for_tracking=str(session.user_id),
-    )
 
+def _conversation_reply_text(
+    session: ConversationSession, response_content, error_msg: Optional[str]
+) -> str:
     if error_msg:
         logger.warning(
             f"Error from AI Manager for get_ai_response (Session {session.id}): {error_msg}"
@@ -81,17 +81,56 @@ def get_ai_response(
     return response_content
 
 
-@transaction.atomic
-def generate_ai_question_and_message(
-    session: ConversationSession, user: User
-) -> Dict[str, Any]:
+def get_ai_response(
+    session: ConversationSession,
+    user_message_text: str,
+    current_topic_question: Optional[Question] = None,
+) -> str:
     ai_manager = get_ai_manager()
     if not ai_manager.is_available():
-        # Original code raised ValueError for client unavailability, maintain that for caller.
-        raise ValueError(ai_manager.get_error_message_if_unavailable())
+        return ai_manager.get_error_message_if_unavailable()
+
+    system_prompt, messages_for_api = _build_conversation_request(
+        session, user_message_text, current_topic_question
+    )
+    response_content, error_msg = ai_manager.get_chat_completion(
+        system_prompt_content=system_prompt,
+        messages_for_api=messages_for_api,
+        user_id_for_tracking=str(session.user_id),
+    )
+    return _conversation_reply_text(session, response_content, error_msg)
+
 
-    # 1. Select a Question (Logic remains unchanged)
-    # ... (Copy existing question selection logic here) ...
+async def aget_ai_response(
+    session: ConversationSession,
+    user_message_text: str,
+    current_topic_question: Optional[Question] = None,
+) -> str:
+    """Async variant of get_ai_response, awaiting the AI on the async client."""
+    ai_manager = get_ai_manager()
+    if not ai_manager.is_available():
+        return ai_manager.get_error_message_if_unavailable()
+
+    system_prompt, messages_for_api = await sync_to_async(
+        _build_conversation_request
+    )(session, user_message_text, current_topic_question)
+    response_content, error_msg = await ai_manager.aget_chat_completion(
+        system_prompt_content=system_prompt,
+        messages_for_api=messages_for_api,
+        user_id_for_tracking=str(session.user_id),
+    )
+    return _conversation_reply_text(session, response_content, error_msg)
+
+
+DEFAULT_CHEER_MESSAGE = _("Okay, let's try this practice question:")
+CHEER_TRIGGER_MESSAGE = {
+    "role": "user",
+    "content": "Please generate the preface message now.",
+}
+
+
+def _select_question_for_session(session: ConversationSession, user: User) -> Question:
+    """Picks a question not yet used in the session, preferring not-mastered skills."""
     session_q_ids = set(
         session.messages.filter(related_question__isnull=False).values_list(
             "related_question_id", flat=True
@@ -117,36 +156,64 @@ def generate_ai_question_and_message(
     logger.info(
         f"Selected Q:{selected_question.id} for AI to ask in session {session.id} for user {user.id}."
     )
+    return selected_question
 
-    # 2. Generate AI Cheer Message using AIInteractionManager
+
+def _build_cheer_prompt(
+    session: ConversationSession, selected_question: Question
+) -> str:
     skill_name = (
         selected_question.skill.name if selected_question.skill else "a relevant topic"
     )
-    topic_context = skill_name
-
     context_params_for_cheer = {
-        "topic_context": topic_context,
+        "topic_context": skill_name,
         "question_text_snippet": selected_question.question_text[:400],
         # 'tone' is passed to _construct_system_prompt and available in template
     }
-
-    system_prompt_for_cheer = ai_manager._construct_system_prompt(
+    return get_ai_manager()._construct_system_prompt(
         ai_tone_value=session.ai_tone,
         context_key="generate_cheer_message",
         context_params=context_params_for_cheer,
     )
 
-    ai_cheer_message_text = _(
-        "Okay, let's try this practice question:"
-    )  # Default fallback
+
+def _save_asked_question(
+    session: ConversationSession, selected_question: Question, ai_message_text: str
+) -> ConversationMessage:
+    ai_msg = ConversationMessage.objects.create(
+        session=session,
+        sender_type=ConversationMessage.SenderType.AI,
+        message_text=ai_message_text,
+        related_question=selected_question,
+    )
+    logger.info(
+        f"AI 'ask-question' preface message saved (ID: {ai_msg.id}) for session {session.id}, linking Q:{selected_question.id}"
+    )
+    session.current_topic_question = selected_question
+    session.save(update_fields=["current_topic_question", "updated_at"])
+    return ai_msg
+
+
+@transaction.atomic
+def generate_ai_question_and_message(
+    session: ConversationSession, user: User
+) -> Dict[str, Any]:
+    ai_manager = get_ai_manager()
+    if not ai_manager.is_available():
+        # Original code raised ValueError for client unavailability, maintain that for caller.
+        raise ValueError(ai_manager.get_error_message_if_unavailable())
+
+    # 1. Select a Question
+    selected_question = _select_question_for_session(session, user)
+
+    # 2. Generate AI Cheer Message using AIInteractionManager
+    ai_cheer_message_text = DEFAULT_CHEER_MESSAGE  # Default fallback
 
     # No history needed for this specific generation task
     # The "user" message is a trigger for the task defined in the system prompt.
     response_content, error_msg = ai_manager.get_chat_completion(
-        system_prompt_content=system_prompt_for_cheer,
-        messages_for_api=[
-            {"role": "user", "content": "Please generate the preface message now."}
-        ],
+        system_prompt_content=_build_cheer_prompt(session, selected_question),
+        messages_for_api=[CHEER_TRIGGER_MESSAGE],
         temperature=0.8,
         max_tokens=1000,
         user_id_for_tracking=str(user.id),
@@ -164,19 +231,8 @@ def generate_ai_question_and_message(
             f"Received empty/non-string AI cheer message for session {session.id}, Q:{selected_question.id}. Using fallback."
         )
 
-    # 3. Save AI Message & Update Session (Logic remains unchanged)
-    # ... (Copy existing save logic and session update here) ...
-    ai_msg = ConversationMessage.objects.create(
-        session=session,
-        sender_type=ConversationMessage.SenderType.AI,
-        message_text=ai_cheer_message_text,
-        related_question=selected_question,
-    )
-    logger.info(
-        f"AI 'ask-question' preface message saved (ID: {ai_msg.id}) for session {session.id}, linking Q:{selected_question.id}"
-    )
-    session.current_topic_question = selected_question
-    session.save(update_fields=["current_topic_question", "updated_at"])
+    # 3. Save AI Message & Update Session
+    _save_asked_question(session, selected_question, ai_cheer_message_text)
 
     return {"ai_message": ai_cheer_message_text, "question": selected_question}
 
@@ -256,30 +312,26 @@ def prepare_understanding_test(
     return {"ai_message": ai_message_text, "test_question": test_question}
 
 
-def process_user_message_with_ai(
+def _intent_fallback_response() -> Dict[str, Any]:
+    # Structure for successful processing, values are fallbacks
+    return {
+        "processed_as_answer": False,
+        "user_choice": None,
+        "feedback_text": _(
+            "Sorry, I encountered an issue processing that. Could you try again?"
+        ),
+    }
+
+
+def _build_intent_request(
     session: ConversationSession,
     user_message_text: str,
     current_topic_question: Optional[Question] = None,
-) -> Dict[str, Any]:
+) -> Tuple[str, List[Dict[str, str]]]:
+    """System prompt and messages asking the AI to classify and answer the user message."""
     ai_manager = get_ai_manager()
-    fallback_response_structure = (
-        {  # Structure for successful processing, values are fallbacks
-            "processed_as_answer": False,
-            "user_choice": None,
-            "feedback_text": _(
-                "Sorry, I encountered an issue processing that. Could you try again?"
-            ),
-        }
-    )
-
-    if not ai_manager.is_available():
-        return {
-            **fallback_response_structure,
-            "feedback_text": ai_manager.get_error_message_if_unavailable(),
-        }
-
-    history_objects = list(session.messages.order_by("timestamp").all())
-    formatted_history = ai_manager._format_conversation_history(history_objects)
+    # Running summary + recent messages, bounded however long the session is
+    formatted_history = build_conversation_context(session)
 
     # Prepare context parameters for the "process_user_answer_intent" template
     context_params_for_intent = {"user_message_text": user_message_text}
@@ -341,23 +393,27 @@ Correct Answer Letter: '{correct_letter}']
         },  # The actual user message to be processed
     ]
 
-    parsed_json_response, error_msg = ai_manager.get_chat_completion(
-        system_prompt_content=system_prompt_for_intent,
-        messages_for_api=messages_for_api,
-        temperature=0.8,
-        max_tokens=1000,
-        response_format={"type": "json_object"},
-        user_id_for_tracking=str(session.user_id),
-    )
+    return system_prompt_for_intent, messages_for_api
+
+
+def _check_intent_response(
+    session: ConversationSession,
+    parsed_json_response: Optional[Dict[str, Any]],
+    error_msg: Optional[str],
+    user_message_text: str,
+) -> Tuple[Dict[str, Any], Optional[str]]:
+    """
+    Validates the AI's intent JSON. Returns the result and, when its
+    feedback_text must be replaced by a plain conversational reply, the
+    message to reply to (None otherwise).
+    """
+    fallback_response_structure = _intent_fallback_response()
 
     if error_msg:  # Includes JSON parsing errors from manager
         logger.error(
             f"AI Manager error during intent analysis (Session {session.id}): {error_msg}. Falling back to standard conversation."
         )
-        fallback_text = get_ai_response(
-            session, user_message_text, current_topic_question
-        )  # Call self for standard response
-        return {**fallback_response_structure, "feedback_text": fallback_text}
+        return fallback_response_structure, user_message_text
 
     if not isinstance(
         parsed_json_response, dict
@@ -365,10 +421,7 @@ Correct Answer Letter: '{correct_letter}']
         logger.error(
             f"AI Manager returned non-dict for JSON request (Session {session.id}). Response: {parsed_json_response}. Falling back."
         )
-        fallback_text = get_ai_response(
-            session, user_message_text, current_topic_question
-        )
-        return {**fallback_response_structure, "feedback_text": fallback_text}
+        return fallback_response_structure, user_message_text
 
     # Validate structure and types from parsed_json_response
     try:
@@ -384,6 +437,7 @@ Correct Answer Letter: '{correct_letter}']
         valid_answer_choices = (
             UserQuestionAttempt.AnswerChoice.values
         )  # ['A', 'B', 'C', 'D']
+        fallback_message = None
         if processed_as_answer and (
             user_choice is None or user_choice not in valid_answer_choices
         ):
@@ -393,14 +447,8 @@ Correct Answer Letter: '{correct_letter}']
             # Override AI decision if choice is invalid
             processed_as_answer = False
             user_choice = None
-            # Consider asking AI for a purely conversational response here, or use a generic message.
-            # For now, we use the feedback_text that might be confusing, or generate a new one.
-            # Let's generate a simple conversational one.
-            feedback_text = get_ai_response(
-                session,
-                f"Regarding my previous message: {user_message_text}",
-                current_topic_question,
-            )
+            # The feedback_text might be confusing: ask for a simple conversational one.
+            fallback_message = f"Regarding my previous message: {user_message_text}"
 
         elif not processed_as_answer:
             user_choice = None  # Ensure choice is null if not an answer
@@ -412,16 +460,81 @@ Correct Answer Letter: '{correct_letter}']
             "processed_as_answer": processed_as_answer,
             "user_choice": user_choice,
             "feedback_text": feedback_text,
-        }
+        }, fallback_message
     except (ValueError, KeyError) as validation_err:
         logger.error(
             f"Failed to validate AI JSON structure from AI manager (Session {session.id}). Error: {validation_err}. JSON: {parsed_json_response}",
             exc_info=True,
         )
-        fallback_text = get_ai_response(
-            session, user_message_text, current_topic_question
+        return fallback_response_structure, user_message_text
+
+
+def _interpret_intent_response(
+    session: ConversationSession,
+    parsed_json_response: Optional[Dict[str, Any]],
+    error_msg: Optional[str],
+    user_message_text: str,
+    current_topic_question: Optional[Question] = None,
+) -> Dict[str, Any]:
+    """Validates the AI's intent JSON, falling back to a plain conversational reply."""
+    result, fallback_message = _check_intent_response(
+        session, parsed_json_response, error_msg, user_message_text
+    )
+    if fallback_message is not None:
+        result["feedback_text"] = get_ai_response(
+            session, fallback_message, current_topic_question
         )
-        return {**fallback_response_structure, "feedback_text": fallback_text}
+    return result
+
+
+async def _ainterpret_intent_response(
+    session: ConversationSession,
+    parsed_json_response: Optional[Dict[str, Any]],
+    error_msg: Optional[str],
+    user_message_text: str,
+    current_topic_question: Optional[Question] = None,
+) -> Dict[str, Any]:
+    """Async variant of _interpret_intent_response."""
+    result, fallback_message = _check_intent_response(
+        session, parsed_json_response, error_msg, user_message_text
+    )
+    if fallback_message is not None:
+        result["feedback_text"] = await aget_ai_response(
+            session, fallback_message, current_topic_question
+        )
+    return result
+
+
+def process_user_message_with_ai(
+    session: ConversationSession,
+    user_message_text: str,
+    current_topic_question: Optional[Question] = None,
+) -> Dict[str, Any]:
+    ai_manager = get_ai_manager()
+    if not ai_manager.is_available():
+        return {
+            **_intent_fallback_response(),
+            "feedback_text": ai_manager.get_error_message_if_unavailable(),
+        }
+
+    system_prompt_for_intent, messages_for_api = _build_intent_request(
+        session, user_message_text, current_topic_question
+    )
+    parsed_json_response, error_msg = ai_manager.get_chat_completion(
+        system_prompt_content=system_prompt_for_intent,
+        messages_for_api=messages_for_api,
+        temperature=0.8,
+        max_tokens=1000,
+        response_format={"type": "json_object"},
+        user_id_for_tracking=str(session.user_id),
+    )
+    return _interpret_intent_response(
+        session,
+        parsed_json_response,
+        error_msg,
+        user_message_text,
+        current_topic_question,
+    )
 
 
 def get_ai_feedback_on_answer(
@@ -649,3 +762,248 @@ def record_conversation_test_attempt(
     # award_points_for_conversation_attempt(attempt)
 
     return attempt
+
+
+# --- Streaming Variants ---
+# Used by the conversation endpoints' server-sent events mode. Each yields
+# (event, payload) tuples: ("delta", text) while the AI writes, and a final
+# ("result", ...) with the same structure as the non-streaming function, after
+# everything has been saved. The async ("astream_") variants serve the same
+# events under ASGI, awaiting the AI on the async client instead of holding a
+# worker thread for the whole generation.
+
+_JSON_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+
+
+class _JsonStringFieldStreamer:
+    """
+    Extracts one string field of a JSON object that arrives in chunks, so its
+    value can be forwarded to the user before the object is complete.
+    """
+
+    def __init__(self, field_name: str):
+        self._key_pattern = re.compile(rf'"{re.escape(field_name)}"\s*:\s*"')
+        self._buffer = ""
+        self._position = None  # Next unread character of the value, once found
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        """Adds a chunk and returns the newly decoded part of the value."""
+        self._buffer += chunk
+        if self._done:
+            return ""
+        if self._position is None:
+            match = self._key_pattern.search(self._buffer)
+            if not match:
+                return ""
+            self._position = match.end()
+
+        buffer, i, decoded = self._buffer, self._position, []
+        while i < len(buffer):
+            char = buffer[i]
+            if char == '"':
+                self._done = True
+                break
+            if char != "\\":
+                decoded.append(char)
+                i += 1
+                continue
+            # Escape sequence; wait for more input if it is incomplete
+            if i + 1 >= len(buffer):
+                break
+            if buffer[i + 1] == "u":
+                # Surrogate pairs take two \uXXXX escapes
+                is_high_surrogate = buffer[i + 2 : i + 4].lower() in ("d8", "d9", "da", "db")
+                length = 12 if is_high_surrogate else 6
+                if i + length > len(buffer):
+                    break
+                decoded.append(json.loads(f'"{buffer[i:i + length]}"'))
+                i += length
+                continue
+            decoded.append(_JSON_ESCAPES.get(buffer[i + 1], buffer[i + 1]))
+            i += 2
+        self._position = i
+        return "".join(decoded)
+
+
+def stream_user_message_with_ai(
+    session: ConversationSession,
+    user_message_text: str,
+    current_topic_question: Optional[Question] = None,
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Streaming variant of process_user_message_with_ai: yields the feedback text
+    as the AI writes it, then the interpreted result. The result's
+    feedback_text is authoritative; it replaces the streamed text when the
+    response could not be used and a fallback reply was generated.
+    """
+    ai_manager = get_ai_manager()
+    if not ai_manager.is_available():
+        yield "result", {
+            **_intent_fallback_response(),
+            "feedback_text": ai_manager.get_error_message_if_unavailable(),
+        }
+        return
+
+    system_prompt_for_intent, messages_for_api = _build_intent_request(
+        session, user_message_text, current_topic_question
+    )
+    feedback_streamer = _JsonStringFieldStreamer("feedback_text")
+    content_chunks = []
+    parsed_json_response = None
+    try:
+        for chunk in ai_manager.stream_chat_completion(
+            system_prompt_content=system_prompt_for_intent,
+            messages_for_api=messages_for_api,
+            temperature=0.8,
+            max_tokens=1000,
+            response_format={"type": "json_object"},
+            user_id_for_tracking=str(session.user_id),
+        ):
+            content_chunks.append(chunk)
+            feedback_delta = feedback_streamer.feed(chunk)
+            if feedback_delta:
+                yield "delta", feedback_delta
+    except AIStreamError as e:
+        error_msg = str(e)
+    else:
+        parsed_json_response, error_msg = ai_manager._parse_json_content(
+            "".join(content_chunks), str(session.user_id)
+        )
+
+    yield "result", _interpret_intent_response(
+        session,
+        parsed_json_response,
+        error_msg,
+        user_message_text,
+        current_topic_question,
+    )
+
+
+async def astream_user_message_with_ai(
+    session: ConversationSession,
+    user_message_text: str,
+    current_topic_question: Optional[Question] = None,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Async variant of stream_user_message_with_ai."""
+    ai_manager = get_ai_manager()
+    if not ai_manager.is_available():
+        yield "result", {
+            **_intent_fallback_response(),
+            "feedback_text": ai_manager.get_error_message_if_unavailable(),
+        }
+        return
+
+    system_prompt_for_intent, messages_for_api = await sync_to_async(
+        _build_intent_request
+    )(session, user_message_text, current_topic_question)
+    feedback_streamer = _JsonStringFieldStreamer("feedback_text")
+    content_chunks = []
+    parsed_json_response = None
+    try:
+        async for chunk in ai_manager.astream_chat_completion(
+            system_prompt_content=system_prompt_for_intent,
+            messages_for_api=messages_for_api,
+            temperature=0.8,
+            max_tokens=1000,
+            response_format={"type": "json_object"},
+            user_id_for_tracking=str(session.user_id),
+        ):
+            content_chunks.append(chunk)
+            feedback_delta = feedback_streamer.feed(chunk)
+            if feedback_delta:
+                yield "delta", feedback_delta
+    except AIStreamError as e:
+        error_msg = str(e)
+    else:
+        parsed_json_response, error_msg = ai_manager._parse_json_content(
+            "".join(content_chunks), str(session.user_id)
+        )
+
+    yield "result", await _ainterpret_intent_response(
+        session,
+        parsed_json_response,
+        error_msg,
+        user_message_text,
+        current_topic_question,
+    )
+
+
+def select_ai_question(session: ConversationSession, user: User) -> Question:
+    """
+    First step of the streaming ask-question flow: checks the AI is available
+    and picks the question, raising the same ValueError / ObjectDoesNotExist
+    as generate_ai_question_and_message before anything is streamed.
+    """
+    ai_manager = get_ai_manager()
+    if not ai_manager.is_available():
+        raise ValueError(ai_manager.get_error_message_if_unavailable())
+    return _select_question_for_session(session, user)
+
+
+@transaction.atomic
+def _save_asked_question_atomic(
+    session: ConversationSession, selected_question: Question, ai_message_text: str
+) -> ConversationMessage:
+    return _save_asked_question(session, selected_question, ai_message_text)
+
+
+def stream_ai_question_message(
+    session: ConversationSession, user: User, selected_question: Question
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Streaming variant of generate_ai_question_and_message, for a question
+    picked by select_ai_question: yields the preface message as it is
+    written, then the result once the message is saved.
+    """
+    content_chunks = []
+    try:
+        for chunk in get_ai_manager().stream_chat_completion(
+            system_prompt_content=_build_cheer_prompt(session, selected_question),
+            messages_for_api=[CHEER_TRIGGER_MESSAGE],
+            temperature=0.8,
+            max_tokens=1000,
+            user_id_for_tracking=str(user.id),
+        ):
+            content_chunks.append(chunk)
+            yield "delta", chunk
+        ai_cheer_message_text = "".join(content_chunks).strip()
+    except AIStreamError as e:
+        logger.error(
+            f"AI stream error generating cheer message for session {session.id}, Q:{selected_question.id}: {e}"
+        )
+        ai_cheer_message_text = DEFAULT_CHEER_MESSAGE
+
+    _save_asked_question_atomic(session, selected_question, ai_cheer_message_text)
+    yield "result", {"ai_message": ai_cheer_message_text, "question": selected_question}
+
+
+async def astream_ai_question_message(
+    session: ConversationSession, user: User, selected_question: Question
+) -> AsyncIterator[Tuple[str, Any]]:
+    """Async variant of stream_ai_question_message."""
+    system_prompt = await sync_to_async(_build_cheer_prompt)(
+        session, selected_question
+    )
+    content_chunks = []
+    try:
+        async for chunk in get_ai_manager().astream_chat_completion(
+            system_prompt_content=system_prompt,
+            messages_for_api=[CHEER_TRIGGER_MESSAGE],
+            temperature=0.8,
+            max_tokens=1000,
+            user_id_for_tracking=str(user.id),
+        ):
+            content_chunks.append(chunk)
+            yield "delta", chunk
+        ai_cheer_message_text = "".join(content_chunks).strip()
+    except AIStreamError as e:
+        logger.error(
+            f"AI stream error generating cheer message for session {session.id}, Q:{selected_question.id}: {e}"
+        )
+        ai_cheer_message_text = DEFAULT_CHEER_MESSAGE
+
+    await sync_to_async(_save_asked_question_atomic)(
+        session, selected_question, ai_cheer_message_text
+    )
+    yield "result", {"ai_message": ai_cheer_message_text, "question": selected_question}
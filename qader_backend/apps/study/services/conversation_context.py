@@ -0,0 +1,185 @@
+import logging
+from typing import Dict, List
+
+from django.conf import settings
+from django.db import transaction
+
+from apps.study.models import ConversationMessage, ConversationSession
+
+from .ai_manager import get_ai_manager
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Most recent messages always sent verbatim
+CONVERSATION_CONTEXT_WINDOW_MESSAGES = getattr(
+    settings, "CONVERSATION_CONTEXT_WINDOW_MESSAGES", 10
+)
+# Older messages are folded into the summary once this many have left the window
+CONVERSATION_SUMMARY_BATCH_MESSAGES = getattr(
+    settings, "CONVERSATION_SUMMARY_BATCH_MESSAGES", 10
+)
+# Upper bound on messages read per summary refresh (backlogs beyond it are skipped)
+CONVERSATION_SUMMARY_MAX_FOLD_MESSAGES = getattr(
+    settings, "CONVERSATION_SUMMARY_MAX_FOLD_MESSAGES", 40
+)
+CONVERSATION_SUMMARY_MAX_WORDS = getattr(settings, "CONVERSATION_SUMMARY_MAX_WORDS", 250)
+
+# Prompt messages = summary + at most this many unsummarized messages
+MAX_UNSUMMARIZED_CONTEXT_MESSAGES = (
+    CONVERSATION_CONTEXT_WINDOW_MESSAGES + CONVERSATION_SUMMARY_BATCH_MESSAGES
+)
+
+
+def _unsummarized_messages(session: ConversationSession):
+    messages = session.messages.all()
+    if session.context_summary_message_id is not None:
+        messages = messages.filter(id__gt=session.context_summary_message_id)
+    return messages
+
+
+def build_conversation_context(session: ConversationSession) -> List[Dict[str, str]]:
+    """
+    Conversation history for the AI prompt: the running summary of older turns
+    (if any) followed by the messages not folded into it yet, oldest first.
+
+    Reads at most MAX_UNSUMMARIZED_CONTEXT_MESSAGES rows, however long the
+    session is.
+    """
+    recent_messages = list(
+        _unsummarized_messages(session).order_by("-id")[
+            :MAX_UNSUMMARIZED_CONTEXT_MESSAGES
+        ]
+    )
+    recent_messages.reverse()
+    # Not _format_conversation_history: it keeps only the last
+    # MAX_HISTORY_MESSAGES_FOR_AI_CONTEXT messages, which would drop turns that
+    # are neither in the window nor in the summary yet.
+    context = [
+        {
+            "role": (
+                "user"
+                if message.sender_type == ConversationMessage.SenderType.USER
+                else "assistant"
+            ),
+            "content": message.message_text,
+        }
+        for message in recent_messages
+    ]
+    if session.context_summary:
+        context.insert(
+            0,
+            {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{session.context_summary}",
+            },
+        )
+    return context
+
+
+def summary_refresh_due(session: ConversationSession) -> bool:
+    """True once a full batch of unsummarized messages has left the window."""
+    threshold = MAX_UNSUMMARIZED_CONTEXT_MESSAGES
+    messages = _unsummarized_messages(session).order_by("-id")
+    return messages[threshold - 1 : threshold].exists()
+
+
+def schedule_summary_refresh(session: ConversationSession):
+    """Queues a summary refresh after the current transaction commits, if one is due."""
+    if not summary_refresh_due(session):
+        return
+    session_id = session.id
+    transaction.on_commit(lambda: _dispatch_summary_refresh(session_id))
+
+
+def _dispatch_summary_refresh(session_id: int):
+    from apps.study.tasks import refresh_conversation_summary_task
+
+    try:
+        refresh_conversation_summary_task.delay(session_id)
+    except Exception as e:
+        # Not critical: the next message retries, and the context stays bounded meanwhile
+        logger.error(
+            f"Could not queue conversation summary refresh for session {session_id}: {e}"
+        )
+
+
+def _format_transcript(messages: List[ConversationMessage]) -> str:
+    lines = []
+    for message in messages:
+        speaker = (
+            "Student"
+            if message.sender_type == ConversationMessage.SenderType.USER
+            else "Qader AI"
+        )
+        question_ref = (
+            f" [Question ID {message.related_question_id}]"
+            if message.related_question_id
+            else ""
+        )
+        lines.append(f"{speaker}{question_ref}: {message.message_text}")
+    return "\n".join(lines)
+
+
+def refresh_conversation_summary(session_id: int) -> bool:
+    """
+    Folds the unsummarized messages that left the context window into the
+    session's running summary. Only messages newer than the previous summary are
+    read, so the cost per refresh does not grow with the session.
+
+    Returns True if the summary was updated.
+    """
+    session = ConversationSession.objects.filter(pk=session_id).first()
+    if session is None or not summary_refresh_due(session):
+        return False
+
+    # Everything older than the window, newest first, capped
+    to_fold = list(
+        _unsummarized_messages(session).order_by("-id")[
+            CONVERSATION_CONTEXT_WINDOW_MESSAGES : CONVERSATION_CONTEXT_WINDOW_MESSAGES
+            + CONVERSATION_SUMMARY_MAX_FOLD_MESSAGES
+        ]
+    )
+    to_fold.reverse()
+    if not to_fold:
+        return False
+
+    ai_manager = get_ai_manager()
+    if not ai_manager.is_available():
+        logger.warning(
+            f"AI unavailable; conversation summary for session {session_id} not refreshed."
+        )
+        return False
+
+    system_prompt = ai_manager._construct_system_prompt(
+        ai_tone_value=session.ai_tone,
+        context_key="summarize_conversation",
+        context_params={
+            "existing_summary": session.context_summary or "(none)",
+            "max_words": CONVERSATION_SUMMARY_MAX_WORDS,
+        },
+    )
+    summary, error_msg = ai_manager.get_chat_completion(
+        system_prompt_content=system_prompt,
+        messages_for_api=[{"role": "user", "content": _format_transcript(to_fold)}],
+        temperature=0.3,
+        max_tokens=800,
+        user_id_for_tracking=str(session.user_id),
+        background=True,
+    )
+    if error_msg or not summary or not isinstance(summary, str):
+        logger.error(
+            f"Failed to refresh conversation summary for session {session_id}: {error_msg or 'empty response'}"
+        )
+        return False
+
+    # Only store if no concurrent refresh moved the watermark meanwhile
+    updated = ConversationSession.objects.filter(
+        pk=session_id, context_summary_message_id=session.context_summary_message_id
+    ).update(context_summary=summary, context_summary_message_id=to_fold[-1].id)
+    if updated:
+        logger.info(
+            f"Folded {len(to_fold)} messages into the context summary of session {session_id} "
+            f"(through message {to_fold[-1].id})."
+        )
+    return bool(updated)
@@ -0,0 +1,103 @@
+import heapq
+import logging
+import random
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from apps.learning.services import question_pool_index
+from apps.study.models import UserSkillProficiency
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+DEFAULT_PROFICIENCY_THRESHOLD = getattr(settings, "DEFAULT_PROFICIENCY_THRESHOLD", 0.7)
+# Weight of a skill the user has never attempted (same as a score of 0.0).
+UNATTEMPTED_SKILL_WEAKNESS = getattr(settings, "UNATTEMPTED_SKILL_WEAKNESS", 1.0)
+# Floor so that skills just under the threshold still get drawn occasionally.
+MIN_SKILL_WEAKNESS = getattr(settings, "MIN_SKILL_WEAKNESS", 0.05)
+
+
+class ProficiencyVector:
+    """
+    A user's skill proficiency scores keyed by skill ID, loaded with one query.
+    Used to pick weak skills and to weight question sampling towards them.
+    """
+
+    def __init__(self, scores: Optional[Dict[int, float]] = None):
+        self.scores: Dict[int, float] = scores or {}
+
+    @classmethod
+    def for_user(cls, user: User) -> "ProficiencyVector":
+        if not user or not user.is_authenticated:
+            return cls()
+        return cls(
+            dict(
+                UserSkillProficiency.objects.filter(user=user).values_list(
+                    "skill_id", "proficiency_score"
+                )
+            )
+        )
+
+    @property
+    def attempted_skill_ids(self) -> Set[int]:
+        return set(self.scores)
+
+    def weak_skill_ids(
+        self, threshold: float = DEFAULT_PROFICIENCY_THRESHOLD
+    ) -> Set[int]:
+        """Attempted skills scoring below the threshold."""
+        return {
+            skill_id for skill_id, score in self.scores.items() if score < threshold
+        }
+
+    def not_mastered_skill_ids(
+        self,
+        candidate_skill_ids: Iterable[int],
+        threshold: float = DEFAULT_PROFICIENCY_THRESHOLD,
+    ) -> Set[int]:
+        """Weak skills plus any candidate skill the user has not attempted yet."""
+        return self.weak_skill_ids(threshold) | (
+            set(candidate_skill_ids) - self.attempted_skill_ids
+        )
+
+    def weakness(self, skill_id: Optional[int]) -> float:
+        """Sampling weight for a skill: 1 - score, floored at MIN_SKILL_WEAKNESS."""
+        if skill_id is None:
+            return MIN_SKILL_WEAKNESS
+        score = self.scores.get(skill_id)
+        if score is None:
+            return UNATTEMPTED_SKILL_WEAKNESS
+        return max(MIN_SKILL_WEAKNESS, 1.0 - score)
+
+
+def weighted_sample(
+    population: Iterable[int], k: int, weight: Callable[[int], float]
+) -> List[int]:
+    """
+    Draws up to k distinct items, each with probability proportional to its weight
+    (Efraimidis-Spirakis keys: u ** (1 / w), keep the k largest). O(n log k).
+    The result is in random order.
+    """
+    if k <= 0:
+        return []
+    keyed = []
+    for item in population:
+        w = weight(item)
+        if w > 0:
+            keyed.append((random.random() ** (1.0 / w), item))
+    return [item for _, item in heapq.nlargest(k, keyed)]
+
+
+def sample_questions_by_weakness(
+    question_ids: Iterable[int], k: int, proficiency: ProficiencyVector
+) -> List[int]:
+    """Samples question IDs weighted by the weakness of each question's skill."""
+    skill_by_question = question_pool_index.ensure_fresh().skill_id_by_question
+    return weighted_sample(
+        question_ids,
+        k,
+        lambda qid: proficiency.weakness(skill_by_question.get(qid)),
+    )
@@ -0,0 +1,273 @@
+import logging
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.learning.models import Question
+from apps.study.models import (
+    UserQuestionAttempt,
+    UserStatisticsSnapshot,
+    UserTestAttempt,
+)
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+RECENT_TESTS_LIMIT = 10
+# Safety net for changes that bypass the incremental hooks (queryset updates, admin edits)
+USER_STATISTICS_SNAPSHOT_MAX_AGE = timedelta(
+    hours=getattr(settings, "USER_STATISTICS_SNAPSHOT_MAX_AGE_HOURS", 24)
+)
+
+# (is_correct, time_taken_seconds) of a question attempt, or None if it did not exist
+AnswerState = Optional[Tuple[Optional[bool], Optional[int]]]
+
+
+# --- Counter Helpers ---
+def _empty_counters() -> Dict[str, Any]:
+    return {
+        "questions_answered": 0,
+        "tests_completed": 0,
+        # {subsection_id (str): {"attempts": n, "correct": n}}
+        "subsections": {},
+        "question_time": {
+            key: {"total_seconds": 0, "count": 0}
+            for key in ("all", "correct", "incorrect")
+        },
+        # {attempt_type: {...sums and counts...}}
+        "tests_by_type": {},
+        # Most recent completed tests first, at most RECENT_TESTS_LIMIT
+        "recent_tests": [],
+    }
+
+
+def _empty_test_type_counters() -> Dict[str, Any]:
+    return {
+        "scored_count": 0,
+        "score_sum": 0.0,
+        "verbal_sum": 0.0,
+        "verbal_count": 0,
+        "quantitative_sum": 0.0,
+        "quantitative_count": 0,
+        "duration_seconds_sum": 0.0,
+        "duration_count": 0,
+    }
+
+
+def _add_answer(
+    counters: Dict[str, Any],
+    subsection_id: Optional[int],
+    is_correct: Optional[bool],
+    time_taken_seconds: Optional[int],
+    sign: int,
+):
+    counters["questions_answered"] += sign
+    if subsection_id is not None:
+        subsection = counters["subsections"].setdefault(
+            str(subsection_id), {"attempts": 0, "correct": 0}
+        )
+        subsection["attempts"] += sign
+        subsection["correct"] += sign * int(bool(is_correct))
+    if time_taken_seconds is not None:
+        buckets = [counters["question_time"]["all"]]
+        if is_correct is not None:
+            buckets.append(
+                counters["question_time"]["correct" if is_correct else "incorrect"]
+            )
+        for bucket in buckets:
+            bucket["total_seconds"] += sign * time_taken_seconds
+            bucket["count"] += sign
+
+
+def _test_entry(test_attempt: UserTestAttempt) -> Dict[str, Any]:
+    return {
+        "id": test_attempt.id,
+        "attempt_type": test_attempt.attempt_type,
+        "end_time": test_attempt.end_time.isoformat(),
+        "score_percentage": test_attempt.score_percentage,
+        "score_verbal": test_attempt.score_verbal,
+        "score_quantitative": test_attempt.score_quantitative,
+        "num_questions": test_attempt.num_questions,
+    }
+
+
+def _add_completed_test(counters: Dict[str, Any], test_attempt: UserTestAttempt):
+    counters["tests_completed"] += 1
+    type_counters = counters["tests_by_type"].setdefault(
+        test_attempt.attempt_type, _empty_test_type_counters()
+    )
+    if test_attempt.score_percentage is not None:
+        type_counters["scored_count"] += 1
+        type_counters["score_sum"] += test_attempt.score_percentage
+        if test_attempt.score_verbal is not None:
+            type_counters["verbal_sum"] += test_attempt.score_verbal
+            type_counters["verbal_count"] += 1
+        if test_attempt.score_quantitative is not None:
+            type_counters["quantitative_sum"] += test_attempt.score_quantitative
+            type_counters["quantitative_count"] += 1
+    if test_attempt.start_time and test_attempt.end_time:
+        type_counters["duration_seconds_sum"] += (
+            test_attempt.end_time - test_attempt.start_time
+        ).total_seconds()
+        type_counters["duration_count"] += 1
+
+    if test_attempt.end_time is None:
+        return
+    entry = _test_entry(test_attempt)
+    # ISO strings of UTC datetimes sort chronologically
+    counters["recent_tests"] = sorted(
+        [entry, *counters["recent_tests"]],
+        key=lambda e: e["end_time"],
+        reverse=True,
+    )[:RECENT_TESTS_LIMIT]
+
+
+def _count_statistics_from_history(user_id: int) -> Dict[str, Any]:
+    """Builds the counters from raw attempts (the rebuild path)."""
+    counters = _empty_counters()
+    question_attempts = UserQuestionAttempt.objects.filter(user_id=user_id)
+    counters["questions_answered"] = question_attempts.count()
+
+    for row in question_attempts.values("question__subsection_id").annotate(
+        attempts=Count("id"), correct=Count("id", filter=Q(is_correct=True))
+    ):
+        counters["subsections"][str(row["question__subsection_id"])] = {
+            "attempts": row["attempts"],
+            "correct": row["correct"],
+        }
+
+    timed = question_attempts.filter(time_taken_seconds__isnull=False)
+    totals = timed.aggregate(total=Sum("time_taken_seconds"), count=Count("id"))
+    counters["question_time"]["all"] = {
+        "total_seconds": totals["total"] or 0,
+        "count": totals["count"],
+    }
+    for row in (
+        timed.filter(is_correct__isnull=False)
+        .values("is_correct")
+        .annotate(total=Sum("time_taken_seconds"), count=Count("id"))
+    ):
+        counters["question_time"]["correct" if row["is_correct"] else "incorrect"] = {
+            "total_seconds": row["total"] or 0,
+            "count": row["count"],
+        }
+
+    completed_tests = (
+        UserTestAttempt.objects.filter(
+            user_id=user_id, status=UserTestAttempt.Status.COMPLETED
+        )
+        .only(
+            "id",
+            "attempt_type",
+            "start_time",
+            "end_time",
+            "score_percentage",
+            "score_verbal",
+            "score_quantitative",
+            "question_ids",
+        )
+        .order_by("end_time", "id")
+    )
+    for test_attempt in completed_tests.iterator():
+        _add_completed_test(counters, test_attempt)
+    return counters
+
+
+# --- Snapshot Maintenance ---
+def rebuild_user_statistics_snapshot(user_id: int) -> UserStatisticsSnapshot:
+    """Recomputes the user's snapshot from raw attempts and stores it."""
+    with transaction.atomic():
+        snapshot, _created = UserStatisticsSnapshot.objects.select_for_update().get_or_create(
+            user_id=user_id
+        )
+        snapshot.data = _count_statistics_from_history(user_id)
+        snapshot.is_stale = False
+        snapshot.rebuilt_at = timezone.now()
+        snapshot.save()
+    logger.info(f"Rebuilt statistics snapshot for user {user_id}.")
+    return snapshot
+
+
+def get_user_statistics_snapshot(user_id: int) -> UserStatisticsSnapshot:
+    """
+    Returns the user's statistics snapshot, rebuilding it first if it does not
+    exist yet, was marked stale, or is older than USER_STATISTICS_SNAPSHOT_MAX_AGE.
+    """
+    snapshot = UserStatisticsSnapshot.objects.filter(user_id=user_id).first()
+    if (
+        snapshot is None
+        or snapshot.is_stale
+        or snapshot.rebuilt_at < timezone.now() - USER_STATISTICS_SNAPSHOT_MAX_AGE
+    ):
+        snapshot = rebuild_user_statistics_snapshot(user_id)
+    return snapshot
+
+
+def mark_user_statistics_stale(user_id: int):
+    """Forces a rebuild on the next read, for changes that cannot be applied incrementally."""
+    UserStatisticsSnapshot.objects.filter(user_id=user_id).update(is_stale=True)
+
+
+def _update_snapshot(user_id: int, mutate: Callable[[Dict[str, Any]], None]):
+    """
+    Applies `mutate` to the user's counters under a row lock. Users without a
+    snapshot are skipped: it is built from raw attempts on first read.
+    Errors mark the snapshot stale instead of propagating to the caller.
+    """
+    try:
+        with transaction.atomic():
+            snapshot = (
+                UserStatisticsSnapshot.objects.select_for_update()
+                .filter(user_id=user_id, is_stale=False)
+                .first()
+            )
+            if snapshot is None:
+                return
+            mutate(snapshot.data)
+            snapshot.save(update_fields=["data", "updated_at"])
+    except Exception as e:
+        logger.exception(
+            f"Error updating statistics snapshot for user {user_id}; marking it stale: {e}"
+        )
+        mark_user_statistics_stale(user_id)
+
+
+def record_question_attempt_statistics(
+    user_id: int, changes: Iterable[Tuple[int, AnswerState, AnswerState]]
+):
+    """
+    Applies answer changes to the user's snapshot.
+
+    Args:
+        changes: (question_id, before, after) per question attempt, where before/after
+                 are (is_correct, time_taken_seconds), or None for a created/deleted attempt.
+    """
+    changes = [change for change in changes if change[1] != change[2]]
+    if not changes:
+        return
+
+    def mutate(counters):
+        subsection_by_question = dict(
+            Question.objects.filter(
+                pk__in={question_id for question_id, _b, _a in changes}
+            ).values_list("id", "subsection_id")
+        )
+        for question_id, before, after in changes:
+            subsection_id = subsection_by_question.get(question_id)
+            if before is not None:
+                _add_answer(counters, subsection_id, *before, sign=-1)
+            if after is not None:
+                _add_answer(counters, subsection_id, *after, sign=1)
+
+    _update_snapshot(user_id, mutate)
+
+
+def record_test_completion_statistics(test_attempt: UserTestAttempt):
+    """Adds a newly completed test attempt to the user's snapshot."""
+    _update_snapshot(
+        test_attempt.user_id, lambda counters: _add_completed_test(counters, test_attempt)
+    )
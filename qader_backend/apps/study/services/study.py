@@ -35,6 +35,7 @@ from rest_framework import (
 )  # Use DRF's validation error for API context
 from rest_framework.exceptions import PermissionDenied, APIException
 
+from apps.learning.services import question_pool_index
 from apps.learning.models import (
     LearningSubSection,
     Question,
@@ -55,21 +56,20 @@ from django.contrib.auth import get_user_model
 from apps.api.exceptions import UsageLimitExceeded
 from apps.users.services import UsageLimiter
 from apps.study.services.ai_manager import get_ai_manager
+from apps.study.services import statistics as statistics_services
+from apps.study.services import weakness as weakness_services
+from apps.study.services.sampling import (
+    DEFAULT_PROFICIENCY_THRESHOLD,
+    ProficiencyVector,
+    sample_questions_by_weakness,
+)
 from apps.gamification import services as gamification_services
-from apps.gamification.models import Badge
-from django.db.models.signals import post_save
-from apps.gamification.signals import (
-    gamify_on_test_completed as gamify_test_completed_signal_handler,
-)  # Specific import
-from apps.gamification.services import (
-    process_test_completion_gamification,
-)  # New import
+from apps.gamification.models import Badge, GamificationEvent, PointReason
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
 # --- Constants ---
-DEFAULT_PROFICIENCY_THRESHOLD = getattr(settings, "DEFAULT_PROFICIENCY_THRESHOLD", 0.7)
 EMERGENCY_MODE_DEFAULT_QUESTIONS = getattr(
     settings, "EMERGENCY_MODE_DEFAULT_QUESTIONS", 15
 )
@@ -94,6 +94,16 @@ AI_ANALYSIS_HIGH_SCORE_THRESHOLD = getattr(
     settings, "AI_ANALYSIS_HIGH_SCORE_THRESHOLD", 85
 )
 AI_ANALYSIS_MAX_ANSWER_DETAILS = getattr(settings, "AI_ANALYSIS_MAX_ANSWER_DETAILS", 10)
+# Seconds an identical analysis/tips prompt reuses the previous AI response (0 disables)
+AI_ANALYSIS_CACHE_TTL = getattr(settings, "AI_ANALYSIS_CACHE_TTL", 24 * 60 * 60)
+AI_EMERGENCY_TIPS_CACHE_TTL = getattr(
+    settings, "AI_EMERGENCY_TIPS_CACHE_TTL", 6 * 60 * 60
+)
+# When True, answers inside a test attempt do not touch UserSkillProficiency;
+# the attempt's aggregated per-skill deltas are flushed once when it ends.
+SKILL_PROFICIENCY_BUFFERED_UPDATES = getattr(
+    settings, "SKILL_PROFICIENCY_BUFFERED_UPDATES", False
+)
 
 
 # --- Question Filtering Logic ---
@@ -130,22 +140,15 @@ def get_filtered_questions(
     if limit <= 0:
         return Question.objects.none()
 
-    # Use the custom manager to annotate every question with user-specific data.
-    # We pass the user object, which can be an authenticated user or anonymous.
-    queryset = Question.objects.with_user_annotations(user=user).filter(is_active=True)
-
-    filters = Q()
-    exclude_ids_set = (
-        set(int(id) for id in exclude_ids if isinstance(id, int))
-        if exclude_ids
-        else set()
+    # Candidate IDs come from the in-memory question pool index (active
+    # questions only), so no table scan is needed to build the sampling pool.
+    candidate_ids = question_pool_index.candidate_ids(
+        subsection_slugs=subsections or None,
+        skill_slugs=skills or None,
     )
 
-    # Apply filters based on arguments
-    if subsections:
-        filters &= Q(subsection__slug__in=subsections)
-    if skills:
-        filters &= Q(skill__slug__in=skills)
+    # Set when 'not_mastered' applies; switches sampling to weakness-weighted.
+    proficiency: Optional[ProficiencyVector] = None
 
     if starred:
         if not user or not user.is_authenticated:
@@ -154,7 +157,11 @@ def get_filtered_questions(
             )
             return Question.objects.none()
 
-        filters &= Q(user_has_starred=True)
+        candidate_ids &= set(
+            UserStarredQuestion.objects.filter(user=user).values_list(
+                "question_id", flat=True
+            )
+        )
 
     if not_mastered:
         if not user or not user.is_authenticated:
@@ -163,26 +170,18 @@ def get_filtered_questions(
             )
         else:
             try:
-                # (your existing try/except block for not_mastered)
-                low_prof_skill_ids = set(
-                    UserSkillProficiency.objects.filter(
-                        user=user, proficiency_score__lt=proficiency_threshold
-                    ).values_list("skill_id", flat=True)
+                proficiency = ProficiencyVector.for_user(user)
+                not_mastered_skill_ids = proficiency.not_mastered_skill_ids(
+                    question_pool_index.skill_ids(), proficiency_threshold
                 )
-                # All skills user has ever attempted (has a proficiency record for)
-                attempted_skill_ids = set(
-                    UserSkillProficiency.objects.filter(user=user).values_list(
-                        "skill_id", flat=True
-                    )
-                )
-                not_mastered_filter = Q(skill_id__in=low_prof_skill_ids) | (
-                    Q(skill__isnull=False) & ~Q(skill_id__in=attempted_skill_ids)
+                candidate_ids &= question_pool_index.candidate_ids(
+                    skill_ids=not_mastered_skill_ids
                 )
-                filters &= not_mastered_filter
                 logger.info(
-                    f"Applied 'not_mastered' filter for user {user.id}. Low prof skills: {len(low_prof_skill_ids)}, Attempted skills: {len(attempted_skill_ids)}"
+                    f"Applied 'not_mastered' filter for user {user.id}. Not mastered skills: {len(not_mastered_skill_ids)}, Attempted skills: {len(proficiency.attempted_skill_ids)}"
                 )
             except Exception as e:
+                proficiency = None
                 logger.error(
                     f"get_filtered_questions: Error applying 'not_mastered' filter for user {user.id}: {e}",
                     exc_info=True,
@@ -191,16 +190,14 @@ def get_filtered_questions(
                     f"Could not apply 'not_mastered' filter for user {user.id} due to error. Proceeding without it."
                 )
 
-    # Apply collected filters
-    if filters:
-        queryset = queryset.filter(filters)
-
     # Apply exclusions AFTER main filters
-    if exclude_ids_set:
-        queryset = queryset.exclude(id__in=exclude_ids_set)
+    if exclude_ids:
+        candidate_ids.difference_update(
+            int(qid) for qid in exclude_ids if isinstance(qid, int)
+        )
 
     if min_required > 0:
-        pool_count = queryset.count()
+        pool_count = len(candidate_ids)
         if pool_count < min_required:
             logger.warning(
                 f"Insufficient questions ({pool_count}) found matching criteria for user {user.id}. Minimum required: {min_required}."
@@ -213,8 +210,8 @@ def get_filtered_questions(
             )
 
     # --- Random Sampling Technique ---
-    # 1. Get all potential IDs matching the criteria
-    all_matching_ids = list(queryset.values_list("id", flat=True))
+    # 1. The candidate pool is already materialized in memory
+    all_matching_ids = list(candidate_ids)
     count = len(all_matching_ids)
     if count == 0:
         logger.debug(
@@ -225,7 +222,13 @@ def get_filtered_questions(
     # 2. Determine how many to fetch and sample randomly
     num_to_fetch = min(limit, count)
     try:
-        random_ids = random.sample(all_matching_ids, num_to_fetch)
+        if proficiency is not None:
+            # Weak skills are drawn more often than nearly-mastered ones
+            random_ids = sample_questions_by_weakness(
+                all_matching_ids, num_to_fetch, proficiency
+            )
+        else:
+            random_ids = random.sample(all_matching_ids, num_to_fetch)
     except ValueError as e:
         # Should only happen if logic above is flawed (e.g., num_to_fetch > count)
         logger.error(
@@ -244,7 +247,7 @@ def get_filtered_questions(
     # the final objects have the `user_has_starred` attribute.
     final_queryset = (
         Question.objects.with_user_annotations(user=user)
-        .filter(id__in=random_ids)
+        .filter(id__in=random_ids, is_active=True)
         .select_related("subsection", "subsection__section", "skill")
         .order_by(preserved_order)
     )
@@ -287,28 +290,13 @@ def update_user_skill_proficiency(user: User, skill: Optional[Skill], is_correct
         return
 
     try:
-        # Use get_or_create for atomicity and simplicity
-        proficiency, created = UserSkillProficiency.objects.get_or_create(
-            user=user,
-            skill=skill,
-            defaults={
-                "proficiency_score": 0.0,
-                "attempts_count": 0,
-                "correct_count": 0,
-            },
+        # Single upsert: insert the row if missing, then one F()-expression UPDATE
+        UserSkillProficiency.add_attempt_deltas(
+            user.id, {skill.id: {"attempts": 1, "correct": int(is_correct)}}
+        )
+        logger.info(
+            f"Updated skill proficiency for user {user.id}, skill '{skill.name}' (ID: {skill.id}). Correct: {is_correct}"
         )
-        # Call the model method to handle the update logic
-        proficiency.record_attempt(
-            is_correct=is_correct
-        )  # Assumes this method saves itself
-        if created:
-            logger.info(
-                f"Created skill proficiency record for user {user.id}, skill '{skill.name}' (ID: {skill.id}). Score after first attempt: {proficiency.proficiency_score:.2f}"
-            )
-        else:
-            logger.info(
-                f"Updated skill proficiency for user {user.id}, skill '{skill.name}' (ID: {skill.id}). New score: {proficiency.proficiency_score:.2f}, Attempts: {proficiency.attempts_count}"
-            )
 
     except Exception as e:
         # Log error but don't interrupt the main process
@@ -318,7 +306,115 @@ def update_user_skill_proficiency(user: User, skill: Optional[Skill], is_correct
         )
 
 
+def apply_skill_proficiency_deltas(user: User, deltas: Dict[int, Dict[str, int]]):
+    """
+    Applies aggregated attempt/correct counts to several UserSkillProficiency rows
+    at once (see `UserSkillProficiency.add_attempt_deltas`).
+
+    Args:
+        user: The user whose proficiencies are being updated.
+        deltas: {skill_id: {"attempts": int, "correct": int}}. Skills with zero
+                attempts are ignored.
+    """
+    deltas = {
+        skill_id: delta
+        for skill_id, delta in deltas.items()
+        if skill_id is not None and delta.get("attempts", 0) > 0
+    }
+    if not deltas:
+        return
+    if not user or not user.is_authenticated:
+        logger.warning(
+            "Bulk proficiency update skipped: Invalid or anonymous user provided."
+        )
+        return
+
+    updated = UserSkillProficiency.add_attempt_deltas(user.id, deltas)
+    logger.info(
+        f"Applied bulk proficiency deltas for user {user.id}: {updated} skill(s) updated."
+    )
+
+
+def flush_test_attempt_proficiency(test_attempt: UserTestAttempt) -> int:
+    """
+    Buffered proficiency mode: applies the aggregated per-skill deltas of a test
+    attempt's final answers in one upsert. Called when the attempt ends; answers
+    changed during the attempt therefore count once, with their final correctness.
+    Returns the number of proficiency rows updated.
+    """
+    rows = (
+        test_attempt.question_attempts.filter(
+            question__skill_id__isnull=False, is_correct__isnull=False
+        )
+        .values("question__skill_id")
+        .annotate(
+            attempts=Count("id"), correct=Count("id", filter=Q(is_correct=True))
+        )
+    )
+    deltas = {
+        row["question__skill_id"]: {
+            "attempts": row["attempts"],
+            "correct": row["correct"],
+        }
+        for row in rows
+    }
+    if not deltas:
+        return 0
+    updated = UserSkillProficiency.add_attempt_deltas(test_attempt.user_id, deltas)
+    logger.info(
+        f"Flushed buffered proficiency deltas for TestAttempt:{test_attempt.id} (user {test_attempt.user_id}): {updated} skill(s) updated."
+    )
+    return updated
+
+
 # --- Test Attempt Answer Handling ---
+# Maps the type of test attempt to the UserQuestionAttempt.Mode recorded for its answers
+QUESTION_ATTEMPT_MODE_MAP = {
+    UserTestAttempt.AttemptType.LEVEL_ASSESSMENT: UserQuestionAttempt.Mode.LEVEL_ASSESSMENT,
+    UserTestAttempt.AttemptType.PRACTICE: UserQuestionAttempt.Mode.TEST,
+    UserTestAttempt.AttemptType.SIMULATION: UserQuestionAttempt.Mode.TEST,
+    UserTestAttempt.AttemptType.TRADITIONAL: UserQuestionAttempt.Mode.TRADITIONAL,
+    # Add mappings for any future test types
+}
+
+
+def _get_question_attempt_mode(test_attempt: UserTestAttempt) -> str:
+    """Determines the UserQuestionAttempt.Mode based on the type of test attempt."""
+    mode = QUESTION_ATTEMPT_MODE_MAP.get(test_attempt.attempt_type)
+    if not mode:
+        # This indicates a configuration mismatch
+        logger.error(
+            f"Cannot map UserTestAttempt type '{test_attempt.attempt_type}' to UserQuestionAttempt.Mode for TestAttempt:{test_attempt.id}. Falling back to 'TEST'."
+        )
+        mode = UserQuestionAttempt.Mode.TEST  # Fallback to a sensible default
+    return mode
+
+
+def _build_answer_feedback(
+    test_attempt: UserTestAttempt, question: Question, is_correct: bool
+) -> Dict[str, Any]:
+    """Builds the immediate feedback for a recorded answer."""
+    # Default feedback hides sensitive info during tests
+    feedback = {
+        "question_id": question.id,
+        "is_correct": is_correct,
+        "correct_answer": None,
+        "explanation": None,
+        "feedback_message": _("Answer recorded."),
+    }
+
+    # Reveal answer/explanation immediately ONLY for 'Traditional' practice mode
+    if test_attempt.attempt_type == UserTestAttempt.AttemptType.TRADITIONAL:
+        feedback["correct_answer"] = question.correct_answer
+        feedback["explanation"] = question.explanation  # Provide full explanation
+        feedback["feedback_message"] = (
+            _("Answer recorded. See feedback below.")
+            if is_correct
+            else _("Answer recorded. The correct answer is shown below.")
+        )
+    return feedback
+
+
 @transaction.atomic
 def record_single_answer(
     test_attempt: UserTestAttempt, question: Question, answer_data: Dict[str, Any]
@@ -390,21 +486,7 @@ def record_single_answer(
             }
         )
 
-    # Determine UserQuestionAttempt.Mode based on the type of test attempt
-    mode_map = {
-        UserTestAttempt.AttemptType.LEVEL_ASSESSMENT: UserQuestionAttempt.Mode.LEVEL_ASSESSMENT,
-        UserTestAttempt.AttemptType.PRACTICE: UserQuestionAttempt.Mode.TEST,
-        UserTestAttempt.AttemptType.SIMULATION: UserQuestionAttempt.Mode.TEST,
-        UserTestAttempt.AttemptType.TRADITIONAL: UserQuestionAttempt.Mode.TRADITIONAL,
-        # Add mappings for any future test types
-    }
-    mode = mode_map.get(test_attempt.attempt_type)
-    if not mode:
-        # This indicates a configuration mismatch
-        logger.error(
-            f"Cannot map UserTestAttempt type '{test_attempt.attempt_type}' to UserQuestionAttempt.Mode for TestAttempt:{test_attempt.id}. Falling back to 'TEST'."
-        )
-        mode = UserQuestionAttempt.Mode.TEST  # Fallback to a sensible default
+    mode = _get_question_attempt_mode(test_attempt)
 
     # Create or update the specific question attempt record within this test attempt
     # update_or_create handles cases where a user might change their answer before submitting the test
@@ -430,31 +512,190 @@ def record_single_answer(
     )
 
     # Update user's proficiency for the skill related to this question
-    update_user_skill_proficiency(
-        user=user, skill=question.skill, is_correct=is_correct
+    # (buffered mode defers this to attempt completion)
+    if not SKILL_PROFICIENCY_BUFFERED_UPDATES:
+        update_user_skill_proficiency(
+            user=user, skill=question.skill, is_correct=is_correct
+        )
+
+    return _build_answer_feedback(test_attempt, question, is_correct)
+
+
+@transaction.atomic
+def record_answers_bulk(
+    test_attempt: UserTestAttempt, answers: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Records several answers for an ongoing test attempt in one go (offline clients,
+    simulation mode submitting everything at the end).
+
+    Equivalent to calling `record_single_answer` for each answer, but the
+    UserQuestionAttempt rows are written with one `bulk_create` and one
+    `bulk_update`, skill proficiencies get their aggregated deltas in a single
+    UPDATE, and question-solved points are awarded in one batch (bulk_create
+    bypasses the post_save gamification signal).
+
+    Args:
+        test_attempt: The active UserTestAttempt instance.
+        answers: List of dicts with 'question_id' (int), 'selected_answer' and
+                 optionally 'time_taken_seconds'. Each question may appear once.
+
+    Returns:
+        {
+            'results': List[Dict],          # Per-answer feedback, in input order
+            'answered_question_count': int, # Distinct answered questions in the attempt
+        }
+
+    Raises:
+        serializers.ValidationError: If the attempt is not active, or any answer is
+                                     invalid. Nothing is written in that case.
+    """
+    user = test_attempt.user
+    if not user or not user.is_authenticated:
+        raise serializers.ValidationError(
+            _("Authentication required to record an answer.")
+        )
+
+    if test_attempt.status != UserTestAttempt.Status.STARTED:
+        logger.warning(
+            f"Attempt to record bulk answers for non-active test attempt {test_attempt.id} (Status: {test_attempt.status}) by user {user.id}."
+        )
+        raise serializers.ValidationError(
+            {"non_field_errors": [_("This test attempt is not currently active.")]}
+        )
+
+    if not answers:
+        raise serializers.ValidationError(
+            {"answers": [_("At least one answer must be provided.")]}
+        )
+
+    question_ids = [answer["question_id"] for answer in answers]
+    if len(set(question_ids)) != len(question_ids):
+        raise serializers.ValidationError(
+            {"answers": [_("Each question can only be answered once per request.")]}
+        )
+
+    allowed_ids = set(test_attempt.question_ids or [])
+    foreign_ids = [qid for qid in question_ids if qid not in allowed_ids]
+    if foreign_ids:
+        logger.error(
+            f"User {user.id} attempted to bulk-answer Qs:{foreign_ids} which are NOT in the question list for TestAttempt:{test_attempt.id}."
+        )
+        raise serializers.ValidationError(
+            {
+                "question_id": [
+                    _("Questions {ids} are not part of the current test attempt.").format(
+                        ids=foreign_ids
+                    )
+                ]
+            }
+        )
+
+    questions = Question.objects.filter(pk__in=question_ids, is_active=True).only(
+        "id", "correct_answer", "explanation", "skill_id"
     )
+    questions_by_id = {question.id: question for question in questions}
+    missing_ids = [qid for qid in question_ids if qid not in questions_by_id]
+    if missing_ids:
+        raise serializers.ValidationError(
+            {
+                "question_id": [
+                    _("Questions {ids} do not exist or are inactive.").format(
+                        ids=missing_ids
+                    )
+                ]
+            }
+        )
 
-    # --- Prepare Immediate Feedback ---
-    # Default feedback hides sensitive info during tests
-    feedback = {
-        "question_id": question.id,
-        "is_correct": is_correct,
-        "correct_answer": None,
-        "explanation": None,
-        "feedback_message": _("Answer recorded."),
+    mode = _get_question_attempt_mode(test_attempt)
+    now = timezone.now()
+    existing_attempts = {
+        qa.question_id: qa
+        for qa in UserQuestionAttempt.objects.filter(
+            test_attempt=test_attempt, question_id__in=question_ids
+        )
     }
 
-    # Reveal answer/explanation immediately ONLY for 'Traditional' practice mode
-    if test_attempt.attempt_type == UserTestAttempt.AttemptType.TRADITIONAL:
-        feedback["correct_answer"] = question.correct_answer
-        feedback["explanation"] = question.explanation  # Provide full explanation
-        feedback["feedback_message"] = (
-            _("Answer recorded. See feedback below.")
-            if is_correct
-            else _("Answer recorded. The correct answer is shown below.")
+    to_create: List[UserQuestionAttempt] = []
+    to_update: List[UserQuestionAttempt] = []
+    proficiency_deltas: Dict[int, Dict[str, int]] = {}
+    correct_count_delta = 0  # For badge counters, which bulk writes do not signal
+    statistics_changes = []  # Same for the statistics snapshot
+    results: List[Dict[str, Any]] = []
+
+    for answer in answers:
+        question = questions_by_id[answer["question_id"]]
+        selected_answer = answer["selected_answer"]
+        is_correct = selected_answer == question.correct_answer
+        question_attempt = existing_attempts.get(question.id)
+        if question_attempt is None:
+            question_attempt = UserQuestionAttempt(
+                user=user, test_attempt=test_attempt, question=question
+            )
+            to_create.append(question_attempt)
+        else:
+            to_update.append(question_attempt)
+        correct_count_delta += int(is_correct) - int(bool(question_attempt.is_correct))
+        statistics_changes.append(
+            (
+                question.id,
+                (
+                    None
+                    if question_attempt.pk is None
+                    else (question_attempt.is_correct, question_attempt.time_taken_seconds)
+                ),
+                (is_correct, answer.get("time_taken_seconds")),
+            )
         )
+        question_attempt.selected_answer = selected_answer
+        question_attempt.is_correct = is_correct
+        question_attempt.time_taken_seconds = answer.get("time_taken_seconds")
+        question_attempt.mode = mode
+        question_attempt.attempted_at = now
 
-    return feedback
+        if question.skill_id is not None:
+            delta = proficiency_deltas.setdefault(
+                question.skill_id, {"attempts": 0, "correct": 0}
+            )
+            delta["attempts"] += 1
+            delta["correct"] += int(is_correct)
+
+        results.append(_build_answer_feedback(test_attempt, question, is_correct))
+
+    if to_create:
+        UserQuestionAttempt.objects.bulk_create(to_create)
+    if to_update:
+        UserQuestionAttempt.objects.bulk_update(
+            to_update,
+            ["selected_answer", "is_correct", "time_taken_seconds", "mode", "attempted_at"],
+        )
+    logger.info(
+        f"Bulk recorded {len(to_create)} new and {len(to_update)} updated answers in TestAttempt:{test_attempt.id} by User:{user.id}. Mode: {mode}"
+    )
+
+    if not SKILL_PROFICIENCY_BUFFERED_UPDATES:
+        apply_skill_proficiency_deltas(user, proficiency_deltas)
+    gamification_services.increment_badge_counters(
+        user.id, questions_solved_correctly=correct_count_delta
+    )
+    statistics_services.record_question_attempt_statistics(user.id, statistics_changes)
+
+    # bulk_create skips post_save, so award the per-question points here instead
+    solved_questions = [qa.question for qa in to_create if qa.is_correct]
+    if solved_questions and settings.POINTS_QUESTION_SOLVED_CORRECT > 0:
+        mode_display = dict(UserQuestionAttempt.Mode.choices).get(mode, mode)
+        gamification_services.award_points_bulk(
+            user=user,
+            points_per_object=settings.POINTS_QUESTION_SOLVED_CORRECT,
+            reason_code=PointReason.QUESTION_SOLVED,
+            related_objects=solved_questions,
+            description_fn=lambda question: gettext(
+                "Solved Question #{qid} ({mode})"
+            ).format(qid=question.id, mode=mode_display),
+        )
+
+    answered_count = test_attempt.question_attempts.count()
+    return {"results": results, "answered_question_count": answered_count}
 
 
 # --- AI Performance Analysis Helper ---
@@ -639,6 +880,8 @@ def _generate_ai_performance_analysis(user: User, test_attempt: UserTestAttempt)
         max_tokens=450,  # Slightly increased max_tokens for potentially more detailed analysis
         response_format=None,
         user_id_for_tracking=str(user.id),
+        cache_ttl=AI_ANALYSIS_CACHE_TTL,
+        background=True,  # Only generate_and_store_ai_performance_analysis calls this
     )
 
     if (
@@ -684,6 +927,82 @@ def _generate_ai_performance_analysis(user: User, test_attempt: UserTestAttempt)
     return ai_response_content.strip()
 
 
+def _rule_based_performance_analysis(test_attempt: UserTestAttempt) -> str:
+    """Short score-based analysis returned inline while the AI analysis is generated."""
+    if test_attempt.score_percentage is None:
+        return AI_ANALYSIS_DEFAULT_FALLBACK
+    if test_attempt.score_percentage >= AI_ANALYSIS_HIGH_SCORE_THRESHOLD:
+        return _("Excellent work! You demonstrated strong understanding in this test.")
+    elif test_attempt.score_percentage < AI_ANALYSIS_LOW_SCORE_THRESHOLD:
+        return _(
+            "Good effort! Review your results to identify areas for improvement and keep practicing."
+        )
+    return _(
+        "Well done on completing the test! Check your detailed results for insights."
+    )
+
+
+def _dispatch_ai_performance_analysis(test_attempt_id: int):
+    """Queues the AI analysis task. Marks the analysis FAILED if the broker is unreachable."""
+    from apps.study.tasks import generate_test_performance_analysis_task
+
+    try:
+        generate_test_performance_analysis_task.delay(test_attempt_id)
+    except Exception as e:
+        logger.error(
+            f"Could not queue AI performance analysis for attempt {test_attempt_id}: {e}. "
+            f"Keeping the rule-based analysis."
+        )
+        UserTestAttempt.objects.filter(
+            pk=test_attempt_id, smart_analysis_status=UserTestAttempt.AnalysisStatus.PENDING
+        ).update(smart_analysis_status=UserTestAttempt.AnalysisStatus.FAILED)
+
+
+def generate_and_store_ai_performance_analysis(test_attempt_id: int) -> Optional[str]:
+    """
+    Generates the AI performance analysis for a completed attempt and stores it on
+    the attempt. Runs in a Celery worker; safe to call more than once, only a
+    PENDING analysis is replaced.
+
+    Returns:
+        The stored analysis text, or None if the attempt does not exist.
+    """
+    try:
+        test_attempt = UserTestAttempt.objects.select_related("user").get(
+            pk=test_attempt_id
+        )
+    except UserTestAttempt.DoesNotExist:
+        logger.error(
+            f"AI performance analysis requested for non-existent attempt {test_attempt_id}."
+        )
+        return None
+
+    if test_attempt.smart_analysis_status != UserTestAttempt.AnalysisStatus.PENDING:
+        logger.info(
+            f"Skipping AI performance analysis for attempt {test_attempt_id}: status is '{test_attempt.smart_analysis_status}'."
+        )
+        return test_attempt.smart_analysis
+
+    pending = UserTestAttempt.objects.filter(
+        pk=test_attempt_id, smart_analysis_status=UserTestAttempt.AnalysisStatus.PENDING
+    )
+    try:
+        analysis = _generate_ai_performance_analysis(test_attempt.user, test_attempt)
+    except Exception as e:  # Catch any unexpected error during AI call
+        logger.error(
+            f"Unexpected error generating AI smart analysis for attempt {test_attempt_id}: {e}",
+            exc_info=True,
+        )
+        pending.update(smart_analysis_status=UserTestAttempt.AnalysisStatus.FAILED)
+        return test_attempt.smart_analysis
+
+    pending.update(
+        smart_analysis=str(analysis),
+        smart_analysis_status=UserTestAttempt.AnalysisStatus.COMPLETED,
+    )
+    return str(analysis)
+
+
 @transaction.atomic
 def complete_test_attempt(test_attempt: UserTestAttempt) -> Dict[str, Any]:
     user = test_attempt.user
@@ -704,112 +1023,62 @@ def complete_test_attempt(test_attempt: UserTestAttempt) -> Dict[str, Any]:
             }
         )
 
-    signal_disconnected_successfully = False
-    try:
-        # Temporarily disconnect signal to prevent double processing if calculate_and_save_scores also saves
-        disconnected = post_save.disconnect(
-            receiver=gamify_test_completed_signal_handler,
-            sender=UserTestAttempt,
-            dispatch_uid="gamify_test_completed",
-        )
+    test_attempt.status = UserTestAttempt.Status.COMPLETED
+    test_attempt.end_time = timezone.now()
 
-        if disconnected:
-            signal_disconnected_successfully = True
-            logger.debug(
-                f"Temporarily disconnected 'gamify_on_test_completed' signal (UID: gamify_test_completed) for attempt {test_attempt.id}."
-            )
-        else:
-            logger.warning(
-                f"Failed to disconnect 'gamify_on_test_completed' signal (UID: gamify_test_completed) for attempt {test_attempt.id}. Gamification might run twice if calculate_scores saves."
-            )
+    total_questions = test_attempt.num_questions
 
-        # --- REFACTORED LOGIC STARTS HERE ---
-
-        test_attempt.status = UserTestAttempt.Status.COMPLETED
-        test_attempt.end_time = timezone.now()
-
-        total_questions = test_attempt.num_questions
-
-        # This block is now unified for ALL attempt types, including Traditional.
-        question_attempts_qs = test_attempt.question_attempts.select_related(
-            "question__subsection__section", "question__skill"
-        ).all()
-        answered_count = question_attempts_qs.count()
-        correct_answers_in_test_count = question_attempts_qs.filter(
-            is_correct=True
-        ).count()
-
-        if total_questions > 0 and answered_count < total_questions:
-            logger.warning(
-                f"Test attempt {test_attempt.id} (Type: {test_attempt.get_attempt_type_display()}) completed by user {user.id} with only {answered_count}/{total_questions} questions answered."
-            )
-        elif (
-            total_questions > 0 and answered_count > total_questions
-        ):  # Should not happen
-            logger.error(
-                f"Data inconsistency: Test attempt {test_attempt.id} has {answered_count} answers recorded but expected {total_questions}. Scoring based on recorded answers."
-            )
-
-        # Calculate scores and save them (this will update score_percentage, etc. for all types)
-        try:
-            test_attempt.calculate_and_save_scores(
-                question_attempts_qs=question_attempts_qs
-            )  # This method saves score fields itself
-            logger.info(
-                f"Test attempt {test_attempt.id} (Type: {test_attempt.get_attempt_type_display()}) scores calculated for user {user.id}. Score: {test_attempt.score_percentage}%"
-            )
-        except Exception as e:
-            # Log and set status to ERROR if score calculation is critical
-            logger.exception(
-                f"Error calculating or saving scores for test attempt {test_attempt.id}, user {user.id}: {e}"
-            )
-            test_attempt.status = UserTestAttempt.Status.ERROR
+    # This block is now unified for ALL attempt types, including Traditional.
+    question_attempts_qs = test_attempt.question_attempts.all()
+    answered_count = question_attempts_qs.count()
+    correct_answers_in_test_count = question_attempts_qs.filter(
+        is_correct=True
+    ).count()
 
-        # Save status and end_time. Score fields were saved by calculate_and_save_scores.
-        # This needs to run AFTER score calculation in case of errors.
-        service_controlled_update_fields = ["status", "end_time", "updated_at"]
-        test_attempt.save(update_fields=service_controlled_update_fields)
-        logger.info(
-            f"Status and end_time saved for test_attempt {test_attempt.id}. Status is now {test_attempt.status.label}."
+    if total_questions > 0 and answered_count < total_questions:
+        logger.warning(
+            f"Test attempt {test_attempt.id} (Type: {test_attempt.get_attempt_type_display()}) completed by user {user.id} with only {answered_count}/{total_questions} questions answered."
+        )
+    elif (
+        total_questions > 0 and answered_count > total_questions
+    ):  # Should not happen
+        logger.error(
+            f"Data inconsistency: Test attempt {test_attempt.id} has {answered_count} answers recorded but expected {total_questions}. Scoring based on recorded answers."
         )
 
-        # --- REFACTORED LOGIC ENDS HERE ---
-
-        # Initialize gamification_results before the try block
-        gamification_results = {
-            "total_points_earned": 0,
-            "badges_won_details": [],
-            "streak_info": {"was_updated": False, "current_days": 0},
-        }
-
+    # Calculate scores and save them (this will update score_percentage, etc. for all types)
+    try:
+        test_attempt.calculate_and_save_scores()  # This method saves score fields itself
         logger.info(
-            f"Before calling gamification service directly for test {test_attempt.id}, completion_points_awarded is: {test_attempt.completion_points_awarded}"
+            f"Test attempt {test_attempt.id} (Type: {test_attempt.get_attempt_type_display()}) scores calculated for user {user.id}. Score: {test_attempt.score_percentage}%"
+        )
+    except Exception as e:
+        # Log and set status to ERROR if score calculation is critical
+        logger.exception(
+            f"Error calculating or saving scores for test attempt {test_attempt.id}, user {user.id}: {e}"
         )
+        test_attempt.status = UserTestAttempt.Status.ERROR
 
-        # Perform gamification processing *after* scores are saved and status is COMPLETED.
-        try:
-            gamification_results = process_test_completion_gamification(
-                user, test_attempt
-            )
-        except Exception as e:
-            logger.exception(
-                f"Error processing gamification for test_attempt {test_attempt.id}: {e}"
-            )
+    # Save status and end_time. Score fields were saved by calculate_and_save_scores.
+    # This needs to run AFTER score calculation in case of errors.
+    service_controlled_update_fields = ["status", "end_time", "updated_at"]
+    test_attempt.save(update_fields=service_controlled_update_fields)
+    logger.info(
+        f"Status and end_time saved for test_attempt {test_attempt.id}. Status is now {test_attempt.status.label}."
+    )
 
-    finally:
-        # Reconnect the signal regardless of success/failure within the try block
-        if signal_disconnected_successfully:
-            post_save.connect(
-                gamify_test_completed_signal_handler,
-                sender=UserTestAttempt,
-                dispatch_uid="gamify_test_completed",
-            )
-            logger.debug(
-                f"Reconnected 'gamify_on_test_completed' signal (UID: gamify_test_completed) for attempt {test_attempt.id}."
-            )
+    if SKILL_PROFICIENCY_BUFFERED_UPDATES:
+        flush_test_attempt_proficiency(test_attempt)
+
+    # Points, streak and badges are awarded by the gamification outbox worker after
+    # commit; completion does not wait on them. The event is keyed on the attempt,
+    # so the post_save signal having queued it already is harmless.
+    gamification_status = None
+    if test_attempt.status == UserTestAttempt.Status.COMPLETED:
+        gamification_services.enqueue_test_completion_event(test_attempt)
+        gamification_status = GamificationEvent.Status.PENDING
 
-    # Refresh the instance from DB to get any updates from signals or direct saves
-    test_attempt.refresh_from_db()  # Important if gamification service modifies test_attempt
+    test_attempt.refresh_from_db()
 
     # Update user profile for level assessments
     if test_attempt.attempt_type == UserTestAttempt.AttemptType.LEVEL_ASSESSMENT:
@@ -842,35 +1111,19 @@ def complete_test_attempt(test_attempt: UserTestAttempt) -> Dict[str, Any]:
         except Exception as e:
             logger.exception(f"Error updating profile levels for user {user.id}: {e}")
 
-    # --- Generate Smart Analysis (AI or Fallback) ---
+    # --- Smart Analysis (rule-based inline, AI generated asynchronously) ---
     smart_analysis = AI_ANALYSIS_DEFAULT_FALLBACK  # Default fallback
+    analysis_status = UserTestAttempt.AnalysisStatus.NOT_REQUESTED
     # The `smart_analysis` logic can remain different for traditional vs. other types.
-    # Our goal was to fix the score, not the analysis text.
     if test_attempt.attempt_type != UserTestAttempt.AttemptType.TRADITIONAL:
-        # Only generate AI analysis for non-traditional tests that have scores
+        # Only request AI analysis for non-traditional tests that have scores
         if (
             test_attempt.score_percentage is not None
         ):  # Ensure there's a score to analyze
-            try:
-                smart_analysis = _generate_ai_performance_analysis(user, test_attempt)
-            except Exception as e:  # Catch any unexpected error during AI call
-                logger.error(
-                    f"Unexpected error generating AI smart analysis for attempt {test_attempt.id}: {e}",
-                    exc_info=True,
-                )
-                # Fallback to simpler rule-based analysis if AI fails catastrophically
-                if test_attempt.score_percentage >= AI_ANALYSIS_HIGH_SCORE_THRESHOLD:
-                    smart_analysis = _(
-                        "Excellent work! You demonstrated strong understanding in this test."
-                    )
-                elif test_attempt.score_percentage < AI_ANALYSIS_LOW_SCORE_THRESHOLD:
-                    smart_analysis = _(
-                        "Good effort! Review your results to identify areas for improvement and keep practicing."
-                    )
-                else:
-                    smart_analysis = _(
-                        "Well done on completing the test! Check your detailed results for insights."
-                    )
+            # The LLM call is slow; return the rule-based text now and let the
+            # Celery task replace it once the AI analysis is ready.
+            smart_analysis = _rule_based_performance_analysis(test_attempt)
+            analysis_status = UserTestAttempt.AnalysisStatus.PENDING
         else:
             smart_analysis = _(
                 "Test completed. Scores are not available for detailed analysis at this time."
@@ -883,23 +1136,35 @@ def complete_test_attempt(test_attempt: UserTestAttempt) -> Dict[str, Any]:
                 "Practice session ended. You answered {count} questions."
             ).format(count=answered_count)
 
+    # Queryset update: persisting the analysis must not re-trigger post_save handlers
+    UserTestAttempt.objects.filter(pk=test_attempt.pk).update(
+        smart_analysis=str(smart_analysis), smart_analysis_status=analysis_status
+    )
+    test_attempt.smart_analysis = str(smart_analysis)
+    test_attempt.smart_analysis_status = analysis_status
+    if analysis_status == UserTestAttempt.AnalysisStatus.PENDING:
+        transaction.on_commit(
+            lambda: _dispatch_ai_performance_analysis(test_attempt.id)
+        )
+
     score_data = {
         "overall": test_attempt.score_percentage,
         "verbal": test_attempt.score_verbal,
         "quantitative": test_attempt.score_quantitative,
     }
 
-    badges_won_for_response = [
-        {"slug": b["slug"], "name": b["name"], "description": b["description"]}
-        for b in gamification_results.get("badges_won_details", [])
-    ]
-
     points_from_correct_answers_this_test = (
         correct_answers_in_test_count * settings.POINTS_QUESTION_SOLVED_CORRECT
     )
-    points_from_test_completion_event = gamification_results.get(
-        "total_points_earned", 0
+    current_streak_days = (
+        UserProfile.objects.filter(user=user)
+        .values_list("current_streak_days", flat=True)
+        .first()
+        or 0
     )
+    # Not known until the gamification event is processed; the analysis endpoint
+    # reports them as `gamification_result`
+    rewards_pending = gamification_status == GamificationEvent.Status.PENDING
 
     return {
         "attempt_id": test_attempt.id,
@@ -911,17 +1176,15 @@ def complete_test_attempt(test_attempt: UserTestAttempt) -> Dict[str, Any]:
         "total_questions": total_questions,
         "correct_answers_in_test_count": correct_answers_in_test_count,
         "smart_analysis": smart_analysis,
-        "points_from_test_completion_event": points_from_test_completion_event,
+        "smart_analysis_status": analysis_status,
+        "points_from_test_completion_event": None if rewards_pending else 0,
         "points_from_correct_answers_this_test": points_from_correct_answers_this_test,
-        "badges_won": badges_won_for_response,
+        "badges_won": None if rewards_pending else [],
         "streak_info": {
-            "updated": gamification_results.get("streak_info", {}).get(
-                "was_updated", False
-            ),
-            "current_days": gamification_results.get("streak_info", {}).get(
-                "current_days", 0
-            ),
+            "updated": None if rewards_pending else False,
+            "current_days": current_streak_days,
         },
+        "gamification_status": gamification_status,
     }
 
 
@@ -1061,6 +1324,9 @@ def _start_test_attempt_base(
             attempt_type=attempt_type,
             test_configuration=config_snapshot,
             question_ids=selected_question_ids,  # Store the ordered list of selected IDs
+            question_snapshot=UserTestAttempt.build_question_snapshot(
+                selected_question_ids
+            ),
             status=UserTestAttempt.Status.STARTED,
         )
         logger.info(
@@ -1396,6 +1662,9 @@ def retake_test_attempt(
             attempt_type=original_attempt_type,
             test_configuration=new_config_snapshot,
             question_ids=final_question_ids,
+            question_snapshot=UserTestAttempt.build_question_snapshot(
+                final_question_ids
+            ),
             status=UserTestAttempt.Status.STARTED,
         )
         logger.info(
@@ -1503,15 +1772,8 @@ DEFAULT_EMERGENCY_TIPS = [  # Ensure this is defined
 ]
 
 
-def _generate_ai_emergency_tips(
-    user: User,
-    target_skills_data: List[Dict[str, Any]],
-    focus_area_names: List[str],
-    available_time_hours: Optional[float] = None,
-    days_until_test: Optional[int] = None,  # <<<--- ADD NEW PARAMETER
-) -> List[str]:
-    ai_manager = get_ai_manager()
-    # Define fallback tips here, ensuring it's always a list of 2-3 strings
+def _default_emergency_tips() -> List[str]:
+    """A random selection of 2-3 default tips."""
     num_fallback_tips = min(
         len(DEFAULT_EMERGENCY_TIPS),
         (
@@ -1520,17 +1782,51 @@ def _generate_ai_emergency_tips(
             else len(DEFAULT_EMERGENCY_TIPS)
         ),
     )
-    fallback_tips = (
+    return (
         random.sample(DEFAULT_EMERGENCY_TIPS, k=num_fallback_tips)
         if DEFAULT_EMERGENCY_TIPS
         else ["Stay calm and focus!"]
     )
 
+
+def _generate_ai_emergency_tips(
+    user: User,
+    target_skills_data: List[Dict[str, Any]],
+    focus_area_names: List[str],
+    available_time_hours: Optional[float] = None,
+    days_until_test: Optional[int] = None,  # <<<--- ADD NEW PARAMETER
+) -> List[str]:
+    return (
+        _request_ai_emergency_tips(
+            user,
+            target_skills_data,
+            focus_area_names,
+            available_time_hours,
+            days_until_test,
+        )
+        or _default_emergency_tips()
+    )
+
+
+def _request_ai_emergency_tips(
+    user: User,
+    target_skills_data: List[Dict[str, Any]],
+    focus_area_names: List[str],
+    available_time_hours: Optional[float] = None,
+    days_until_test: Optional[int] = None,
+    background: bool = False,
+) -> Optional[List[str]]:
+    """
+    Asks the AI for personalized emergency tips. Returns None if it could not.
+    `background` is passed on to get_chat_completion (True from the Celery task).
+    """
+    ai_manager = get_ai_manager()
+
     if not ai_manager.is_available():
         logger.warning(
             f"AI manager not available for emergency tips (User {user.id}). Reason: {ai_manager.init_error}. Using default tips."
         )
-        return fallback_tips
+        return None
 
     weak_skills_summary_list = [
         f"- {s['name']} ({s.get('reason', 'Needs practice')})"
@@ -1588,13 +1884,15 @@ def _generate_ai_emergency_tips(
         max_tokens=1000,
         response_format={"type": "json_object"},
         user_id_for_tracking=str(user.id),
+        cache_ttl=AI_EMERGENCY_TIPS_CACHE_TTL,
+        background=background,
     )
 
     if error_msg:  # Includes JSON parsing errors
         logger.error(
             f"AI Manager error generating emergency tips for user {user.id}: {error_msg}. Using default tips."
         )
-        return fallback_tips
+        return None
 
     if isinstance(parsed_json_response, dict) and "tips" in parsed_json_response:
         generated_tips = parsed_json_response["tips"]
@@ -1616,7 +1914,7 @@ def _generate_ai_emergency_tips(
             f"AI returned non-dict or 'tips' key missing for user {user.id} emergency tips. Response: {parsed_json_response}. Using default tips."
         )
 
-    return fallback_tips  # Ultimate fallback
+    return None  # Ultimate fallback
 
 
 # --- Emergency Mode Plan Generation ---
@@ -1630,10 +1928,16 @@ def generate_emergency_plan(
     default_question_count: int = EMERGENCY_MODE_DEFAULT_QUESTIONS,
     min_question_count: int = EMERGENCY_MODE_MIN_QUESTIONS,
     estimated_mins_per_q: float = EMERGENCY_MODE_ESTIMATED_MINS_PER_Q,
+    defer_ai_tips: bool = False,
 ) -> Dict[str, Any]:
     """
     Generates a more detailed study plan for Emergency Mode.
 
+    Weak skills and review topics come from the user's cached weakness profile
+    (see `apps.study.services.weakness`), which a background task keeps up to
+    date as answers arrive; proficiency rows are only scanned when the
+    profile has to be built on read (first plan, or a forced rebuild).
+
     Args:
         user: The user requesting the plan.
         available_time_hours: Optional estimated time available for study.
@@ -1644,6 +1948,8 @@ def generate_emergency_plan(
         default_question_count: Default number of questions if time is not specified.
         min_question_count: Minimum questions to recommend, regardless of time.
         estimated_mins_per_q: Estimated minutes per question for time calculation.
+        defer_ai_tips: If True, the plan gets default tips and the AI is not called;
+                       use `schedule_emergency_tips_generation` once the session exists.
 
     Returns:
         A dictionary representing the plan with enhanced details:
@@ -1729,175 +2035,95 @@ def generate_emergency_plan(
     # --- Determine Weak Skills & Focus Areas ---
     target_skills_data: List[Dict[str, Any]] = []
     target_skill_ids: Set[int] = set()
-    subsection_ids_for_review: Set[int] = set()
-    review_topics_data: Dict[str, Dict[str, Any]] = {}
     core_plan_error_tip_added = False
 
     try:
-        # Fetch user's proficiency data for all attempted skills
-        proficiency_qs = UserSkillProficiency.objects.filter(user=user).select_related(
-            "skill__subsection__section",
-            "skill__subsection",
-            "skill",
-        )
+        profile = weakness_services.get_user_weakness_profile(user.id).data
 
-        # Apply focus area filter if provided
         if focus_areas:
-            focus_sections_qs = LearningSection.objects.filter(slug__in=focus_areas)
-            proficiency_qs = proficiency_qs.filter(
-                skill__subsection__section__slug__in=focus_areas
-            )
             plan["focus_area_names"] = list(
-                focus_sections_qs.values_list("name", flat=True)
+                LearningSection.objects.filter(slug__in=focus_areas).values_list(
+                    "name", flat=True
+                )
             )
         else:
             all_user_section_names = list(
-                proficiency_qs.values_list(
-                    "skill__subsection__section__name", flat=True
+                dict.fromkeys(
+                    rollup["section_name"]
+                    for rollup in weakness_services.subsection_rollups(profile)
+                    if rollup["section_name"]
                 )
-                .distinct()
-                .exclude(skill__subsection__section__name__isnull=True)
             )
             plan["focus_area_names"] = (
                 all_user_section_names
                 if all_user_section_names
-                else [_("Verbal"), _("Quantitative")]
+                else [str(_("Verbal")), str(_("Quantitative"))]
             )
 
-        # --- Aggregate proficiency at the subsection level ---
-        for p in proficiency_qs:
-            if not p.skill or not p.skill.subsection:
-                continue
-
-            sub = p.skill.subsection
-            if sub.id not in review_topics_data:
-                review_topics_data[sub.id] = {
-                    "slug": sub.slug,
-                    "name": sub.name,
-                    "description": sub.description,
-                    "total_attempts": 0,
-                    "correct_attempts": 0,
-                    "proficiency_sum": 0.0,
-                    "skill_count": 0,
-                }
-
-            # Aggregate data for calculating average subsection proficiency
-            review_topics_data[sub.id]["total_attempts"] += p.attempts_count
-            review_topics_data[sub.id]["correct_attempts"] += p.correct_count
-            review_topics_data[sub.id]["proficiency_sum"] += p.proficiency_score
-            review_topics_data[sub.id]["skill_count"] += 1
-
-        # --- Calculate final average proficiency for each subsection ---
-        final_review_topics_list = []
-        for sub_id, data in review_topics_data.items():
-            avg_proficiency = (
-                (data["proficiency_sum"] / data["skill_count"])
-                if data["skill_count"] > 0
-                else 0.0
-            )
-            data["current_proficiency"] = round(avg_proficiency, 2)
-            if avg_proficiency < proficiency_threshold:
-                data["reason"] = str(_("Needs improvement"))
-            else:
-                data["reason"] = str(_("Area of strength"))
-
-            # Clean up intermediate calculation fields
-            del data["total_attempts"]
-            del data["correct_attempts"]
-            del data["proficiency_sum"]
-            del data["skill_count"]
-            final_review_topics_list.append(data)
-
-        # Sort topics by proficiency (weakest first)
-        final_review_topics_list.sort(key=lambda x: x["current_proficiency"])
-        plan["quick_review_topics"] = final_review_topics_list[
-            :num_weak_skills
+        # --- Review topics: subsections by average skill proficiency (weakest first) ---
+        plan["quick_review_topics"] = [
+            {
+                "slug": rollup["slug"],
+                "name": rollup["name"],
+                "description": rollup["description"],
+                "current_proficiency": round(rollup["average"], 2),
+                "reason": (
+                    str(_("Needs improvement"))
+                    if rollup["average"] < proficiency_threshold
+                    else str(_("Area of strength"))
+                ),
+            }
+            for rollup in weakness_services.subsection_rollups(profile, focus_areas)[
+                :num_weak_skills
+            ]
         ]  # Show top N weak topics
 
-        # 1. Skills strictly below the threshold
-        weakest_proficiencies = list(
-            proficiency_qs.filter(proficiency_score__lt=proficiency_threshold).order_by(
-                "proficiency_score"
-            )[:num_weak_skills]
-        )
-        for p in weakest_proficiencies:
-            if p.skill and p.skill_id not in target_skill_ids:
-                target_skills_data.append(
-                    {
-                        "slug": p.skill.slug,
-                        "name": p.skill.name,
-                        "reason": str(
-                            _("Low score ({score}%)").format(
-                                score=round(p.proficiency_score * 100)
-                            )
-                        ),
-                        "current_proficiency": round(p.proficiency_score, 2),
-                        "subsection_name": (
-                            p.skill.subsection.name
-                            if p.skill.subsection
-                            else str(_("N/A"))
-                        ),
-                    }
-                )
-                target_skill_ids.add(p.skill_id)
-
-        # 2. If needed, find other attempted skills to reach the target count
-        needed = num_weak_skills - len(target_skills_data)
-        if needed > 0:
-            additional_candidates = list(
-                proficiency_qs.exclude(skill_id__in=target_skill_ids).order_by(
-                    "proficiency_score", "attempts_count"
-                )[:needed]
+        # 1. Attempted skills, weakest first (below the threshold, then the rest)
+        for skill in weakness_services.ranked_skills(profile, focus_areas)[
+            :num_weak_skills
+        ]:
+            reason = (
+                _("Low score ({score}%)")
+                if skill["score"] < proficiency_threshold
+                else _("Area for improvement ({score}%)")
             )
-            for p in additional_candidates:
-                if p.skill and p.skill_id not in target_skill_ids:
-                    target_skills_data.append(
-                        {
-                            "slug": p.skill.slug,
-                            "name": p.skill.name,
-                            "reason": str(
-                                _("Area for improvement ({score}%)").format(
-                                    score=round(p.proficiency_score * 100)
-                                )
-                            ),
-                            "current_proficiency": round(p.proficiency_score, 2),
-                            "subsection_name": (
-                                p.skill.subsection.name
-                                if p.skill.subsection
-                                else str(_("N/A"))
-                            ),
-                        }
-                    )
-                    target_skill_ids.add(p.skill_id)
+            target_skills_data.append(
+                {
+                    "slug": skill["slug"],
+                    "name": skill["name"],
+                    "reason": str(reason.format(score=round(skill["score"] * 100))),
+                    "current_proficiency": round(skill["score"], 2),
+                    "subsection_name": skill["subsection_name"] or str(_("N/A")),
+                }
+            )
+            target_skill_ids.add(skill["id"])
 
-        # 3. If still needed, find unattempted skills
+        # 2. If still needed, find unattempted skills
         needed = num_weak_skills - len(target_skills_data)
         if needed > 0:
-            unattempted_skills_qs = (
-                Skill.objects.filter(is_active=True)
-                .exclude(id__in=target_skill_ids)
-                .select_related("subsection__section", "subsection")
+            unattempted_skills_qs = Skill.objects.filter(is_active=True).exclude(
+                id__in=target_skill_ids
             )
             if focus_areas:
                 unattempted_skills_qs = unattempted_skills_qs.filter(
                     subsection__section__slug__in=focus_areas
                 )
-            unattempted_skills = list(unattempted_skills_qs.order_by("?")[:needed])
-
-            for s in unattempted_skills:
-                if s and s.id not in target_skill_ids:
-                    target_skills_data.append(
-                        {
-                            "slug": s.slug,
-                            "name": s.name,
-                            "reason": str(_("Not attempted yet")),
-                            "current_proficiency": None,
-                            "subsection_name": (
-                                s.subsection.name if s.subsection else str(_("N/A"))
-                            ),
-                        }
-                    )
-                    target_skill_ids.add(s.id)
+            unattempted_skills = list(
+                unattempted_skills_qs.values("id", "slug", "name", "subsection__name")
+            )
+            for s in random.sample(
+                unattempted_skills, min(needed, len(unattempted_skills))
+            ):
+                target_skills_data.append(
+                    {
+                        "slug": s["slug"],
+                        "name": s["name"],
+                        "reason": str(_("Not attempted yet")),
+                        "current_proficiency": None,
+                        "subsection_name": s["subsection__name"] or str(_("N/A")),
+                    }
+                )
+                target_skill_ids.add(s["id"])
 
         plan["target_skills"] = target_skills_data
 
@@ -1917,13 +2143,17 @@ def generate_emergency_plan(
 
     # --- Generate Motivational Tips (AI or Fallback) ---
     try:
-        ai_or_default_tips = _generate_ai_emergency_tips(
-            user=user,
-            target_skills_data=plan.get("target_skills", []),
-            focus_area_names=plan.get("focus_area_names", []),
-            available_time_hours=available_time_hours,
-            days_until_test=days_until_test,  # <<<--- PASS PARAMETER TO AI HELPER
-        )
+        if defer_ai_tips:
+            # Personalized tips replace these once generated in the background
+            ai_or_default_tips = _default_emergency_tips()
+        else:
+            ai_or_default_tips = _generate_ai_emergency_tips(
+                user=user,
+                target_skills_data=plan.get("target_skills", []),
+                focus_area_names=plan.get("focus_area_names", []),
+                available_time_hours=available_time_hours,
+                days_until_test=days_until_test,  # <<<--- PASS PARAMETER TO AI HELPER
+            )
     except Exception as ai_tip_error_call:
         logger.error(
             f"Error calling _generate_ai_emergency_tips for user {user.id}: {ai_tip_error_call}",
@@ -1962,6 +2192,124 @@ def generate_emergency_plan(
     return plan
 
 
+# --- Deferred Emergency Tips ---
+def schedule_emergency_tips_generation(
+    session: EmergencyModeSession, available_time_hours: Optional[float] = None
+):
+    """Queues AI tip generation for a session created with `defer_ai_tips=True`."""
+    session_id = session.id
+    transaction.on_commit(
+        lambda: _dispatch_emergency_tips_generation(session_id, available_time_hours)
+    )
+
+
+def _dispatch_emergency_tips_generation(
+    session_id: int, available_time_hours: Optional[float]
+):
+    from apps.study.tasks import generate_emergency_tips_task
+
+    try:
+        generate_emergency_tips_task.delay(session_id, available_time_hours)
+    except Exception as e:
+        logger.error(
+            f"Could not queue AI emergency tips for session {session_id}: {e}. Keeping the default tips."
+        )
+
+
+def generate_and_store_emergency_tips(
+    session_id: int, available_time_hours: Optional[float] = None
+) -> Optional[List[str]]:
+    """
+    Generates personalized AI tips for an emergency session's plan and stores
+    them in place of the default tips. Runs in a Celery worker.
+
+    Returns:
+        The stored tips, or None if the session does not exist or the AI
+        could not provide tips (the default tips are kept).
+    """
+    session = (
+        EmergencyModeSession.objects.select_related("user").filter(pk=session_id).first()
+    )
+    if session is None or not isinstance(session.suggested_plan, dict):
+        logger.error(f"AI emergency tips requested for invalid session {session_id}.")
+        return None
+
+    plan = session.suggested_plan
+    tips = _request_ai_emergency_tips(
+        user=session.user,
+        target_skills_data=plan.get("target_skills", []),
+        focus_area_names=plan.get("focus_area_names", []),
+        available_time_hours=available_time_hours,
+        days_until_test=session.days_until_test,
+        background=True,
+    )
+    if not tips:
+        return None
+
+    plan["motivational_tips"] = [str(tip) for tip in tips]
+    session.save(update_fields=["suggested_plan", "updated_at"])
+    logger.info(f"Stored {len(tips)} AI emergency tips for session {session_id}.")
+    return plan["motivational_tips"]
+
+
+# --- Emergency Mode Question Set ---
+def sample_emergency_question_ids(user: User, plan: Dict[str, Any]) -> List[int]:
+    """
+    Samples the question set for an emergency session from its plan: the
+    quick review topics (subsections), or the target skills if there are none.
+
+    Returns:
+        The sampled question IDs, in the order they are presented.
+
+    Raises:
+        serializers.ValidationError: If the plan has no target areas or no
+            matching questions exist.
+    """
+    target_subsection_slugs = [
+        topic["slug"] for topic in plan.get("quick_review_topics", [])
+    ]
+    # If for some reason the plan has no review topics, we can fall back to skills
+    # to prevent returning no questions at all.
+    target_skill_slugs = [skill["slug"] for skill in plan.get("target_skills", [])]
+    if not target_subsection_slugs and not target_skill_slugs:
+        raise serializers.ValidationError(
+            _("The study plan does not contain any target areas to fetch questions from.")
+        )
+
+    # The 'not_mastered' flag is set to False to ensure we get questions from the
+    # target areas, even if the user's score is decent but still needs practice.
+    questions = get_filtered_questions(
+        user=user,
+        limit=plan.get("recommended_question_count", 10),
+        subsections=target_subsection_slugs,
+        skills=(
+            target_skill_slugs if not target_subsection_slugs else None
+        ),  # Use skills only as a fallback
+        not_mastered=False,
+        min_required=1,
+    )
+    return list(questions.values_list("id", flat=True))
+
+
+def get_emergency_session_question_ids(session: EmergencyModeSession) -> List[int]:
+    """
+    Returns the session's stored question set. Sessions without one (created
+    before sets were stored, or when sampling failed at start) are sampled
+    now and the result is persisted, so later fetches return the same set.
+    """
+    if session.question_ids:
+        return session.question_ids
+
+    session.question_ids = sample_emergency_question_ids(
+        session.user, session.suggested_plan
+    )
+    session.save(update_fields=["question_ids", "updated_at"])
+    logger.info(
+        f"Stored {len(session.question_ids)} questions for emergency session {session.id}."
+    )
+    return session.question_ids
+
+
 def _generate_ai_emergency_session_feedback(
     user: User,
     session: EmergencyModeSession,
@@ -2010,6 +2358,7 @@ def _generate_ai_emergency_session_feedback(
         max_tokens=300,
         response_format=None,
         user_id_for_tracking=str(user.id),
+        cache_ttl=AI_ANALYSIS_CACHE_TTL,
     )
 
     if (
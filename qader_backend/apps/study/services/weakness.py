@@ -0,0 +1,272 @@
+import logging
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from apps.study.models import UserSkillProficiency, UserWeaknessProfile
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Safety net for changes that bypass the scheduled rebuild (row deletes, skill renames)
+USER_WEAKNESS_PROFILE_MAX_AGE = timedelta(
+    hours=getattr(settings, "USER_WEAKNESS_PROFILE_MAX_AGE_HOURS", 24)
+)
+# Proficiency changes are folded into the profile by one background rebuild per
+# user per this many seconds, however many answers arrive meanwhile
+USER_WEAKNESS_PROFILE_REBUILD_DELAY_SECONDS = getattr(
+    settings, "USER_WEAKNESS_PROFILE_REBUILD_DELAY_SECONDS", 30
+)
+WEAKNESS_PROFILE_REBUILD_CACHE_KEY = "study:weakness_profile:rebuild_queued:{user_id}"
+
+# Skill/subsection fields copied into the profile, so plans need no joins
+_SKILL_METADATA_FIELDS = [
+    "id",
+    "slug",
+    "name",
+    "subsection_id",
+    "subsection__slug",
+    "subsection__name",
+    "subsection__description",
+    "subsection__section__slug",
+    "subsection__section__name",
+]
+
+
+# --- Profile Helpers ---
+def _empty_profile() -> Dict[str, Any]:
+    return {
+        # {skill_id (str): {"attempts", "correct", "slug", "name", "subsection_id"}}
+        "skills": {},
+        # {subsection_id (str): {"slug", "name", "description", "section_slug",
+        #                        "section_name", "skill_count", "proficiency_sum"}}
+        "subsections": {},
+        # Skill IDs weakest first: by score, then number of attempts
+        "ranked_skill_ids": [],
+    }
+
+
+def skill_score(entry: Dict[str, Any]) -> float:
+    return entry["correct"] / entry["attempts"] if entry["attempts"] else 0.0
+
+
+def _add_skill_attempts(
+    profile: Dict[str, Any], metadata: Dict[str, Any], attempts: int, correct: int
+):
+    """Adds attempt counts for one skill and keeps its subsection rollup in step."""
+    skill_key = str(metadata["id"])
+    subsection_key = (
+        str(metadata["subsection_id"]) if metadata["subsection_id"] else None
+    )
+    entry = profile["skills"].get(skill_key)
+    if entry is None:
+        entry = profile["skills"][skill_key] = {
+            "attempts": 0,
+            "correct": 0,
+            "slug": metadata["slug"],
+            "name": metadata["name"],
+            "subsection_id": metadata["subsection_id"],
+        }
+        if subsection_key:
+            subsection = profile["subsections"].setdefault(
+                subsection_key,
+                {
+                    "slug": metadata["subsection__slug"],
+                    "name": metadata["subsection__name"],
+                    "description": metadata["subsection__description"],
+                    "section_slug": metadata["subsection__section__slug"],
+                    "section_name": metadata["subsection__section__name"],
+                    "skill_count": 0,
+                    "proficiency_sum": 0.0,
+                },
+            )
+            subsection["skill_count"] += 1
+
+    previous_score = skill_score(entry)
+    entry["attempts"] += attempts
+    entry["correct"] += correct
+    if subsection_key:
+        profile["subsections"][subsection_key]["proficiency_sum"] += (
+            skill_score(entry) - previous_score
+        )
+
+
+def _rank_skills(profile: Dict[str, Any]):
+    skills = profile["skills"]
+    profile["ranked_skill_ids"] = sorted(
+        (int(skill_id) for skill_id in skills),
+        key=lambda skill_id: (
+            skill_score(skills[str(skill_id)]),
+            skills[str(skill_id)]["attempts"],
+            skill_id,
+        ),
+    )
+
+
+def _build_profile_from_proficiencies(user_id: int) -> Dict[str, Any]:
+    profile = _empty_profile()
+    rows = (
+        UserSkillProficiency.objects.filter(user_id=user_id)
+        .values(
+            "attempts_count",
+            "correct_count",
+            *[f"skill__{field}" for field in _SKILL_METADATA_FIELDS],
+        )
+        .order_by()
+    )
+    for row in rows:
+        metadata = {
+            field: row[f"skill__{field}"] for field in _SKILL_METADATA_FIELDS
+        }
+        _add_skill_attempts(
+            profile, metadata, row["attempts_count"], row["correct_count"]
+        )
+    _rank_skills(profile)
+    return profile
+
+
+# --- Profile Maintenance ---
+def rebuild_user_weakness_profile(user_id: int) -> UserWeaknessProfile:
+    """Recomputes the user's weakness profile from their skill proficiencies."""
+    with transaction.atomic():
+        profile, _created = UserWeaknessProfile.objects.select_for_update().get_or_create(
+            user_id=user_id
+        )
+        profile.data = _build_profile_from_proficiencies(user_id)
+        profile.is_stale = False
+        profile.rebuilt_at = timezone.now()
+        profile.save()
+    logger.info(f"Rebuilt weakness profile for user {user_id}.")
+    return profile
+
+
+def get_user_weakness_profile(user_id: int) -> UserWeaknessProfile:
+    """
+    Returns the user's weakness profile, rebuilding it first if it does not
+    exist yet, was marked stale, or is older than USER_WEAKNESS_PROFILE_MAX_AGE.
+    Recent answers are reflected once their scheduled rebuild has run, i.e.
+    within about USER_WEAKNESS_PROFILE_REBUILD_DELAY_SECONDS.
+    """
+    profile = UserWeaknessProfile.objects.filter(user_id=user_id).first()
+    if (
+        profile is None
+        or profile.is_stale
+        or profile.rebuilt_at < timezone.now() - USER_WEAKNESS_PROFILE_MAX_AGE
+    ):
+        profile = rebuild_user_weakness_profile(user_id)
+    return profile
+
+
+def mark_user_weakness_profile_stale(user_id: int):
+    """Forces a rebuild on the next read, for changes that could not be scheduled."""
+    UserWeaknessProfile.objects.filter(user_id=user_id, is_stale=False).update(
+        is_stale=True
+    )
+
+
+def schedule_user_weakness_profile_rebuild(user_id: int):
+    """
+    Called whenever the user's skill proficiencies change. Once the current
+    transaction commits, queues a rebuild of their profile, unless one is
+    already queued or the user has no profile yet (it is built on first read):
+    answering questions never locks or rewrites the profile, and a burst of
+    answers costs a single rebuild off the request path.
+    """
+    transaction.on_commit(lambda: _dispatch_profile_rebuild(user_id))
+
+
+def _dispatch_profile_rebuild(user_id: int):
+    from apps.study.tasks import rebuild_user_weakness_profile_task
+
+    cache_key = WEAKNESS_PROFILE_REBUILD_CACHE_KEY.format(user_id=user_id)
+    if not UserWeaknessProfile.objects.filter(user_id=user_id).exists():
+        return
+    if not cache.add(
+        cache_key, True, timeout=USER_WEAKNESS_PROFILE_REBUILD_DELAY_SECONDS * 2
+    ):
+        return  # Already queued; that rebuild reads the rows just committed
+    try:
+        rebuild_user_weakness_profile_task.apply_async(
+            (user_id,), countdown=USER_WEAKNESS_PROFILE_REBUILD_DELAY_SECONDS
+        )
+    except Exception as e:
+        logger.error(
+            f"Could not queue weakness profile rebuild for user {user_id}; marking it stale: {e}"
+        )
+        cache.delete(cache_key)
+        mark_user_weakness_profile_stale(user_id)
+
+
+def refresh_user_weakness_profile(user_id: int) -> bool:
+    """
+    Runs a queued rebuild. Users without a profile are skipped: it is built
+    on first read. Returns whether the profile was rebuilt.
+    """
+    # Cleared before reading the proficiencies, so any answer committed from
+    # now on queues a new rebuild instead of being missed by this one
+    cache.delete(WEAKNESS_PROFILE_REBUILD_CACHE_KEY.format(user_id=user_id))
+    if not UserWeaknessProfile.objects.filter(user_id=user_id).exists():
+        return False
+    rebuild_user_weakness_profile(user_id)
+    return True
+
+
+# --- Profile Queries (in memory) ---
+def _in_sections(
+    profile: Dict[str, Any],
+    subsection_id: Optional[int],
+    section_slugs: Optional[Iterable[str]],
+) -> bool:
+    if not section_slugs:
+        return True
+    subsection = profile["subsections"].get(str(subsection_id))
+    return subsection is not None and subsection["section_slug"] in section_slugs
+
+
+def ranked_skills(
+    profile: Dict[str, Any], section_slugs: Optional[Iterable[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Attempted skills weakest first, optionally limited to some sections. Each
+    item is the profile entry plus "id", "score" and "subsection_name".
+    """
+    skills = []
+    for skill_id in profile["ranked_skill_ids"]:
+        entry = profile["skills"][str(skill_id)]
+        if not _in_sections(profile, entry["subsection_id"], section_slugs):
+            continue
+        subsection = profile["subsections"].get(str(entry["subsection_id"]))
+        skills.append(
+            {
+                **entry,
+                "id": skill_id,
+                "score": skill_score(entry),
+                "subsection_name": subsection["name"] if subsection else None,
+            }
+        )
+    return skills
+
+
+def subsection_rollups(
+    profile: Dict[str, Any], section_slugs: Optional[Iterable[str]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Subsections with attempted skills, weakest first by the average score of
+    those skills, optionally limited to some sections.
+    """
+    rollups = []
+    for subsection_id, subsection in profile["subsections"].items():
+        if section_slugs and subsection["section_slug"] not in section_slugs:
+            continue
+        average = (
+            subsection["proficiency_sum"] / subsection["skill_count"]
+            if subsection["skill_count"]
+            else 0.0
+        )
+        rollups.append({**subsection, "id": int(subsection_id), "average": average})
+    rollups.sort(key=lambda rollup: rollup["average"])
+    return rollups
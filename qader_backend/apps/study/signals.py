@@ -0,0 +1,69 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+import logging
+
+from apps.api.tracking import UNSET, saved_change, track_loaded_values
+from .models import UserQuestionAttempt, UserTestAttempt
+from .services.statistics import (
+    mark_user_statistics_stale,
+    record_question_attempt_statistics,
+    record_test_completion_statistics,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# --- Statistics Snapshot ---
+# post_save applies only the difference a save made to the snapshot; the values
+# loaded before it come from the shared tracker (see `apps.api.tracking`).
+_ANSWER_FIELDS = ["is_correct", "time_taken_seconds"]
+
+track_loaded_values(UserQuestionAttempt, _ANSWER_FIELDS)
+track_loaded_values(UserTestAttempt, ["status"])
+
+
+@receiver(post_save, sender=UserQuestionAttempt, dispatch_uid="stats_question_attempt_saved")
+def update_statistics_on_answer(sender, instance, created, **kwargs):
+    changes = [saved_change(instance, field, created) for field in _ANSWER_FIELDS]
+    before = None if created else tuple(was for was, _ in changes)
+    after = tuple(now for _, now in changes)
+    if UNSET in after or (before is not None and UNSET in before):
+        mark_user_statistics_stale(instance.user_id)
+    else:
+        record_question_attempt_statistics(
+            instance.user_id, [(instance.question_id, before, after)]
+        )
+
+
+@receiver(post_delete, sender=UserQuestionAttempt, dispatch_uid="stats_question_attempt_deleted")
+def update_statistics_on_answer_delete(sender, instance, **kwargs):
+    record_question_attempt_statistics(
+        instance.user_id,
+        [
+            (
+                instance.question_id,
+                (instance.is_correct, instance.time_taken_seconds),
+                None,
+            )
+        ],
+    )
+
+
+@receiver(post_save, sender=UserTestAttempt, dispatch_uid="stats_test_attempt_saved")
+def update_statistics_on_test_completion(sender, instance, created, **kwargs):
+    # Saves that do not write the status (e.g. score fields saved before the
+    # status) see no change, so the real transition is still seen later.
+    previous_status, status = saved_change(instance, "status", created)
+    if UNSET not in (previous_status, status):
+        is_completed = status == UserTestAttempt.Status.COMPLETED
+        was_completed = previous_status == UserTestAttempt.Status.COMPLETED
+        if is_completed and not was_completed:
+            record_test_completion_statistics(instance)
+        elif was_completed and not is_completed:
+            mark_user_statistics_stale(instance.user_id)
+
+
+@receiver(post_delete, sender=UserTestAttempt, dispatch_uid="stats_test_attempt_deleted")
+def update_statistics_on_test_delete(sender, instance, **kwargs):
+    if instance.status == UserTestAttempt.Status.COMPLETED:
+        mark_user_statistics_stale(instance.user_id)
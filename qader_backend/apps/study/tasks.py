@@ -0,0 +1,52 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="generate_test_performance_analysis_task")
+def generate_test_performance_analysis_task(test_attempt_id: int):
+    """
+    Generates the AI performance analysis for a completed test attempt off the
+    request thread and stores it on the attempt.
+    """
+    from apps.study.services.study import (
+        generate_and_store_ai_performance_analysis,
+    )  # Import here to avoid circular dependency
+
+    logger.info(f"Generating AI performance analysis for attempt {test_attempt_id}.")
+    analysis = generate_and_store_ai_performance_analysis(test_attempt_id)
+    return f"AI performance analysis for attempt {test_attempt_id}: {'stored' if analysis else 'skipped'}."
+
+
+@shared_task(name="refresh_conversation_summary_task")
+def refresh_conversation_summary_task(session_id: int):
+    """Folds older conversation messages into the session's running AI context summary."""
+    from apps.study.services.conversation_context import (
+        refresh_conversation_summary,
+    )  # Import here to avoid circular dependency
+
+    updated = refresh_conversation_summary(session_id)
+    return f"Conversation summary for session {session_id}: {'updated' if updated else 'unchanged'}."
+
+
+@shared_task(name="generate_emergency_tips_task")
+def generate_emergency_tips_task(session_id: int, available_time_hours=None):
+    """Replaces an emergency session's default tips with personalized AI tips."""
+    from apps.study.services.study import (
+        generate_and_store_emergency_tips,
+    )  # Import here to avoid circular dependency
+
+    tips = generate_and_store_emergency_tips(session_id, available_time_hours)
+    return f"AI emergency tips for session {session_id}: {'stored' if tips else 'skipped'}."
+
+
+@shared_task(name="rebuild_user_weakness_profile_task")
+def rebuild_user_weakness_profile_task(user_id: int):
+    """Folds the user's recent skill proficiency changes into their weakness profile."""
+    from apps.study.services.weakness import (
+        refresh_user_weakness_profile,
+    )  # Import here to avoid circular dependency
+
+    rebuilt = refresh_user_weakness_profile(user_id)
+    return f"Weakness profile for user {user_id}: {'rebuilt' if rebuilt else 'skipped'}."
@@ -278,8 +278,7 @@ def create_attempt_scenario(
         created_attempts.append(qa)
 
     if attempt.status == UserTestAttempt.Status.COMPLETED and created_attempts:
-        attempt_qs = UserQuestionAttempt.objects.filter(test_attempt=attempt)
-        attempt.calculate_and_save_scores(attempt_qs)
+        attempt.calculate_and_save_scores()
         if not attempt.end_time:
             attempt.end_time = timezone.now()
             attempt.save(update_fields=["end_time"])
@@ -1,13 +1,17 @@
 # qader_backend/apps/study/tests/test_api_attempts.py
 import random
 import pytest
+from django.conf import settings
 from django.urls import reverse
 from rest_framework import status
 from apps.study.models import UserTestAttempt, UserQuestionAttempt, UserSkillProficiency
 from apps.learning.models import Question, UserStarredQuestion, Skill
 from apps.users.models import UserProfile
+from apps.gamification.models import GamificationEvent, PointLog, PointReason
 from unittest.mock import patch
 
+from apps.study.api.views.attempts import UserTestAttemptReviewView
+
 from apps.study.tests.factories import (
     UserTestAttemptFactory,
     UserQuestionAttemptFactory,
@@ -379,6 +383,128 @@ class TestAttemptAnswerAPI:
         assert res_data["explanation"] == question_to_answer.explanation
 
 
+class TestAttemptBulkAnswerAPI:
+    @pytest.fixture
+    def bulk_url(self, started_practice_attempt):
+        attempt, _ = started_practice_attempt
+        return reverse(
+            "api:v1:study:attempt-answer-bulk", kwargs={"attempt_id": attempt.id}
+        )
+
+    @staticmethod
+    def _wrong_answer(question):
+        return next(c for c in "ABCD" if c != question.correct_answer)
+
+    def test_bulk_answer_unauthenticated(self, api_client, bulk_url):
+        response = api_client.post(bulk_url, {"answers": []}, format="json")
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_bulk_answer_success(
+        self, subscribed_client, started_practice_attempt, bulk_url
+    ):
+        attempt, questions = started_practice_attempt
+        user = subscribed_client.user
+        points_before = UserProfile.objects.get(user=user).points
+        answers = [
+            {"question_id": q.id, "selected_answer": q.correct_answer}
+            for q in questions[:3]
+        ] + [
+            {"question_id": q.id, "selected_answer": self._wrong_answer(q)}
+            for q in questions[3:]
+        ]
+
+        response = subscribed_client.post(bulk_url, {"answers": answers}, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["answered_question_count"] == len(questions)
+        assert [r["question_id"] for r in response.data["results"]] == [
+            a["question_id"] for a in answers
+        ]
+        assert [r["is_correct"] for r in response.data["results"]] == [True] * 3 + [
+            False
+        ] * (len(questions) - 3)
+        assert all(r["correct_answer"] is None for r in response.data["results"])
+        assert (
+            UserQuestionAttempt.objects.filter(
+                test_attempt=attempt, is_correct=True
+            ).count()
+            == 3
+        )
+
+        # Proficiency counters match what per-answer updates would have produced
+        for skill_id in {q.skill_id for q in questions if q.skill_id}:
+            skill_questions = [q for q in questions if q.skill_id == skill_id]
+            proficiency = UserSkillProficiency.objects.get(user=user, skill_id=skill_id)
+            expected_correct = sum(1 for q in skill_questions if q in questions[:3])
+            assert proficiency.attempts_count == len(skill_questions)
+            assert proficiency.correct_count == expected_correct
+            assert proficiency.proficiency_score == pytest.approx(
+                expected_correct / len(skill_questions)
+            )
+
+        # Question-solved points are awarded even though post_save is bypassed
+        points_after = UserProfile.objects.get(user=user).points
+        assert points_after - points_before == 3 * getattr(
+            settings, "POINTS_QUESTION_SOLVED_CORRECT", 1
+        )
+
+    def test_bulk_answer_overwrites_existing_answer(
+        self, subscribed_client, started_practice_attempt, bulk_url
+    ):
+        attempt, questions = started_practice_attempt
+        question = questions[0]
+        UserQuestionAttemptFactory(
+            user=attempt.user,
+            test_attempt=attempt,
+            question=question,
+            selected_answer=self._wrong_answer(question),
+            is_correct=False,
+        )
+        payload = {
+            "answers": [
+                {"question_id": question.id, "selected_answer": question.correct_answer}
+            ]
+        }
+
+        response = subscribed_client.post(bulk_url, payload, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        question_attempt = UserQuestionAttempt.objects.get(
+            test_attempt=attempt, question=question
+        )
+        assert question_attempt.is_correct is True
+        assert question_attempt.selected_answer == question.correct_answer
+
+    def test_bulk_answer_rejects_whole_batch_on_invalid_question(
+        self, subscribed_client, started_practice_attempt, bulk_url
+    ):
+        attempt, questions = started_practice_attempt
+        other_question = QuestionFactory()
+        payload = {
+            "answers": [
+                {"question_id": questions[0].id, "selected_answer": "A"},
+                {"question_id": other_question.id, "selected_answer": "A"},
+            ]
+        }
+
+        response = subscribed_client.post(bulk_url, payload, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "question_id" in response.data
+        assert not UserQuestionAttempt.objects.filter(test_attempt=attempt).exists()
+
+    def test_bulk_answer_rejects_duplicate_questions(
+        self, subscribed_client, started_practice_attempt, bulk_url
+    ):
+        _, questions = started_practice_attempt
+        payload = {
+            "answers": [
+                {"question_id": questions[0].id, "selected_answer": "A"},
+                {"question_id": questions[0].id, "selected_answer": "B"},
+            ]
+        }
+        response = subscribed_client.post(bulk_url, payload, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "answers" in response.data
+
+
 class TestCompleteAttemptAPI:
     @pytest.fixture
     def complete_url_practice(self, partially_answered_attempt):
@@ -554,6 +680,116 @@ class TestCompleteAttemptAPI:
         assert attempt.results_summary is None or attempt.results_summary == {}
 
 
+class TestAttemptAnalysisAPI:
+    def test_complete_returns_fallback_and_queues_ai_analysis(
+        self,
+        subscribed_client,
+        partially_answered_attempt,
+        django_capture_on_commit_callbacks,
+    ):
+        attempt, _ = partially_answered_attempt
+        url = reverse("api:v1:study:attempt-complete", kwargs={"attempt_id": attempt.id})
+
+        with patch(
+            "apps.study.tasks.generate_test_performance_analysis_task.delay"
+        ) as mock_delay, patch(
+            "apps.study.services.study._generate_ai_performance_analysis"
+        ) as mock_ai:
+            with django_capture_on_commit_callbacks(execute=True):
+                response = subscribed_client.post(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["smart_analysis_status"] == "pending"
+        assert response.data["smart_analysis"]
+        mock_ai.assert_not_called()  # No LLM call on the request thread
+        mock_delay.assert_called_once_with(attempt.id)
+        attempt.refresh_from_db()
+        assert attempt.smart_analysis == response.data["smart_analysis"]
+        assert attempt.smart_analysis_status == UserTestAttempt.AnalysisStatus.PENDING
+
+    def test_task_stores_ai_analysis_and_poll_endpoint_returns_it(
+        self, subscribed_client, completed_practice_attempt
+    ):
+        from apps.study.tasks import generate_test_performance_analysis_task
+
+        attempt, _ = completed_practice_attempt
+        UserTestAttempt.objects.filter(pk=attempt.pk).update(
+            smart_analysis="Fallback",
+            smart_analysis_status=UserTestAttempt.AnalysisStatus.PENDING,
+        )
+        with patch(
+            "apps.study.services.study._generate_ai_performance_analysis",
+            return_value="AI analysis text",
+        ) as mock_ai:
+            generate_test_performance_analysis_task(attempt.id)
+            generate_test_performance_analysis_task(attempt.id)  # Idempotent
+        mock_ai.assert_called_once()
+
+        url = reverse("api:v1:study:attempt-analysis", kwargs={"attempt_id": attempt.id})
+        response = subscribed_client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["attempt_id"] == attempt.id
+        assert response.data["smart_analysis_status"] == "completed"
+        assert response.data["smart_analysis"] == "AI analysis text"
+
+    def test_complete_queues_gamification_and_poll_endpoint_reports_it(
+        self,
+        subscribed_client,
+        partially_answered_attempt,
+        django_capture_on_commit_callbacks,
+    ):
+        from apps.gamification.tasks import process_gamification_event_task
+
+        attempt, _ = partially_answered_attempt
+        url = reverse("api:v1:study:attempt-complete", kwargs={"attempt_id": attempt.id})
+        with patch(
+            "apps.gamification.tasks.process_gamification_event_task.delay"
+        ) as mock_delay, patch(
+            "apps.study.tasks.generate_test_performance_analysis_task.delay"
+        ):
+            with django_capture_on_commit_callbacks(execute=True):
+                response = subscribed_client.post(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["gamification_status"] == "pending"
+        assert response.data["points_from_test_completion_event"] is None
+        assert response.data["badges_won"] is None
+        assert response.data["streak_info"]["updated"] is None
+        event = GamificationEvent.objects.get(test_attempt=attempt)
+        mock_delay.assert_called_once_with(event.id)
+        attempt.refresh_from_db()
+        assert attempt.completion_points_awarded is False
+
+        process_gamification_event_task(event.id)
+        process_gamification_event_task(event.id)  # Idempotent
+        attempt.refresh_from_db()
+        assert attempt.completion_points_awarded is True
+        assert (
+            PointLog.objects.filter(
+                user=attempt.user, reason_code=PointReason.TEST_COMPLETED
+            ).count()
+            == 1
+        )
+
+        poll_url = reverse(
+            "api:v1:study:attempt-analysis", kwargs={"attempt_id": attempt.id}
+        )
+        response = subscribed_client.get(poll_url)
+        assert response.data["gamification_status"] == "processed"
+        assert (
+            response.data["gamification_result"]["total_points_earned"]
+            >= settings.POINTS_TEST_COMPLETED
+        )
+
+    def test_poll_endpoint_not_owner(self, subscribed_client):
+        other_attempt = UserTestAttemptFactory(user=UserFactory())
+        url = reverse(
+            "api:v1:study:attempt-analysis", kwargs={"attempt_id": other_attempt.id}
+        )
+        response = subscribed_client.get(url)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 class TestCancelAttemptAPI:
     @pytest.fixture
     def cancel_url(self, started_practice_attempt):
@@ -617,6 +853,48 @@ class TestReviewAttemptAPI:
         ).count()
         assert len(response.data["questions"]) == incorrect_count_in_db
 
+    def test_review_is_rendered_once_for_both_views(
+        self, subscribed_client, completed_practice_attempt
+    ):
+        attempt, _ = completed_practice_attempt
+        url = reverse("api:v1:study:attempt-review", kwargs={"attempt_id": attempt.id})
+        with patch(
+            "apps.study.api.views.attempts.UserTestAttemptReviewView._render_review",
+            autospec=True,
+            side_effect=UserTestAttemptReviewView._render_review,
+        ) as render:
+            full = subscribed_client.get(url)
+            subscribed_client.get(url)
+            incorrect = subscribed_client.get(url, {"incorrect_only": "true"})
+
+        assert render.call_count == 1
+        incorrect_ids = set(
+            UserQuestionAttempt.objects.filter(
+                test_attempt=attempt, is_correct=False
+            ).values_list("question_id", flat=True)
+        )
+        assert {q["id"] for q in incorrect.data["questions"]} == incorrect_ids
+        assert len(full.data["questions"]) == len(attempt.question_ids)
+
+    def test_review_cache_follows_question_edits_and_stars(
+        self, subscribed_client, completed_practice_attempt
+    ):
+        attempt, _ = completed_practice_attempt
+        url = reverse("api:v1:study:attempt-review", kwargs={"attempt_id": attempt.id})
+        subscribed_client.get(url)
+
+        question = Question.objects.get(pk=attempt.question_ids[0])
+        question.question_text = "Edited question text"
+        question.save()
+        UserStarredQuestion.objects.create(
+            user=subscribed_client.user, question=question
+        )
+
+        response = subscribed_client.get(url)
+        reviewed = {q["id"]: q for q in response.data["questions"]}[question.id]
+        assert reviewed["question_text"] == "Edited question text"
+        assert reviewed["is_starred"] is True
+
 
 class TestRetakeSimilarAPI:
     def test_retake_unauthenticated(self, api_client, completed_practice_attempt):
@@ -0,0 +1,236 @@
+import io
+import json
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIRequest
+from django.urls import reverse
+from rest_framework import status
+
+from apps.study.models import (
+    ConversationMessage,
+    ConversationSession,
+    UserQuestionAttempt,
+)
+from apps.study.services import conversation
+from apps.study.services.ai_manager import AIInteractionManager, AIStreamError
+from apps.study.api.views.conversation import _event_stream_response
+from apps.learning.tests.factories import QuestionFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def read_events(response):
+    """Parses a server-sent events response into (event, data) tuples."""
+    body = b"".join(response.streaming_content).decode("utf-8")
+    events = []
+    for block in filter(None, body.split("\n\n")):
+        event_line, data_line = block.split("\n")
+        events.append(
+            (event_line[len("event: ") :], json.loads(data_line[len("data: ") :]))
+        )
+    return events
+
+
+def chunked(text, size=4):
+    return [text[i : i + size] for i in range(0, len(text), size)]
+
+
+@pytest.fixture
+def streaming_ai():
+    """Makes the AI available and streams the chunks assigned to `.chunks`."""
+    fake = SimpleNamespace(chunks=[])
+    stream = lambda *args, **kwargs: iter(fake.chunks)
+    with patch.object(AIInteractionManager, "is_available", return_value=True):
+        with patch.object(
+            AIInteractionManager, "stream_chat_completion", side_effect=stream
+        ):
+            yield fake
+
+
+def collect(async_events):
+    async def consume():
+        return [item async for item in async_events]
+
+    return async_to_sync(consume)()
+
+
+@pytest.fixture
+def async_streaming_ai():
+    """As `streaming_ai`, for the async client used under ASGI."""
+    fake = SimpleNamespace(chunks=[])
+
+    async def stream(*args, **kwargs):
+        for chunk in fake.chunks:
+            yield chunk
+
+    with patch.object(AIInteractionManager, "is_available", return_value=True):
+        with patch.object(
+            AIInteractionManager, "astream_chat_completion", side_effect=stream
+        ):
+            yield fake
+
+
+@pytest.fixture
+def session(subscribed_user):
+    return ConversationSession.objects.create(user=subscribed_user)
+
+
+def test_send_message_streams_feedback_and_saves_reply(
+    subscribed_client, session, streaming_ai, setup_learning_content
+):
+    question = QuestionFactory(
+        subsection=setup_learning_content["algebra_sub"], correct_answer="B"
+    )
+    session.current_topic_question = question
+    session.save()
+    feedback = 'Correct! "B" is right ✨'
+    streaming_ai.chunks = chunked(
+        json.dumps(
+            {
+                "processed_as_answer": True,
+                "user_choice": "B",
+                "feedback_text": feedback,
+            },
+            ensure_ascii=False,
+        )
+    )
+    url = reverse("api:v1:study:conversation-send-message", kwargs={"pk": session.pk})
+
+    response = subscribed_client.post(f"{url}?stream=true", data={"message_text": "B"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"] == "text/event-stream"
+    events = read_events(response)
+    assert "".join(data["text"] for name, data in events if name == "delta") == feedback
+    assert events[-1][0] == "message"
+    assert events[-1][1]["message_text"] == feedback
+    ai_message = ConversationMessage.objects.get(
+        session=session, sender_type=ConversationMessage.SenderType.AI
+    )
+    assert ai_message.message_text == feedback
+    attempt = UserQuestionAttempt.objects.get(conversation_session=session)
+    assert attempt.selected_answer == "B"
+
+
+def test_send_message_stream_reports_ai_unavailable(subscribed_client, session):
+    url = reverse("api:v1:study:conversation-send-message", kwargs={"pk": session.pk})
+
+    # The stream is lazy: it must be consumed while the patches are active
+    with patch.object(AIInteractionManager, "is_available", return_value=False):
+        with patch.object(
+            AIInteractionManager, "stream_chat_completion"
+        ) as mock_stream:
+            response = subscribed_client.post(
+                f"{url}?stream=true", data={"message_text": "Hello"}
+            )
+            events = read_events(response)
+
+    mock_stream.assert_not_called()
+    assert [name for name, _data in events] == ["error"]
+    assert events[0][1]["status"] == status.HTTP_503_SERVICE_UNAVAILABLE
+    # The user message is kept, no AI message is saved
+    assert list(session.messages.values_list("sender_type", flat=True)) == [
+        ConversationMessage.SenderType.USER
+    ]
+
+
+def test_ask_question_streams_question_then_preface(
+    subscribed_client, session, streaming_ai, setup_learning_content
+):
+    streaming_ai.chunks = ["Let's ", "try ", "this one!"]
+    url = reverse("api:v1:study:conversation-ask-question", kwargs={"pk": session.pk})
+
+    response = subscribed_client.post(f"{url}?stream=true")
+
+    events = read_events(response)
+    assert [name for name, _data in events] == [
+        "question",
+        "delta",
+        "delta",
+        "delta",
+        "message",
+    ]
+    question_id = events[0][1]["id"]
+    assert events[-1][1]["ai_message"] == "Let's try this one!"
+    assert events[-1][1]["question"]["id"] == question_id
+    session.refresh_from_db()
+    assert session.current_topic_question_id == question_id
+    assert session.messages.get().related_question_id == question_id
+
+
+def test_stream_chat_completion_yields_deltas_and_rejects_empty_stream():
+    manager = AIInteractionManager.__new__(AIInteractionManager)
+    manager.init_error = None
+    manager.client = MagicMock()
+
+    def stream_of(*deltas):
+        return [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=d))])
+            for d in deltas
+        ]
+
+    manager.client.chat.completions.create.return_value = stream_of("Hel", None, "lo")
+    assert list(manager.stream_chat_completion("system", [])) == ["Hel", "lo"]
+    assert manager.client.chat.completions.create.call_args.kwargs["stream"] is True
+
+    manager.client.chat.completions.create.return_value = stream_of(None)
+    with pytest.raises(AIStreamError):
+        list(manager.stream_chat_completion("system", []))
+
+
+def test_event_stream_response_serves_async_events_under_asgi():
+    asgi_request = ASGIRequest(
+        {"type": "http", "method": "POST", "path": "/", "headers": []}, io.BytesIO()
+    )
+
+    async def async_events():
+        yield "async"
+
+    response = _event_stream_response(
+        SimpleNamespace(_request=asgi_request), lambda: iter(["sync"]), async_events
+    )
+
+    assert response.is_async
+
+
+def test_async_message_stream_yields_feedback_then_result(
+    session, async_streaming_ai, setup_learning_content
+):
+    question = QuestionFactory(
+        subsection=setup_learning_content["algebra_sub"], correct_answer="B"
+    )
+    async_streaming_ai.chunks = chunked(
+        json.dumps(
+            {"processed_as_answer": True, "user_choice": "B", "feedback_text": "Yes!"}
+        )
+    )
+
+    events = collect(
+        conversation.astream_user_message_with_ai(session, "B", question)
+    )
+
+    assert "".join(text for name, text in events if name == "delta") == "Yes!"
+    assert events[-1] == (
+        "result",
+        {"processed_as_answer": True, "user_choice": "B", "feedback_text": "Yes!"},
+    )
+
+
+def test_async_question_stream_saves_the_preface(
+    session, subscribed_user, async_streaming_ai, setup_learning_content
+):
+    question = QuestionFactory(subsection=setup_learning_content["algebra_sub"])
+    async_streaming_ai.chunks = ["Let's ", "go!"]
+
+    events = collect(
+        conversation.astream_ai_question_message(session, subscribed_user, question)
+    )
+
+    assert [name for name, _payload in events] == ["delta", "delta", "result"]
+    assert events[-1][1]["ai_message"] == "Let's go!"
+    session.refresh_from_db()
+    assert session.current_topic_question_id == question.id
+    assert session.messages.get().message_text == "Let's go!"
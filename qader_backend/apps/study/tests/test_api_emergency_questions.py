@@ -0,0 +1,63 @@
+import pytest
+from django.urls import reverse
+from rest_framework import status
+
+from apps.study.models import EmergencyModeSession
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def session(subscribed_user, setup_learning_content):
+    plan = {
+        "focus_area_names": ["Quantitative"],
+        "estimated_duration_minutes": 30,
+        "target_skills": [],
+        "recommended_question_count": 6,
+        "quick_review_topics": [{"slug": "algebra", "name": "Algebra"}],
+        "motivational_tips": [],
+    }
+    return EmergencyModeSession.objects.create(
+        user=subscribed_user, suggested_plan=plan
+    )
+
+
+def questions_url(session):
+    return reverse(
+        "api:v1:study:emergency-session-questions", kwargs={"session_id": session.id}
+    )
+
+
+def test_question_set_is_sampled_once_and_reused(subscribed_client, session):
+    first = subscribed_client.get(questions_url(session))
+    second = subscribed_client.get(questions_url(session))
+
+    assert first.status_code == status.HTTP_200_OK
+    first_ids = [q["id"] for q in first.data]
+    assert len(first_ids) == 6
+    assert [q["id"] for q in second.data] == first_ids
+    session.refresh_from_db()
+    assert session.question_ids == first_ids
+
+
+def test_invalid_plan_is_rejected(subscribed_client, session):
+    session.suggested_plan["quick_review_topics"] = []
+    session.save()
+
+    response = subscribed_client.get(questions_url(session))
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_questions_can_be_fetched_in_chunks(subscribed_client, session):
+    all_ids = [q["id"] for q in subscribed_client.get(questions_url(session)).data]
+
+    first_chunk = subscribed_client.get(questions_url(session), {"limit": 4})
+    assert first_chunk.data["count"] == 6
+    assert [q["id"] for q in first_chunk.data["results"]] == all_ids[:4]
+    assert first_chunk.data["next"]
+
+    second_chunk = subscribed_client.get(first_chunk.data["next"])
+    assert [q["id"] for q in second_chunk.data["results"]] == all_ids[4:]
+    assert second_chunk.data["next"] is None
+
@@ -10,6 +10,7 @@ from apps.study.models import (
     UserTestAttempt,
     UserQuestionAttempt,
     UserSkillProficiency,
+    UserStatisticsSnapshot,
 )
 from apps.users.models import UserProfile
 from apps.study.tests.factories import (
@@ -19,7 +20,10 @@ from apps.study.tests.factories import (
     create_attempt_scenario,  # Using updated helper
 )
 from apps.learning.models import Skill, LearningSection, LearningSubSection
-from apps.study.api.serializers.statistics import RECENT_TESTS_LIMIT
+from apps.study.api.serializers.statistics import (
+    RECENT_TESTS_LIMIT,
+    UserStatisticsSerializer,
+)
 
 pytestmark = pytest.mark.django_db
 
@@ -61,7 +65,7 @@ class TestUserStatisticsAPI:
             user=user,
             question=factory.Iterator(reading_questions[3:]),
             mode=UserQuestionAttempt.Mode.TRADITIONAL,
-            correct=False,
+            incorrect=True,
         )
 
         algebra_sub = setup_learning_content["algebra_sub"]
@@ -79,7 +83,7 @@ class TestUserStatisticsAPI:
             user=user,
             question=algebra_questions[2],
             mode=UserQuestionAttempt.Mode.TRADITIONAL,
-            correct=False,
+            incorrect=True,
         )
 
         # 3. Create User Skill Proficiency (Remains same)
@@ -371,3 +375,58 @@ class TestUserStatisticsAPI:
         assert (
             response.status_code == status.HTTP_403_FORBIDDEN
         )  # Permission check fails first
+
+    def test_statistics_snapshot_tracks_changes_incrementally(
+        self, subscribed_client, statistics_url, setup_stats_data, rf
+    ):
+        user = setup_stats_data["user"]
+        subscribed_client.get(statistics_url)  # Builds the snapshot
+        rebuilt_at = UserStatisticsSnapshot.objects.get(user=user).rebuilt_at
+
+        # New, changed and deleted answers, plus a newly completed test
+        question = setup_stats_data["algebra_sub"].questions.filter(is_active=True).last()
+        UserQuestionAttemptFactory(
+            user=user, question=question, correct=True, time_taken_seconds=30
+        )
+        changed = UserQuestionAttempt.objects.filter(user=user, is_correct=False).first()
+        changed.is_correct = True
+        changed.time_taken_seconds = 12
+        changed.save()
+        UserQuestionAttempt.objects.filter(user=user).order_by("id").first().delete()
+        attempt, _ = create_attempt_scenario(
+            user=user, num_questions=4, num_answered=4, num_correct_answered=3
+        )
+        attempt.status = UserTestAttempt.Status.COMPLETED
+        attempt.end_time = timezone.now() + timezone.timedelta(minutes=1)
+        attempt.score_percentage = 75.0
+        attempt.save()
+
+        snapshot = UserStatisticsSnapshot.objects.get(user=user)
+        assert not snapshot.is_stale
+        assert snapshot.rebuilt_at == rebuilt_at  # Updated in place, not rebuilt
+
+        response = subscribed_client.get(statistics_url)
+        assert response.status_code == status.HTTP_200_OK
+        request = rf.get(statistics_url)
+        request.user = user
+        live = UserStatisticsSerializer(instance=user, context={"request": request}).data
+
+        for key in [
+            "overall",
+            "performance_by_section",
+            "test_history_summary",
+            "performance_trends_by_test_type",
+            "time_analytics",
+        ]:
+            assert response.data[key] == live[key], key
+        assert response.data["test_history_summary"][0]["attempt_id"] == attempt.id
+        for type_value, averages in live["average_scores_by_test_type"].items():
+            snapshot_averages = response.data["average_scores_by_test_type"][type_value]
+            assert snapshot_averages["test_count"] == averages["test_count"]
+            for field in ["average_score", "average_verbal_score"]:
+                if averages[field] is None:
+                    assert snapshot_averages[field] is None
+                else:
+                    assert snapshot_averages[field] == pytest.approx(
+                        averages[field], abs=0.11
+                    )
@@ -0,0 +1,98 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.learning.models import Question
+from apps.study.models import UserQuestionAttempt, UserTestAttempt
+from apps.study.tests.factories import UserQuestionAttemptFactory, UserTestAttemptFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_scores_and_summary_come_from_one_aggregate(
+    subscribed_user, setup_learning_content
+):
+    reading = list(Question.objects.filter(subsection__slug="reading-comp")[:3])
+    algebra = list(Question.objects.filter(subsection__slug="algebra")[:2])
+    attempt = UserTestAttemptFactory(
+        user=subscribed_user,
+        question_ids=[q.id for q in reading + algebra],
+        score_percentage=None,
+        results_summary=None,
+    )
+    for question, is_correct in [
+        (reading[0], True),
+        (reading[1], False),
+        (algebra[0], True),
+        (algebra[1], True),
+    ]:  # reading[2] left unanswered
+        UserQuestionAttemptFactory(
+            user=subscribed_user,
+            question=question,
+            test_attempt=attempt,
+            is_correct=is_correct,
+            mode=UserQuestionAttempt.Mode.TEST,
+        )
+
+    with CaptureQueriesContext(connection) as queries:
+        attempt.calculate_and_save_scores()
+    selects = [q for q in queries.captured_queries if q["sql"].startswith("SELECT")]
+    assert len(selects) == 1
+
+    attempt = UserTestAttempt.objects.get(pk=attempt.pk)
+    assert attempt.score_percentage == 60.0
+    assert attempt.score_verbal == 33.3
+    assert attempt.score_quantitative == 100.0
+    assert attempt.results_summary == {
+        "algebra": {"correct": 2, "total": 2, "name": "Algebra", "score": 100.0},
+        "reading-comp": {
+            "correct": 1,
+            "total": 3,
+            "name": "Reading Comp",
+            "score": 33.3,
+        },
+    }
+
+
+def test_snapshot_keeps_scoring_and_order_as_taken(
+    subscribed_user, setup_learning_content
+):
+    reading = list(Question.objects.filter(subsection__slug="reading-comp")[:2])
+    algebra = Question.objects.filter(subsection__slug="algebra").first()
+    question_ids = [algebra.id, reading[1].id, reading[0].id]
+    attempt = UserTestAttemptFactory(
+        user=subscribed_user,
+        question_ids=question_ids,
+        question_snapshot=UserTestAttempt.build_question_snapshot(question_ids),
+    )
+    UserQuestionAttemptFactory(
+        user=subscribed_user,
+        question=algebra,
+        test_attempt=attempt,
+        is_correct=True,
+        mode=UserQuestionAttempt.Mode.TEST,
+    )
+    # Moving a question afterwards does not rewrite the attempt's history
+    Question.objects.filter(pk=algebra.pk).update(subsection=reading[0].subsection)
+
+    with CaptureQueriesContext(connection) as queries:
+        attempt.calculate_and_save_scores()
+    selects = [q for q in queries.captured_queries if q["sql"].startswith("SELECT")]
+    assert len(selects) == 1
+    assert "JOIN" not in selects[0]["sql"]
+    assert attempt.score_quantitative == 100.0
+    assert attempt.score_verbal == 0.0
+    assert attempt.results_summary["algebra"]["total"] == 1
+    assert attempt.results_summary["reading-comp"]["total"] == 2
+
+    assert [q.id for q in attempt.get_ordered_questions()] == question_ids
+
+
+def test_scoring_benchmark_runs_and_leaves_no_data(capsys):
+    questions_before = Question.objects.count()
+    call_command("benchmark_scoring", sizes="5,10", repeat=1)
+    output = capsys.readouterr().out
+    assert "5 questions (snapshot)" in output
+    assert "10 questions (no snapshot)" in output
+    assert Question.objects.count() == questions_before
@@ -0,0 +1,175 @@
+import asyncio
+import httpx
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from openai import APIConnectionError, BadRequestError
+
+from apps.study.services import ai_manager as ai_manager_module
+from apps.study.services.ai_limits import (
+    AI_RETRY_ATTEMPTS,
+    CircuitBreaker,
+    ConcurrencyLimiter,
+    UserRateLimiter,
+    ai_circuit_breaker,
+    ai_user_rate_limiter,
+)
+from apps.study.services.ai_manager import (
+    AI_BUSY_MSG,
+    AI_RATE_LIMITED_MSG,
+    AI_UNAVAILABLE_ERROR_MSG,
+    AIInteractionManager,
+)
+
+REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def completion(content):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))]
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_limits():
+    ai_circuit_breaker.reset()
+    ai_user_rate_limiter.reset()
+    yield
+    ai_circuit_breaker.reset()
+    ai_user_rate_limiter.reset()
+
+
+@pytest.fixture
+def manager():
+    manager = AIInteractionManager.__new__(AIInteractionManager)
+    manager.init_error = None
+    manager.client = MagicMock()
+    manager.async_create = AsyncMock()
+    async_client = MagicMock()
+    async_client.chat.completions.create = manager.async_create
+    manager._get_async_client = lambda: async_client
+    return manager
+
+
+def complete(manager, user_id="7", **kwargs):
+    return manager.get_chat_completion(
+        "system",
+        [{"role": "user", "content": "Hi"}],
+        user_id_for_tracking=user_id,
+        **kwargs,
+    )
+
+
+def complete_async(manager, user_id="7"):
+    return asyncio.run(
+        manager.aget_chat_completion(
+            "system", [{"role": "user", "content": "Hi"}], user_id_for_tracking=user_id
+        )
+    )
+
+
+def test_circuit_breaker_opens_and_lets_one_trial_through_after_reset():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert not breaker.allow_request()
+
+    breaker._opened_at -= 31  # Cool-down elapsed
+    assert breaker.allow_request()  # Trial request
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.allow_request() and not breaker.is_open
+
+
+def test_user_rate_limiter_buckets_are_per_user():
+    limiter = UserRateLimiter(rate_per_minute=0, burst=2)
+    assert limiter.try_acquire("1") and limiter.try_acquire("1")
+    assert not limiter.try_acquire("1")
+    assert limiter.try_acquire("2")
+
+
+def test_transient_errors_open_the_circuit_but_client_errors_do_not(manager):
+    create = manager.client.chat.completions.create
+    create.side_effect = BadRequestError(
+        "bad", response=httpx.Response(400, request=REQUEST), body=None
+    )
+    for _ in range(ai_circuit_breaker.failure_threshold):
+        content, error_msg = complete(manager)
+        assert content is None and error_msg
+    assert not ai_circuit_breaker.is_open
+
+    create.side_effect = APIConnectionError(request=REQUEST)
+    for _ in range(ai_circuit_breaker.failure_threshold):
+        complete(manager)
+    assert ai_circuit_breaker.is_open
+
+
+def test_open_circuit_fails_fast_without_calling_openai(manager):
+    for _ in range(ai_circuit_breaker.failure_threshold):
+        ai_circuit_breaker.record_failure()
+
+    assert complete(manager) == (None, str(AI_UNAVAILABLE_ERROR_MSG))
+    assert complete_async(manager) == (None, str(AI_UNAVAILABLE_ERROR_MSG))
+    manager.client.chat.completions.create.assert_not_called()
+    manager.async_create.assert_not_awaited()
+
+
+def test_async_completion_retries_transient_errors_with_backoff(manager):
+    manager.async_create.side_effect = [
+        APIConnectionError(request=REQUEST),
+        completion(" Hello "),
+    ]
+
+    with patch.object(ai_manager_module.asyncio, "sleep", AsyncMock()) as mock_sleep:
+        assert complete_async(manager) == ("Hello", None)
+
+    assert manager.async_create.await_count == 2
+    assert mock_sleep.await_count == 1
+    assert not ai_circuit_breaker.is_open
+
+
+def test_async_completion_gives_up_after_retries_and_skips_client_errors(manager):
+    manager.async_create.side_effect = APIConnectionError(request=REQUEST)
+    with patch.object(ai_manager_module.asyncio, "sleep", AsyncMock()):
+        content, error_msg = complete_async(manager)
+    assert content is None and error_msg
+    assert manager.async_create.await_count == AI_RETRY_ATTEMPTS
+
+    manager.async_create.reset_mock()
+    manager.async_create.side_effect = BadRequestError(
+        "bad", response=httpx.Response(400, request=REQUEST), body=None
+    )
+    content, error_msg = complete_async(manager)
+    assert content is None and error_msg
+    assert manager.async_create.await_count == 1
+
+
+def test_rate_limit_applies_to_user_requests_not_background_work(
+    manager, monkeypatch
+):
+    monkeypatch.setattr(
+        ai_manager_module,
+        "ai_user_rate_limiter",
+        UserRateLimiter(rate_per_minute=0, burst=1),
+    )
+    manager.client.chat.completions.create.return_value = completion("Hi")
+
+    assert complete(manager) == ("Hi", None)
+    assert complete(manager) == (None, str(AI_RATE_LIMITED_MSG))
+    assert complete(manager, background=True) == ("Hi", None)
+
+
+def test_request_paths_fail_fast_when_no_slot_is_free(manager, monkeypatch):
+    limiter = ConcurrencyLimiter(max_concurrent=1, wait_seconds=0.05)
+    monkeypatch.setattr(ai_manager_module, "ai_concurrency_limiter", limiter)
+    manager.client.chat.completions.create.return_value = completion("Hi")
+
+    assert limiter.acquire()  # Another request holds the only slot
+    assert complete(manager) == (None, str(AI_BUSY_MSG))
+    assert complete(manager, background=True) == (None, str(AI_BUSY_MSG))
+    manager.client.chat.completions.create.assert_not_called()
+
+    limiter.release()
+    assert complete(manager, background=True) == ("Hi", None)
@@ -0,0 +1,85 @@
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from django.core.cache import cache
+from openai import OpenAIError
+
+from apps.study.services.ai_manager import AIInteractionManager
+from apps.study.services.ai_response_cache import AIResponseCache, ai_response_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    cache.clear()
+    ai_response_cache.clear_local()
+    yield
+    cache.clear()
+    ai_response_cache.clear_local()
+
+
+@pytest.fixture
+def manager():
+    manager = AIInteractionManager.__new__(AIInteractionManager)
+    manager.init_error = None
+    manager.client = MagicMock()
+    manager.client.chat.completions.create.return_value = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content='{"tips": ["a"]}'))]
+    )
+    return manager
+
+
+def complete(manager, system_prompt, temperature=0.8, **kwargs):
+    return manager.get_chat_completion(
+        system_prompt_content=system_prompt,
+        messages_for_api=[{"role": "user", "content": "Tips please"}],
+        temperature=temperature,
+        response_format={"type": "json_object"},
+        **kwargs,
+    )
+
+
+def test_cached_call_sites_reuse_responses_for_equivalent_prompts(manager):
+    api_call = manager.client.chat.completions.create
+
+    first = complete(manager, "Weak skills: algebra", cache_ttl=60)
+    # Whitespace-only differences and a nearby temperature share the entry
+    second = complete(
+        manager, "Weak skills:\n  algebra ", temperature=0.85, cache_ttl=60
+    )
+
+    assert first == second == ({"tips": ["a"]}, None)
+    assert api_call.call_count == 1
+
+    complete(manager, "Weak skills: algebra", temperature=0.2, cache_ttl=60)
+    complete(manager, "Weak skills: algebra")  # Not opted in
+    assert api_call.call_count == 3
+
+
+def test_errors_are_not_cached(manager):
+    api_call = manager.client.chat.completions.create
+    api_call.side_effect = OpenAIError("boom")
+
+    content, error_msg = complete(manager, "Weak skills: geometry", cache_ttl=60)
+    assert content is None and error_msg
+
+    api_call.side_effect = None
+    content, _error = complete(manager, "Weak skills: geometry", cache_ttl=60)
+    assert content == {"tips": ["a"]}
+    assert api_call.call_count == 2
+
+
+def test_local_tier_evicts_least_recently_used_and_counts_hits():
+    response_cache = AIResponseCache(max_entries=2)
+    response_cache.set("a", "A", 60)
+    response_cache.set("b", "B", 60)
+    assert response_cache.get("a", 60) == "A"
+    response_cache.set("c", "C", 60)
+
+    cache.clear()  # Only the local tier is left
+    assert response_cache.get("b", 60) is None
+    assert response_cache.get("a", 60) == "A"
+    assert response_cache.get("c", 60) == "C"
+
+    stats = response_cache.stats()
+    assert (stats["local_hits"], stats["misses"], stats["local_entries"]) == (3, 1, 2)
@@ -0,0 +1,84 @@
+import pytest
+from unittest.mock import patch
+
+from apps.study.models import ConversationMessage, ConversationSession
+from apps.study.services import conversation_context
+from apps.study.services.ai_manager import AIInteractionManager
+
+pytestmark = pytest.mark.django_db
+
+WINDOW = conversation_context.CONVERSATION_CONTEXT_WINDOW_MESSAGES
+MAX_UNSUMMARIZED = conversation_context.MAX_UNSUMMARIZED_CONTEXT_MESSAGES
+
+
+def add_messages(session, count):
+    return [
+        ConversationMessage.objects.create(
+            session=session,
+            sender_type=(
+                ConversationMessage.SenderType.USER
+                if i % 2 == 0
+                else ConversationMessage.SenderType.AI
+            ),
+            message_text=f"message {i}",
+        )
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def session(subscribed_user):
+    return ConversationSession.objects.create(user=subscribed_user)
+
+
+def test_context_is_summary_plus_bounded_recent_messages(session):
+    messages = add_messages(session, MAX_UNSUMMARIZED + 15)
+    session.context_summary = "Discussed ratios."
+    session.context_summary_message_id = messages[4].id
+    session.save()
+
+    context = conversation_context.build_conversation_context(session)
+
+    assert context[0]["role"] == "system"
+    assert "Discussed ratios." in context[0]["content"]
+    assert len(context) == MAX_UNSUMMARIZED + 1
+    assert context[-1]["content"] == messages[-1].message_text
+
+
+def test_refresh_folds_messages_outside_window_into_summary(session):
+    messages = add_messages(session, MAX_UNSUMMARIZED)
+
+    with patch.object(AIInteractionManager, "is_available", return_value=True):
+        with patch.object(
+            AIInteractionManager,
+            "get_chat_completion",
+            return_value=("New summary", None),
+        ) as mock_completion:
+            assert conversation_context.refresh_conversation_summary(session.id)
+
+    transcript = mock_completion.call_args.kwargs["messages_for_api"][0]["content"]
+    assert "Student: message 0" in transcript
+    assert messages[-WINDOW].message_text not in transcript
+    session.refresh_from_db()
+    assert session.context_summary == "New summary"
+    assert session.context_summary_message_id == messages[-WINDOW - 1].id
+    # Only the window is left unsummarized, so no refresh is due anymore
+    assert not conversation_context.summary_refresh_due(session)
+    assert len(conversation_context.build_conversation_context(session)) == WINDOW + 1
+
+
+def test_schedule_summary_refresh_only_when_due(
+    session, django_capture_on_commit_callbacks
+):
+    add_messages(session, MAX_UNSUMMARIZED - 1)
+    with patch(
+        "apps.study.tasks.refresh_conversation_summary_task.delay"
+    ) as mock_delay:
+        with django_capture_on_commit_callbacks(execute=True):
+            conversation_context.schedule_summary_refresh(session)
+        mock_delay.assert_not_called()
+
+        add_messages(session, 1)
+        with django_capture_on_commit_callbacks(execute=True):
+            conversation_context.schedule_summary_refresh(session)
+        mock_delay.assert_called_once_with(session.id)
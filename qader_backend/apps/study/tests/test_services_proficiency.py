@@ -0,0 +1,96 @@
+import pytest
+from unittest.mock import patch
+
+from apps.study.models import UserSkillProficiency, UserTestAttempt
+from apps.study.services import study as study_services
+from .factories import UserQuestionAttemptFactory, UserTestAttemptFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_update_user_skill_proficiency_upserts_counters(
+    subscribed_user, setup_learning_content
+):
+    skill = setup_learning_content["algebra_skill"]
+
+    study_services.update_user_skill_proficiency(subscribed_user, skill, True)
+    study_services.update_user_skill_proficiency(subscribed_user, skill, False)
+    study_services.update_user_skill_proficiency(subscribed_user, skill, True)
+
+    proficiency = UserSkillProficiency.objects.get(user=subscribed_user, skill=skill)
+    assert proficiency.attempts_count == 3
+    assert proficiency.correct_count == 2
+    assert proficiency.proficiency_score == pytest.approx(2 / 3)
+
+
+def test_record_attempt_refreshes_instance(subscribed_user, setup_learning_content):
+    skill = setup_learning_content["reading_skill"]
+    proficiency = UserSkillProficiency.objects.create(user=subscribed_user, skill=skill)
+
+    proficiency.record_attempt(is_correct=True)
+    proficiency.record_attempt(is_correct=False)
+
+    assert proficiency.attempts_count == 2
+    assert proficiency.correct_count == 1
+    assert proficiency.proficiency_score == pytest.approx(0.5)
+
+
+def test_flush_test_attempt_proficiency_aggregates_final_answers(
+    subscribed_user, setup_learning_content
+):
+    algebra = setup_learning_content["algebra_skill"]
+    reading = setup_learning_content["reading_skill"]
+    algebra_questions = list(algebra.questions.all()[:3])
+    reading_question = reading.questions.first()
+    test_attempt = UserTestAttemptFactory(
+        user=subscribed_user,
+        question_ids=[q.id for q in algebra_questions] + [reading_question.id],
+    )
+    for question, is_correct in zip(algebra_questions, [True, True, False]):
+        UserQuestionAttemptFactory(
+            user=subscribed_user,
+            test_attempt=test_attempt,
+            question=question,
+            is_correct=is_correct,
+        )
+    UserQuestionAttemptFactory(
+        user=subscribed_user,
+        test_attempt=test_attempt,
+        question=reading_question,
+        is_correct=False,
+    )
+
+    assert study_services.flush_test_attempt_proficiency(test_attempt) == 2
+
+    scores = {
+        p.skill_id: (p.attempts_count, p.correct_count)
+        for p in UserSkillProficiency.objects.filter(user=subscribed_user)
+    }
+    assert scores == {algebra.id: (3, 2), reading.id: (1, 0)}
+
+
+def test_buffered_mode_defers_proficiency_until_completion(
+    subscribed_user, setup_learning_content
+):
+    question = setup_learning_content["algebra_skill"].questions.first()
+    test_attempt = UserTestAttemptFactory(
+        user=subscribed_user,
+        attempt_type=UserTestAttempt.AttemptType.PRACTICE,
+        question_ids=[question.id],
+    )
+
+    with patch.object(study_services, "SKILL_PROFICIENCY_BUFFERED_UPDATES", True):
+        study_services.record_single_answer(
+            test_attempt,
+            question,
+            {"selected_answer": question.correct_answer},
+        )
+        assert not UserSkillProficiency.objects.filter(user=subscribed_user).exists()
+
+        study_services.complete_test_attempt(test_attempt)
+
+    proficiency = UserSkillProficiency.objects.get(
+        user=subscribed_user, skill=question.skill
+    )
+    assert proficiency.attempts_count == 1
+    assert proficiency.correct_count == 1
@@ -0,0 +1,57 @@
+import pytest
+
+from apps.study.services.sampling import (
+    ProficiencyVector,
+    weighted_sample,
+)
+from apps.study.services.study import get_filtered_questions
+from .factories import UserSkillProficiencyFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_weighted_sample_returns_distinct_items_and_skips_zero_weight():
+    population = list(range(20))
+    sample = weighted_sample(population, 10, lambda i: 0.0 if i < 5 else 1.0)
+    assert len(sample) == 10
+    assert len(set(sample)) == 10
+    assert all(i >= 5 for i in sample)
+
+
+def test_proficiency_vector_weak_and_not_mastered_skills(
+    subscribed_user, setup_learning_content
+):
+    reading = setup_learning_content["reading_skill"]
+    algebra = setup_learning_content["algebra_skill"]
+    geometry = setup_learning_content["geometry_skill"]
+    UserSkillProficiencyFactory(
+        user=subscribed_user, skill=reading, proficiency_score=0.2
+    )
+    UserSkillProficiencyFactory(
+        user=subscribed_user, skill=algebra, proficiency_score=0.9
+    )
+
+    vector = ProficiencyVector.for_user(subscribed_user)
+    assert vector.weak_skill_ids() == {reading.id}
+    assert vector.not_mastered_skill_ids({reading.id, algebra.id, geometry.id}) == {
+        reading.id,
+        geometry.id,
+    }
+    assert vector.weakness(reading.id) == pytest.approx(0.8)
+    assert vector.weakness(geometry.id) == 1.0
+
+
+def test_get_filtered_questions_not_mastered_excludes_mastered_skills(
+    subscribed_user, setup_learning_content
+):
+    algebra = setup_learning_content["algebra_skill"]
+    UserSkillProficiencyFactory(
+        user=subscribed_user, skill=algebra, proficiency_score=0.95
+    )
+
+    questions = list(
+        get_filtered_questions(subscribed_user, limit=30, not_mastered=True)
+    )
+    assert len(questions) == 30
+    assert all(q.skill_id is not None for q in questions)
+    assert all(q.skill_id != algebra.id for q in questions)
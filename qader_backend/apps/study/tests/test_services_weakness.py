@@ -0,0 +1,144 @@
+import json
+import pytest
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+
+from apps.learning.models import Skill
+from apps.study.models import EmergencyModeSession, UserWeaknessProfile
+from apps.study.services import study as study_services
+from apps.study.services import weakness as weakness_services
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()  # Rebuild debounce keys live in the cache
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def skills(setup_learning_content):
+    return {skill.slug: skill for skill in Skill.objects.all()}
+
+
+def answer(user, skill, correct, wrong):
+    study_services.apply_skill_proficiency_deltas(
+        user, {skill.id: {"attempts": correct + wrong, "correct": correct}}
+    )
+
+
+def test_answers_queue_one_debounced_rebuild_off_the_read_path(
+    subscribed_user, skills, django_capture_on_commit_callbacks
+):
+    answer(subscribed_user, skills["linear-equations"], correct=3, wrong=1)
+    profile = weakness_services.get_user_weakness_profile(subscribed_user.id)
+    assert profile.data["ranked_skill_ids"] == [skills["linear-equations"].id]
+
+    with patch(
+        "apps.study.tasks.rebuild_user_weakness_profile_task.apply_async"
+    ) as mock_apply:
+        with django_capture_on_commit_callbacks(execute=True):
+            answer(subscribed_user, skills["area-calculation"], correct=1, wrong=3)
+        with django_capture_on_commit_callbacks(execute=True):
+            answer(subscribed_user, skills["linear-equations"], correct=0, wrong=4)
+    mock_apply.assert_called_once_with(
+        (subscribed_user.id,),
+        countdown=weakness_services.USER_WEAKNESS_PROFILE_REBUILD_DELAY_SECONDS,
+    )
+
+    with patch.object(
+        weakness_services,
+        "_build_profile_from_proficiencies",
+        wraps=weakness_services._build_profile_from_proficiencies,
+    ) as mock_build:
+        profile = weakness_services.get_user_weakness_profile(subscribed_user.id)
+    mock_build.assert_not_called()  # Reads never rescan while a rebuild is queued
+    assert not profile.is_stale
+
+    assert weakness_services.refresh_user_weakness_profile(subscribed_user.id)
+    profile = weakness_services.get_user_weakness_profile(subscribed_user.id)
+    assert profile.data["ranked_skill_ids"] == [
+        skills["area-calculation"].id,  # 25%
+        skills["linear-equations"].id,  # 37.5%
+    ]
+
+
+def test_answers_queue_no_rebuild_without_a_profile(
+    subscribed_user, skills, django_capture_on_commit_callbacks
+):
+    with patch(
+        "apps.study.tasks.rebuild_user_weakness_profile_task.apply_async"
+    ) as mock_apply:
+        with django_capture_on_commit_callbacks(execute=True):
+            answer(subscribed_user, skills["area-calculation"], correct=1, wrong=3)
+    mock_apply.assert_not_called()
+    assert not weakness_services.refresh_user_weakness_profile(subscribed_user.id)
+
+
+def test_plan_is_built_from_profile_with_deferred_tips(subscribed_user, skills):
+    answer(subscribed_user, skills["main-idea"], correct=4, wrong=0)
+    answer(subscribed_user, skills["area-calculation"], correct=1, wrong=3)
+
+    with patch.object(study_services, "_request_ai_emergency_tips") as mock_ai_tips:
+        plan = study_services.generate_emergency_plan(
+            subscribed_user, num_weak_skills=3, defer_ai_tips=True
+        )
+
+    mock_ai_tips.assert_not_called()
+    json.dumps(plan)  # Stored in a JSONField
+    assert plan["motivational_tips"]
+    assert [skill["slug"] for skill in plan["target_skills"][:2]] == [
+        "area-calculation",
+        "main-idea",
+    ]
+    # Remaining slots are filled with skills the user has not attempted yet
+    assert plan["target_skills"][2]["current_proficiency"] is None
+    assert [topic["slug"] for topic in plan["quick_review_topics"]] == [
+        "geometry",
+        "reading-comp",
+    ]
+    assert sorted(plan["focus_area_names"]) == [
+        "Quantitative Section",
+        "Verbal Section",
+    ]
+
+    quantitative_plan = study_services.generate_emergency_plan(
+        subscribed_user, focus_areas=["quantitative"], defer_ai_tips=True
+    )
+    assert "main-idea" not in [s["slug"] for s in quantitative_plan["target_skills"]]
+
+
+def test_start_queues_ai_tips_and_session_serves_them(
+    subscribed_client, subscribed_user, skills, django_capture_on_commit_callbacks
+):
+    answer(subscribed_user, skills["linear-equations"], 1, 1)
+
+    with patch("apps.study.tasks.generate_emergency_tips_task.delay") as mock_delay:
+        with django_capture_on_commit_callbacks(execute=True):
+            response = subscribed_client.post(
+                reverse("api:v1:study:emergency-start"),
+                {"days_until_test": 3, "available_time_hours": 2},
+                format="json",
+            )
+    assert response.status_code == status.HTTP_201_CREATED
+    session_id = response.data["session_id"]
+    mock_delay.assert_called_once_with(session_id, 2)
+    assert UserWeaknessProfile.objects.filter(user=subscribed_user).exists()
+
+    with patch.object(
+        study_services, "_request_ai_emergency_tips", return_value=["Tip A", "Tip B"]
+    ):
+        study_services.generate_and_store_emergency_tips(session_id, 2)
+
+    session_url = reverse(
+        "api:v1:study:emergency-session-update", kwargs={"session_id": session_id}
+    )
+    detail = subscribed_client.get(session_url)
+    assert detail.status_code == status.HTTP_200_OK
+    assert detail.data["suggested_plan"]["motivational_tips"] == ["Tip A", "Tip B"]
+    assert EmergencyModeSession.objects.get(pk=session_id).question_ids
@@ -8,7 +8,7 @@ from django.utils.translation import gettext_lazy as _
 from datetime import timedelta, date
 
 from apps.notifications.services import create_notification
-from apps.notifications.models import Notification, NotificationTypeChoices
+from apps.notifications.models import NotificationTypeChoices
 from .constants import (
     AccountTypeChoices,
     GenderChoices,
@@ -596,10 +596,12 @@ class UserProfile(models.Model):
     def unread_notifications_count(self) -> int:
         """Returns the count of unread notifications for the user associated with this profile."""
         if hasattr(self, "user") and self.user_id:  # Efficiently check if user is set
+            from apps.notifications.services import (
+                get_unread_count,
+            )  # Import here to avoid circular dependency
+
             # Use user_id directly to avoid fetching the full user object if not already done
-            return Notification.objects.filter(
-                recipient_id=self.user_id, is_read=False
-            ).count()
+            return get_unread_count(self.user_id)
         return 0
 
     def apply_subscription(self, serial_code: SerialCode):  # Added type hint
@@ -0,0 +1,287 @@
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from typing import Iterable, List, Optional, Set
+
+import redis
+import redis.asyncio as aioredis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# --- Constants ---
+# Unset means an in-process store: fine for tests and single-process development only
+PRESENCE_REDIS_URL = getattr(settings, "PRESENCE_REDIS_URL", None)
+# A user counts as present for this long after their last heartbeat
+PRESENCE_TTL_SECONDS = getattr(settings, "PRESENCE_TTL_SECONDS", 60)
+
+ONLINE_KEY = "presence:online"
+CONTEXT_KEY_PREFIX = "presence:context"
+
+
+def chat_context(conversation_id) -> str:
+    return f"chat:{conversation_id}"
+
+
+def challenge_context(challenge_id) -> str:
+    return f"challenge:{challenge_id}"
+
+
+def _context_key(context: Optional[str]) -> str:
+    return f"{CONTEXT_KEY_PREFIX}:{context}" if context else ONLINE_KEY
+
+
+class InMemorySortedSets:
+    """
+    The handful of Redis sorted-set commands presence and matchmaking need,
+    kept in process memory. Used when no Redis URL is configured.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sets = {}
+
+    def zadd(self, name, mapping):
+        with self._lock:
+            self._sets.setdefault(name, {}).update(mapping)
+
+    def zrem(self, name, *members):
+        with self._lock:
+            scores = self._sets.get(name, {})
+            return sum(scores.pop(member, None) is not None for member in members)
+
+    def zremrangebyscore(self, name, min_score, max_score):
+        with self._lock:
+            members = self._sets.get(name, {})
+            removed = [
+                member
+                for member, score in members.items()
+                if min_score <= score <= max_score
+            ]
+            for member in removed:
+                del members[member]
+            return len(removed)
+
+    def zrange(self, name, start, end, withscores=False):
+        with self._lock:
+            items = sorted(
+                ((score, member) for member, score in self._sets.get(name, {}).items())
+            )
+        items = items[start : None if end == -1 else end + 1]
+        if withscores:
+            return [(member, score) for score, member in items]
+        return [member for _score, member in items]
+
+    def zmscore(self, name, members):
+        with self._lock:
+            scores = self._sets.get(name, {})
+            return [scores.get(member) for member in members]
+
+    def zrevrangebyscore(self, name, max_score, min_score, start=None, num=None):
+        with self._lock:
+            items = sorted(
+                (
+                    (score, member)
+                    for member, score in self._sets.get(name, {}).items()
+                    if min_score <= score <= max_score
+                ),
+                reverse=True,
+            )
+        members = [member for _score, member in items]
+        if start is not None and num is not None:
+            members = members[start : start + num]
+        return members
+
+    def expire(self, name, seconds):
+        pass  # Entries are filtered and pruned by score instead
+
+    def clear(self):
+        with self._lock:
+            self._sets.clear()
+
+
+class PresenceService:
+    """
+    Tracks which users are online, globally and per context (a chat
+    conversation, a challenge), from client heartbeats.
+
+    Each key is a Redis sorted set of user IDs scored by their last
+    heartbeat, so "who is online" is one range query and checking many
+    users is one ZMSCORE. Heartbeats prune expired members and refresh the
+    key's expiry, so idle contexts disappear on their own.
+
+    Every operation exists in a sync form (signals, services) and an async
+    form (consumers) that uses redis' native asyncio client instead of a
+    thread hop. Presence is best effort: Redis errors are logged and
+    reported as "nobody present".
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = PRESENCE_REDIS_URL,
+        ttl_seconds: int = PRESENCE_TTL_SECONDS,
+    ):
+        self.redis_url = redis_url
+        self.ttl_seconds = ttl_seconds
+        self._client = None
+        self._memory = None if redis_url else InMemorySortedSets()
+        # redis.asyncio connections belong to the event loop that opened them
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    # --- Clients ---
+    def _get_client(self):
+        if self._memory is not None:
+            return self._memory
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.redis_url, decode_responses=True)
+        return self._client
+
+    def _get_async_client(self):
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            client = aioredis.Redis.from_url(self.redis_url, decode_responses=True)
+            self._async_clients[loop] = client
+        return client
+
+    def _execute(self, commands: List[tuple]) -> list:
+        client = self._get_client()
+        if self._memory is not None:
+            return [getattr(client, name)(*args) for name, *args in commands]
+        pipe = client.pipeline(transaction=False)
+        for name, *args in commands:
+            getattr(pipe, name)(*args)
+        return pipe.execute()
+
+    async def _aexecute(self, commands: List[tuple]) -> list:
+        if self._memory is not None:
+            return self._execute(commands)
+        pipe = self._get_async_client().pipeline(transaction=False)
+        for name, *args in commands:
+            getattr(pipe, name)(*args)
+        return await pipe.execute()
+
+    # --- Commands ---
+    def _heartbeat_commands(self, user_id, contexts: Iterable[str]) -> List[tuple]:
+        now = time.time()
+        member = str(user_id)
+        commands = []
+        for key in [ONLINE_KEY, *(_context_key(context) for context in contexts)]:
+            commands += [
+                ("zadd", key, {member: now}),
+                ("zremrangebyscore", key, float("-inf"), now - self.ttl_seconds),
+                ("expire", key, self.ttl_seconds),
+            ]
+        return commands
+
+    def _leave_commands(self, user_id, context: Optional[str]) -> List[tuple]:
+        return [("zrem", _context_key(context), str(user_id))]
+
+    def _online_commands(
+        self, user_ids: Optional[Iterable], context: Optional[str], limit: Optional[int]
+    ) -> List[tuple]:
+        key = _context_key(context)
+        if user_ids is not None:
+            return [("zmscore", key, [str(user_id) for user_id in user_ids])]
+        min_score = time.time() - self.ttl_seconds
+        if limit is None:
+            return [("zrevrangebyscore", key, float("inf"), min_score)]
+        return [("zrevrangebyscore", key, float("inf"), min_score, 0, limit)]
+
+    def _online_result(
+        self, user_ids: Optional[Iterable], result: list
+    ) -> Set[int]:
+        if user_ids is None:
+            return {int(member) for member in result}
+        min_score = time.time() - self.ttl_seconds
+        return {
+            int(user_id)
+            for user_id, score in zip(user_ids, result)
+            if score is not None and float(score) >= min_score
+        }
+
+    # --- Sync API ---
+    def heartbeat(self, user_id, contexts: Iterable[str] = ()):
+        """Marks the user online, and present in each of `contexts`."""
+        try:
+            self._execute(self._heartbeat_commands(user_id, contexts))
+        except redis.RedisError as e:
+            logger.warning(f"Presence heartbeat failed for user {user_id}: {e}")
+
+    def leave(self, user_id, context: str):
+        """Removes the user from a context right away (they stay online until expiry)."""
+        try:
+            self._execute(self._leave_commands(user_id, context))
+        except redis.RedisError as e:
+            logger.warning(f"Presence leave failed for user {user_id} in {context}: {e}")
+
+    def online_user_ids(
+        self,
+        user_ids: Optional[Iterable] = None,
+        context: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Set[int]:
+        """
+        IDs of users online (or present in `context`). With `user_ids`, only
+        those users are checked, in one round trip; otherwise returns up to
+        `limit` users, most recently seen first.
+        """
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            if not user_ids:
+                return set()
+        try:
+            result = self._execute(self._online_commands(user_ids, context, limit))
+        except redis.RedisError as e:
+            logger.warning(f"Presence lookup failed: {e}")
+            return set()
+        return self._online_result(user_ids, result[0])
+
+    def is_online(self, user_id, context: Optional[str] = None) -> bool:
+        return int(user_id) in self.online_user_ids([user_id], context=context)
+
+    # --- Async API ---
+    async def aheartbeat(self, user_id, contexts: Iterable[str] = ()):
+        try:
+            await self._aexecute(self._heartbeat_commands(user_id, contexts))
+        except redis.RedisError as e:
+            logger.warning(f"Presence heartbeat failed for user {user_id}: {e}")
+
+    async def aleave(self, user_id, context: str):
+        try:
+            await self._aexecute(self._leave_commands(user_id, context))
+        except redis.RedisError as e:
+            logger.warning(f"Presence leave failed for user {user_id} in {context}: {e}")
+
+    async def aonline_user_ids(
+        self,
+        user_ids: Optional[Iterable] = None,
+        context: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Set[int]:
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            if not user_ids:
+                return set()
+        try:
+            result = await self._aexecute(
+                self._online_commands(user_ids, context, limit)
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Presence lookup failed: {e}")
+            return set()
+        return self._online_result(user_ids, result[0])
+
+    async def ais_online(self, user_id, context: Optional[str] = None) -> bool:
+        return int(user_id) in await self.aonline_user_ids([user_id], context=context)
+
+    def clear(self):
+        """Drops all in-process presence data (tests / development only)."""
+        if self._memory is not None:
+            self._memory.clear()
+
+
+# Module-level singleton shared by consumers, signals and services in this process
+presence = PresenceService()
@@ -0,0 +1,63 @@
+import asyncio
+import pytest
+from unittest.mock import patch
+
+from ..presence import PresenceService, chat_context
+
+CHAT = chat_context(1)
+
+
+@pytest.fixture
+def service():
+    return PresenceService(redis_url=None, ttl_seconds=60)
+
+
+def test_heartbeat_marks_user_online_and_present_in_contexts(service):
+    service.heartbeat(1, [CHAT])
+    service.heartbeat(2)
+
+    assert service.online_user_ids() == {1, 2}
+    assert service.online_user_ids([1, 2, 3]) == {1, 2}
+    assert service.online_user_ids(context=CHAT) == {1}
+    assert service.is_online(1, context=CHAT)
+    assert not service.is_online(2, context=CHAT)
+
+
+def test_leave_removes_context_presence_only(service):
+    service.heartbeat(1, [CHAT])
+    service.leave(1, CHAT)
+
+    assert not service.is_online(1, context=CHAT)
+    assert service.is_online(1)
+
+
+def test_presence_expires_without_heartbeats(service):
+    with patch("apps.users.presence.time.time", return_value=1000.0):
+        service.heartbeat(1, [CHAT])
+        service.heartbeat(2)
+    with patch("apps.users.presence.time.time", return_value=1050.0):
+        service.heartbeat(2)
+    with patch("apps.users.presence.time.time", return_value=1070.0):
+        assert service.online_user_ids() == {2}
+        assert service.online_user_ids([1, 2]) == {2}
+        assert not service.is_online(1, context=CHAT)
+
+
+def test_online_user_ids_limit_returns_most_recent(service):
+    for user_id in range(5):
+        with patch("apps.users.presence.time.time", return_value=1000.0 + user_id):
+            service.heartbeat(user_id)
+
+    with patch("apps.users.presence.time.time", return_value=1010.0):
+        assert service.online_user_ids(limit=2) == {3, 4}
+
+
+def test_async_api_matches_sync_api(service):
+    async def scenario():
+        await service.aheartbeat(7, [CHAT])
+        present = await service.ais_online(7, context=CHAT)
+        await service.aleave(7, CHAT)
+        return present, await service.ais_online(7, context=CHAT)
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert service.online_user_ids() == {7}
@@ -25,6 +25,37 @@ def _django_db_setup():
     pass
 
 
+@pytest.fixture(autouse=True)
+def _reset_question_pool_index():
+    """
+    The question pool index lives in process memory, so rows rolled back by a
+    previous test would otherwise survive into the next one.
+    """
+    from apps.learning.services import question_pool_index
+
+    question_pool_index.invalidate()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _reset_presence():
+    """
+    Tests use the in-process presence store, matchmaking queue, challenge
+    live state and unread counters; start each one with nobody online,
+    nobody waiting, no challenge in progress and nothing counted.
+    """
+    from apps.challenges.live_state import challenge_live_state
+    from apps.challenges.matchmaking import matchmaking_queue
+    from apps.notifications.realtime import unread_counter
+    from apps.users.presence import presence
+
+    presence.clear()
+    matchmaking_queue.clear()
+    challenge_live_state.clear()
+    unread_counter.clear()
+    yield
+
+
 @pytest.fixture
 def api_client() -> APIClient:
     """Provides a basic, unauthenticated DRF APIClient instance."""
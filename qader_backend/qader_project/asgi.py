@@ -11,6 +11,9 @@ django.setup()  # Ensure Django settings and apps are loaded
 # Import your WebSocket routing *after* django.setup()
 from apps.challenges.routing import websocket_urlpatterns as challenge_ws_urlpatterns
 from apps.chat.routing import websocket_urlpatterns as chat_ws_urlpatterns
+from apps.notifications.routing import (
+    websocket_urlpatterns as notification_ws_urlpatterns,
+)
 
 # Get the standard Django ASGI app for HTTP requests
 django_asgi_app = get_asgi_application()
@@ -25,6 +28,7 @@ application = ProtocolTypeRouter(
                 URLRouter(
                     challenge_ws_urlpatterns  # Add challenge WebSocket routes
                     + chat_ws_urlpatterns  # Add chat WebSocket routes
+                    + notification_ws_urlpatterns  # Add notification WebSocket routes
                 )
             )
         ),
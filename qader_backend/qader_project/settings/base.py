@@ -1,5 +1,6 @@
 from datetime import timedelta
 from pathlib import Path
+from celery.schedules import crontab
 from decouple import config, Csv
 import dj_database_url
 from django.utils.translation import gettext_lazy as _
@@ -241,17 +242,40 @@ CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 300  # Seconds
 CELERY_TASK_SOFT_TIME_LIMIT = 240  # Seconds
 
-# Optional: Define periodic tasks here or in a separate file
-# CELERY_BEAT_SCHEDULE = {
-#     "send-subscription-expiry-reminders-daily": {
-#         "task": "send_subscription_expiry_reminders",
-#         "schedule": timedelta(days=1),  # Run daily
-#         # 'args': (arg1, arg2), # Optional arguments
-#     },
-# }
+# Periodic tasks
+CELERY_BEAT_SCHEDULE = {
+    # "send-subscription-expiry-reminders-daily": {
+    #     "task": "send_subscription_expiry_reminders",
+    #     "schedule": timedelta(days=1),  # Run daily
+    #     # 'args': (arg1, arg2), # Optional arguments
+    # },
+    "process-pending-gamification-events": {
+        "task": "process_pending_gamification_events_task",
+        "schedule": timedelta(minutes=1),
+    },
+    "expire-stale-matchmaking-challenges": {
+        "task": "expire_stale_matchmaking_challenges_task",
+        "schedule": timedelta(minutes=1),
+    },
+    "flush-pending-challenge-answers": {
+        "task": "flush_pending_challenge_answers_task",
+        "schedule": timedelta(seconds=5),  # Live answers reach the database this late at most
+    },
+    "build-daily-statistics-rollups": {
+        "task": "build_daily_statistics_rollups_task",
+        "schedule": crontab(hour=0, minute=15),  # Nightly, just after the day closes
+    },
+}
 
 CHAT_ACTIVE_USER_TIMEOUT = config("CHAT_ACTIVE_USER_TIMEOUT", default=60, cast=int)
 
+# Online presence for chat and challenges (see apps.users.presence).
+# Unset keeps presence in process memory, which only suits tests and local development.
+PRESENCE_REDIS_URL = config("PRESENCE_REDIS_URL", default=None)
+PRESENCE_TTL_SECONDS = config(
+    "PRESENCE_TTL_SECONDS", default=CHAT_ACTIVE_USER_TIMEOUT, cast=int
+)
+
 # Django REST Framework
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
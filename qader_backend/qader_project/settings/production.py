@@ -161,6 +161,12 @@ CACHES = {
     }
 }
 
+# --- Presence ---
+# Shared by every web and ASGI process, so it must live in Redis in production.
+PRESENCE_REDIS_URL = config(
+    "PRESENCE_REDIS_URL", default=CACHES["default"]["LOCATION"]
+)
+
 # --- Simple JWT Signing Key ---
 # CRITICAL: Use a unique, strong secret for JWT signing, different from SECRET_KEY.
 # Load it from an environment variable.